@@ -32,12 +32,14 @@ if MULTIAGENT_AVAILABLE:
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import sys
 import os
 import io
+import json
+from contextlib import aclosing
 import pandas as pd
 import numpy as np
 from datetime import datetime
@@ -49,6 +51,14 @@ from pathlib import Path
 root_dir = Path(__file__).parent
 sys.path.insert(0, str(root_dir))
 
+from src.services.ingest_job_queue import get_ingest_job_queue, IngestQueueFullError
+from src.data.dtype_optimizer import optimize_dtypes
+from src.llm.rate_limiter import get_rate_limiter_metrics
+from src.llm.resilience import get_resilience_metrics
+from src.llm.response_cache import get_llm_response_cache
+from src.utils.single_flight import get_single_flight_metrics
+from src.settings import DTYPE_OPTIMIZATION_ENABLED, INGEST_JOB_RETRY_AFTER
+
 # Configurar logger antes de tudo
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -184,6 +194,9 @@ class CSVUploadResponse(BaseModel):
     message: str
     analysis_ready: bool
     fraud_detection_available: bool
+    ingest_job_id: Optional[str] = None  # Job de ingestão em background
+    ingest_status: Optional[str] = None  # queued, running, completed...
+    ingest_deduplicated: bool = False  # True se arquivo idêntico já estava na fila/base
 
 # Inicialização do sistema multiagente (LAZY LOADING)
 # Os agentes serão carregados apenas quando necessário
@@ -257,7 +270,7 @@ def analyze_csv_data(df: pd.DataFrame, file_info: dict, message: str) -> str:
                     break
             
             if fraud_col is not None:
-                fraud_count = df[fraud_col].sum() if df[fraud_col].dtype in ['int64', 'float64'] else len(df[df[fraud_col] == 1])
+                fraud_count = df[fraud_col].sum() if pd.api.types.is_numeric_dtype(df[fraud_col]) else len(df[df[fraud_col] == 1])
                 fraud_rate = (fraud_count / len(df)) * 100
                 analysis.append(f"   • Taxa de fraude: {fraud_rate:.2f}% ({fraud_count:,} casos)")
                 analysis.append(f"   • Transações legítimas: {len(df) - fraud_count:,}")
@@ -348,6 +361,10 @@ async def health_check_detailed():
             "orchestrator_loaded": orchestrator is not None,
             "llm_router": LLM_ROUTER_AVAILABLE,
         },
+        "llm_providers": get_resilience_metrics(),
+        "llm_rate_limits": get_rate_limiter_metrics(),
+        "llm_response_cache": get_llm_response_cache().get_stats(),
+        "single_flight": get_single_flight_metrics(),
         "performance": {
             "recommended_timeout_frontend": "120000",  # 120 segundos em ms
             "first_load_time": "60-90s (lazy loading)",
@@ -361,62 +378,75 @@ async def health_check_detailed():
         ]
     }
 
+def _load_orchestrator(required_method: str):
+    """Carrega o orquestrador sob demanda (HTTPException 503 se indisponível)."""
+    global orchestrator
+    
+    if not MULTIAGENT_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Sistema multiagente não disponível. Verifique configurações."
+        )
+    
+    # Carrega orquestrador dinamicamente se necessário
+    if orchestrator is None and ORCHESTRATOR_AVAILABLE:
+        try:
+            logger.info("📦 Carregando orquestrador dinamicamente...")
+            from src.agent.orchestrator_agent import OrchestratorAgent
+            orchestrator = OrchestratorAgent()
+            logger.info("✅ Orquestrador carregado com sucesso")
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar orquestrador: {e}")
+            import traceback
+            logger.error(f"Stack trace: {traceback.format_exc()}")
+            raise HTTPException(status_code=503, detail=f"Orquestrador não disponível: {str(e)}")
+    
+    if not orchestrator:
+        logger.error("❌ Orquestrador não está disponível após tentativa de carregamento")
+        raise HTTPException(status_code=503, detail="Orquestrador não disponível")
+    
+    if not hasattr(orchestrator, required_method):
+        logger.error(f"❌ Orquestrador não possui método {required_method}")
+        raise HTTPException(status_code=503, detail="Orquestrador inválido")
+    
+    return orchestrator
+
+def _active_llm_model() -> Optional[str]:
+    """Provedor LLM ativo no LangChainLLMManager (ou 'fallback')."""
+    if not LLM_ROUTER_AVAILABLE:
+        return None
+    try:
+        # Usa LangChainLLMManager para gerenciar LLMs
+        llm_manager = get_langchain_llm_manager()
+        llm_model_used = llm_manager.active_provider.value
+        logger.info(f"🧠 LLM Manager: {llm_model_used} ativo")
+        return llm_model_used
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao inicializar LLM Manager: {e}")
+        return "fallback"
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formata um evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(request: ChatRequest):
     """Chat inteligente com sistema multiagente e análise contextual de CSV"""
-    global orchestrator  # Declarar no início da função
-    
     try:
         start_time = datetime.now()
         session_id = request.session_id or "default"
         
         # 🧠 ROTEAMENTO INTELIGENTE DE LLM
-        llm_config = None
-        llm_model_used = None
+        llm_model_used = _active_llm_model()
         complexity_detected = None
         
-        if LLM_ROUTER_AVAILABLE:
-            try:
-                # Usa LangChainLLMManager para gerenciar LLMs
-                llm_manager = get_langchain_llm_manager()
-                llm_model_used = llm_manager.active_provider.value
-                logger.info(f"🧠 LLM Manager: {llm_model_used} ativo")
-            except Exception as e:
-                logger.warning(f"⚠️ Erro ao inicializar LLM Manager: {e}")
-                llm_model_used = "fallback"
-        
         # 🎯 ANÁLISE COM SISTEMA MULTIAGENTE
         # SEMPRE usa o orquestrador que consulta a base de dados (Supabase/embeddings)
         # NÃO carrega arquivo CSV - apenas consulta vetores
         
-        if not MULTIAGENT_AVAILABLE:
-            raise HTTPException(
-                status_code=503,
-                detail="Sistema multiagente não disponível. Verifique configurações."
-            )
-        
         logger.info(f"💬 Processando pergunta: {request.message[:100]}...")
         
-        # Carrega orquestrador dinamicamente se necessário
-        if orchestrator is None and ORCHESTRATOR_AVAILABLE:
-            try:
-                logger.info("📦 Carregando orquestrador dinamicamente...")
-                from src.agent.orchestrator_agent import OrchestratorAgent
-                orchestrator = OrchestratorAgent()
-                logger.info("✅ Orquestrador carregado com sucesso")
-            except Exception as e:
-                logger.error(f"❌ Erro ao carregar orquestrador: {e}")
-                import traceback
-                logger.error(f"Stack trace: {traceback.format_exc()}")
-                raise HTTPException(status_code=503, detail=f"Orquestrador não disponível: {str(e)}")
-        
-        if not orchestrator:
-            logger.error("❌ Orquestrador não está disponível após tentativa de carregamento")
-            raise HTTPException(status_code=503, detail="Orquestrador não disponível")
-        
-        if not hasattr(orchestrator, 'process_with_persistent_memory'):
-            logger.error("❌ Orquestrador não possui método process_with_persistent_memory")
-            raise HTTPException(status_code=503, detail="Orquestrador inválido")
+        orchestrator = _load_orchestrator('process_with_persistent_memory')
         
         logger.info("🧠 Enviando query para o orquestrador...")
         try:
@@ -464,6 +494,61 @@ async def chat_with_ai(request: ChatRequest):
         logger.error(f"Erro no chat: {e}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_with_ai_stream(request: ChatRequest):
+    """Chat com streaming de tokens (Server-Sent Events).
+    
+    Eventos:
+    - ``token``: ``{"content": trecho}`` conforme o provedor LLM gera a resposta
+    - ``done``: mesmos campos de ``ChatResponse`` (a resposta final é a oficial)
+    - ``error``: ``{"detail": mensagem}``
+    """
+    session_id = request.session_id or "default"
+    llm_model_used = _active_llm_model()
+    orchestrator = _load_orchestrator('process_with_persistent_memory_stream')
+    
+    logger.info(f"💬 Processando pergunta (streaming): {request.message[:100]}...")
+    
+    async def event_stream():
+        start_time = datetime.now()
+        # Cliente desconectado: o fechamento chega ao orquestrador, que termina o
+        # processamento em segundo plano e salva a interação na memória
+        events = orchestrator.process_with_persistent_memory_stream(
+            query=request.message,
+            context={},
+            session_id=session_id
+        )
+        try:
+            async with aclosing(events):
+                async for event in events:
+                    if event["type"] == "token":
+                        yield _sse_event("token", {"content": event["content"]})
+                        continue
+                
+                    metadata = event.get("metadata", {})
+                    agent_used = metadata.get('agent_used', 'orchestrator')
+                    processing_time = (datetime.now() - start_time).total_seconds()
+                    logger.info(f"Chat (streaming) processado em {processing_time:.2f}s por {agent_used}")
+                    yield _sse_event("done", ChatResponse(
+                        response=event.get("content") or 'Desculpe, não consegui processar sua solicitação.',
+                        session_id=session_id,
+                        timestamp=datetime.now().isoformat(),
+                        agent_used=agent_used,
+                        analysis_type=metadata.get('analysis_type'),
+                        confidence=metadata.get('confidence'),
+                        llm_model=llm_model_used,
+                        complexity_level=None
+                    ).model_dump())
+        except Exception as e:
+            logger.error(f"❌ Erro no chat (streaming): {e}")
+            yield _sse_event("error", {"detail": f"Erro ao processar: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/csv/upload", response_model=CSVUploadResponse)
 async def upload_csv(file: UploadFile = File(...)):
     """Upload e processamento de arquivo CSV com preparação para análise IA"""
@@ -480,6 +565,26 @@ async def upload_csv(file: UploadFile = File(...)):
         # Lê o arquivo CSV
         content = await file.read()
         df = pd.read_csv(io.BytesIO(content))
+        dtype_report = None
+        if DTYPE_OPTIMIZATION_ENABLED:
+            # uploaded_files mantém o DataFrame em memória: dtypes compactos
+            df, dtype_report = optimize_dtypes(df, inplace=True)
+        
+        # Enfileira ingestão em background no próprio processo (workers limitados, dedup por hash).
+        # Upload que não entra na fila é recusado por inteiro: o cliente reenvia depois.
+        try:
+            ingest_job, ingest_deduplicated = get_ingest_job_queue().submit(content, file.filename)
+            logger.info(f"Ingestão enfileirada: job {ingest_job.job_id} ({ingest_job.status})")
+        except IngestQueueFullError as e:
+            logger.warning(f"Fila de ingestão cheia, upload recusado: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Fila de ingestão cheia, tente novamente em {INGEST_JOB_RETRY_AFTER}s",
+                headers={"Retry-After": str(INGEST_JOB_RETRY_AFTER)},
+            )
+        except Exception as e:
+            logger.error(f"Falha ao enfileirar ingestão: {e}")
+            raise HTTPException(status_code=500, detail=f"Falha ao enfileirar ingestão: {str(e)}")
         
         # Gera ID único para o arquivo
         file_id = f"csv_{int(datetime.now().timestamp())}_{file.filename.replace('.csv', '')}"
@@ -490,7 +595,8 @@ async def upload_csv(file: UploadFile = File(...)):
             'dataframe': df,
             'upload_date': datetime.now().isoformat(),
             'rows': len(df),
-            'columns': len(df.columns)
+            'columns': len(df.columns),
+            'dtype_optimization': dtype_report.to_dict() if dtype_report else None
         }
         
         # Verifica se é um dataset de fraude (detecta colunas típicas)
@@ -511,15 +617,6 @@ async def upload_csv(file: UploadFile = File(...)):
                 logger.warning(f"Erro ao processar com sistema multiagente: {e}")
         
         logger.info(f"Upload concluído: {file.filename} ({len(df)} linhas, {len(df.columns)} colunas)")
-        # Dispara ingestão automática em background usando python do ambiente virtual
-        import subprocess
-        try:
-            subprocess.Popen([
-                '.venv\\Scripts\\python.exe', 'run_auto_ingest.py', '--once'
-            ])
-            logger.info("Script run_auto_ingest.py --once disparado com python do ambiente virtual.")
-        except Exception as e:
-            logger.error(f"Falha ao disparar run_auto_ingest.py: {e}")
         return CSVUploadResponse(
             file_id=file_id,
             filename=file.filename,
@@ -527,9 +624,14 @@ async def upload_csv(file: UploadFile = File(...)):
             columns=len(df.columns),
             message="CSV carregado e processado com sucesso",
             analysis_ready=analysis_ready,
-            fraud_detection_available=fraud_detection_available
+            fraud_detection_available=fraud_detection_available,
+            ingest_job_id=ingest_job.job_id,
+            ingest_status=ingest_job.status,
+            ingest_deduplicated=ingest_deduplicated
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro no upload: {e}")
         raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(e)}")
@@ -716,6 +818,33 @@ async def list_files():
         'files': files_list
     }
 
+@app.get("/csv/ingest/jobs")
+async def list_ingest_jobs(status: Optional[str] = None, limit: int = 50):
+    """Lista jobs de ingestão (mais recentes primeiro) e resumo da fila"""
+    job_queue = get_ingest_job_queue()
+    jobs = job_queue.list_jobs(status=status, limit=limit)
+    return {
+        'queue': job_queue.get_status(),
+        'total': len(jobs),
+        'jobs': [job.to_dict() for job in jobs]
+    }
+
+@app.get("/csv/ingest/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """Status e progresso de um job de ingestão"""
+    job = get_ingest_job_queue().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de ingestão não encontrado")
+    return job.to_dict()
+
+@app.delete("/csv/ingest/jobs/{job_id}")
+async def cancel_ingest_job(job_id: str):
+    """Cancela um job de ingestão (imediato se enfileirado, cooperativo se em execução)"""
+    job = get_ingest_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de ingestão não encontrado")
+    return job.to_dict()
+
 @app.get("/dashboard/metrics")
 async def dashboard_metrics():
     """Métricas do dashboard"""
@@ -833,19 +962,16 @@ def analyze_fraud_simple(request: FraudDetectionRequest, files_data: Dict) -> Di
         # Detecta colunas numéricas
         numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
         
+        outliers_detected = 0
         if numeric_cols:
-            # Análise de outliers básica
-            outliers_detected = 0
-            for col in numeric_cols[:3]:  # Analisa até 3 colunas
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                outliers = len(df[(df[col] < lower_bound) | (df[col] > upper_bound)])
-                outliers_detected += outliers
-                
-                analysis_text += f"\n• {col}: {outliers} outliers detectados"
+            # Outliers IQR de todas as colunas numéricas em uma única passada
+            from src.data.outlier_engine import detect_outliers
+            report = detect_outliers(df, columns=numeric_cols, methods=("iqr",))
+            outliers_detected = report.rows_flagged["iqr"]
+            top_columns = sorted(report.columns, key=lambda c: report.per_column[c]["iqr"]["count"], reverse=True)
+            for col in top_columns[:3]:  # Destaca as 3 colunas com mais outliers
+                analysis_text += f"\n• {col}: {report.per_column[col]['iqr']['count']} outliers detectados"
+            analysis_text += f"\n• Transações com ao menos um valor atípico: {outliers_detected:,}"
         
         # Verifica se há coluna de classificação (fraude)
         fraud_columns = ['Class', 'isFraud', 'fraud', 'is_fraud', 'label']
@@ -856,7 +982,7 @@ def analyze_fraud_simple(request: FraudDetectionRequest, files_data: Dict) -> Di
                 break
         
         if fraud_col is not None:
-            fraud_count = df[fraud_col].sum() if df[fraud_col].dtype in ['int64', 'float64'] else len(df[df[fraud_col] == 1])
+            fraud_count = df[fraud_col].sum() if pd.api.types.is_numeric_dtype(df[fraud_col]) else len(df[df[fraud_col] == 1])
             fraud_rate = (fraud_count / len(df)) * 100
             analysis_text += f"\n\n**🚨 Detecção de Fraude:**"
             analysis_text += f"\n• Transações fraudulentas: {fraud_count:,} ({fraud_rate:.2f}%)"
@@ -0,0 +1,39 @@
+-- Endereçamento estruturado por intervalo de linhas para chunks CSV
+-- Os chunks CSV_ROW gravam metadata.row_start / metadata.row_end (1-based, inclusivos)
+-- e metadata.source_id. As colunas geradas abaixo expõem esses valores tipados
+-- para filtros via PostgREST (.eq/.lte/.gte) e permitem índice B-tree.
+-- Chunks sem intervalo (ex.: chunks metadata_*) ficam com NULL.
+
+ALTER TABLE public.embeddings
+    ADD COLUMN IF NOT EXISTS source_id text
+        GENERATED ALWAYS AS (COALESCE(metadata->>'source_id', metadata->>'source')) STORED;
+
+ALTER TABLE public.embeddings
+    ADD COLUMN IF NOT EXISTS row_start integer
+        GENERATED ALWAYS AS (
+            CASE WHEN (metadata->>'row_start') ~ '^[0-9]+$'
+                 THEN (metadata->>'row_start')::integer
+                 WHEN (metadata->>'start_row') ~ '^[0-9]+$'
+                 THEN (metadata->>'start_row')::integer
+            END
+        ) STORED;
+
+ALTER TABLE public.embeddings
+    ADD COLUMN IF NOT EXISTS row_end integer
+        GENERATED ALWAYS AS (
+            CASE WHEN (metadata->>'row_end') ~ '^[0-9]+$'
+                 THEN (metadata->>'row_end')::integer
+                 WHEN (metadata->>'end_row') ~ '^[0-9]+$'
+                 THEN (metadata->>'end_row')::integer
+            END
+        ) STORED;
+
+-- Busca de chunks que cobrem um intervalo: source_id = ? AND row_start <= fim AND row_end >= inicio
+CREATE INDEX IF NOT EXISTS idx_embeddings_source_row_range
+    ON public.embeddings (source_id, row_start, row_end)
+    WHERE row_start IS NOT NULL;
+
+COMMENT ON COLUMN public.embeddings.row_start IS
+'Primeira linha de dados do CSV coberta pelo chunk (1-based, inclusiva). NULL para chunks sem intervalo.';
+COMMENT ON COLUMN public.embeddings.row_end IS
+'Última linha de dados do CSV coberta pelo chunk (1-based, inclusiva). NULL para chunks sem intervalo.';
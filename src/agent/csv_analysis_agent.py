@@ -621,6 +621,192 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             'conformidade': 'embeddings_only'
         })
     
+    def _embeddings_records(self) -> List[Dict[str, Any]]:
+        """``current_embeddings`` no formato esperado pela reconstrução (chunk_text + metadata)."""
+        return [
+            {'chunk_text': emb.get('chunk_text', ''), 'metadata': emb.get('metadata') or {}}
+            for emb in self.current_embeddings
+        ]
+    
+    def _embeddings_dataframe(self, analyzer) -> Optional[pd.DataFrame]:
+        """Dataset parseado de ``current_embeddings`` (fallback sem Supabase); None se vazio."""
+        if not self.current_embeddings:
+            return None
+        df = analyzer._parse_chunk_text_to_dataframe(embeddings_df=pd.DataFrame(self._embeddings_records()))
+        if df is None or df.empty:
+            return None
+        return df
+    
+    def _get_dataset_profile(self):
+        """Retorna o perfil pré-calculado do dataset atual (estatísticas exatas).
+        
+        Sem Supabase (ex.: ambiente de testes), calcula o perfil em memória a
+        partir de ``current_embeddings``.
+        """
+        from src.tools.python_analyzer import PythonDataAnalyzer
+        from src.data.dataset_profile import compute_dataset_profile
+        
+        analyzer = PythonDataAnalyzer(caller_agent=self.name)
+        profile = analyzer.get_dataset_profile()
+        if profile is None:
+            df = self._embeddings_dataframe(analyzer)
+            if df is not None:
+                profile = compute_dataset_profile(df)
+        if profile is not None:
+            self.logger.info(f"✅ Perfil do dataset: {profile.row_count} registros, {len(profile.columns)} colunas")
+        return profile
+    
+    def _get_outlier_report(self, columns: Optional[List[str]] = None):
+        """Relatório de outliers da versão atual do dataset (ver ``PythonDataAnalyzer.detect_outliers``).
+        
+        Com ``columns`` (plano da consulta) apenas essas colunas são
+        reconstruídas e analisadas. Sem Supabase, o relatório é calculado a
+        partir de ``current_embeddings``.
+        """
+        from src.tools.python_analyzer import PythonDataAnalyzer
+        from src.data.outlier_engine import detect_outliers
+        
+        options = {'columns': columns} if columns else {}
+        analyzer = PythonDataAnalyzer(caller_agent=self.name)
+        report = analyzer.detect_outliers(**options)
+        if report is None:
+            df = self._embeddings_dataframe(analyzer)
+            if df is not None:
+                if columns:
+                    options['columns'] = [c for c in columns if c in df.columns] or None
+                report = detect_outliers(df, **options)
+        return report
+    
+    def _plan_query(self, query: str):
+        """Colunas e estatísticas que a consulta usa (ver ``src.data.query_planner``)."""
+        from src.tools.python_analyzer import PythonDataAnalyzer
+        return PythonDataAnalyzer(caller_agent=self.name).plan_query_columns(query)
+    
+    @staticmethod
+    def _use_approximate(context: Optional[Dict[str, Any]]) -> bool:
+        """Modo aproximado: ``context['approximate']`` ou ``APPROX_ANALYTICS_DEFAULT``."""
+        from src.settings import APPROX_ANALYTICS_DEFAULT
+        if context and context.get('approximate') is not None:
+            return bool(context['approximate'])
+        return APPROX_ANALYTICS_DEFAULT
+    
+    def _get_approximate_engine(self):
+        """Motor de consultas aproximadas da versão atual do dataset.
+        
+        Sem Supabase, as amostras são construídas a partir de ``current_embeddings``,
+        lidos em janelas de linhas (o dataset parseado nunca fica inteiro em
+        memória); o DataFrame completo só é montado se a precisão pedida exigir
+        o cálculo exato.
+        """
+        from src.tools.python_analyzer import PythonDataAnalyzer
+        from src.data.approximate_analytics import (
+            ApproximateAnalyticsError, ApproximateQueryEngine, StratifiedSampleSet,
+        )
+        from src.data.chunk_reconstruction import ChunkReconstructionError, iter_dataframe_windows
+        
+        analyzer = PythonDataAnalyzer(caller_agent=self.name)
+        engine = analyzer.get_approximate_engine()
+        if engine is None and self.current_embeddings:
+            def load_full() -> Optional[pd.DataFrame]:
+                return self._embeddings_dataframe(analyzer)
+            
+            try:
+                sample_set = StratifiedSampleSet.from_chunks(iter_dataframe_windows(self._embeddings_records()))
+            except (ChunkReconstructionError, ApproximateAnalyticsError) as e:
+                # Chunks sem intervalo de linhas: só o parser legado (dataset inteiro)
+                self.logger.info(f"ℹ️ Leitura em janelas indisponível ({e}), usando dataset completo")
+                df = load_full()
+                if df is None:
+                    return None
+                sample_set = StratifiedSampleSet(df)
+            engine = ApproximateQueryEngine(sample_set, exact_loader=load_full)
+        return engine
+    
+    def _handle_approximate_query(self, query_type: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Responde distribuição, correlação ou outliers com amostras estratificadas e IC.
+        
+        Args:
+            query_type: ``distribution``, ``correlation`` ou ``outliers``
+            context: Pode conter ``max_rel_error``/``max_abs_error`` (precisão pedida)
+            
+        Returns:
+            Resposta com estimativas, intervalos de confiança e tamanho da amostra usada
+        """
+        engine = self._get_approximate_engine()
+        if engine is None:
+            return self._build_response(
+                "❌ Não foi possível extrair dados dos embeddings",
+                metadata={"error": True}
+            )
+        
+        precision = {
+            'max_rel_error': (context or {}).get('max_rel_error'),
+            'max_abs_error': (context or {}).get('max_abs_error'),
+        }
+        sample_set = engine.sample_set
+        numeric_cols = [
+            col for col in sample_set.columns
+            if col != sample_set.strata_column and pd.api.types.is_numeric_dtype(sample_set.frame[col])
+        ]
+        estimates: List[Dict[str, Any]] = []
+        
+        def fmt(result) -> str:
+            if result.exact or result.ci_low is None:
+                return f"{result.value:.4f} (exato)"
+            return f"{result.value:.4f} [{result.ci_low:.4f}, {result.ci_high:.4f}] (n={result.sample_size})"
+        
+        if query_type == 'distribution':
+            response = "## 📊 Análise de Distribuição (modo aproximado)\n\n"
+            response += "| Variável | Assimetria | Curtose |\n|---|---|---|\n"
+            for col in numeric_cols[:10]:
+                skewness = engine.estimate('skewness', col, **precision)
+                kurtosis_val = engine.estimate('kurtosis', col, **precision)
+                estimates.extend([skewness.to_dict(), kurtosis_val.to_dict()])
+                response += f"| {col} | {fmt(skewness)} | {fmt(kurtosis_val)} |\n"
+        elif query_type == 'correlation':
+            if sample_set.strata_column and sample_set.strata_column not in numeric_cols:
+                numeric_cols.append(sample_set.strata_column)
+            cols = numeric_cols[:10]
+            response = "## 🔗 Correlações (modo aproximado)\n\n"
+            response += "| Variável 1 | Variável 2 | Correlação |\n|---|---|---|\n"
+            for i, col in enumerate(cols):
+                for other in cols[i + 1:]:
+                    result = engine.estimate('correlation', col, other=other, **precision)
+                    estimates.append(result.to_dict())
+                    response += f"| {col} | {other} | {fmt(result)} |\n"
+        else:
+            response = "## 🔍 Taxa de Outliers (IQR, modo aproximado)\n\n"
+            response += "| Variável | % de Outliers |\n|---|---|\n"
+            for col in numeric_cols[:15]:
+                result = engine.estimate('outlier_rate', col, **precision)
+                estimates.append(result.to_dict())
+                if result.exact or result.ci_low is None:
+                    response += f"| {col} | {result.value * 100:.2f}% (exato) |\n"
+                else:
+                    response += (f"| {col} | {result.value * 100:.2f}% "
+                                 f"[{result.ci_low * 100:.2f}%, {result.ci_high * 100:.2f}%] (n={result.sample_size}) |\n")
+        
+        response += (f"\n**Intervalos de confiança:** {engine.confidence:.0%} · "
+                     f"**Estratos:** {sample_set.strata_column or 'nenhum'} · "
+                     f"**Linhas no dataset:** {sample_set.population_size}\n")
+        response += f"\n✅ **Conformidade:** Dados obtidos exclusivamente da tabela embeddings\n"
+        
+        return self._build_response(response, metadata={
+            'approximate': True,
+            'estimates': estimates,
+            'confidence': engine.confidence,
+            'strata_column': sample_set.strata_column,
+            'population_size': sample_set.population_size,
+            'exact_fallbacks': sum(1 for e in estimates if e['exact']),
+            'conformidade': 'embeddings_only',
+            'query_type': query_type
+        })
+    
+    @staticmethod
+    def _profile_numeric_columns(profile) -> List[str]:
+        """Colunas numéricas do perfil com ao menos um valor não nulo."""
+        return [col for col, col_stats in profile.numeric.items() if col_stats.get('count')]
+    
     def _handle_statistics_query_from_embeddings(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Processa consultas sobre estatísticas (min, max, intervalos) usando dados reais dos embeddings.
         
@@ -634,30 +820,17 @@ class EmbeddingsAnalysisAgent(BaseAgent):
         try:
             self.logger.info("📊 Calculando estatísticas reais dos dados via embeddings...")
             
-            # Importar Python Analyzer para processar chunk_text
-            try:
-                from src.tools.python_analyzer import PythonDataAnalyzer
-                analyzer = PythonDataAnalyzer()
-            except ImportError as e:
-                self.logger.error(f"Erro ao importar PythonDataAnalyzer: {e}")
-                return self._build_response(
-                    "❌ Erro: PythonDataAnalyzer não disponível para calcular estatísticas",
-                    metadata={"error": True}
-                )
-            
-            # Obter DataFrame real dos chunks
-            df = analyzer.get_data_from_embeddings(limit=None, parse_chunk_text=True)
+            # Perfil pré-calculado do dataset (estatísticas exatas)
+            profile = self._get_dataset_profile()
             
-            if df is None or df.empty:
+            if profile is None:
                 return self._build_response(
                     "❌ Não foi possível obter dados dos embeddings para calcular estatísticas",
                     metadata={"error": True}
                 )
             
-            self.logger.info(f"✅ DataFrame carregado: {len(df)} registros, {len(df.columns)} colunas")
-            
-            # Calcular intervalos (min/max) para TODAS as colunas numéricas
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            # Intervalos (min/max) para TODAS as colunas numéricas
+            numeric_cols = self._profile_numeric_columns(profile)
             
             if not numeric_cols:
                 return self._build_response(
@@ -665,11 +838,12 @@ class EmbeddingsAnalysisAgent(BaseAgent):
                     metadata={"error": True}
                 )
             
-            # Calcular estatísticas de intervalo
+            # Estatísticas de intervalo
             stats_data = []
             for col in numeric_cols:
-                col_min = df[col].min()
-                col_max = df[col].max()
+                col_stats = profile.numeric[col]
+                col_min = col_stats['min']
+                col_max = col_stats['max']
                 col_range = col_max - col_min
                 stats_data.append({
                     'variavel': col,
@@ -682,7 +856,7 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             response = f"""📊 **Intervalo de Cada Variável (Mínimo e Máximo)**
 
 **Fonte:** Dados reais extraídos da tabela embeddings (coluna chunk_text parseada)
-**Total de registros analisados:** {len(df):,}
+**Total de registros analisados:** {profile.row_count:,}
 **Total de variáveis numéricas:** {len(numeric_cols)}
 
 """
@@ -708,9 +882,10 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             response += f"✅ **Método:** Parsing de chunk_text + análise com pandas\n"
             
             return self._build_response(response, metadata={
-                'total_records': len(df),
+                'total_records': profile.row_count,
                 'total_numeric_columns': len(numeric_cols),
                 'statistics': stats_data,
+                'profile_version': profile.version,
                 'conformidade': 'embeddings_only',
                 'query_type': 'statistics'
             })
@@ -737,30 +912,17 @@ class EmbeddingsAnalysisAgent(BaseAgent):
         try:
             self.logger.info("📊 Calculando VARIABILIDADE (desvio padrão, variância) dos dados via embeddings...")
             
-            # Importar Python Analyzer para processar chunk_text
-            try:
-                from src.tools.python_analyzer import PythonDataAnalyzer
-                analyzer = PythonDataAnalyzer()
-            except ImportError as e:
-                self.logger.error(f"Erro ao importar PythonDataAnalyzer: {e}")
-                return self._build_response(
-                    "❌ Erro: PythonDataAnalyzer não disponível para calcular variabilidade",
-                    metadata={"error": True}
-                )
-            
-            # Obter DataFrame real dos chunks (GENÉRICO - qualquer CSV)
-            df = analyzer.get_data_from_embeddings(limit=None, parse_chunk_text=True)
+            # Perfil pré-calculado do dataset (GENÉRICO - qualquer CSV)
+            profile = self._get_dataset_profile()
             
-            if df is None or df.empty:
+            if profile is None:
                 return self._build_response(
                     "❌ Não foi possível obter dados dos embeddings para calcular variabilidade",
                     metadata={"error": True}
                 )
             
-            self.logger.info(f"✅ DataFrame carregado: {len(df)} registros, {len(df.columns)} colunas")
-            
-            # Calcular VARIABILIDADE para TODAS as colunas numéricas (GENÉRICO)
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            # VARIABILIDADE para TODAS as colunas numéricas (GENÉRICO)
+            numeric_cols = self._profile_numeric_columns(profile)
             
             if not numeric_cols:
                 return self._build_response(
@@ -771,10 +933,10 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             # Calcular medidas de DISPERSÃO
             variability_data = []
             for col in numeric_cols:
-                col_std = df[col].std()  # Desvio padrão
-                col_var = df[col].var()  # Variância
-                col_mean = df[col].mean()
-                col_cv = (col_std / col_mean) * 100 if col_mean != 0 else 0  # Coeficiente de Variação
+                col_stats = profile.numeric[col]
+                col_std = col_stats['std']  # Desvio padrão
+                col_var = col_stats['var']  # Variância
+                col_cv = col_stats['cv']  # Coeficiente de Variação
                 
                 variability_data.append({
                     'variavel': col,
@@ -787,7 +949,7 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             response = f"""📊 **Variabilidade dos Dados (Desvio Padrão e Variância)**
 
 **Fonte:** Dados reais extraídos da tabela embeddings (coluna chunk_text parseada)
-**Total de registros analisados:** {len(df):,}
+**Total de registros analisados:** {profile.row_count:,}
 **Total de variáveis numéricas:** {len(numeric_cols)}
 
 """
@@ -814,9 +976,10 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             response += f"- **Coef. Variação:** Percentual de dispersão relativa (útil para comparar variáveis)\n"
             
             return self._build_response(response, metadata={
-                'total_records': len(df),
+                'total_records': profile.row_count,
                 'total_numeric_columns': len(numeric_cols),
                 'variability_data': variability_data,
+                'profile_version': profile.version,
                 'conformidade': 'embeddings_only',
                 'query_type': 'variability'
             })
@@ -841,30 +1004,17 @@ class EmbeddingsAnalysisAgent(BaseAgent):
         try:
             self.logger.info("📊 Calculando medidas de tendência central dos dados via embeddings...")
             
-            # Importar Python Analyzer para processar chunk_text
-            try:
-                from src.tools.python_analyzer import PythonDataAnalyzer
-                analyzer = PythonDataAnalyzer(caller_agent=self.name)
-            except ImportError as e:
-                self.logger.error(f"Erro ao importar PythonDataAnalyzer: {e}")
-                return self._build_response(
-                    "❌ Erro: PythonDataAnalyzer não disponível para calcular medidas de tendência central",
-                    metadata={"error": True}
-                )
-            
-            # Obter DataFrame real dos chunks (APENAS EMBEDDINGS - NUNCA CSV)
-            df = analyzer.get_data_from_embeddings(limit=None, parse_chunk_text=True)
+            # Perfil pré-calculado do dataset (APENAS EMBEDDINGS - NUNCA CSV)
+            profile = self._get_dataset_profile()
             
-            if df is None or df.empty:
+            if profile is None:
                 return self._build_response(
                     "❌ Não foi possível obter dados dos embeddings para calcular medidas de tendência central",
                     metadata={"error": True}
                 )
             
-            self.logger.info(f"✅ DataFrame carregado: {len(df)} registros, {len(df.columns)} colunas")
-            
-            # Calcular medidas de tendência central para TODAS as colunas numéricas
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            # Medidas de tendência central para TODAS as colunas numéricas
+            numeric_cols = self._profile_numeric_columns(profile)
             
             if not numeric_cols:
                 return self._build_response(
@@ -875,12 +1025,12 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             # Calcular média, mediana e moda
             stats_data = []
             for col in numeric_cols:
-                col_mean = df[col].mean()
-                col_median = df[col].median()
+                col_stats = profile.numeric[col]
+                col_mean = col_stats['mean']
+                col_median = col_stats['median']
                 
-                # Moda (pode ter múltiplas modas)
-                mode_values = df[col].mode()
-                col_mode = mode_values.iloc[0] if len(mode_values) > 0 else None
+                # Moda (primeira, quando há múltiplas modas)
+                col_mode = col_stats['mode']
                 
                 stats_data.append({
                     'variavel': col,
@@ -893,7 +1043,7 @@ class EmbeddingsAnalysisAgent(BaseAgent):
             response = f"""📊 **Medidas de Tendência Central**
 
 **Fonte:** Dados reais extraídos da tabela embeddings (coluna chunk_text parseada)
-**Total de registros analisados:** {len(df):,}
+**Total de registros analisados:** {profile.row_count:,}
 **Total de variáveis numéricas:** {len(numeric_cols)}
 
 **O que são Medidas de Tendência Central?**
@@ -934,9 +1084,10 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
             response += f"✅ **Método:** Parsing de chunk_text + análise com pandas\n"
             
             return self._build_response(response, metadata={
-                'total_records': len(df),
+                'total_records': profile.row_count,
                 'total_numeric_columns': len(numeric_cols),
                 'central_tendency': stats_data,
+                'profile_version': profile.version,
                 'conformidade': 'embeddings_only',
                 'query_type': 'central_tendency'
             })
@@ -961,28 +1112,20 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
         try:
             self.logger.info("📊 Calculando correlações entre variáveis...")
             
-            from src.tools.python_analyzer import PythonDataAnalyzer
-            analyzer = PythonDataAnalyzer()
+            if self._use_approximate(context):
+                return self._handle_approximate_query('correlation', context)
             
-            # Parsing dos chunks para DataFrame
-            # Primeiro, tentar reconstruir dados via Supabase embeddings (método público recomendado)
-            df = analyzer.reconstruct_original_data()
-
-            # Se não conseguiu (ex: ambiente de testes sem Supabase), tentar parsear current_embeddings diretamente
-            if df is None:
-                full_text = "\n".join([emb.get('chunk_text', '') for emb in self.current_embeddings])
-                import pandas as pd
-                embeddings_df = pd.DataFrame([{'chunk_text': full_text}])
-                df = analyzer._parse_chunk_text_to_dataframe(embeddings_df=embeddings_df)
+            # Perfil pré-calculado (matriz de correlação exata)
+            profile = self._get_dataset_profile()
 
-            if df is None or df.empty:
+            if profile is None:
                 return self._build_response(
                     "❌ Não foi possível extrair dados dos embeddings",
                     metadata={"error": True}
                 )
             
-            # Selecionar apenas colunas numéricas
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            # Apenas colunas numéricas
+            numeric_cols = [col for col in profile.numeric_columns if col in profile.correlation]
             
             if len(numeric_cols) < 2:
                 return self._build_response(
@@ -990,8 +1133,8 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
                     metadata={"error": True}
                 )
             
-            # Calcular matriz de correlação
-            corr_matrix = df[numeric_cols].corr()
+            # Matriz de correlação
+            corr_matrix = pd.DataFrame(profile.correlation, dtype=float).loc[numeric_cols, numeric_cols]
             
             response = f"## 🔗 Matriz de Correlação\n\n"
             response += f"**Total de variáveis analisadas:** {len(numeric_cols)}\n\n"
@@ -1040,27 +1183,19 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
         try:
             self.logger.info("📊 Analisando distribuição dos dados...")
             
-            from src.tools.python_analyzer import PythonDataAnalyzer
-            from scipy import stats
-            analyzer = PythonDataAnalyzer()
+            if self._use_approximate(context):
+                return self._handle_approximate_query('distribution', context)
             
-            # Tentar reconstruir via método público
-            df = analyzer.reconstruct_original_data()
-
-            # Se não conseguiu (ambiente de testes), tentar parsear current_embeddings diretamente
-            if df is None:
-                full_text = "\n".join([emb.get('chunk_text', '') for emb in self.current_embeddings])
-                import pandas as pd
-                embeddings_df = pd.DataFrame([{'chunk_text': full_text}])
-                df = analyzer._parse_chunk_text_to_dataframe(embeddings_df=embeddings_df)
+            # Perfil pré-calculado (Shapiro-Wilk, assimetria e curtose exatos)
+            profile = self._get_dataset_profile()
 
-            if df is None or df.empty:
+            if profile is None:
                 return self._build_response(
                     "❌ Não foi possível extrair dados dos embeddings",
                     metadata={"error": True}
                 )
             
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_cols = profile.numeric_columns
             
             # Construir sumário estatístico (texto)
             response = f"## 📊 Análise de Distribuição\n\n"
@@ -1069,11 +1204,13 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
             stats_summary = {}
             for col in numeric_cols[:10]:  # Limitar
                 try:
-                    if len(df[col].dropna()) > 3:
-                        stat, pvalue = stats.shapiro(df[col].dropna()[:5000])  # Max 5000 amostras
+                    col_stats = profile.numeric[col]
+                    # Shapiro-Wilk pré-calculado sobre as 5000 primeiras amostras
+                    pvalue = col_stats.get('shapiro_pvalue')
+                    if col_stats['count'] > 3 and pvalue is not None:
                         is_normal = "Sim" if pvalue > 0.05 else "Não"
-                        skewness = df[col].skew()
-                        kurtosis_val = df[col].kurtosis()
+                        skewness = col_stats['skewness']
+                        kurtosis_val = col_stats['kurtosis']
 
                         response += f"### {col}\n"
                         response += f"- **Normal?** {is_normal} (p-value: {pvalue:.4f})\n"
@@ -1138,49 +1275,49 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
         try:
             self.logger.info("📊 Detectando outliers nos dados...")
             
-            from src.tools.python_analyzer import PythonDataAnalyzer
-            analyzer = PythonDataAnalyzer()
+            if self._use_approximate(context):
+                return self._handle_approximate_query('outliers', context)
             
-            full_text = "\n".join([emb.get('chunk_text', '') for emb in self.current_embeddings])
-            df = analyzer.parse_chunk_text(full_text)
+            # IQR, z-score e MAD em uma passada (cacheado por versão); só as
+            # colunas citadas na pergunta são reconstruídas
+            plan = self._plan_query(query)
+            report = self._get_outlier_report(columns=plan.columns)
             
-            if df.empty:
+            if report is None:
                 return self._build_response(
                     "❌ Não foi possível extrair dados dos embeddings",
                     metadata={"error": True}
                 )
             
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            response = f"## 🔍 Detecção de Outliers (IQR, z-score e MAD)\n\n"
+            response += f"**IQR:** Valores abaixo de Q1 - 1.5*IQR ou acima de Q3 + 1.5*IQR\n"
+            response += f"**z-score:** |z| > {report.parameters['z_threshold']}\n"
+            response += f"**MAD:** z robusto > {report.parameters['mad_threshold']}\n\n"
             
-            response = f"## 🔍 Detecção de Outliers (Método IQR)\n\n"
-            response += f"**Método:** Interquartile Range (IQR)\n"
-            response += f"**Critério:** Valores abaixo de Q1 - 1.5*IQR ou acima de Q3 + 1.5*IQR\n\n"
+            response += "| Variável | IQR Inferiores | IQR Superiores | IQR Total | % do Total | z-score | MAD |\n"
+            response += "|----------|----------------|----------------|-----------|------------|---------|-----|\n"
             
-            response += "| Variável | Outliers Inferiores | Outliers Superiores | Total Outliers | % do Total |\n"
-            response += "|----------|---------------------|---------------------|----------------|------------|\n"
+            total_records = report.row_count
             
-            total_records = len(df)
+            for col in report.columns[:15]:  # Limitar
+                col_stats = report.per_column[col]
+                iqr = col_stats['iqr']
+                response += (f"| {col} | {iqr['count_lower']} | {iqr['count_upper']} | {iqr['count']} | "
+                             f"{iqr['rate']:.2f}% | {col_stats['zscore']['count']} | {col_stats['mad']['count']} |\n")
             
-            for col in numeric_cols[:15]:  # Limitar
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                
-                lower_outliers = (df[col] < lower_bound).sum()
-                upper_outliers = (df[col] > upper_bound).sum()
-                total_outliers = lower_outliers + upper_outliers
-                pct_outliers = (total_outliers / total_records) * 100
-                
-                response += f"| {col} | {lower_outliers} | {upper_outliers} | {total_outliers} | {pct_outliers:.2f}% |\n"
+            response += "\n**Linhas com ao menos uma variável atípica:** "
+            response += ", ".join(f"{method}: {count}" for method, count in report.rows_flagged.items())
+            response += "\n"
             
             response += f"\n✅ **Conformidade:** Dados obtidos exclusivamente da tabela embeddings\n"
             
             return self._build_response(response, metadata={
-                'total_variables': len(numeric_cols),
+                'total_variables': len(report.columns),
                 'total_records': total_records,
+                'outliers_by_column': report.per_column,
+                'rows_flagged': report.rows_flagged,
+                'top_rows': report.top_rows,
+                'query_plan': plan.to_dict(),
                 'conformidade': 'embeddings_only',
                 'query_type': 'outliers'
             })
@@ -1214,16 +1351,21 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
             sns.set_style("whitegrid")
             
             # **CORREÇÃO**: Usar DataFrame passado no contexto (já carregado pelo rag_data_agent)
+            from src.data.query_planner import plan_query
             df = None
             if context and 'reconstructed_df' in context:
                 df = context['reconstructed_df']
                 self.logger.info(f"✅ Usando DataFrame pré-carregado: {df.shape[0]} linhas, {df.shape[1]} colunas")
+                # Apenas as colunas citadas na pergunta (se houver) viram gráficos
+                plan = plan_query(query, list(df.columns))
+                if plan.pruned:
+                    df = df[plan.columns]
             else:
-                # Fallback: tentar reconstruir dos embeddings
+                # Fallback: reconstruir dos embeddings apenas as colunas que a pergunta usa
                 self.logger.info("🔄 DataFrame não fornecido, tentando reconstruir dos embeddings...")
                 from src.tools.python_analyzer import PythonDataAnalyzer
                 analyzer = PythonDataAnalyzer(caller_agent=self.name)
-                df = analyzer.reconstruct_original_data()
+                df, plan = analyzer.load_for_query(query)
             
             if df is None or df.empty:
                 return self._build_response(
@@ -1239,8 +1381,8 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
             output_dir.mkdir(parents=True, exist_ok=True)
             
             # Separar variáveis numéricas e categóricas
-            numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
-            categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
+            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+            categorical_cols = df.select_dtypes(include=['object', 'category']).columns.tolist()
             
             self.logger.info(f"📊 Gerando histogramas para {len(numeric_cols)} variáveis numéricas...")
             self.logger.info(f"📊 Gerando gráficos de barras para {len(categorical_cols)} variáveis categóricas...")
@@ -1372,6 +1514,7 @@ As medidas de tendência central são estatísticas que descrevem o valor centra
                     'output_dir': str(output_dir.absolute()),
                     'numeric_cols': numeric_cols,
                     'categorical_cols': categorical_cols,
+                    'query_plan': plan.to_dict(),
                     'conformidade': 'embeddings_only',
                     'visualization_success': True
                 })
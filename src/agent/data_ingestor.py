@@ -42,6 +42,7 @@ Documentação: docs/2025-10-10_ANALISE_CRITICA_INGESTAO.md
 import pandas as pd
 from src.vectorstore.supabase_client import supabase
 from src.embeddings.embedding_generator import generate_embedding
+from src.data.dataset_cache import get_dataset_cache
 import numpy as np
 import logging
 import warnings
@@ -81,6 +82,7 @@ class DataIngestor:
         self.supabase.table('embeddings').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
         self.supabase.table('chunks').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
         self.supabase.table('metadata').delete().neq('id', '00000000-0000-0000-0000-000000000000').execute()
+        get_dataset_cache().invalidate()
         logger.info("Base vetorial limpa com sucesso.")
 
     def analyze_csv(self, csv_path):
@@ -19,6 +19,7 @@ import json
 from dataclasses import dataclass
 
 from src.agent.base_agent import BaseAgent, AgentError
+from src.llm.rate_limiter import estimate_request_tokens, get_rate_limiter
 from src.settings import GOOGLE_API_KEY
 from src.utils.logging_config import get_logger
 
@@ -74,6 +75,8 @@ class GoogleLLMAgent(BaseAgent):
         
         self.model_name = model
         self.model = None
+        # Limite de concorrência/taxa compartilhado com as demais chamadas ao Google
+        self.rate_limiter = get_rate_limiter("google", model)
         
         # Verificar disponibilidade
         if not GOOGLE_AI_AVAILABLE:
@@ -237,11 +240,14 @@ Diretrizes:
                 "candidate_count": 1,
             }
             
-            # Gerar resposta
-            response = self.model.generate_content(
-                request.prompt,
-                generation_config=generation_config
-            )
+            # Gerar resposta (aguarda vaga no limitador; recusa se a fila estourar)
+            tokens = (estimate_request_tokens(request.prompt, max_tokens=request.max_tokens)
+                      if self.rate_limiter.counts_tokens else 0)
+            with self.rate_limiter.slot(tokens):
+                response = self.model.generate_content(
+                    request.prompt,
+                    generation_config=generation_config
+                )
             
             # Extrair conteúdo
             content = response.text if response.text else "Sem resposta gerada"
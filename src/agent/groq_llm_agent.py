@@ -19,6 +19,7 @@ import json
 from dataclasses import dataclass
 
 from src.agent.base_agent import BaseAgent, AgentError
+from src.llm.rate_limiter import estimate_request_tokens, get_rate_limiter
 from src.settings import GROQ_API_KEY
 from src.utils.logging_config import get_logger
 
@@ -73,6 +74,8 @@ class GroqLLMAgent(BaseAgent):
         )
         
         self.model_name = model
+        # Limite de concorrência/taxa compartilhado com as demais chamadas ao Groq
+        self.rate_limiter = get_rate_limiter("groq", model)
         
         # Verificar disponibilidade da biblioteca
         if not GROQ_AVAILABLE:
@@ -234,23 +237,27 @@ Diretrizes:
                 {"role": "user", "content": request.prompt}
             ]
             
-            # Fazer chamada para o Groq
-            chat_completion = self.client.chat.completions.create(
-                messages=messages,
-                model=self.model_name,
-                temperature=request.temperature,
-                max_tokens=request.max_tokens,
-            )
-            
-            # Extrair resposta
-            content = chat_completion.choices[0].message.content
-            
-            # Construir resposta estruturada
-            usage = {
-                "prompt_tokens": chat_completion.usage.prompt_tokens if chat_completion.usage else 0,
-                "completion_tokens": chat_completion.usage.completion_tokens if chat_completion.usage else 0,
-                "total_tokens": chat_completion.usage.total_tokens if chat_completion.usage else 0,
-            }
+            # Fazer chamada para o Groq (aguarda vaga no limitador; recusa se a fila estourar)
+            tokens = (estimate_request_tokens(request.prompt, request.system_prompt, request.max_tokens)
+                      if self.rate_limiter.counts_tokens else 0)
+            with self.rate_limiter.slot(tokens) as permit:
+                chat_completion = self.client.chat.completions.create(
+                    messages=messages,
+                    model=self.model_name,
+                    temperature=request.temperature,
+                    max_tokens=request.max_tokens,
+                )
+                
+                # Extrair resposta
+                content = chat_completion.choices[0].message.content
+                
+                # Construir resposta estruturada
+                usage = {
+                    "prompt_tokens": chat_completion.usage.prompt_tokens if chat_completion.usage else 0,
+                    "completion_tokens": chat_completion.usage.completion_tokens if chat_completion.usage else 0,
+                    "total_tokens": chat_completion.usage.total_tokens if chat_completion.usage else 0,
+                }
+                permit.set_usage(usage["total_tokens"])
             
             return GroqResponse(
                 content=content,
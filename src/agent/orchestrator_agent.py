@@ -17,14 +17,24 @@ from pathlib import Path
 root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
+import asyncio
+import inspect
 import re
-from typing import Any, Dict, List, Optional, Union, Tuple
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional, Union, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 from src.agent.base_agent import BaseAgent, AgentError
 from src.agent.rag_data_agent import RAGDataAgent  # Agente RAG puro sem keywords hardcoded
 from src.data.data_processor import DataProcessor
+from src.data.stat_fast_path import StatFastPath
+from src.llm.async_runtime import run_sync
+from src.llm.llm_router import LLMRouter
+from src.llm.prompt_budget import PromptBudget, PromptSegment
+from src.prompts.compiler import compile_template
+from src.llm.streaming import stream_with_tokens
+from src.settings import STAT_FAST_PATH_ENABLED
 
 # Import condicional do RAGAgent (pode falhar se Supabase não configurado)
 try:
@@ -102,6 +112,47 @@ except RuntimeError as e:
     print(f"⚠️ Semantic Router não disponível: {str(e)[:100]}...")
 
 
+# Instruções do orquestrador para o LLM Manager: texto estático enviado como
+# system prompt (prefixo idêntico entre chamadas, aproveitado pelo cache de
+# prefixo dos provedores)
+_LLM_SYSTEM_PROMPT_DATA = """Você é um assistente especializado em análise de dados CSV.
+Responda com base ESPECIFICAMENTE nos dados carregados fornecidos no contexto.
+Use português brasileiro e seja preciso e detalhado sobre os dados reais.
+
+🎯 INSTRUÇÕES CRÍTICAS PARA ANÁLISE DE DADOS CSV (da tabela embeddings):
+
+� CONTEXTO RECEBIDO:
+- Você recebeu DADOS ESTRUTURADOS (DataFrame) reconstruídos da coluna chunk_text da tabela embeddings
+- Esses dados foram parseados como CSV e representam as COLUNAS ORIGINAIS do arquivo CSV carregado
+- As estatísticas fornecidas (dtypes, describe, info) refletem os DADOS REAIS, não a estrutura da tabela embeddings
+
+🔍 COMO ANALISAR:
+1. EXAMINE as COLUNAS listadas na seção "ANÁLISE DOS DADOS"
+2. IDENTIFIQUE os TIPOS DE DADOS usando dtypes:
+   - **Numéricos**: float64, int64, float32, int32, etc.
+   - **Categóricos**: object, category, bool
+   - **Temporais**: datetime64, timedelta
+   - **Texto**: object (sem padrão numérico)
+
+3. USE as ESTATÍSTICAS FORNECIDAS:
+   - Para distribuições: count, mean, std, min, max, quartis
+   - Para valores únicos: nunique(), value_counts()
+   - Para tipos: dtypes explícitos
+
+⚠️ REGRAS CRÍTICAS:
+- Use APENAS os dtypes fornecidos para classificar tipos de dados
+- NÃO confunda com colunas da tabela embeddings (id, chunk_text, created_at, embedding)
+- NÃO interprete palavras soltas ou descrições textuais como se fossem colunas
+- Se o contexto mostra "Colunas: ['Time', 'V1', ..., 'Amount', 'Class']", essas são as colunas REAIS
+- Seja PRECISO: liste EXATAMENTE as colunas fornecidas, com seus tipos REAIS
+- Se a informação não está no contexto estruturado, diga que não tem acesso a ela"""
+
+_LLM_SYSTEM_PROMPT_GENERAL = """Você é um assistente de análise de dados especializado em CSV e análise estatística.
+Responda de forma clara, precisa e útil. Use português brasileiro.
+
+🎯 Forneça uma resposta útil e estruturada."""
+
+
 class QueryType(Enum):
     """Tipos de consultas que o orquestrador pode processar."""
     CSV_ANALYSIS = "csv_analysis"      # Análise de dados CSV
@@ -113,6 +164,10 @@ class QueryType(Enum):
     UNKNOWN = "unknown"                # Tipo não identificado
 
 
+# Tipos cuja pergunta pode ser respondida pelo atalho estatístico (sem RAG/LLM)
+_STAT_FAST_PATH_TYPES = (QueryType.CSV_ANALYSIS, QueryType.LLM_ANALYSIS, QueryType.HYBRID)
+
+
 @dataclass
 class AgentTask:
     """Representa uma tarefa para um agente específico."""
@@ -243,6 +298,12 @@ class OrchestratorAgent(BaseAgent):
         else:
             self.data_processor = None
         
+        # Atalho estatístico determinístico (respostas exatas do perfil do dataset, sem LLM)
+        self.stat_fast_path = None
+        if STAT_FAST_PATH_ENABLED and PYTHON_ANALYZER_AVAILABLE and python_analyzer:
+            self.stat_fast_path = StatFastPath(python_analyzer.get_dataset_profile)
+            self.logger.info("✅ Atalho estatístico inicializado")
+        
         # Semantic Router (para classificação inteligente de intenções via embeddings)
         if SEMANTIC_ROUTER_AVAILABLE:
             try:
@@ -358,7 +419,10 @@ class OrchestratorAgent(BaseAgent):
             self.logger.info(f"📝 Tipo de consulta identificado: {query_type.value}")
             
             # 3. Processar baseado no tipo
-            if query_type == QueryType.CSV_ANALYSIS:
+            fast_result = self._try_stat_fast_path(query, query_type, context)
+            if fast_result is not None:
+                result = fast_result
+            elif query_type == QueryType.CSV_ANALYSIS:
                 result = self._handle_csv_analysis(query, context)
             elif query_type == QueryType.RAG_SEARCH:
                 result = self._handle_rag_search(query, context)
@@ -772,6 +836,31 @@ class OrchestratorAgent(BaseAgent):
         else:
             return QueryType.GENERAL
     
+    def _try_stat_fast_path(self, query: str, query_type: QueryType,
+                            context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Responde perguntas estatísticas estruturadas direto do perfil do dataset.
+        
+        Retorna None (fluxo normal com recuperação e LLM) quando o atalho está
+        desabilitado, o tipo de consulta não se aplica, a pergunta é ambígua ou
+        há um arquivo no contexto (o perfil descreve apenas o dataset ingerido).
+        """
+        if self.stat_fast_path is None or query_type not in _STAT_FAST_PATH_TYPES:
+            return None
+        if (context and context.get("file_path")) or self.current_data_context.get("file_path"):
+            self.logger.debug("Atalho estatístico ignorado: consulta sobre arquivo do contexto")
+            return None
+        answer = self.stat_fast_path.try_answer(query)
+        if answer is None:
+            return None
+        
+        self.logger.info(f"⚡ Consulta respondida pelo atalho estatístico em {answer.elapsed_ms:.1f}ms")
+        metadata = answer.to_metadata()
+        metadata["query_type"] = query_type.value
+        return self._enhance_response(
+            self._build_response(answer.response, metadata=metadata),
+            ["stat_fast_path"]
+        )
+    
     def _handle_csv_analysis(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Delega análise CSV para o agente especializado.
         
@@ -899,7 +988,6 @@ class OrchestratorAgent(BaseAgent):
         self.logger.info("🔍 Delegando para agente RAG [async]")
         try:
             result_candidate = self.agents["rag"].process(query, context)
-            import inspect
             if inspect.isawaitable(result_candidate):
                 result = await result_candidate
             else:
@@ -939,20 +1027,21 @@ class OrchestratorAgent(BaseAgent):
             self.logger.info(f"📝 [async] Tipo de consulta identificado: {query_type.value}")
 
             # Processar baseado no tipo (usar versões async quando disponível)
-            if query_type == QueryType.CSV_ANALYSIS:
+            fast_result = await asyncio.to_thread(self._try_stat_fast_path, query, query_type, context)
+            if fast_result is not None:
+                result = fast_result
+            elif query_type == QueryType.CSV_ANALYSIS:
                 result = await self._handle_csv_analysis_async(query, context)
             elif query_type == QueryType.RAG_SEARCH:
                 result = await self._handle_rag_search_async(query, context)
             elif query_type == QueryType.DATA_LOADING:
                 result = self._handle_data_loading(query, context)
             elif query_type == QueryType.LLM_ANALYSIS:
-                # LLM analysis pode chamar agentes sync/async internamente
-                # Reusar implementação síncrona e permitir que ela chame agentes sync
-                result = self._handle_llm_analysis(query, context)
+                result = await self._handle_llm_analysis_async(query, context)
             elif query_type == QueryType.HYBRID:
                 result = self._handle_hybrid_query(query, context)
             elif query_type == QueryType.GENERAL:
-                result = self._handle_general_query(query, context)
+                result = await self._handle_general_query_async(query, context)
             else:
                 result = self._handle_unknown_query(query, context)
 
@@ -1071,6 +1160,10 @@ context = {"file_path": "caminho/para/seu/arquivo.csv"}
 
     def _handle_llm_analysis(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Processa consultas através do LLM Manager com verificação de base de dados."""
+        return run_sync(self._handle_llm_analysis_async(query, context))
+
+    async def _handle_llm_analysis_async(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Versão async de _handle_llm_analysis (chamadas LLM não bloqueiam o event loop)."""
         if not self.llm_manager:
             return self._build_response(
                 "❌ LLM Manager não está disponível",
@@ -1089,7 +1182,7 @@ context = {"file_path": "caminho/para/seu/arquivo.csv"}
         needs_data_analysis = any(keyword in query.lower() for keyword in data_specific_keywords)
         
         # 2. VERIFICAR ESTADO DOS DADOS
-        has_loaded_data = self._check_data_availability()
+        has_loaded_data = await asyncio.to_thread(self._check_data_availability)
         has_file_context = bool(context and context.get("file_path"))
         
         self.logger.info(f"📊 Análise necessária: {needs_data_analysis}, Dados carregados: {has_loaded_data}, Arquivo no contexto: {has_file_context}")
@@ -1130,6 +1223,8 @@ Sua pergunta requer análise de dados específicos, mas não há nenhuma base de
                 try:
                     load_query = f"carregar e analisar estrutura básica"
                     csv_result = self.agents["csv"].process(load_query, context)
+                    if inspect.isawaitable(csv_result):
+                        csv_result = await csv_result
                     
                     if csv_result and not csv_result.get("metadata", {}).get("error", False):
                         # Extrair informações do CSV e atualizar contexto
@@ -1167,7 +1262,11 @@ Sua pergunta requer análise de dados específicos, mas não há nenhuma base de
                 try:
                     # Enriquecer contexto com análise semântica via RAG
                     self.logger.info("📚 Usando RAG para interpretação semântica dos chunks...")
-                    rag_result = self.agents["rag"].process(query, {"include_context": True, "max_results": 5})
+                    rag_result = await asyncio.to_thread(
+                        self.agents["rag"].process, query, {"include_context": True, "max_results": 5}
+                    )
+                    if inspect.isawaitable(rag_result):
+                        rag_result = await rag_result
                     
                     if rag_result and not rag_result.get("metadata", {}).get("error"):
                         # Adicionar contexto RAG ao LLM context
@@ -1184,7 +1283,7 @@ Sua pergunta requer análise de dados específicos, mas não há nenhuma base de
                 self.logger.info("🔍 Recuperando dados da base Supabase para análise...")
                 try:
                     # Recuperar informações sobre os dados armazenados
-                    supabase_data_context = self._retrieve_data_context_from_supabase()
+                    supabase_data_context = await asyncio.to_thread(self._retrieve_data_context_from_supabase)
                     if supabase_data_context:
                         llm_context.update(supabase_data_context)
                         self.logger.info("✅ Contexto de dados recuperado do Supabase")
@@ -1194,12 +1293,13 @@ Sua pergunta requer análise de dados específicos, mas não há nenhuma base de
                     self.logger.error(f"❌ Erro ao recuperar dados do Supabase: {str(e)}")
         
         # 5. CONSTRUIR PROMPT CONTEXTUALIZADO
-        prompt = self._build_llm_prompt(query, llm_context, needs_data_analysis)
+        system_prompt, prompt = self._build_llm_prompt(query, llm_context, needs_data_analysis)
         
         try:
             # 6. CHAMAR LLM MANAGER com configuração otimizada
             config = LLMConfig(temperature=0.2, max_tokens=512)  # Reduzir tokens de resposta
-            response = self.llm_manager.chat(prompt, config)
+            response = await self.llm_manager.achat(prompt, config, system_prompt=system_prompt, cache_query=query,
+                                                    complexity=LLMRouter.detect_complexity(query))
             
             if not response.success:
                 raise RuntimeError(response.error)
@@ -1222,11 +1322,11 @@ Sua pergunta requer análise de dados específicos, mas não há nenhuma base de
                         
                         # Tentar novamente com correções
                         self.logger.info("🔄 Tentando nova consulta com correções...")
-                        corrected_prompt = self._build_llm_prompt(query, corrected_context, needs_data_analysis)
+                        corrected_system, corrected_prompt = self._build_llm_prompt(query, corrected_context, needs_data_analysis)
                         
                         try:
                             config = LLMConfig(temperature=0.1, max_tokens=512)  # Temperatura mais baixa para precisão
-                            corrected_response = self.llm_manager.chat(corrected_prompt, config)
+                            corrected_response = await self.llm_manager.achat(corrected_prompt, config, system_prompt=corrected_system)
                             
                             if corrected_response.success:
                                 response = corrected_response
@@ -1304,6 +1404,10 @@ Sua pergunta requer análise de dados específicos, mas não há nenhuma base de
     
     def _handle_general_query(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         """Processa consultas gerais/conversacionais."""
+        return run_sync(self._handle_general_query_async(query, context))
+
+    async def _handle_general_query_async(self, query: str, context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Versão async de _handle_general_query."""
         self.logger.info("💬 Processando consulta geral")
         
         query_lower = query.lower()
@@ -1339,9 +1443,10 @@ Sou o coordenador central que pode te ajudar com:
         # Usar LLM Manager para resposta geral se disponível
         elif self.llm_manager:
             try:
-                prompt = self._build_llm_prompt(query, context)
+                system_prompt, prompt = self._build_llm_prompt(query, context)
                 config = LLMConfig(temperature=0.3, max_tokens=512)  # Mais criativo para consultas gerais
-                response = self.llm_manager.chat(prompt, config)
+                response = await self.llm_manager.achat(prompt, config, system_prompt=system_prompt, cache_query=query,
+                                                        complexity=LLMRouter.detect_complexity(query))
                 
                 if response.success:
                     result = {"content": response.content}
@@ -1546,73 +1651,16 @@ context = {"file_path": "fraude.csv"}
         self.logger.info(f"🧠 Processando com memória persistente: '{query[:50]}...'")
         
         try:
-            # 1. Inicializar sessão de memória se necessário
-            if session_id and self.has_memory:
-                if not self._current_session_id or self._current_session_id != session_id:
-                    await self.init_memory_session(session_id)
-            elif not self._current_session_id and self.has_memory:
-                session_id = await self.init_memory_session()
-            
-            # 2. Recuperar contexto de memória
-            memory_context = {}
-            if self.has_memory and self._current_session_id:
-                memory_context = await self.recall_conversation_context()
-                self.logger.debug(f"Contexto de memória recuperado: {len(memory_context.get('recent_conversations', []))} interações")
-                
-                # Mescla contexto de memória com contexto atual
-                if context:
-                    context.update({"memory_context": memory_context})
-                else:
-                    context = {"memory_context": memory_context}
-            
-            # 3. Verificar cache de análises
-            analysis_cache_key = None
-            if context and context.get('file_path'):
-                analysis_cache_key = f"analysis_{hash(query + str(context.get('file_path')))}"
-                cached_result = await self.recall_cached_analysis(analysis_cache_key)
-                if cached_result:
-                    self.logger.info("📦 Resultado recuperado do cache de análises")
-                    cached_result['metadata']['from_cache'] = True
-                    return cached_result
+            # 1-3. Sessão, contexto de memória e cache de análises
+            context, analysis_cache_key, cached_result = await self._prepare_memory_context(query, context, session_id)
+            if cached_result:
+                return cached_result
             
             # 4. Processar consulta usando versão assíncrona (evita coroutines não aguardadas)
             result = await self._process_async(query, context)
             
-            # 5. Salvar interação na memória persistente
-            if self.has_memory and self._current_session_id:
-                await self.remember_interaction(
-                    query=query,
-                    response=result.get('content', str(result)),
-                    metadata=result.get('metadata', {})
-                )
-                
-                # 6. Cachear resultado de análise se aplicável
-                if analysis_cache_key and result.get('metadata', {}).get('query_type') in ['csv_analysis', 'llm_analysis']:
-                    await self.remember_analysis_result(analysis_cache_key, result, expiry_hours=24)
-                
-                # 7. Salvar contexto de dados se carregado
-                if context and context.get('file_path'):
-                    data_context = {
-                        'file_path': context['file_path'],
-                        'last_query': query,
-                        'timestamp': self._get_timestamp()
-                    }
-                    await self.remember_data_context(data_context, "current_data")
-            
-            # 8. Adicionar informações de memória à resposta
-            if self.has_memory:
-                result.setdefault('metadata', {})['session_id'] = self._current_session_id
-                result.setdefault('metadata', {})['memory_enabled'] = True
-                
-                # Estatísticas de memória
-                memory_stats = await self.get_memory_stats()
-                result.setdefault('metadata', {})['memory_stats'] = memory_stats
-            
-            # 9. Garantir compatibilidade do campo 'content' (RAGDataAgent retorna 'response')
-            if 'response' in result and 'content' not in result:
-                result['content'] = result['response']
-            
-            return result
+            # 5-9. Persistência e metadados de memória
+            return await self._finalize_with_memory(query, context, analysis_cache_key, result)
             
         except Exception as e:
             self.logger.error(f"Erro no processamento com memória: {e}", exc_info=True)
@@ -1622,6 +1670,118 @@ context = {"file_path": "fraude.csv"}
             except Exception:
                 return self._build_response(f"❌ Erro no processamento com memória: {str(e)}", metadata={"error": True})
     
+    async def process_with_persistent_memory_stream(self, query: str, context: Optional[Dict[str, Any]] = None,
+                                                  session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão em streaming de ``process_with_persistent_memory``.
+        
+        A chamada LLM que produz a resposta final transmite os tokens conforme
+        chegam do provedor (``src.llm.streaming``); o restante do pipeline é o mesmo.
+        
+        Yields:
+            ``{"type": "token", "content": trecho}`` para cada trecho recebido e, ao
+            final, ``{"type": "done", "content": resposta, "metadata": {...}}``. A
+            resposta do evento ``done`` é a oficial (inclui pós-processamento).
+        """
+        self.logger.info(f"🧠 Processando (streaming) com memória persistente: '{query[:50]}...'")
+        
+        context, analysis_cache_key, cached_result = await self._prepare_memory_context(query, context, session_id)
+        if cached_result:
+            result = cached_result
+        else:
+            async def process_and_remember() -> Dict[str, Any]:
+                processed = await self._process_async(query, context)
+                return await self._finalize_with_memory(query, context, analysis_cache_key, processed)
+            
+            # Se o cliente desconectar, o processamento termina em segundo plano e a
+            # interação ainda é persistida na memória
+            result = None
+            async with aclosing(stream_with_tokens(process_and_remember, cancel_on_close=False)) as events:
+                async for kind, value in events:
+                    if kind == "token":
+                        yield {"type": "token", "content": value}
+                    else:
+                        result = value
+        
+        yield {"type": "done", "content": result.get('content', ''), "metadata": result.get('metadata', {})}
+    
+    async def _prepare_memory_context(self, query: str, context: Optional[Dict[str, Any]],
+                                      session_id: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[Dict[str, Any]]]:
+        """Passos 1-3 do processamento com memória.
+        
+        Returns:
+            (contexto mesclado com a memória, chave do cache de análises, resultado em cache ou None)
+        """
+        # 1. Inicializar sessão de memória se necessário
+        if session_id and self.has_memory:
+            if not self._current_session_id or self._current_session_id != session_id:
+                await self.init_memory_session(session_id)
+        elif not self._current_session_id and self.has_memory:
+            session_id = await self.init_memory_session()
+        
+        # 2. Recuperar contexto de memória
+        memory_context = {}
+        if self.has_memory and self._current_session_id:
+            memory_context = await self.recall_conversation_context()
+            self.logger.debug(f"Contexto de memória recuperado: {len(memory_context.get('recent_conversations', []))} interações")
+            
+            # Mescla contexto de memória com contexto atual
+            if context:
+                context.update({"memory_context": memory_context})
+            else:
+                context = {"memory_context": memory_context}
+        
+        # 3. Verificar cache de análises
+        analysis_cache_key = None
+        if context and context.get('file_path'):
+            analysis_cache_key = f"analysis_{hash(query + str(context.get('file_path')))}"
+            cached_result = await self.recall_cached_analysis(analysis_cache_key)
+            if cached_result:
+                self.logger.info("📦 Resultado recuperado do cache de análises")
+                cached_result['metadata']['from_cache'] = True
+                return context, analysis_cache_key, cached_result
+        
+        return context, analysis_cache_key, None
+    
+    async def _finalize_with_memory(self, query: str, context: Optional[Dict[str, Any]],
+                                    analysis_cache_key: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Passos 5-9 do processamento com memória: persiste a interação e anota a resposta."""
+        # 5. Salvar interação na memória persistente
+        if self.has_memory and self._current_session_id:
+            await self.remember_interaction(
+                query=query,
+                response=result.get('content', str(result)),
+                metadata=result.get('metadata', {})
+            )
+            
+            # 6. Cachear resultado de análise se aplicável
+            if analysis_cache_key and result.get('metadata', {}).get('query_type') in ['csv_analysis', 'llm_analysis']:
+                await self.remember_analysis_result(analysis_cache_key, result, expiry_hours=24)
+            
+            # 7. Salvar contexto de dados se carregado
+            if context and context.get('file_path'):
+                data_context = {
+                    'file_path': context['file_path'],
+                    'last_query': query,
+                    'timestamp': self._get_timestamp()
+                }
+                await self.remember_data_context(data_context, "current_data")
+        
+        # 8. Adicionar informações de memória à resposta
+        if self.has_memory:
+            result.setdefault('metadata', {})['session_id'] = self._current_session_id
+            result.setdefault('metadata', {})['memory_enabled'] = True
+            
+            # Estatísticas de memória
+            memory_stats = await self.get_memory_stats()
+            result.setdefault('metadata', {})['memory_stats'] = memory_stats
+        
+        # 9. Garantir compatibilidade do campo 'content' (RAGDataAgent retorna 'response')
+        if 'response' in result and 'content' not in result:
+            result['content'] = result['response']
+        
+        return result
+    
     # ========================================================================
     # MÉTODOS DE GESTÃO DE MEMÓRIA PARA COMPATIBILIDADE
     # ========================================================================
@@ -1773,81 +1933,59 @@ context = {"file_path": "fraude.csv"}
         
         return self._build_response(response, metadata={"agents": agents_info})
 
-    def _build_llm_prompt(self, query: str, context: Optional[Dict[str, Any]] = None, needs_data_analysis: bool = False) -> Tuple[str, Optional[str]]:
+    def _build_llm_prompt(self, query: str, context: Optional[Dict[str, Any]] = None,
+                          needs_data_analysis: bool = False) -> Tuple[str, str]:
         """Constrói prompt contextualizado para o LLM Manager.
         
+        As instruções são estáticas e vão no system prompt, no início da
+        requisição, para aproveitar o cache de prefixo dos provedores; os
+        valores dinâmicos (arquivo, análise, consulta, correções) vão no
+        prompt do usuário, montado com orçamento de tokens
+        (``LLM_PROMPT_MAX_TOKENS`` menos os tokens do system prompt, contados
+        uma única vez): a análise dos dados é cortada antes de
+        colunas/dimensões; consulta e correções nunca são cortadas.
+        
         Args:
             query: Consulta do usuário
             context: Contexto adicional (dados, histórico, etc.)
             needs_data_analysis: Se a consulta requer análise de dados específicos
             
         Returns:
-            Tuple[str, Optional[str]]: (user_prompt, system_prompt)
+            Tuple[str, str]: (system prompt, prompt do usuário)
         """
-        prompt_parts = []
-        
-        # Instrução base diferenciada
+        # Instrução diferenciada
         if needs_data_analysis and context and context.get("csv_loaded"):
-            prompt_parts.append("""Você é um assistente especializado em análise de dados CSV.
-Responda com base ESPECIFICAMENTE nos dados carregados fornecidos no contexto.
-Use português brasileiro e seja preciso e detalhado sobre os dados reais.""")
+            system_template = compile_template(_LLM_SYSTEM_PROMPT_DATA)
         else:
-            prompt_parts.append("""Você é um assistente de análise de dados especializado em CSV e análise estatística.
-Responda de forma clara, precisa e útil. Use português brasileiro.""")
+            system_template = compile_template(_LLM_SYSTEM_PROMPT_GENERAL)
+        
+        segments = []
         
         # Adicionar contexto de dados se disponível
         if context:
             if 'file_path' in context:
-                prompt_parts.append(f"\n📊 ARQUIVO CARREGADO: {context['file_path']}")
+                segments.append(PromptSegment("arquivo", f"📊 ARQUIVO CARREGADO: {context['file_path']}", required=True))
             
             if 'csv_analysis' in context:
-                prompt_parts.append(f"\n📈 ANÁLISE DOS DADOS:\n{context['csv_analysis']}")
+                segments.append(PromptSegment("analise", f"\n📈 ANÁLISE DOS DADOS:\n{context['csv_analysis']}", priority=1))
                 
             if 'columns_summary' in context:
-                prompt_parts.append(f"\n📋 COLUNAS: {context['columns_summary']}")
+                segments.append(PromptSegment("colunas", f"\n📋 COLUNAS: {context['columns_summary']}", priority=2))
                 
             if 'shape' in context:
-                prompt_parts.append(f"\n� DIMENSÕES: {context['shape']}")
+                segments.append(PromptSegment("dimensoes", f"\n� DIMENSÕES: {context['shape']}", priority=2))
         
         # Adicionar a consulta do usuário
-        prompt_parts.append(f"\n❓ CONSULTA DO USUÁRIO: {query}")
-        
-        # Instrução final diferenciada
-        if needs_data_analysis and context and context.get("csv_loaded"):
-            # 🔄 CORREÇÃO CRÍTICA: Sempre analisar dados CSV ESTRUTURADOS reconstruídos da tabela embeddings
-            prompt_parts.append("""\n🎯 INSTRUÇÕES CRÍTICAS PARA ANÁLISE DE DADOS CSV (da tabela embeddings):
-
-� CONTEXTO RECEBIDO:
-- Você recebeu DADOS ESTRUTURADOS (DataFrame) reconstruídos da coluna chunk_text da tabela embeddings
-- Esses dados foram parseados como CSV e representam as COLUNAS ORIGINAIS do arquivo CSV carregado
-- As estatísticas fornecidas (dtypes, describe, info) refletem os DADOS REAIS, não a estrutura da tabela embeddings
-
-🔍 COMO ANALISAR:
-1. EXAMINE as COLUNAS listadas na seção "ANÁLISE DOS DADOS"
-2. IDENTIFIQUE os TIPOS DE DADOS usando dtypes:
-   - **Numéricos**: float64, int64, float32, int32, etc.
-   - **Categóricos**: object, category, bool
-   - **Temporais**: datetime64, timedelta
-   - **Texto**: object (sem padrão numérico)
-
-3. USE as ESTATÍSTICAS FORNECIDAS:
-   - Para distribuições: count, mean, std, min, max, quartis
-   - Para valores únicos: nunique(), value_counts()
-   - Para tipos: dtypes explícitos
-
-⚠️ REGRAS CRÍTICAS:
-- Use APENAS os dtypes fornecidos para classificar tipos de dados
-- NÃO confunda com colunas da tabela embeddings (id, chunk_text, created_at, embedding)
-- NÃO interprete palavras soltas ou descrições textuais como se fossem colunas
-- Se o contexto mostra "Colunas: ['Time', 'V1', ..., 'Amount', 'Class']", essas são as colunas REAIS
-- Seja PRECISO: liste EXATAMENTE as colunas fornecidas, com seus tipos REAIS
-- Se a informação não está no contexto estruturado, diga que não tem acesso a ela""")
-        else:
-            prompt_parts.append("\n🎯 Forneça uma resposta útil e estruturada:")
+        segments.append(PromptSegment("consulta", f"\n❓ CONSULTA DO USUÁRIO: {query}", required=True))
         
         # Adicionar correções se disponíveis
         if context and 'correction_prompt' in context:
-            prompt_parts.append(f"\n{context['correction_prompt']}")
-            prompt_parts.append("\nRefaça sua resposta com os valores corretos fornecidos acima.")
-        
-        return "\n".join(prompt_parts)
\ No newline at end of file
+            segments.append(PromptSegment(
+                "correcao",
+                f"\n{context['correction_prompt']}\n\nRefaça sua resposta com os valores corretos fornecidos acima.",
+                required=True
+            ))
+        
+        prompt = PromptBudget().assemble(segments, reserved_tokens=system_template.static_tokens,
+                                         label="Prompt do orquestrador").text
+        return system_template.static_prefix, prompt
\ No newline at end of file
@@ -10,7 +10,8 @@ Este agente combina:
 - Geração de respostas contextualizadas via LLM
 """
 from __future__ import annotations
-from typing import List, Dict, Any, Optional, Union, Tuple
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Union, Tuple
+import itertools
 import time
 import io
 from pathlib import Path
@@ -19,8 +20,19 @@ import pandas as pd
 
 from src.agent.base_agent import BaseAgent, AgentError
 from src.embeddings.chunker import TextChunker, ChunkStrategy, TextChunk
-from src.embeddings.generator import EmbeddingGenerator, EmbeddingProvider
+from src.embeddings.generator import EmbeddingGenerator, EmbeddingProvider, EmbeddingResult
 from src.embeddings.vector_store import VectorStore, VectorSearchResult
+from src.embeddings.ingest_pipeline import StagedPipeline, PipelineStage, iter_batches
+from src.embeddings.csv_enrichment import enrich_csv_chunks
+from src.data.dataset_cache import get_dataset_cache
+from src.data.outlier_engine import detect_outliers
+from src.settings import (
+    INGEST_PIPELINE_BATCH_SIZE,
+    INGEST_PIPELINE_QUEUE_SIZE,
+    INGEST_PIPELINE_ENRICH_WORKERS,
+    INGEST_PIPELINE_EMBED_WORKERS,
+    INGEST_PIPELINE_STORE_WORKERS,
+)
 from src.api.sonar_client import send_sonar_query
 
 
@@ -95,55 +107,49 @@ class RAGAgent(BaseAgent):
         start_time = time.perf_counter()
         
         try:
-            # 1. Chunking
-            self.logger.info("Executando chunking...")
-            chunks = self.chunker.chunk_text(text, source_id, chunk_strategy)
+            # 1. Chunking sob demanda: alimenta o pipeline enquanto o texto ainda é dividido
+            chunking_start = time.perf_counter()
+            chunk_iter = self.chunker.iter_chunks(text, source_id, chunk_strategy)
+            first_chunk = next(chunk_iter, None)
+            first_chunk_time = time.perf_counter() - chunking_start
             
-            if not chunks:
+            if first_chunk is None:
                 return self._build_response(
                     "Nenhum chunk válido foi criado a partir do texto",
                     metadata={"error": True}
                 )
-
-            # OTIMIZAÇÃO BALANCEADA: Enriquecimento leve para manter precisão sem comprometer velocidade
-            if chunk_strategy == ChunkStrategy.CSV_ROW:
-                chunks = self._enrich_csv_chunks_light(chunks)
             
-            chunk_stats = self.chunker.get_stats(chunks)
-            self.logger.info(f"Criados {len(chunks)} chunks")
+            chunks: List[TextChunk] = []
             
-            # 2. Geração de embeddings (MODO ASSÍNCRONO para performance)
-            self.logger.info("Gerando embeddings com processamento assíncrono...")
+            def produce_chunks() -> Iterator[TextChunk]:
+                for chunk in itertools.chain([first_chunk], chunk_iter):
+                    chunks.append(chunk)
+                    yield chunk
             
-            # Usar geração assíncrona se disponível
-            try:
-                from src.embeddings.async_generator import run_async_embeddings
-                embedding_results = run_async_embeddings(
-                    chunks=chunks,
-                    provider=self.embedding_generator.provider,
-                    max_workers=4  # 4 workers paralelos
-                )
-                self.logger.info("✅ Embeddings gerados com processamento assíncrono")
-            except ImportError:
-                # Fallback para processamento síncrono
-                self.logger.warning("Processamento assíncrono não disponível, usando síncrono")
-                embedding_results = self.embedding_generator.generate_embeddings_batch(chunks)
-            except Exception as e:
-                self.logger.error(f"Erro no processamento assíncrono: {e}, fallback para síncrono")
-                embedding_results = self.embedding_generator.generate_embeddings_batch(chunks)
+            # 2. Pipeline em estágios: chunking → enriquecimento → embeddings → armazenamento
+            # Filas limitadas entre estágios: a CPU gera embeddings enquanto a rede insere lotes anteriores
+            self.logger.info("Executando pipeline de ingestão (chunking → enriquecimento → embeddings → armazenamento)...")
+            embedding_results, stored_ids, pipeline_metrics = self._run_ingest_pipeline(
+                produce_chunks(), source_type, enrich_csv=chunk_strategy == ChunkStrategy.CSV_ROW
+            )
+            chunking_time = first_chunk_time + pipeline_metrics["stages"]["chunk"]["busy_time"]
+            pipeline_metrics["chunking_time"] = round(chunking_time, 4)
+            
+            chunk_stats = self.chunker.get_stats(chunks)
+            self.logger.info(f"Criados {len(chunks)} chunks")
             
             if not embedding_results:
                 return self._build_response(
                     "Falha na geração de embeddings",
-                    metadata={"error": True, "chunk_stats": chunk_stats}
+                    metadata={"error": True, "chunk_stats": chunk_stats, "pipeline_metrics": pipeline_metrics}
                 )
             
             embedding_stats = self.embedding_generator.get_embedding_stats(embedding_results)
-            self.logger.info(f"Gerados {len(embedding_results)} embeddings")
+            self.logger.info(f"Gerados {len(embedding_results)} embeddings, {len(stored_ids)} armazenados")
+            self.logger.info(f"⏱️ Gargalo do pipeline: {pipeline_metrics.get('bottleneck')}")
             
-            # 3. Armazenamento
-            self.logger.info("Armazenando no vector store...")
-            stored_ids = self.vector_store.store_embeddings(embedding_results, source_type)
+            # Datasets reconstruídos desta fonte ficaram obsoletos
+            get_dataset_cache().invalidate(source_id)
             
             processing_time = time.perf_counter() - start_time
             
@@ -158,6 +164,7 @@ class RAGAgent(BaseAgent):
                 "chunk_strategy": chunk_strategy.value,
                 "chunk_stats": chunk_stats,
                 "embedding_stats": embedding_stats,
+                "pipeline_metrics": pipeline_metrics,
                 "success_rate": len(stored_ids) / len(chunks) * 100 if chunks else 0
             }
             
@@ -176,6 +183,46 @@ class RAGAgent(BaseAgent):
                 metadata={"error": True}
             )
     
+    def _run_ingest_pipeline(self,
+                             chunks: Iterable[TextChunk],
+                             source_type: str,
+                             enrich_csv: bool = False) -> Tuple[List[EmbeddingResult], List[str], Dict[str, Any]]:
+        """Executa enriquecimento, embeddings e armazenamento como estágios concorrentes.
+        
+        Args:
+            chunks: Chunks do chunker (lista ou gerador consumido sob demanda)
+            source_type: Tipo da fonte repassado ao vector store
+            enrich_csv: Aplica ``_enrich_csv_chunks_light`` como estágio
+        
+        Returns:
+            Tupla (embedding_results, stored_ids, métricas por estágio), ambos
+            na ordem dos chunks
+        """
+        stages: List[PipelineStage] = []
+        if enrich_csv:
+            stages.append(PipelineStage("enrich", self._enrich_csv_chunks_light, INGEST_PIPELINE_ENRICH_WORKERS))
+        
+        def embed(batch: List[TextChunk]) -> Optional[List[EmbeddingResult]]:
+            results = self.embedding_generator.generate_embeddings_batch(batch, batch_size=len(batch))
+            return results or None
+        
+        def store(batch: List[EmbeddingResult]) -> Tuple[List[EmbeddingResult], List[str]]:
+            return batch, self.vector_store.store_embeddings(batch, source_type)
+        
+        stages.append(PipelineStage("embed", embed, INGEST_PIPELINE_EMBED_WORKERS))
+        stages.append(PipelineStage("store", store, INGEST_PIPELINE_STORE_WORKERS))
+        
+        pipeline = StagedPipeline(stages, queue_size=INGEST_PIPELINE_QUEUE_SIZE)
+        outputs = pipeline.run(iter_batches(chunks, INGEST_PIPELINE_BATCH_SIZE), source_name="chunk")
+        
+        embedding_results: List[EmbeddingResult] = []
+        stored_ids: List[str] = []
+        for batch_results, batch_ids in outputs:
+            embedding_results.extend(batch_results)
+            stored_ids.extend(batch_ids)
+        
+        return embedding_results, stored_ids, pipeline.get_metrics()
+
     def ingest_csv_data(self, 
                        csv_text: str, 
                        source_id: str,
@@ -216,88 +263,12 @@ class RAGAgent(BaseAgent):
         return result
 
     def _enrich_csv_chunks_light(self, chunks: List[TextChunk]) -> List[TextChunk]:
-        """VERSÃO BALANCEADA - Enriquecimento leve que mantém precisão sem comprometer velocidade."""
-        enriched_chunks: List[TextChunk] = []
-
-        for chunk in chunks:
-            info = chunk.metadata.additional_info or {}
-            start_row = info.get("start_row")
-            end_row = info.get("end_row")
-            row_span = f"linhas {start_row} a {end_row}" if start_row and end_row else "intervalo não identificado"
-            
-            # Análise rápida sem pandas
-            lines = chunk.content.split('\n')
-            header_line = lines[0] if lines else ""
-            data_lines = [line for line in lines[1:] if line.strip()]
-            
-            # Extrair nome do arquivo CSV do metadata do chunk
-            csv_filename = chunk.metadata.additional_info.get('source_file', 'dataset.csv') if chunk.metadata.additional_info else 'dataset.csv'
-            if not csv_filename.endswith('.csv'):
-                # Tentar extrair do conteúdo do chunk
-                import re
-                csv_match = re.search(r'([\w-]+\.csv)', chunk.content)
-                if csv_match:
-                    csv_filename = csv_match.group(1)
-            
-            # Detectar automaticamente colunas do header (genérico para qualquer CSV)
-            detected_columns = []
-            if header_line:
-                # Parsear header (com ou sem aspas)
-                detected_columns = [col.strip().strip('"') for col in header_line.split(',')]
-                detected_columns = [col for col in detected_columns if col and not col.startswith('#')]
-            
-            # Análise genérica: detectar possíveis colunas de classificação/target (última coluna)
-            target_column = None
-            binary_class_count = 0
-            if detected_columns and len(detected_columns) > 0:
-                target_column = detected_columns[-1]  # Última coluna geralmente é o target
-                # Verificar se é binária (0 ou 1)
-                for line in data_lines[:100]:  # Amostra
-                    parts = line.split(',')
-                    if parts and parts[-1].strip() in ['0', '1', '"0"', '"1"']:
-                        binary_class_count += 1
-            
-            # Construir descrição contextual genérica e otimizada
-            summary_lines = [
-                f"Chunk do dataset {csv_filename} ({row_span}) - {len(data_lines)} registros",
-            ]
-            
-            # Adicionar informações sobre colunas detectadas
-            if detected_columns:
-                num_cols = len(detected_columns)
-                col_sample = ', '.join(detected_columns[:3])
-                if num_cols > 3:
-                    col_sample += f", ... ({num_cols} colunas no total)"
-                summary_lines.append(f"Colunas: {col_sample}")
-            
-            # Se detectar possível classificação binária
-            if binary_class_count > 0:
-                binary_ratio = (binary_class_count / min(len(data_lines), 100)) * 100
-                if binary_ratio > 50:  # Se >50% das linhas são binárias na última coluna
-                    if target_column:
-                        summary_lines.append(f"Coluna '{target_column}': Variável binária detectada (~{binary_ratio:.1f}% de valores binários na amostra)")
-                    else:
-                        summary_lines.append(f"Classificação binária detectada (~{binary_ratio:.1f}% na amostra)")
-            
-            # Adicionar informação sobre tipo de dados
-            if len(detected_columns) > 5:
-                summary_lines.append(f"Dataset com {len(detected_columns)} features para análise")
-            
-            # Amostra das primeiras linhas para contexto
-            if len(data_lines) >= 2:
-                sample_line = data_lines[0][:150] + "..." if len(data_lines[0]) > 150 else data_lines[0]
-                summary_lines.append(f"Exemplo de registro: {sample_line}")
-            
-            # Incluir cabeçalho para referência
-            summary_lines.append(f"Colunas: {header_line}")
-
-            # CORREÇÃO CRÍTICA: Manter dados originais + adicionar contexto enriquecido
-            context_summary = "\n".join(summary_lines)
-            enriched_content = f"{context_summary}\n\n=== DADOS ORIGINAIS ===\n{chunk.content}"
-            
-            enriched_chunks.append(TextChunk(content=enriched_content, metadata=chunk.metadata))
-
-        return enriched_chunks
+        """VERSÃO BALANCEADA - Enriquecimento leve que mantém precisão sem comprometer velocidade.
+        
+        Processa o lote inteiro (resumo do header calculado uma vez) via
+        ``src.embeddings.csv_enrichment.enrich_csv_chunks``.
+        """
+        return enrich_csv_chunks(chunks)
 
     def _generate_metadata_chunks(self, csv_text: str, source_id: str) -> List[TextChunk]:
         """Gera chunks adicionais sobre metadados do dataset para melhorar RAG.
@@ -477,17 +448,15 @@ VALORES MAIS FREQUENTES (TOP 5) POR COLUNA:
             freq_content += "\n\nOUTLIERS DETECTADOS (Método IQR):\n"
             outliers_detected = False
             if numeric_cols:
-                for col in numeric_cols[:10]:  # Primeiras 10 numéricas
-                    q1, q3 = df[col].quantile([0.25, 0.75])
-                    iqr = q3 - q1
-                    lower_bound = q1 - 1.5 * iqr
-                    upper_bound = q3 + 1.5 * iqr
-                    outliers = df[(df[col] < lower_bound) | (df[col] > upper_bound)][col]
-                    if len(outliers) > 0:
+                # Primeiras 10 numéricas, em uma única passada sobre a matriz
+                report = detect_outliers(df, columns=numeric_cols[:10], methods=("iqr",), top_n=0)
+                for col in report.columns:
+                    iqr_stats = report.per_column[col]["iqr"]
+                    if iqr_stats["count"] > 0:
                         outliers_detected = True
-                        pct_outliers = (len(outliers) / total_rows) * 100
-                        freq_content += f"  • {col}: {len(outliers)} outliers ({pct_outliers:.2f}%)\n"
-                        freq_content += f"    Intervalo normal: [{lower_bound:.2f}, {upper_bound:.2f}]\n"
+                        pct_outliers = (iqr_stats["count"] / total_rows) * 100
+                        freq_content += f"  • {col}: {iqr_stats['count']} outliers ({pct_outliers:.2f}%)\n"
+                        freq_content += f"    Intervalo normal: [{iqr_stats['lower']:.2f}, {iqr_stats['upper']:.2f}]\n"
             
             if not outliers_detected:
                 freq_content += "  Nenhum outlier significativo detectado nas primeiras colunas.\n"
@@ -780,8 +749,11 @@ ANÁLISE TEMPORAL:
             from src.agent.rag_synthesis_agent import synthesize_response
             chunks = [result.chunk_text for result in search_results]
             # Se LLM disponível, use síntese via LangChain; senão, fallback manual
+            # (o contexto é comprimido com os embeddings já calculados pela busca)
             try:
-                content = synthesize_response(chunks, query, use_llm=include_context)
+                content = synthesize_response(chunks, query, use_llm=include_context,
+                                              embeddings=[result.embedding for result in search_results],
+                                              query_embedding=query_embedding)
                 self.logger.info("✅ Resposta consolidada gerada pelo agente de síntese")
             except Exception as e:
                 self.logger.error(f"❌ Falha na síntese via LLM, usando fallback manual: {e}")
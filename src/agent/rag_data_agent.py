@@ -56,6 +56,11 @@ import asyncio
 from src.agent.base_agent import BaseAgent, AgentError
 from src.vectorstore.supabase_client import supabase
 from src.embeddings.generator import EmbeddingGenerator
+from src.llm.prompt_budget import PromptBudget, PromptSegment
+from src.llm.response_cache import get_llm_response_cache
+from src.llm.streaming import claim_token_sink
+from src.settings import LLM_CACHE_ENABLED
+from src.utils.single_flight import get_single_flight, make_flight_key
 from src.utils.logging_config import get_logger
 
 # Imports LangChain
@@ -294,7 +299,10 @@ class RAGDataAgent(BaseAgent):
                         self.logger.info(f"🔁 Nenhum chunk similar — visualização solicitada. Tentando fallback com amostra de {sample_limit} embeddings")
 
                         analyzer = PythonDataAnalyzer(caller_agent=self.name)
-                        sampled_df = analyzer.get_data_from_embeddings(limit=sample_limit, parse_chunk_text=True)
+                        # Apenas as colunas citadas na pergunta (plano de consulta)
+                        plan = analyzer.plan_query_columns(query)
+                        sampled_df = analyzer.get_data_from_embeddings(limit=sample_limit, parse_chunk_text=True,
+                                                                       columns=plan.columns)
 
                         if sampled_df is not None and not sampled_df.empty:
                             self.logger.info(f"🔄 Fallback reconstruct bem-sucedido: {sampled_df.shape[0]} linhas, {sampled_df.shape[1]} colunas")
@@ -579,6 +587,15 @@ class RAGDataAgent(BaseAgent):
         Returns:
             Lista de chunks similares com metadata
         """
+        # Buscas idênticas simultâneas compartilham a mesma chamada RPC
+        flight_key = make_flight_key("rag_match_embeddings", query_embedding, threshold, limit)
+        chunks = get_single_flight("vector_search").do(
+            flight_key,
+            lambda: self._match_embeddings(query_embedding, threshold, limit)
+        )
+        return [dict(chunk) for chunk in chunks]
+    
+    def _match_embeddings(self, query_embedding: List[float], threshold: float, limit: int) -> List[Dict[str, Any]]:
         try:
             # Chamar função RPC match_embeddings
             response = supabase.rpc(
@@ -621,17 +638,16 @@ class RAGDataAgent(BaseAgent):
     ) -> str:
         try:
             # Preparar contexto histórico da conversa
-            history_context = ""
+            history_lines = []
             if memory_context.get('recent_messages') and len(memory_context['recent_messages']) > 0:
-                history_context = "\n\n**Contexto da Conversa Anterior:**\n"
                 for msg in memory_context['recent_messages'][-6:]:  # Últimas 6 mensagens (3 pares user/assistant)
                     msg_type = msg.get('type', 'unknown')
                     content = msg.get('content', '')[:200]  # Limitar a 200 chars
                     if msg_type == 'user':
-                        history_context += f"- Usuário perguntou: {content}\n"
+                        history_lines.append(f"- Usuário perguntou: {content}")
                     elif msg_type == 'assistant':
-                        history_context += f"- Assistente respondeu: {content}\n"
-                history_context += "\n"
+                        history_lines.append(f"- Assistente respondeu: {content}")
+            history_context = self._format_history_context(history_lines, bool(memory_context.get('recent_messages')))
 
             # Preparar prompt DINÂMICO baseado no tipo de query
             query_lower = query.lower()
@@ -780,7 +796,7 @@ class RAGDataAgent(BaseAgent):
                     from src.tools.python_analyzer import python_analyzer
                     
                     # Executar clustering real nos dados
-                    clustering_result = python_analyzer.calculate_clustering_analysis(n_clusters=3)
+                    clustering_result = python_analyzer.calculate_clustering_analysis()
                     
                     if "error" in clustering_result:
                         # Se houve erro, informar ao usuário
@@ -898,6 +914,9 @@ class RAGDataAgent(BaseAgent):
                     "**Resposta:**"
                 )
             
+            # Orçamento de tokens: histórico antigo e chunks menos relevantes são cortados primeiro
+            user_prompt = self._fit_prompt_budget(system_prompt, user_prompt, history_lines, history_context, context_data)
+            
             # Usar LangChain LLM se disponível
             if self.llm and LANGCHAIN_AVAILABLE:
                 messages = [
@@ -905,18 +924,47 @@ class RAGDataAgent(BaseAgent):
                     HumanMessage(content=user_prompt)
                 ]
                 
-                response = await asyncio.to_thread(self.llm.invoke, messages)
-                return response.content
+                # Cache local de respostas: perguntas repetidas não chegam ao provedor
+                cache = get_llm_response_cache() if LLM_CACHE_ENABLED else None
+                cache_args = (
+                    f"langchain:{type(self.llm).__name__}",
+                    str(getattr(self.llm, "model", None) or getattr(self.llm, "model_name", "")),
+                    {"temperature": getattr(self.llm, "temperature", None)},
+                    user_prompt,
+                )
+                # Requisição em streaming (/chat/stream): esta resposta é transmitida
+                sink = claim_token_sink()
+                if cache is not None:
+                    cached = await cache.aget(*cache_args, system_prompt, query=query)
+                    if cached is not None:
+                        self.logger.info("⚡ Resposta LLM servida do cache local")
+                        if sink is not None:
+                            sink.emit(cached)
+                        return cached
+                
+                if sink is None:
+                    content = (await self.llm.ainvoke(messages)).content
+                else:
+                    parts = []
+                    async for chunk in self.llm.astream(messages):
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            sink.emit(chunk.content)
+                    content = "".join(parts)
+                if cache is not None and content:
+                    await cache.aput(*cache_args, content, system_prompt, query=query)
+                return content
             
             # Fallback: usar LLM Manager customizado
             else:
-                from src.llm.manager import LLMManager, LLMConfig
-                llm_manager = LLMManager()
+                from src.llm.manager import get_llm_manager, LLMConfig
+                llm_manager = get_llm_manager()
                 
-                # Construir prompt único (LLMManager.chat espera string, não messages)
+                # Construir prompt único (LLMManager.achat espera string, não messages)
                 full_prompt = f"{system_prompt}\n\n{user_prompt}"
-                llm_response = llm_manager.chat(
+                llm_response = await llm_manager.achat(
                     full_prompt,
+                    cache_query=query,
                     config=LLMConfig(
                         temperature=0.3,
                         max_tokens=2000
@@ -939,6 +987,49 @@ class RAGDataAgent(BaseAgent):
             self.logger.error(f"Erro ao gerar resposta LLM: {str(e)}", exc_info=True)
             return self._format_raw_data_response(query, chunks_metadata)
     
+    @staticmethod
+    def _format_history_context(history_lines: List[str], has_history: bool = True) -> str:
+        """Bloco de histórico da conversa inserido nos prompts."""
+        if not has_history:
+            return ""
+        body = "".join(f"{line}\n" for line in history_lines)
+        return f"\n\n**Contexto da Conversa Anterior:**\n{body}\n"
+    
+    def _fit_prompt_budget(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        history_lines: List[str],
+        history_context: str,
+        context_data: str
+    ) -> str:
+        """Reduz histórico e chunks do prompt ao orçamento de tokens (``LLM_PROMPT_MAX_TOKENS``).
+        
+        Instruções e pergunta são preservadas; o histórico (mensagens mais antigas
+        primeiro) é cortado antes dos chunks (os menos relevantes, ao fim, primeiro).
+        """
+        budget = PromptBudget()
+        counter = budget.counter
+        has_history = bool(history_context) and history_context in user_prompt
+        has_chunks = bool(context_data) and context_data in user_prompt
+        fixed_tokens = counter.count(system_prompt) + counter.count(user_prompt)
+        fixed_tokens -= counter.count(history_context) if has_history else 0
+        fixed_tokens -= counter.count(context_data) if has_chunks else 0
+        
+        segments = []
+        if has_history:
+            segments.append(PromptSegment("historico", history_lines, priority=1, keep="tail"))
+        if has_chunks:
+            segments.append(PromptSegment("chunks", context_data, priority=2))
+        assembly = budget.assemble(segments, reserved_tokens=fixed_tokens, label="Prompt RAG")
+        
+        if has_history and "historico" in assembly.trimmed:
+            trimmed_history = assembly.texts["historico"].split("\n") if assembly.texts["historico"] else []
+            user_prompt = user_prompt.replace(history_context, self._format_history_context(trimmed_history), 1)
+        if has_chunks and "chunks" in assembly.trimmed:
+            user_prompt = user_prompt.replace(context_data, assembly.texts["chunks"], 1)
+        return user_prompt
+    
     def _format_raw_data_response(
         self,
         query: str,
@@ -3,17 +3,21 @@ Agente de Síntese para respostas RAG no EDA AIMinds
 - Recebe chunks recuperados do banco vetorial
 - Usa LangChain + LLM (via camada de abstração) para gerar resposta consolidada
 - Fallback manual para síntese se LLM indisponível
+- Prompt montado com orçamento de tokens (chunks menos relevantes são cortados primeiro)
+- Instruções estáticas no system prompt (prefixo estável para o cache dos provedores)
+- Contexto comprimido antes da síntese (linhas repetidas, chunks redundantes e
+  linhas pouco relevantes à pergunta saem; ``src.llm.context_compression``)
 """
 from langchain_core.prompts import PromptTemplate
+from src.llm.context_compression import ContextCompressor
 from src.llm.manager import get_llm_manager
+from src.llm.prompt_budget import PromptBudget, PromptSegment
+from src.prompts.compiler import compile_template
+from src.settings import RAG_CONTEXT_COMPRESSION_ENABLED
 
-# Prompt estruturado para síntese
-SYNTHESIS_PROMPT = """Você é um assistente especializado em análise de dados. Sua tarefa é consolidar informações de múltiplos chunks de dados para responder de forma CLARA, HUMANIZADA e ESTRUTURADA à pergunta do usuário.
-
-PERGUNTA DO USUÁRIO: {question}
-
-DADOS RECUPERADOS DO BANCO VETORIAL:
-{chunks}
+# Instruções de síntese: texto estático, enviado como system prompt para que o
+# prefixo da requisição seja idêntico entre chamadas (cache de prefixo dos provedores)
+SYNTHESIS_SYSTEM_PROMPT = """Você é um assistente especializado em análise de dados. Sua tarefa é consolidar informações de múltiplos chunks de dados para responder de forma CLARA, HUMANIZADA e ESTRUTURADA à pergunta do usuário.
 
 INSTRUÇÕES OBRIGATÓRIAS:
 1. Analise todos os chunks fornecidos e extraia as informações relevantes
@@ -23,7 +27,7 @@ INSTRUÇÕES OBRIGATÓRIAS:
 
 MODELO DE RESPOSTA ESPERADO:
 
-Pergunta feita: {question}
+Pergunta feita: [pergunta do usuário]
 
 Olá! Aqui está uma análise dos tipos de variáveis presentes no seu conjunto de dados:
 
@@ -53,18 +57,45 @@ IMPORTANTE:
 - Não mencione frequência de valores para variáveis categóricas
 """
 
-def synthesize_response(chunks, question, use_llm=True):
+# Parte dinâmica, enviada na mensagem do usuário
+SYNTHESIS_PROMPT = """PERGUNTA DO USUÁRIO: {question}
+
+DADOS RECUPERADOS DO BANCO VETORIAL:
+{chunks}"""
+
+def build_synthesis_prompt(chunks, question):
+    """
+    Monta SYNTHESIS_PROMPT dentro do orçamento de tokens (descontado o system prompt).
+    Os chunks chegam ordenados por relevância: os últimos são descartados primeiro.
+    Retorna (system prompt, prompt do usuário).
+    """
+    system = compile_template(SYNTHESIS_SYSTEM_PROMPT)
+    before, _ = SYNTHESIS_PROMPT.split("{chunks}")
+    prompt = PromptBudget().assemble(
+        [
+            PromptSegment("pergunta", compile_template(before).render({"question": question}), required=True),
+            PromptSegment("chunks", list(chunks), priority=1, separator="\n\n"),
+        ],
+        joiner="",
+        reserved_tokens=system.static_tokens,
+        label="Prompt de síntese RAG"
+    ).text
+    return system.static_prefix, prompt
+
+def synthesize_response(chunks, question, use_llm=True, embeddings=None, query_embedding=None):
     """
     Recebe lista de chunks e pergunta, retorna resposta consolidada.
     Se use_llm=True, usa LLM via camada de abstração. Senão, faz pós-processamento manual.
+    embeddings/query_embedding (da busca vetorial, opcionais) ajudam a compressão do contexto.
     """
-    context = "\n\n".join(chunks)
     if use_llm:
         llm_manager = get_llm_manager()
-        prompt = SYNTHESIS_PROMPT.format(question=question, chunks=context)
-        # Usar o método chat do LLMManager
-        response = llm_manager.chat(prompt, {})
-        return response.get('content', 'Erro na síntese via LLM.')
+        if RAG_CONTEXT_COMPRESSION_ENABLED:
+            chunks = ContextCompressor().compress(question, chunks, embeddings, query_embedding).chunks
+        system_prompt, prompt = build_synthesis_prompt(chunks, question)
+        # Usar o método chat do LLMManager (perguntas repetidas são servidas pelo cache de respostas)
+        response = llm_manager.chat(prompt, system_prompt=system_prompt, cache_query=question)
+        return response.content if response.success else 'Erro na síntese via LLM.'
     else:
         # Fallback manual: parsing inteligente e estruturado
         import re
@@ -5,6 +5,7 @@ Função principal: send_sonar_query(question: str, context: dict | None = None,
 - Carrega chave via SONAR_API_KEY (env)
 - Faz POST seguro usando requests
 - Faz logging sem expor segredos
+- Respeita o limite de concorrência/taxa do provedor ``sonar`` (``src.llm.rate_limiter``)
 
 Referência de endpoint (sujeito a mudanças):
 - POST {SONAR_API_BASE}/chat/completions
@@ -16,6 +17,7 @@ import time
 import requests
 from requests import Response
 
+from src.llm.rate_limiter import RateLimitExceededError, estimate_request_tokens, get_rate_limiter
 from src.settings import (
     SONAR_API_BASE,
     SONAR_API_KEY,
@@ -100,12 +102,24 @@ def send_sonar_query(
         bool(context),
     )
 
-    t0 = time.perf_counter()
+    limiter = get_rate_limiter("sonar", payload["model"])
+    tokens = (estimate_request_tokens(question, str(context) if context else None, max_tokens)
+              if limiter.counts_tokens else 0)
     try:
-        resp: Response = requests.post(url, json=payload, headers=headers, timeout=timeout)
-    except requests.RequestException as e:
-        raise SonarAPIError(f"Erro de rede ao chamar Sonar API: {e}") from e
-    dt = time.perf_counter() - t0
+        with limiter.slot(tokens) as permit:
+            t0 = time.perf_counter()
+            try:
+                resp: Response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+            except requests.RequestException as e:
+                raise SonarAPIError(f"Erro de rede ao chamar Sonar API: {e}") from e
+            dt = time.perf_counter() - t0
+            if resp.ok:
+                try:
+                    permit.set_usage(resp.json().get("usage", {}).get("total_tokens"))
+                except (ValueError, AttributeError):
+                    pass
+    except RateLimitExceededError as e:
+        raise SonarAPIError(str(e)) from e
 
     logger.info("Sonar response: status=%s dur=%.3fs", resp.status_code, dt)
 
@@ -0,0 +1,573 @@
+"""Modo de análise aproximada com amostras estratificadas e intervalos de confiança.
+
+Perguntas exploratórias (forma da distribuição, correlações, taxa de
+outliers) não precisam varrer todas as linhas. Este módulo mantém, por
+dataset, amostras estratificadas aninhadas em vários tamanhos e responde
+com intervalo de confiança, escalando para uma amostra maior (ou para o
+cálculo exato) apenas quando a precisão pedida exige.
+
+- Estratos: coluna de rótulo/categoria escolhida automaticamente (ex.:
+  ``Class``), garantindo representação das classes raras
+- Alocação proporcional com mínimo por estrato; pesos ``N_h / n_h``
+- Amostras aninhadas: cada linha recebe uma chave aleatória e a amostra de
+  tamanho ``n`` usa as ``n_h`` menores chaves de cada estrato. A construção
+  é incremental (``StratifiedSampleSet.from_chunks``): cada estrato guarda
+  só as linhas de menor chave vistas até agora, então o dataset pode ser lido
+  em janelas sem nunca ficar inteiro em memória
+- Estimadores: média e proporção (estimador estratificado clássico),
+  correlação (Fisher z com tamanho efetivo de Kish), quantis (Woodruff),
+  desvio padrão, assimetria e curtose (jackknife por grupos aleatórios)
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.settings import (
+    APPROX_CONFIDENCE,
+    APPROX_MAX_REL_ERROR,
+    APPROX_SAMPLE_SIZES,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Nomes típicos de colunas de rótulo (preferidas como estrato)
+LABEL_COLUMN_NAMES = ("class", "label", "target", "fraud", "is_fraud", "y")
+MAX_STRATA = 20
+MIN_PER_STRATUM = 30
+JACKKNIFE_GROUPS = 20
+# Assimetria/curtose em amostras pequenas subestimam caudas pesadas (IC otimista)
+MIN_MOMENT_SAMPLE = 5000
+
+# Estatísticas cuja precisão é avaliada em erro absoluto (valores perto de zero)
+ABSOLUTE_ERROR_DEFAULTS = {
+    "correlation": 0.05,
+    "outlier_rate": 0.005,
+    "proportion": 0.005,
+    "skewness": 0.1,
+    "kurtosis": 0.25,
+}
+
+SUPPORTED_STATISTICS = (
+    "mean", "std", "quantile", "median", "skewness", "kurtosis",
+    "correlation", "proportion", "outlier_rate",
+)
+
+
+class ApproximateAnalyticsError(Exception):
+    """Estatística não suportada ou coluna inválida no modo aproximado."""
+    pass
+
+
+@dataclass
+class ApproximateResult:
+    """Estimativa com intervalo de confiança."""
+    statistic: str
+    column: str
+    value: Optional[float]
+    ci_low: Optional[float]
+    ci_high: Optional[float]
+    confidence: float
+    sample_size: int
+    population_size: int
+    exact: bool
+    strata_column: Optional[str] = None
+    elapsed_ms: float = 0.0
+
+    @property
+    def half_width(self) -> float:
+        if self.ci_low is None or self.ci_high is None:
+            return math.inf
+        return (self.ci_high - self.ci_low) / 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["half_width"] = None if math.isinf(self.half_width) else self.half_width
+        return data
+
+
+def choose_strata_column(df: pd.DataFrame, max_strata: int = MAX_STRATA) -> Optional[str]:
+    """Escolhe a coluna de estratificação (rótulo conhecido > categórica > inteiro de baixa cardinalidade)."""
+    candidates: List[Tuple[int, int, str]] = []
+    for position, col in enumerate(df.columns):
+        series = df[col]
+        if series.dtype.kind == 'f' and not series.dropna().eq(series.dropna().round()).all():
+            continue
+        n_unique = series.nunique(dropna=True)
+        if not 2 <= n_unique <= max_strata:
+            continue
+        if str(col).strip().lower() in LABEL_COLUMN_NAMES:
+            priority = 0
+        elif series.dtype == object or str(series.dtype) == 'category':
+            priority = 1
+        else:
+            priority = 2
+        candidates.append((priority, -position, str(col)))
+    if not candidates:
+        return None
+    return min(candidates)[2]
+
+
+def _label_column(df: pd.DataFrame) -> Optional[str]:
+    """Coluna de rótulo conhecida com um único valor (classe rara ausente no pedaço)."""
+    for col in df.columns:
+        if str(col).strip().lower() in LABEL_COLUMN_NAMES and df[col].nunique(dropna=True) == 1:
+            return str(col)
+    return None
+
+
+def _z_value(confidence: float) -> float:
+    from statistics import NormalDist
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _weighted_quantile(values: np.ndarray, weights: np.ndarray, q: float) -> float:
+    order = np.argsort(values, kind="mergesort")
+    values = values[order]
+    cumulative = np.cumsum(weights[order])
+    cumulative /= cumulative[-1]
+    index = int(np.searchsorted(cumulative, min(max(q, 0.0), 1.0), side="left"))
+    return float(values[min(index, len(values) - 1)])
+
+
+def _weighted_moments(values: np.ndarray, weights: np.ndarray) -> Dict[str, float]:
+    total = weights.sum()
+    mean = float((weights * values).sum() / total)
+    centered = values - mean
+    m2 = float((weights * centered ** 2).sum() / total)
+    m3 = float((weights * centered ** 3).sum() / total)
+    m4 = float((weights * centered ** 4).sum() / total)
+    return {
+        "std": math.sqrt(m2),
+        "skewness": m3 / m2 ** 1.5 if m2 > 0 else 0.0,
+        "kurtosis": m4 / m2 ** 2 - 3 if m2 > 0 else 0.0,
+    }
+
+
+class StratifiedSampleSet:
+    """Amostras estratificadas aninhadas de um dataset.
+
+    Args:
+        df: Dataset completo (apenas as linhas amostradas são mantidas)
+        strata_column: Coluna de estratos (None = escolha automática)
+        sizes: Tamanhos das amostras (crescentes)
+        seed: Semente das chaves aleatórias
+    """
+
+    def __init__(self,
+                 df: pd.DataFrame,
+                 strata_column: Optional[str] = None,
+                 sizes: Sequence[int] = APPROX_SAMPLE_SIZES,
+                 seed: int = 42):
+        if strata_column is None:
+            strata_column = choose_strata_column(df)
+        self._build([df], strata_column, sizes, seed)
+
+    @classmethod
+    def from_chunks(cls,
+                    chunks: Iterable[pd.DataFrame],
+                    strata_column: Optional[str] = None,
+                    sizes: Sequence[int] = APPROX_SAMPLE_SIZES,
+                    seed: int = 42) -> "StratifiedSampleSet":
+        """Constrói as amostras lendo o dataset em pedaços (uma passada, memória limitada).
+
+        Sem ``strata_column``, o estrato é escolhido pelo primeiro pedaço (colunas
+        de rótulo conhecidas são aceitas mesmo que a classe rara ainda não tenha
+        aparecido nele).
+
+        Raises:
+            ApproximateAnalyticsError: Nenhuma linha nos pedaços
+        """
+        iterator = iter(chunks)
+        first = next((chunk for chunk in iterator if chunk is not None and not chunk.empty), None)
+        if first is None:
+            raise ApproximateAnalyticsError("Nenhuma linha para construir as amostras")
+        if strata_column is None:
+            strata_column = choose_strata_column(first) or _label_column(first)
+
+        def all_chunks():
+            yield first
+            yield from iterator
+
+        sample_set = cls.__new__(cls)
+        sample_set._build(all_chunks(), strata_column, sizes, seed)
+        return sample_set
+
+    def _build(self, chunks: Iterable[pd.DataFrame], strata_column: Optional[str],
+               sizes: Sequence[int], seed: int) -> None:
+        started = time.perf_counter()
+        self.strata_column = strata_column
+        requested = sorted(int(s) for s in sizes if int(s) > 0)
+        # Nenhum estrato recebe mais que max(maior tamanho, mínimo por estrato)
+        capacity = max(requested[-1], MIN_PER_STRATUM) if requested else 0
+        rng = np.random.default_rng(seed)
+        self.population_size = 0
+        self.columns: List[str] = []
+        self.strata_sizes: Dict[Any, int] = {}
+        kept: Dict[Any, pd.DataFrame] = {}
+
+        for chunk in chunks:
+            if chunk is None or chunk.empty:
+                continue
+            if not self.columns:
+                self.columns = [str(c) for c in chunk.columns]
+            self.population_size += int(len(chunk))
+            if self.strata_column is not None:
+                strata = chunk[self.strata_column].astype(str).to_numpy()
+            else:
+                strata = np.zeros(len(chunk), dtype=object)
+            keys = rng.random(len(chunk))
+            labels, inverse = np.unique(strata, return_inverse=True)
+            for code, label in enumerate(labels):
+                positions = np.flatnonzero(inverse == code)
+                self.strata_sizes[label] = self.strata_sizes.get(label, 0) + int(positions.size)
+                if not capacity:
+                    continue
+                part = chunk.iloc[positions].copy()
+                part["_key"] = keys[positions]
+                if label in kept:
+                    part = pd.concat([kept[label], part], ignore_index=True)
+                if len(part) > capacity:
+                    part = part.nsmallest(capacity, "_key")
+                kept[label] = part
+
+        self.sizes = [size for size in requested if size < self.population_size]
+        self._allocations: Dict[int, Dict[Any, int]] = {size: self._allocate(size) for size in self.sizes}
+        largest = self._allocations[self.sizes[-1]] if self.sizes else {}
+        parts: List[pd.DataFrame] = []
+        for label in sorted(kept):
+            part = kept[label].sort_values("_key", kind="mergesort").drop(columns="_key")
+            part = part.head(largest.get(label, 0)).reset_index(drop=True)
+            part["_stratum"] = label
+            part["_rank"] = np.arange(len(part))
+            parts.append(part)
+
+        # Dataset menor que todas as amostras: frame vazio, só o cálculo exato responde
+        self.frame = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=self.columns)
+        self.build_seconds = time.perf_counter() - started
+        logger.info(
+            f"🎯 Amostras estratificadas criadas em {self.build_seconds:.2f}s "
+            f"(estratos: {self.strata_column or 'nenhum'}, tamanhos: {self.sizes}, "
+            f"{self.population_size} linhas lidas)"
+        )
+
+    def _allocate(self, size: int) -> Dict[Any, int]:
+        """Alocação proporcional com mínimo por estrato (classes raras representadas)."""
+        allocation = {}
+        for label, stratum_size in self.strata_sizes.items():
+            proportional = int(round(size * stratum_size / self.population_size))
+            allocation[label] = min(stratum_size, max(proportional, MIN_PER_STRATUM))
+        return allocation
+
+    def level(self, size: int) -> pd.DataFrame:
+        """Amostra de um dos tamanhos configurados, com coluna ``_weight`` (N_h / n_h)."""
+        allocation = self._allocations[size]
+        limits = self.frame["_stratum"].map(allocation)
+        sample = self.frame[self.frame["_rank"] < limits].copy()
+        counts = sample["_stratum"].map(sample["_stratum"].value_counts())
+        sample["_weight"] = sample["_stratum"].map(self.strata_sizes) / counts
+        return sample
+
+    @property
+    def memory_bytes(self) -> int:
+        return int(self.frame.memory_usage(deep=True).sum())
+
+
+class ApproximateQueryEngine:
+    """Responde estatísticas com IC, escalando amostra → exato conforme a precisão.
+
+    Args:
+        sample_set: Amostras estratificadas do dataset
+        exact_loader: Carrega o dataset completo quando o cálculo exato é necessário
+        confidence: Nível de confiança dos intervalos
+    """
+
+    def __init__(self,
+                 sample_set: StratifiedSampleSet,
+                 exact_loader: Optional[Callable[[], Optional[pd.DataFrame]]] = None,
+                 confidence: float = APPROX_CONFIDENCE):
+        self.sample_set = sample_set
+        self.exact_loader = exact_loader
+        self.confidence = confidence
+        self._z = _z_value(confidence)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def estimate(self,
+                 statistic: str,
+                 column: str,
+                 other: Optional[str] = None,
+                 q: Optional[float] = None,
+                 predicate: Optional[Callable[[pd.Series], pd.Series]] = None,
+                 max_rel_error: Optional[float] = None,
+                 max_abs_error: Optional[float] = None) -> ApproximateResult:
+        """Estima uma estatística com a menor amostra que atinge a precisão pedida.
+
+        Args:
+            statistic: Uma de ``SUPPORTED_STATISTICS``
+            column: Coluna analisada
+            other: Segunda coluna (correlação)
+            q: Quantil desejado (0-1) para ``quantile``
+            predicate: Condição booleana para ``proportion``
+            max_rel_error: Meia-largura máxima do IC relativa ao valor
+            max_abs_error: Meia-largura máxima do IC absoluta
+
+        Returns:
+            ApproximateResult (``exact=True`` quando foi preciso usar todas as linhas)
+        """
+        self._validate(statistic, column, other, predicate)
+        if statistic == "median":
+            statistic, q = "quantile", 0.5
+        # Sem precisão explícita: médias também aceitam erro relativo ao desvio
+        # padrão (médias perto de zero não forçam o cálculo exato)
+        scale_aware = statistic == "mean" and max_rel_error is None and max_abs_error is None
+        if max_rel_error is None and max_abs_error is None:
+            max_abs_error = ABSOLUTE_ERROR_DEFAULTS.get(statistic)
+            if max_abs_error is None:
+                max_rel_error = APPROX_MAX_REL_ERROR
+
+        started = time.perf_counter()
+        result: Optional[ApproximateResult] = None
+        for size in self.sample_set.sizes:
+            if statistic in ("skewness", "kurtosis") and size < MIN_MOMENT_SAMPLE:
+                continue
+            sample = self.sample_set.level(size)
+            result = self._estimate_on_sample(sample, statistic, column, other, q, predicate)
+            tolerance = max_abs_error
+            if scale_aware:
+                tolerance = max_rel_error * float(sample[column].std())
+            if self._precise_enough(result, max_rel_error, tolerance):
+                result.elapsed_ms = (time.perf_counter() - started) * 1000
+                return result
+            logger.debug(f"IC de {statistic}({column}) com n={size} acima do pedido, escalando")
+
+        exact = self._estimate_exact(statistic, column, other, q, predicate)
+        if exact is None:
+            if result is None:
+                raise ApproximateAnalyticsError("Dataset completo indisponível para cálculo exato")
+            logger.warning(f"⚠️ Precisão pedida não atingida para {statistic}({column}); retornando maior amostra")
+            exact = result
+        exact.elapsed_ms = (time.perf_counter() - started) * 1000
+        return exact
+
+    # ------------------------------------------------------------------
+    # Estimadores
+    # ------------------------------------------------------------------
+    def _validate(self, statistic: str, column: str, other: Optional[str],
+                  predicate: Optional[Callable]) -> None:
+        if statistic not in SUPPORTED_STATISTICS:
+            raise ApproximateAnalyticsError(f"Estatística não suportada no modo aproximado: {statistic}")
+        for col in (column, other):
+            if col is not None and col not in self.sample_set.columns:
+                raise ApproximateAnalyticsError(f"Coluna inexistente: {col}")
+        if statistic == "correlation" and other is None:
+            raise ApproximateAnalyticsError("Correlação exige a segunda coluna (other)")
+        if statistic == "proportion" and predicate is None:
+            raise ApproximateAnalyticsError("Proporção exige um predicado")
+
+    @staticmethod
+    def _precise_enough(result: ApproximateResult, max_rel_error: Optional[float],
+                        max_abs_error: Optional[float]) -> bool:
+        if result.value is None:
+            return False
+        if max_abs_error is not None and result.half_width <= max_abs_error:
+            return True
+        if max_rel_error is not None and result.half_width <= max_rel_error * abs(result.value):
+            return True
+        return False
+
+    def _result(self, statistic: str, column: str, value: Optional[float], half_width: Optional[float],
+                sample_size: int, exact: bool = False) -> ApproximateResult:
+        if value is None or half_width is None or not math.isfinite(half_width):
+            low = high = None if not exact else value
+        else:
+            low, high = value - half_width, value + half_width
+        return ApproximateResult(
+            statistic=statistic,
+            column=column,
+            value=value,
+            ci_low=low,
+            ci_high=high,
+            confidence=self.confidence,
+            sample_size=sample_size,
+            population_size=self.sample_set.population_size,
+            exact=exact,
+            strata_column=self.sample_set.strata_column,
+        )
+
+    def _stratified_mean(self, sample: pd.DataFrame, values: pd.Series) -> Tuple[float, float]:
+        """Estimador estratificado da média e erro padrão (com correção de população finita)."""
+        population = self.sample_set.population_size
+        mean = 0.0
+        variance = 0.0
+        for label, group in values.groupby(sample["_stratum"]):
+            group = group.dropna()
+            n_h = len(group)
+            if n_h == 0:
+                continue
+            N_h = self.sample_set.strata_sizes[label]
+            W_h = N_h / population
+            mean += W_h * float(group.mean())
+            if n_h > 1:
+                variance += W_h ** 2 * (1 - n_h / N_h) * float(group.var()) / n_h
+        return mean, math.sqrt(max(variance, 0.0))
+
+    def _estimate_on_sample(self, sample: pd.DataFrame, statistic: str, column: str,
+                            other: Optional[str], q: Optional[float],
+                            predicate: Optional[Callable]) -> ApproximateResult:
+        n = len(sample)
+        values = sample[column]
+        weights = sample["_weight"].to_numpy(dtype=float)
+
+        if statistic == "mean":
+            mean, se = self._stratified_mean(sample, values)
+            return self._result(statistic, column, mean, self._z * se, n)
+
+        if statistic in ("proportion", "outlier_rate"):
+            if statistic == "outlier_rate":
+                q1, q3 = self._outlier_quartiles(sample, column)
+                iqr = q3 - q1
+                indicator = ((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)).astype(float)
+            else:
+                indicator = predicate(values).astype(float)
+            mean, se = self._stratified_mean(sample, indicator)
+            return self._result(statistic, column, mean, self._z * se, n)
+
+        mask = values.notna().to_numpy()
+        data = values.to_numpy(dtype=float)[mask]
+        w = weights[mask]
+        n_eff = (w.sum() ** 2) / (w ** 2).sum() if len(w) else 0
+
+        if statistic == "correlation":
+            other_values = sample[other].to_numpy(dtype=float)
+            both = mask & ~np.isnan(other_values)
+            x, y, wb = sample[column].to_numpy(dtype=float)[both], other_values[both], weights[both]
+            n_eff = (wb.sum() ** 2) / (wb ** 2).sum() if len(wb) else 0
+            r = self._weighted_corr(x, y, wb)
+            if r is None or n_eff <= 3:
+                return self._result(statistic, f"{column}~{other}", r, None, n)
+            z = math.atanh(max(min(r, 0.999999), -0.999999))
+            delta = self._z / math.sqrt(n_eff - 3)
+            result = self._result(statistic, f"{column}~{other}", r, None, n)
+            result.ci_low, result.ci_high = math.tanh(z - delta), math.tanh(z + delta)
+            return result
+
+        if len(data) == 0:
+            return self._result(statistic, column, None, None, n)
+
+        if statistic == "quantile":
+            value = _weighted_quantile(data, w, q)
+            spread = self._z * math.sqrt(q * (1 - q) / n_eff)
+            result = self._result(statistic, column, value, None, n)
+            result.ci_low = _weighted_quantile(data, w, q - spread)
+            result.ci_high = _weighted_quantile(data, w, q + spread)
+            return result
+
+        # std / skewness / kurtosis: jackknife por grupos aleatórios (delete-a-group)
+        value = _weighted_moments(data, w)[statistic]
+        groups = np.random.default_rng(7).integers(0, JACKKNIFE_GROUPS, size=len(data))
+        replicates = np.array([
+            _weighted_moments(data[groups != g], w[groups != g])[statistic]
+            for g in range(JACKKNIFE_GROUPS)
+        ])
+        se = math.sqrt((JACKKNIFE_GROUPS - 1) / JACKKNIFE_GROUPS * ((replicates - replicates.mean()) ** 2).sum())
+        return self._result(statistic, column, value, self._z * se, n)
+
+    def _outlier_quartiles(self, sample: pd.DataFrame, column: str) -> Tuple[float, float]:
+        values = sample[column]
+        mask = values.notna().to_numpy()
+        data = values.to_numpy(dtype=float)[mask]
+        w = sample["_weight"].to_numpy(dtype=float)[mask]
+        return _weighted_quantile(data, w, 0.25), _weighted_quantile(data, w, 0.75)
+
+    @staticmethod
+    def _weighted_corr(x: np.ndarray, y: np.ndarray, w: np.ndarray) -> Optional[float]:
+        if len(x) < 3:
+            return None
+        total = w.sum()
+        mx, my = (w * x).sum() / total, (w * y).sum() / total
+        cov = (w * (x - mx) * (y - my)).sum()
+        var_x, var_y = (w * (x - mx) ** 2).sum(), (w * (y - my) ** 2).sum()
+        if var_x <= 0 or var_y <= 0:
+            return None
+        return float(cov / math.sqrt(var_x * var_y))
+
+    def _estimate_exact(self, statistic: str, column: str, other: Optional[str], q: Optional[float],
+                        predicate: Optional[Callable]) -> Optional[ApproximateResult]:
+        df = self.exact_loader() if self.exact_loader else None
+        if df is None or df.empty:
+            return None
+        logger.info(f"🎯 Precisão exige cálculo exato: {statistic}({column}) sobre {len(df)} linhas")
+        values = df[column]
+        name = column
+        if statistic == "mean":
+            value = values.mean()
+        elif statistic == "std":
+            value = values.std()
+        elif statistic == "skewness":
+            # Estimadores ajustados, como no DatasetProfile e nos handlers pandas
+            value = values.skew()
+        elif statistic == "kurtosis":
+            value = values.kurt()
+        elif statistic == "quantile":
+            value = values.quantile(q, interpolation="lower")
+        elif statistic == "correlation":
+            value = values.corr(df[other])
+            name = f"{column}~{other}"
+        elif statistic == "outlier_rate":
+            q1, q3 = values.quantile([0.25, 0.75])
+            iqr = q3 - q1
+            value = ((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)).mean()
+        else:
+            value = predicate(values).mean()
+        value = None if pd.isna(value) else float(value)
+        return self._result(statistic, name, value, 0.0, len(df), exact=True)
+
+
+class SampleSetRegistry:
+    """Amostras por dataset/versão (poucas entradas, construção única por chave)."""
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        self._sets: Dict[Hashable, StratifiedSampleSet] = {}
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable,
+                     builder: Callable[[], Optional[StratifiedSampleSet]]) -> Optional[StratifiedSampleSet]:
+        with self._lock:
+            sample_set = self._sets.get(key)
+            if sample_set is not None:
+                return sample_set
+            # Construção sob o lock: chamadas simultâneas aguardam uma única construção
+            sample_set = builder()
+            if sample_set is not None:
+                self._sets[key] = sample_set
+                while len(self._sets) > self.max_entries:
+                    self._sets.pop(next(iter(self._sets)))
+            return sample_set
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sets.clear()
+
+
+_sample_registry: Optional[SampleSetRegistry] = None
+_sample_registry_lock = threading.Lock()
+
+
+def get_sample_registry() -> SampleSetRegistry:
+    """Retorna o registro de amostras do processo (singleton)."""
+    global _sample_registry
+    if _sample_registry is None:
+        with _sample_registry_lock:
+            if _sample_registry is None:
+                _sample_registry = SampleSetRegistry()
+    return _sample_registry
@@ -0,0 +1,224 @@
+"""Reconstrução vetorizada de DataFrames a partir dos chunks CSV da tabela embeddings.
+
+Substitui o caminho linha a linha (``iterrows`` + ``split``) de
+``PythonDataAnalyzer._parse_chunk_text_to_dataframe``:
+
+1. Agrupa os chunks por fonte e ordena por ``row_start``
+2. Descarta as linhas de overlap pelo intervalo de linhas (sem parsear duplicatas)
+3. Concatena os blocos CSV em um único texto
+4. Faz o parse em uma passada com o leitor CSV do pandas (pyarrow quando
+   disponível, senão engine C)
+
+A semântica de tipos segue o parser legado: toda coluna é convertida com
+``pd.to_numeric(errors='coerce')``. Com ``columns=`` (ver
+``src.data.query_planner``) apenas as colunas pedidas são parseadas e
+convertidas.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.embeddings.row_range import RowRangeChunk, chunk_from_record, merge_row_ranges
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+class ChunkReconstructionError(Exception):
+    """Os chunks não permitem reconstrução vetorizada (sem intervalo de linhas, header ausente...)."""
+    pass
+
+
+def _records_from_frame(embeddings_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    columns = [c for c in ("id", "chunk_text", "metadata", "source_id", "row_start", "row_end") if c in embeddings_df.columns]
+    values = [embeddings_df[c].tolist() for c in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def group_chunks_by_source(records: Iterable[Dict[str, Any]]) -> "OrderedDict[str, List[RowRangeChunk]]":
+    """Agrupa chunks CSV (com intervalo de linhas) por fonte, na ordem em que aparecem."""
+    groups: "OrderedDict[str, List[RowRangeChunk]]" = OrderedDict()
+    for record in records:
+        chunk = chunk_from_record(record)
+        if chunk is None or not chunk.chunk_text:
+            continue
+        groups.setdefault(chunk.source_id, []).append(chunk)
+    return groups
+
+
+def _clean_column_name(name: Any) -> str:
+    return str(name).strip().strip('"').strip()
+
+
+def parse_header_columns(header: str) -> List[str]:
+    """Nomes limpos das colunas de uma linha de header CSV."""
+    return [_clean_column_name(raw) for raw in next(csv.reader([header], skipinitialspace=True), [])]
+
+
+def _select_header_columns(header: str, columns: Sequence[str]) -> List[str]:
+    """Nomes brutos do header (como o leitor CSV os vê) das colunas pedidas, na ordem do header."""
+    raw_names = next(csv.reader([header], skipinitialspace=True), [])
+    wanted = {_clean_column_name(c) for c in columns}
+    selected = [raw for raw in raw_names if _clean_column_name(raw) in wanted]
+    missing = wanted - {_clean_column_name(raw) for raw in selected}
+    if missing:
+        logger.warning(f"⚠️ Colunas ausentes no header ignoradas: {sorted(missing)}")
+    if not selected:
+        raise ChunkReconstructionError(f"Nenhuma das colunas pedidas existe no header: {sorted(wanted)}")
+    return selected
+
+
+def _read_csv_block(csv_text: str, engine: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    buffer = io.BytesIO(csv_text.encode("utf-8")) if engine == "pyarrow" else io.StringIO(csv_text)
+    kwargs: Dict[str, Any] = {"engine": engine, "skipinitialspace": engine != "pyarrow"}
+    if engine == "c":
+        kwargs["float_precision"] = "round_trip"
+    if usecols is not None:
+        if engine == "pyarrow":
+            kwargs["usecols"] = usecols
+        else:
+            wanted = {_clean_column_name(c) for c in usecols}
+            kwargs["usecols"] = lambda name: _clean_column_name(name) in wanted
+    return pd.read_csv(buffer, **kwargs)
+
+
+def _coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte colunas não numéricas com ``to_numeric(errors='coerce')`` (semântica legada)."""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            df[col] = series.astype(np.int64)
+        elif not pd.api.types.is_numeric_dtype(series):
+            converted = pd.to_numeric(series, errors="coerce")
+            if converted.isna().sum() > series.isna().sum():
+                # Valores com espaços/aspas residuais: limpa como o parser legado
+                cleaned = series.where(series.isna(), series.astype(str).str.strip().str.strip('"'))
+                converted = pd.to_numeric(cleaned, errors="coerce")
+            df[col] = converted
+    return df
+
+
+def reconstruct_dataframe(
+    records: Iterable[Dict[str, Any]],
+    row_start: Optional[int] = None,
+    row_end: Optional[int] = None,
+    engine: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """Reconstrói o DataFrame original a partir de registros da tabela embeddings.
+
+    Args:
+        records: Registros com ``chunk_text`` e ``metadata`` (ou colunas row_start/row_end/source_id)
+        row_start: Primeira linha desejada (1-based, inclusiva)
+        row_end: Última linha desejada (1-based, inclusiva)
+        engine: ``"pyarrow"`` ou ``"c"``; padrão pyarrow quando instalado
+        columns: Colunas a parsear/converter (None = todas); nomes ausentes no header são ignorados
+
+    Returns:
+        DataFrame sem linhas duplicadas de overlap. Fontes com o mesmo header
+        da primeira fonte encontrada são concatenadas (como no parser legado).
+
+    Raises:
+        ChunkReconstructionError: Se não houver chunks com intervalo de linhas/header
+            ou nenhuma das colunas pedidas existir
+    """
+    groups = group_chunks_by_source(records)
+    if not groups:
+        raise ChunkReconstructionError("Nenhum chunk CSV com intervalo de linhas encontrado")
+
+    engine = engine or ("pyarrow" if PYARROW_AVAILABLE else "c")
+    reference_header: Optional[str] = None
+    blocks: List[str] = []
+
+    for source_id, chunks in groups.items():
+        header, lines, _ = merge_row_ranges(chunks, row_start, row_end)
+        if not header:
+            continue
+        if reference_header is None:
+            reference_header = header
+        elif header != reference_header:
+            logger.warning(f"⚠️ Fonte '{source_id}' com header diferente ignorada na reconstrução")
+            continue
+        blocks.extend(lines)
+
+    if reference_header is None:
+        raise ChunkReconstructionError("Header CSV não encontrado nos chunks")
+
+    usecols = _select_header_columns(reference_header, columns) if columns is not None else None
+    df = _parse_lines(reference_header, blocks, engine, usecols)
+    logger.info(f"✅ DataFrame reconstruído (vetorizado/{engine}): {len(df)} linhas, {len(df.columns)} colunas")
+    return df
+
+
+def _parse_lines(header: str, lines: List[str], engine: str, usecols: Optional[List[str]]) -> pd.DataFrame:
+    csv_text = "\n".join([header, *lines])
+    try:
+        df = _read_csv_block(csv_text, engine, usecols)
+    except Exception as e:
+        if engine == "c":
+            raise ChunkReconstructionError(f"Falha no parse CSV: {e}") from e
+        logger.debug(f"Engine {engine} falhou ({e}), usando engine C")
+        df = _read_csv_block(csv_text, "c", usecols)
+
+    df.columns = [_clean_column_name(c) for c in df.columns]
+    return _coerce_numeric(df)
+
+
+def iter_dataframe_windows(
+    records: Iterable[Dict[str, Any]],
+    window_rows: int = 50_000,
+    engine: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Reconstrói o dataset em janelas de ``window_rows`` linhas, sem montar o DataFrame inteiro.
+
+    Mesma semântica de ``reconstruct_dataframe`` (overlap descartado, fontes
+    com header diferente ignoradas); só uma janela parseada fica em memória
+    por vez.
+
+    Raises:
+        ChunkReconstructionError: Se não houver chunks com intervalo de linhas/header
+    """
+    groups = group_chunks_by_source(records)
+    if not groups:
+        raise ChunkReconstructionError("Nenhum chunk CSV com intervalo de linhas encontrado")
+
+    engine = engine or ("pyarrow" if PYARROW_AVAILABLE else "c")
+    window_rows = max(1, int(window_rows))
+    reference_header: Optional[str] = None
+    usecols: Optional[List[str]] = None
+    for source_id, chunks in groups.items():
+        last_row = max(chunk.row_end for chunk in chunks)
+        for start in range(1, last_row + 1, window_rows):
+            header, lines, _ = merge_row_ranges(chunks, start, start + window_rows - 1)
+            if not header or not lines:
+                continue
+            if reference_header is None:
+                reference_header = header
+                usecols = _select_header_columns(header, columns) if columns is not None else None
+            elif header != reference_header:
+                logger.warning(f"⚠️ Fonte '{source_id}' com header diferente ignorada na reconstrução")
+                break
+            yield _parse_lines(reference_header, lines, engine, usecols)
+
+    if reference_header is None:
+        raise ChunkReconstructionError("Header CSV não encontrado nos chunks")
+
+
+def reconstruct_dataframe_from_frame(embeddings_df: pd.DataFrame, **kwargs: Any) -> pd.DataFrame:
+    """Atalho para ``reconstruct_dataframe`` a partir do DataFrame bruto da tabela embeddings."""
+    if embeddings_df is None or "chunk_text" not in embeddings_df.columns:
+        raise ChunkReconstructionError("DataFrame sem coluna chunk_text")
+    return reconstruct_dataframe(_records_from_frame(embeddings_df), **kwargs)
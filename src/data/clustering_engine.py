@@ -0,0 +1,329 @@
+"""Clustering escalável (MiniBatchKMeans) com escolha automática de k e cache por versão.
+
+``PythonDataAnalyzer.calculate_clustering_analysis`` rodava ``KMeans(n_init=10)``
+sobre o dataset completo a cada pergunta. Este módulo:
+
+- Padroniza as colunas numéricas em float32 (metade da memória do float64)
+- Escolhe k automaticamente em uma amostra: MiniBatchKMeans para cada k do
+  intervalo e silhouette calculada sobre uma subamostra
+- Inicializa os centróides com KMeans++ em uma amostra (em vez de n_init=10
+  sobre todas as linhas) e refina com MiniBatchKMeans sobre o dataset completo
+- Rotula todas as linhas em blocos (inércia exata)
+- Cacheia o resultado por (fonte, versão do dataset, parâmetros)
+- Serializa as execuções: uma única rodada por vez ocupa CPU; pedidos
+  simultâneos com os mesmos parâmetros reaproveitam o resultado em cache
+- Reporta tempo e variação do RSS de cada execução; o pico de memória via
+  tracemalloc (que rastreia todas as alocações do processo enquanto ligado)
+  só é medido com ``trace_memory=True`` (benchmarks/testes)
+"""
+from __future__ import annotations
+
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.settings import (
+    CLUSTERING_BATCH_SIZE,
+    CLUSTERING_CACHE_ENTRIES,
+    CLUSTERING_K_RANGE,
+    CLUSTERING_SAMPLE_SIZE,
+    CLUSTERING_TRACE_MEMORY,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Colunas ignoradas (identificadores)
+IGNORED_COLUMNS = ("id", "index", "unnamed: 0")
+# Linhas usadas na escolha de k (métricas baratas)
+K_SELECTION_SAMPLE_SIZE = 5000
+# Subamostra usada no cálculo da silhouette (O(n²))
+SILHOUETTE_SAMPLE_SIZE = 2000
+# Linhas rotuladas por bloco na passada final
+PREDICT_BLOCK_SIZE = 50000
+
+
+class ClusteringError(Exception):
+    """Dados insuficientes ou inválidos para clustering."""
+    pass
+
+
+@dataclass
+class ClusteringResult:
+    """Resultado de uma execução de clustering."""
+    n_clusters: int
+    total_points: int
+    numeric_columns: List[str]
+    cluster_distribution: Dict[int, int]
+    centroids: Dict[int, Dict[str, float]]
+    inertia: float
+    method: str
+    sample_size: int
+    k_selection: Dict[int, float] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    memory_delta_mb: float = 0.0
+    peak_memory_mb: Optional[float] = None
+    cached: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _numeric_matrix(df: pd.DataFrame) -> tuple[np.ndarray, List[str]]:
+    numeric_cols = [
+        col for col in df.columns
+        if pd.api.types.is_numeric_dtype(df[col]) and str(col).lower() not in IGNORED_COLUMNS
+    ]
+    if not numeric_cols:
+        raise ClusteringError("Nenhuma coluna numérica encontrada para clustering")
+    # Preenche a matriz float32 coluna a coluna (sem cópias float64 intermediárias)
+    X = np.empty((len(df), len(numeric_cols)), dtype=np.float32)
+    for j, col in enumerate(numeric_cols):
+        X[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    valid = ~np.isnan(X).any(axis=1)
+    if not valid.all():
+        X = X[valid]
+    if len(X) == 0:
+        raise ClusteringError("Todos os dados têm valores nulos nas colunas numéricas")
+    return X, [str(c) for c in numeric_cols]
+
+
+def _current_rss() -> Optional[int]:
+    """RSS atual do processo em bytes (None sem psutil)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class ClusteringEngine:
+    """Executa e cacheia análises de clustering.
+
+    Args:
+        sample_size: Linhas usadas na escolha de k e na inicialização
+        batch_size: Tamanho dos mini-batches do refinamento
+        k_range: Valores de k avaliados na escolha automática
+        cache_entries: Resultados mantidos em cache (LRU)
+        seed: Semente dos sorteios
+        trace_memory: Mede o pico de memória com tracemalloc (apenas benchmarks/testes)
+    """
+
+    def __init__(self,
+                 sample_size: int = CLUSTERING_SAMPLE_SIZE,
+                 batch_size: int = CLUSTERING_BATCH_SIZE,
+                 k_range: Sequence[int] = CLUSTERING_K_RANGE,
+                 cache_entries: int = CLUSTERING_CACHE_ENTRIES,
+                 seed: int = 42,
+                 trace_memory: bool = CLUSTERING_TRACE_MEMORY):
+        self.sample_size = sample_size
+        self.batch_size = batch_size
+        self.k_range = tuple(sorted(int(k) for k in k_range if int(k) >= 2))
+        self.cache_entries = cache_entries
+        self.seed = seed
+        self.trace_memory = trace_memory
+        self._cache: "OrderedDict[Hashable, ClusteringResult]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._stats = {"runs": 0, "hits": 0}
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def run(self, df: pd.DataFrame, n_clusters: Optional[int] = None,
+            cache_key: Optional[Hashable] = None) -> ClusteringResult:
+        """Agrupa as linhas numéricas de ``df``.
+
+        Args:
+            df: Dataset completo
+            n_clusters: Número de clusters (None = escolha automática)
+            cache_key: Identifica o dataset (ex.: fonte + versão); None desativa o cache
+
+        Returns:
+            ClusteringResult (``cached=True`` quando servido do cache)
+
+        Raises:
+            ClusteringError: Sem colunas numéricas ou linhas válidas
+        """
+        key = None if cache_key is None else (cache_key, n_clusters, self.sample_size, self.batch_size, self.k_range)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        # Importa o scikit-learn antes da medição (o import não conta como custo da execução)
+        import sklearn.cluster  # noqa: F401
+        import sklearn.metrics  # noqa: F401
+
+        with self._run_lock:
+            # Outro pedido pode ter calculado o mesmo resultado enquanto aguardávamos
+            cached = self._cached(key)
+            if cached is not None:
+                return cached
+            result = self._measure(lambda: self._fit(df, n_clusters))
+            self._stats["runs"] += 1
+            if key is not None:
+                with self._cache_lock:
+                    self._cache[key] = result
+                    while len(self._cache) > self.cache_entries:
+                        self._cache.popitem(last=False)
+        return result
+
+    def load_and_run(self, loader, n_clusters: Optional[int] = None,
+                     cache_key: Optional[Hashable] = None) -> ClusteringResult:
+        """Como ``run``, mas só carrega o dataset se o resultado não estiver em cache."""
+        key = None if cache_key is None else (cache_key, n_clusters, self.sample_size, self.batch_size, self.k_range)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        df = loader()
+        if df is None or df.empty:
+            raise ClusteringError("Nenhum dado disponível para análise de clustering")
+        return self.run(df, n_clusters=n_clusters, cache_key=cache_key)
+
+    def clear(self) -> None:
+        with self._cache_lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cache_lock:
+            return {**self._stats, "entries": len(self._cache)}
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+    def _cached(self, key: Optional[Hashable]) -> Optional[ClusteringResult]:
+        if key is None:
+            return None
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is None:
+                return None
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+        logger.info(f"⚡ Clustering servido do cache (k={result.n_clusters})")
+        return ClusteringResult(**{**result.to_dict(), "cached": True})
+
+    def _measure(self, fit) -> ClusteringResult:
+        started = time.perf_counter()
+        rss_before = _current_rss()
+        already_tracing = tracemalloc.is_tracing()
+        if self.trace_memory:
+            if not already_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        peak = None
+        try:
+            result = fit()
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            if self.trace_memory and not already_tracing:
+                tracemalloc.stop()
+        result.elapsed_seconds = time.perf_counter() - started
+        if rss_before is not None:
+            result.memory_delta_mb = (_current_rss() - rss_before) / (1024 * 1024)
+        if peak is not None:
+            result.peak_memory_mb = peak / (1024 * 1024)
+        memory = f"pico de memória {result.peak_memory_mb:.1f} MB" if peak is not None \
+            else f"RSS {result.memory_delta_mb:+.1f} MB"
+        logger.info(
+            f"✅ Clustering concluído em {result.elapsed_seconds:.2f}s "
+            f"(k={result.n_clusters}, {memory})"
+        )
+        return result
+
+    def _fit(self, df: pd.DataFrame, n_clusters: Optional[int]) -> ClusteringResult:
+        from sklearn.cluster import MiniBatchKMeans, kmeans_plusplus
+
+        X, numeric_cols = _numeric_matrix(df)
+        mean = X.mean(axis=0)
+        std = X.std(axis=0)
+        std[std == 0] = 1.0
+        X -= mean
+        X /= std
+
+        rng = np.random.default_rng(self.seed)
+        sample_idx = rng.choice(len(X), size=min(self.sample_size, len(X)), replace=False)
+        sample = X[sample_idx]
+
+        k_selection: Dict[int, float] = {}
+        if n_clusters is None:
+            n_clusters, k_selection = self._choose_k(sample[:K_SELECTION_SAMPLE_SIZE])
+        n_clusters = max(1, min(int(n_clusters), len(sample)))
+        logger.info(f"🔬 MiniBatchKMeans com {n_clusters} clusters em {len(numeric_cols)} variáveis ({len(X)} linhas)")
+
+        init, _ = kmeans_plusplus(sample, n_clusters, random_state=self.seed)
+        model = MiniBatchKMeans(
+            n_clusters=n_clusters,
+            init=init,
+            n_init=1,
+            batch_size=self.batch_size,
+            random_state=self.seed,
+        ).fit(X)
+
+        labels = np.empty(len(X), dtype=np.int32)
+        inertia = 0.0
+        for start in range(0, len(X), PREDICT_BLOCK_SIZE):
+            block = X[start:start + PREDICT_BLOCK_SIZE]
+            block_labels = model.predict(block)
+            labels[start:start + len(block)] = block_labels
+            inertia += float(((block - model.cluster_centers_[block_labels]) ** 2).sum())
+
+        unique, counts = np.unique(labels, return_counts=True)
+        centers = model.cluster_centers_ * std + mean
+        return ClusteringResult(
+            n_clusters=n_clusters,
+            total_points=int(len(X)),
+            numeric_columns=numeric_cols,
+            cluster_distribution=dict(zip(unique.tolist(), counts.tolist())),
+            centroids={i: dict(zip(numeric_cols, map(float, center))) for i, center in enumerate(centers)},
+            inertia=inertia,
+            method="minibatch_kmeans",
+            sample_size=int(len(sample)),
+            k_selection=k_selection,
+        )
+
+    def _choose_k(self, sample: np.ndarray) -> tuple[int, Dict[int, float]]:
+        """Escolhe k pela maior silhouette (subamostra) entre os valores de ``k_range``."""
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.metrics import silhouette_score
+
+        scores: Dict[int, float] = {}
+        for k in self.k_range:
+            if k >= len(sample):
+                break
+            labels = MiniBatchKMeans(
+                n_clusters=k, n_init=3, batch_size=self.batch_size, random_state=self.seed
+            ).fit_predict(sample)
+            if len(np.unique(labels)) < 2:
+                continue
+            scores[k] = float(silhouette_score(
+                sample, labels,
+                sample_size=min(SILHOUETTE_SAMPLE_SIZE, len(sample)),
+                random_state=self.seed,
+            ))
+        if not scores:
+            return (self.k_range[0] if self.k_range else 2), scores
+        best = max(scores, key=scores.get)
+        logger.info(f"🎯 k escolhido automaticamente: {best} (silhouette {scores[best]:.3f})")
+        return best, scores
+
+
+_clustering_engine: Optional[ClusteringEngine] = None
+_clustering_engine_lock = threading.Lock()
+
+
+def get_clustering_engine() -> ClusteringEngine:
+    """Retorna o motor de clustering do processo (singleton)."""
+    global _clustering_engine
+    if _clustering_engine is None:
+        with _clustering_engine_lock:
+            if _clustering_engine is None:
+                _clustering_engine = ClusteringEngine()
+    return _clustering_engine
@@ -26,6 +26,8 @@ from urllib.parse import urlparse
 import warnings
 from datetime import datetime, timedelta
 
+from src.data.dtype_optimizer import optimize_dtypes
+from src.settings import DTYPE_OPTIMIZATION_ENABLED
 from src.utils.logging_config import get_logger
 
 
@@ -45,7 +47,12 @@ class DataLoader:
     ⚠️ CONFORMIDADE: Restrito ao agente de ingestão apenas.
     """
     
-    def __init__(self, caller_agent: Optional[str] = None):
+    def __init__(self, caller_agent: Optional[str] = None, optimize_memory: bool = DTYPE_OPTIMIZATION_ENABLED):
+        """
+        Args:
+            caller_agent: Nome do agente que está chamando (para validação)
+            optimize_memory: Otimiza os dtypes dos DataFrames lidos (ver ``optimize_dtypes``)
+        """
         self.logger = get_logger(__name__)
         self._last_loaded_info: Optional[Dict[str, Any]] = None
         
@@ -57,6 +64,7 @@ class DataLoader:
         self.supported_encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252', 'utf-16']
         self.max_file_size_mb = 500
         self.timeout_seconds = 30
+        self.optimize_memory = optimize_memory
         
         self.logger.info(f"DataLoader inicializado por: {self.caller_agent}")
     
@@ -161,6 +169,7 @@ class DataLoader:
             
             # Carregar dados
             df = pd.read_csv(file_path, **default_kwargs)
+            dtype_report = self._optimize_memory(df)
             
             # Informações do carregamento
             load_info = {
@@ -172,7 +181,8 @@ class DataLoader:
                 'columns': len(df.columns),
                 'memory_usage_mb': df.memory_usage(deep=True).sum() / (1024 * 1024),
                 'load_time': datetime.now().isoformat(),
-                'pandas_kwargs': default_kwargs
+                'pandas_kwargs': default_kwargs,
+                'dtype_optimization': dtype_report
             }
             
             self._last_loaded_info = load_info
@@ -239,6 +249,7 @@ class DataLoader:
             
             # Carregar dados
             df = pd.read_csv(io.BytesIO(content), **default_kwargs)
+            dtype_report = self._optimize_memory(df)
             
             # Informações do carregamento
             load_info = {
@@ -251,6 +262,7 @@ class DataLoader:
                 'memory_usage_mb': df.memory_usage(deep=True).sum() / (1024 * 1024),
                 'load_time': datetime.now().isoformat(),
                 'pandas_kwargs': default_kwargs,
+                'dtype_optimization': dtype_report,
                 'response_headers': dict(response.headers)
             }
             
@@ -349,6 +361,7 @@ class DataLoader:
             
             # Carregar dados
             df = pd.read_csv(io.BytesIO(content), **default_kwargs)
+            dtype_report = self._optimize_memory(df)
             
             # Informações do carregamento
             load_info = {
@@ -360,7 +373,8 @@ class DataLoader:
                 'columns': len(df.columns),
                 'memory_usage_mb': df.memory_usage(deep=True).sum() / (1024 * 1024),
                 'load_time': datetime.now().isoformat(),
-                'pandas_kwargs': default_kwargs
+                'pandas_kwargs': default_kwargs,
+                'dtype_optimization': dtype_report
             }
             
             self._last_loaded_info = load_info
@@ -426,6 +440,13 @@ class DataLoader:
         
         return df, load_info
     
+    def _optimize_memory(self, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """Otimiza os dtypes de ``df`` no lugar e retorna o relatório (None se desativado)."""
+        if not self.optimize_memory:
+            return None
+        _, report = optimize_dtypes(df, inplace=True)
+        return report.to_dict()
+    
     def get_last_load_info(self) -> Optional[Dict[str, Any]]:
         """Retorna informações do último carregamento realizado."""
         return self._last_loaded_info
@@ -19,6 +19,8 @@ import pandas as pd
 
 from src.data.data_loader import DataLoader, DataLoaderError  
 from src.data.data_validator import DataValidator, DataValidationError
+from src.data.dtype_optimizer import optimize_dtypes
+from src.settings import DTYPE_OPTIMIZATION_ENABLED
 from src.agent.csv_analysis_agent import EmbeddingsAnalysisAgent
 from src.utils.logging_config import get_logger
 
@@ -50,7 +52,8 @@ class DataProcessor:
         self._validate_csv_access_authorization()
         
         # Componentes principais (com caller_agent)
-        self.loader = DataLoader(caller_agent=self.caller_agent)
+        # dtypes são otimizados só depois da validação/limpeza (que trabalham sobre object)
+        self.loader = DataLoader(caller_agent=self.caller_agent, optimize_memory=False)
         self.validator = DataValidator()
         self.analyzer = EmbeddingsAnalysisAgent()
         
@@ -426,6 +429,14 @@ class DataProcessor:
                 self.logger.warning(f"Falha na limpeza automática: {str(e)}")
                 result['cleaning'] = {"error": str(e)}
         
+        # Otimização de dtypes do DataFrame mantido em memória
+        if DTYPE_OPTIMIZATION_ENABLED:
+            try:
+                self.current_df, dtype_report = optimize_dtypes(self.current_df, inplace=True)
+                result['dtype_optimization'] = dtype_report.to_dict()
+            except Exception as e:
+                self.logger.warning(f"Falha na otimização de dtypes: {str(e)}")
+        
         # Conectar com EmbeddingsAnalysisAgent
         try:
             # ⚠️ CONFORMIDADE: Este processador é restrito ao agente de ingestão
@@ -0,0 +1,271 @@
+"""Cache de datasets reconstruídos, compartilhado por todo o processo.
+
+Todos os handlers de análise (EmbeddingsAnalysisAgent, RAGDataAgent,
+OrchestratorAgent) reconstroem o mesmo DataFrame a partir da tabela
+embeddings. Este cache evita reconstruções repetidas:
+
+- Chave: fonte + variante da leitura (limite, filtros)
+- Versão: geração local (incrementada em ``invalidate``, chamado ao final de
+  cada ingestão) + token de versão do banco (ex.: ``created_at`` mais
+  recente), consultado no máximo a cada ``version_ttl`` segundos para
+  detectar ingestões feitas por outros processos
+- Orçamento de memória com despejo LRU
+- Single-flight: requisições simultâneas pela mesma chave aguardam uma
+  única carga em vez de disparar N reconstruções
+
+Os DataFrames devolvidos são cópias rasas (``copy(deep=False)``): os dados
+são compartilhados com a entrada em cache, sem duplicar o dataset a cada
+acerto. Adicionar, remover ou substituir colunas (``df["x"] = ...``) é
+seguro; alterar valores no lugar (``inplace=True``, ``df.loc[...] = ...``)
+corromperia o cache — quem precisar disso deve chamar ``df.copy()`` antes.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.settings import DATASET_CACHE_MAX_MB, DATASET_CACHE_VERSION_TTL
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+ALL_SOURCES = "*"
+
+
+@dataclass
+class _CacheEntry:
+    df: pd.DataFrame
+    version: Tuple[int, Any]
+    size_bytes: int
+    loaded_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class _InFlightLoad:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[pd.DataFrame] = None
+        self.error: Optional[BaseException] = None
+
+
+class DatasetCache:
+    """Cache versionado de DataFrames com single-flight e orçamento de memória.
+
+    Args:
+        max_bytes: Orçamento total de memória dos DataFrames em cache
+        version_ttl: Segundos durante os quais o token de versão do banco é reaproveitado
+    """
+
+    def __init__(self, max_bytes: int = DATASET_CACHE_MAX_MB * 1024 * 1024,
+                 version_ttl: float = DATASET_CACHE_VERSION_TTL):
+        self.max_bytes = max_bytes
+        self.version_ttl = version_ttl
+        self._entries: "OrderedDict[Tuple[str, Hashable], _CacheEntry]" = OrderedDict()
+        self._in_flight: Dict[Tuple[Tuple[str, Hashable], Tuple[int, Any]], _InFlightLoad] = {}
+        self._versions: Dict[str, Tuple[Any, float]] = {}
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "coalesced": 0, "evictions": 0, "invalidations": 0}
+
+    # ------------------------------------------------------------------
+    # Versão
+    # ------------------------------------------------------------------
+    def _generation(self, source: str) -> int:
+        return self._global_generation + self._generations.get(source, 0)
+
+    def current_version(self, source: Optional[str],
+                        version_provider: Optional[Callable[[], Any]]) -> Tuple[int, Any]:
+        """Versão atual de uma fonte: (geração local, token do banco reaproveitado por ``version_ttl``)."""
+        source = source or ALL_SOURCES
+        generation = self._generation(source)
+        if version_provider is None:
+            return generation, None
+        with self._lock:
+            cached = self._versions.get(source)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.version_ttl:
+            return generation, cached[0]
+        try:
+            token = version_provider()
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao consultar versão do dataset '{source}': {e}")
+            token = cached[0] if cached else None
+        with self._lock:
+            self._versions[source] = (token, now)
+        return generation, token
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def get_or_load(self,
+                    source: Optional[str],
+                    loader: Callable[[], Optional[pd.DataFrame]],
+                    variant: Hashable = None,
+                    version_provider: Optional[Callable[[], Any]] = None) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame em cache ou carrega via ``loader`` (uma única vez por chave).
+
+        Args:
+            source: Fonte do dataset (None = todas)
+            loader: Função que reconstrói o DataFrame (None = falha, não é cacheado)
+            variant: Distingue leituras da mesma fonte (limite, filtros...)
+            version_provider: Retorna o token de versão atual do banco
+
+        Returns:
+            Cópia rasa do DataFrame (não alterar valores no lugar) ou None
+        """
+        source = source or ALL_SOURCES
+        key = (source, variant)
+        # Consulta de versão fora do lock (pode ir ao banco)
+        version = self.current_version(source, version_provider)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.version == version:
+                    entry.hits += 1
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    logger.info(f"⚡ Dataset '{source}' servido do cache ({len(entry.df)} linhas)")
+                    return entry.df.copy(deep=False)
+                self._drop(key)
+
+            # Cargas em andamento só são compartilhadas dentro da mesma versão
+            in_flight = self._in_flight.get((key, version))
+            owner = in_flight is None
+            if owner:
+                in_flight = _InFlightLoad()
+                self._in_flight[(key, version)] = in_flight
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if owner:
+            return self._load(key, version, loader, in_flight)
+
+        logger.info(f"⏳ Aguardando carga em andamento do dataset '{source}'")
+        in_flight.done.wait()
+        if in_flight.error is not None:
+            raise in_flight.error
+        return in_flight.result.copy(deep=False) if in_flight.result is not None else None
+
+    def peek(self,
+             source: Optional[str],
+             variant: Hashable = None,
+             version_provider: Optional[Callable[[], Any]] = None,
+             columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """Retorna o DataFrame em cache (versão atual) sem disparar carga.
+
+        Args:
+            source: Fonte do dataset (None = todas)
+            variant: Variante da leitura (ver ``get_or_load``)
+            version_provider: Retorna o token de versão atual do banco
+            columns: Projeção das colunas (ex.: plano de ``query_planner``); colunas
+                ausentes na entrada em cache resultam em None
+
+        Returns:
+            Cópia rasa (projetada) do DataFrame ou None se não houver entrada válida
+        """
+        source = source or ALL_SOURCES
+        key = (source, variant)
+        version = self.current_version(source, version_provider)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            if columns is not None and not set(columns).issubset(entry.df.columns):
+                return None
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            if columns is not None:
+                return entry.df[list(columns)]  # a seleção de colunas já cria outro DataFrame
+            return entry.df.copy(deep=False)
+
+    def _load(self, key: Tuple[str, Hashable], version: Tuple[int, Any],
+              loader: Callable[[], Optional[pd.DataFrame]], in_flight: _InFlightLoad) -> Optional[pd.DataFrame]:
+        started = time.perf_counter()
+        try:
+            df = loader()
+            in_flight.result = df
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop((key, version), None)
+                self._stats["loads"] += 1
+                if in_flight.error is None and in_flight.result is not None:
+                    # Invalidação durante a carga: o resultado já nasce obsoleto
+                    if self._generation(key[0]) == version[0]:
+                        self._store(key, version, in_flight.result)
+            in_flight.done.set()
+
+        if df is None:
+            return None
+        logger.info(f"💾 Dataset '{key[0]}' carregado em {time.perf_counter() - started:.2f}s e armazenado no cache")
+        return df.copy(deep=False)
+
+    def _store(self, key: Tuple[str, Hashable], version: Tuple[int, Any], df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        if size > self.max_bytes:
+            logger.warning(f"⚠️ Dataset '{key[0]}' ({size / 1e6:.1f} MB) excede o orçamento do cache; não armazenado")
+            return
+        self._entries[key] = _CacheEntry(df=df, version=version, size_bytes=size)
+        while self._total_bytes() > self.max_bytes:
+            evicted_key, _ = self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+            logger.info(f"🧹 Dataset '{evicted_key[0]}' removido do cache (orçamento de memória)")
+
+    def _drop(self, key: Tuple[str, Hashable]) -> None:
+        self._entries.pop(key, None)
+
+    def _total_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def invalidate(self, source: Optional[str] = None) -> None:
+        """Invalida o cache após uma ingestão (de uma fonte ou de todas)."""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if source is None:
+                self._global_generation += 1
+                self._entries.clear()
+                self._versions.clear()
+            else:
+                self._generations[source] = self._generations.get(source, 0) + 1
+                # Leituras de "todas as fontes" também incluem esta fonte
+                self._generations[ALL_SOURCES] = self._generations.get(ALL_SOURCES, 0) + 1
+                for key in [k for k in self._entries if k[0] in (source, ALL_SOURCES)]:
+                    self._drop(key)
+                self._versions.pop(source, None)
+                self._versions.pop(ALL_SOURCES, None)
+        logger.info(f"🔄 Cache de datasets invalidado ({source or 'todas as fontes'})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes,
+                "in_flight": len(self._in_flight),
+            }
+
+
+_dataset_cache: Optional[DatasetCache] = None
+_dataset_cache_lock = threading.Lock()
+
+
+def get_dataset_cache() -> DatasetCache:
+    """Retorna o cache de datasets do processo (singleton)."""
+    global _dataset_cache
+    if _dataset_cache is None:
+        with _dataset_cache_lock:
+            if _dataset_cache is None:
+                _dataset_cache = DatasetCache()
+    return _dataset_cache
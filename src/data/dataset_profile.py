@@ -0,0 +1,320 @@
+"""Perfil pré-calculado de datasets (estatísticas exatas por fonte e versão).
+
+Os handlers de estatística, variabilidade, tendência central, correlação,
+distribuição e outliers recalculavam tudo a cada pergunta. O perfil é
+calculado uma vez após a ingestão (ou na primeira consulta de uma versão
+nova) e persistido em SQLite, de modo que perguntas de resumo são
+respondidas em milissegundos.
+
+Conteúdo do perfil:
+
+- Tipos das colunas (mesma classificação de ``calculate_real_statistics``)
+- Estatísticas exatas por coluna numérica: contagem, média, desvio padrão,
+  variância, mínimo, máximo, quartis, mediana, moda, assimetria, curtose,
+  coeficiente de variação, teste de Shapiro-Wilk (5000 primeiras amostras)
+- Limites de outliers (IQR 1.5) e contagens
+- Histogramas (contagens + bordas)
+- Matriz de correlação de Pearson
+- Contagens de valores das colunas categóricas
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.dataset_cache import ALL_SOURCES
+from src.settings import DATASET_PROFILE_DB_PATH, DATASET_PROFILE_HISTOGRAM_BINS
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Mesmo limite usado pelo handler de distribuição (scipy.stats.shapiro)
+SHAPIRO_MAX_SAMPLES = 5000
+CATEGORICAL_TOP_VALUES = 20
+# Versões antigas mantidas por fonte
+PROFILE_VERSIONS_KEPT = 3
+
+
+class DatasetProfileError(Exception):
+    """Falha ao calcular ou persistir o perfil de um dataset."""
+    pass
+
+
+@dataclass
+class DatasetProfile:
+    """Perfil estruturado de um dataset (uma fonte em uma versão de ingestão)."""
+    source: str
+    version: Optional[str]
+    row_count: int
+    columns: List[str]
+    dtypes: Dict[str, str]
+    column_types: Dict[str, List[str]]
+    numeric: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    categorical: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    histograms: Dict[str, Dict[str, List[float]]] = field(default_factory=dict)
+    correlation: Dict[str, Dict[str, Optional[float]]] = field(default_factory=dict)
+    computed_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    compute_seconds: float = 0.0
+
+    @property
+    def numeric_columns(self) -> List[str]:
+        return list(self.numeric)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DatasetProfile":
+        return cls(**data)
+
+
+def _float(value: Any) -> Optional[float]:
+    if value is None:
+        return None
+    value = float(value)
+    return None if np.isnan(value) or np.isinf(value) else value
+
+
+def classify_columns(df: pd.DataFrame) -> Dict[str, List[str]]:
+    """Classifica colunas em numéricas/categóricas/datetime (regras de ``calculate_real_statistics``)."""
+    numeric_cols: List[str] = []
+    categorical_cols: List[str] = []
+    datetime_cols: List[str] = []
+    for col in df.columns:
+        col_dtype = df[col].dtype
+        if col_dtype.kind in 'biufc':
+            numeric_cols.append(col)
+        elif col_dtype == 'object':
+            try:
+                pd.to_numeric(df[col].dropna().head(100))
+                numeric_cols.append(col)
+            except (ValueError, TypeError):
+                categorical_cols.append(col)
+        elif 'datetime' in str(col_dtype).lower():
+            datetime_cols.append(col)
+        else:
+            categorical_cols.append(col)
+    return {"numericos": numeric_cols, "categoricos": categorical_cols, "datetime": datetime_cols}
+
+
+def _numeric_profile(series: pd.Series) -> Dict[str, Any]:
+    values = series.dropna()
+    count = int(values.size)
+    stats: Dict[str, Any] = {"dtype": str(series.dtype), "count": count, "null_count": int(series.size - count)}
+    if count == 0:
+        return stats
+
+    q25, median, q75 = (float(v) for v in values.quantile([0.25, 0.5, 0.75]))
+    mean = float(values.mean())
+    std = _float(values.std())
+    iqr = q75 - q25
+    lower_bound = q25 - 1.5 * iqr
+    upper_bound = q75 + 1.5 * iqr
+    mode_values = values.mode()
+
+    stats.update({
+        "mean": mean,
+        "std": std,
+        "var": _float(values.var()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "q25": q25,
+        "median": median,
+        "q75": q75,
+        "mode": float(mode_values.iloc[0]) if len(mode_values) > 0 else None,
+        "skewness": _float(values.skew()),
+        "kurtosis": _float(values.kurtosis()),
+        "cv": (std / mean) * 100 if mean != 0 and std is not None else 0,
+        "iqr_lower": lower_bound,
+        "iqr_upper": upper_bound,
+        "outliers_lower": int((values < lower_bound).sum()),
+        "outliers_upper": int((values > upper_bound).sum()),
+        "shapiro_pvalue": None,
+    })
+
+    if count > 3:
+        try:
+            from scipy import stats as scipy_stats
+            stats["shapiro_pvalue"] = _float(scipy_stats.shapiro(values.iloc[:SHAPIRO_MAX_SAMPLES])[1])
+        except Exception as e:  # scipy ausente ou série constante
+            logger.debug(f"Shapiro indisponível para '{series.name}': {e}")
+    return stats
+
+
+def _categorical_profile(series: pd.Series) -> Dict[str, Any]:
+    value_counts = series.value_counts()
+    # category: value_counts inclui categorias sem ocorrências
+    value_counts = value_counts[value_counts > 0]
+    return {
+        "dtype": str(series.dtype),
+        "unique_count": int(len(value_counts)),
+        "unique_values": [v for v in series.unique().tolist()[:10]],
+        "value_counts": {str(k): int(v) for k, v in value_counts.head(CATEGORICAL_TOP_VALUES).items()},
+    }
+
+
+def compute_dataset_profile(df: pd.DataFrame,
+                            source: Optional[str] = None,
+                            version: Optional[str] = None,
+                            histogram_bins: int = DATASET_PROFILE_HISTOGRAM_BINS) -> DatasetProfile:
+    """Calcula o perfil exato de um DataFrame.
+
+    Args:
+        df: Dataset reconstruído
+        source: Fonte (None = todas)
+        version: Token de versão da ingestão
+        histogram_bins: Número de classes dos histogramas
+
+    Returns:
+        DatasetProfile com estatísticas, histogramas, correlações e limites de outliers
+    """
+    started = time.perf_counter()
+    column_types = classify_columns(df)
+    numeric_df = df.select_dtypes(include=[np.number])
+
+    numeric = {str(col): _numeric_profile(numeric_df[col]) for col in numeric_df.columns}
+
+    histograms: Dict[str, Dict[str, List[float]]] = {}
+    for col in numeric_df.columns:
+        values = numeric_df[col].dropna().to_numpy(dtype=float)
+        if values.size == 0:
+            continue
+        counts, edges = np.histogram(values, bins=histogram_bins)
+        histograms[str(col)] = {"counts": counts.tolist(), "edges": edges.tolist()}
+
+    correlation: Dict[str, Dict[str, Optional[float]]] = {}
+    if len(numeric_df.columns) >= 2:
+        corr = numeric_df.corr()
+        correlation = {str(r): {str(c): _float(corr.loc[r, c]) for c in corr.columns} for r in corr.index}
+
+    categorical = {
+        str(col): _categorical_profile(df[col])
+        for col in df.select_dtypes(include=['object', 'category']).columns
+    }
+
+    profile = DatasetProfile(
+        source=source or ALL_SOURCES,
+        version=version,
+        row_count=int(len(df)),
+        columns=[str(c) for c in df.columns],
+        dtypes={str(c): str(t) for c, t in df.dtypes.items()},
+        column_types=column_types,
+        numeric=numeric,
+        categorical=categorical,
+        histograms=histograms,
+        correlation=correlation,
+        compute_seconds=time.perf_counter() - started,
+    )
+    logger.info(
+        f"📐 Perfil do dataset '{profile.source}' calculado em {profile.compute_seconds:.2f}s "
+        f"({profile.row_count} linhas, {len(numeric)} colunas numéricas)"
+    )
+    return profile
+
+
+class DatasetProfileStore:
+    """Persistência dos perfis em SQLite com cache em memória.
+
+    Args:
+        db_path: Arquivo SQLite (padrão ``DATASET_PROFILE_DB_PATH``)
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or DATASET_PROFILE_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._memory: Dict[tuple, DatasetProfile] = {}
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dataset_profiles (
+                    source TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    computed_at TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    PRIMARY KEY (source, version)
+                )
+                """
+            )
+
+    def get(self, source: Optional[str], version: Optional[str]) -> Optional[DatasetProfile]:
+        """Retorna o perfil de uma fonte na versão informada (None se não existir)."""
+        if version is None:
+            return None
+        key = (source or ALL_SOURCES, str(version))
+        with self._lock:
+            profile = self._memory.get(key)
+            if profile is not None:
+                return profile
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT payload FROM dataset_profiles WHERE source = ? AND version = ?", key
+                ).fetchone()
+            if row is None:
+                return None
+            profile = DatasetProfile.from_dict(json.loads(row[0]))
+            self._memory[key] = profile
+            return profile
+
+    def save(self, profile: DatasetProfile) -> None:
+        """Persiste o perfil e descarta versões antigas da mesma fonte."""
+        if profile.version is None:
+            raise DatasetProfileError("Perfil sem versão não pode ser persistido")
+        key = (profile.source, str(profile.version))
+        payload = json.dumps(profile.to_dict(), default=str)
+        with self._lock:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO dataset_profiles (source, version, computed_at, payload) VALUES (?, ?, ?, ?)",
+                    (*key, profile.computed_at, payload),
+                )
+                conn.execute(
+                    """
+                    DELETE FROM dataset_profiles
+                    WHERE source = ? AND version NOT IN (
+                        SELECT version FROM dataset_profiles WHERE source = ?
+                        ORDER BY computed_at DESC LIMIT ?
+                    )
+                    """,
+                    (profile.source, profile.source, PROFILE_VERSIONS_KEPT),
+                )
+            self._memory = {k: v for k, v in self._memory.items() if k[0] != profile.source}
+            self._memory[key] = profile
+        logger.info(f"💾 Perfil do dataset '{profile.source}' salvo (versão {profile.version})")
+
+    def list_versions(self, source: Optional[str] = None) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT version FROM dataset_profiles WHERE source = ? ORDER BY computed_at DESC",
+                (source or ALL_SOURCES,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+
+_profile_store: Optional[DatasetProfileStore] = None
+_profile_store_lock = threading.Lock()
+
+
+def get_dataset_profile_store() -> DatasetProfileStore:
+    """Retorna o store de perfis do processo (singleton)."""
+    global _profile_store
+    if _profile_store is None:
+        with _profile_store_lock:
+            if _profile_store is None:
+                _profile_store = DatasetProfileStore()
+    return _profile_store
@@ -0,0 +1,159 @@
+"""Otimização de dtypes dos DataFrames mantidos em memória.
+
+Os DataFrames reconstruídos da tabela embeddings, os carregados pelo
+``DataLoader`` (``low_memory=False``) e os do ``/csv/upload`` chegam como
+float64/int64/object. Esta etapa reduz a memória de 2 a 4x sem mudar os
+valores além da tolerância:
+
+- Inteiros: menor tipo (int8/16/32, uint quando não há negativos) que
+  comporta o intervalo da coluna (conversão exata)
+- Floats: float32 quando o erro relativo máximo da conversão fica dentro
+  de ``float_rtol`` (padrão ``DTYPE_FLOAT32_RTOL``) e o intervalo cabe em float32
+- Strings com baixa cardinalidade (únicos/linhas <= ``category_max_ratio``):
+  ``category``
+- Strings restantes: ``string[pyarrow]`` quando ``arrow_strings=True`` e
+  pyarrow está instalado
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.settings import DTYPE_ARROW_STRINGS, DTYPE_CATEGORY_MAX_RATIO, DTYPE_FLOAT32_RTOL
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+_INTEGER_CANDIDATES = (np.int8, np.int16, np.int32)
+_UNSIGNED_CANDIDATES = (np.uint8, np.uint16, np.uint32)
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+@dataclass
+class DtypeOptimizationReport:
+    """Memória antes/depois e conversões aplicadas (coluna -> (dtype original, novo dtype))."""
+    memory_before_bytes: int
+    memory_after_bytes: int
+    conversions: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.memory_before_bytes - self.memory_after_bytes
+
+    @property
+    def reduction_ratio(self) -> float:
+        return self.memory_before_bytes / self.memory_after_bytes if self.memory_after_bytes else 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "memory_before_mb": round(self.memory_before_bytes / (1024 * 1024), 3),
+            "memory_after_mb": round(self.memory_after_bytes / (1024 * 1024), 3),
+            "saved_mb": round(self.saved_bytes / (1024 * 1024), 3),
+            "reduction_ratio": round(self.reduction_ratio, 2),
+            "conversions": {col: list(change) for col, change in self.conversions.items()},
+        }
+
+
+def _downcast_integer(series: pd.Series) -> Optional[pd.Series]:
+    if series.empty:
+        return None
+    low, high = int(series.min()), int(series.max())
+    candidates = _UNSIGNED_CANDIDATES if low >= 0 else _INTEGER_CANDIDATES
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return series.astype(dtype) if np.dtype(dtype).itemsize < series.dtype.itemsize else None
+    return None
+
+
+def _downcast_float(series: pd.Series, rtol: float) -> Optional[pd.Series]:
+    if series.dtype.itemsize <= 4:
+        return None
+    values = series.to_numpy()
+    finite = values[np.isfinite(values)]
+    if finite.size and np.abs(finite).max() > _FLOAT32_MAX:
+        return None
+    converted = values.astype(np.float32)
+    if finite.size:
+        back = converted[np.isfinite(values)].astype(np.float64)
+        # Tolerância relativa (com piso absoluto para valores próximos de zero)
+        if not np.all(np.abs(back - finite) <= rtol * np.maximum(np.abs(finite), 1.0)):
+            return None
+    return pd.Series(converted, index=series.index, name=series.name)
+
+
+def _optimize_strings(series: pd.Series, category_max_ratio: float, arrow_strings: bool) -> Optional[pd.Series]:
+    non_null = series.dropna()
+    if non_null.empty or not non_null.map(type).eq(str).all():
+        return None
+    if non_null.nunique() <= category_max_ratio * len(series):
+        return series.astype("category")
+    if arrow_strings and PYARROW_AVAILABLE:
+        return series.astype("string[pyarrow]")
+    return None
+
+
+def optimize_dtypes(df: pd.DataFrame,
+                    float_rtol: float = DTYPE_FLOAT32_RTOL,
+                    category_max_ratio: float = DTYPE_CATEGORY_MAX_RATIO,
+                    arrow_strings: bool = DTYPE_ARROW_STRINGS,
+                    inplace: bool = False) -> Tuple[pd.DataFrame, DtypeOptimizationReport]:
+    """Converte as colunas para os menores dtypes seguros.
+
+    Args:
+        df: DataFrame a otimizar
+        float_rtol: Erro relativo máximo aceito na conversão float64 -> float32 (0 desativa)
+        category_max_ratio: Razão máxima únicos/linhas para converter strings em ``category``
+        arrow_strings: Converte as demais colunas de texto para ``string[pyarrow]``
+        inplace: Altera ``df`` em vez de uma cópia
+
+    Returns:
+        Tupla (DataFrame otimizado, relatório com a memória economizada)
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    if not inplace:
+        df = df.copy()
+    conversions: Dict[str, Tuple[str, str]] = {}
+
+    for col in df.columns:
+        series = df[col]
+        dtype = series.dtype
+        try:
+            if pd.api.types.is_bool_dtype(dtype):
+                continue
+            if pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+                converted = _downcast_integer(series)
+            elif pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+                converted = _downcast_float(series, float_rtol) if float_rtol > 0 else None
+            elif dtype == object:
+                converted = _optimize_strings(series, category_max_ratio, arrow_strings)
+            else:
+                converted = None
+        except (TypeError, ValueError, OverflowError) as e:
+            logger.debug(f"Coluna '{col}' mantida como {dtype}: {e}")
+            converted = None
+        if converted is not None:
+            df[col] = converted
+            conversions[str(col)] = (str(dtype), str(converted.dtype))
+
+    report = DtypeOptimizationReport(
+        memory_before_bytes=before,
+        memory_after_bytes=int(df.memory_usage(deep=True).sum()),
+        conversions=conversions,
+    )
+    if conversions:
+        logger.info(
+            f"🗜️ Dtypes otimizados: {len(conversions)} colunas, "
+            f"{report.memory_before_bytes / 1e6:.1f} MB → {report.memory_after_bytes / 1e6:.1f} MB "
+            f"({report.reduction_ratio:.1f}x)"
+        )
+    return df, report
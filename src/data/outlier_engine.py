@@ -0,0 +1,337 @@
+"""Detecção de outliers em uma passada vetorizada sobre a matriz numérica.
+
+Os detectores existentes (handler de outliers do ``EmbeddingsAnalysisAgent``,
+chunk de metadados do ``RAGAgent``, análise simplificada de ``/fraud/detect``)
+calculavam limites IQR coluna a coluna com operações de DataFrame. Este
+módulo monta uma matriz float32 (linhas × colunas numéricas) e calcula todos
+os métodos de uma vez, com operações por eixo:
+
+- IQR: limites ``Q1 - k·IQR`` / ``Q3 + k·IQR``
+- z-score: ``|x - média| / desvio padrão``
+- MAD: z robusto ``0.6745 · |x - mediana| / MAD`` (Iglewicz-Hoaglin)
+- Isolation Forest (opcional, scikit-learn): score de anomalia por linha
+
+Retorna resumos por coluna (limites, contagens, taxas) e por linha (linhas
+marcadas por método e as linhas mais anômalas). Relatórios são cacheados
+por chave (fonte + versão do dataset) e parâmetros.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+SUPPORTED_METHODS = ("iqr", "zscore", "mad")
+# Constante de consistência do MAD para a normal (Iglewicz-Hoaglin)
+MAD_SCALE = 0.6745
+IGNORED_COLUMNS = ("id", "index", "unnamed: 0")
+
+
+class OutlierDetectionError(Exception):
+    """Método desconhecido ou dataset sem colunas numéricas."""
+    pass
+
+
+@dataclass
+class OutlierReport:
+    """Resumo de outliers por coluna e por linha."""
+    row_count: int
+    columns: List[str]
+    methods: List[str]
+    per_column: Dict[str, Dict[str, Dict[str, Any]]]
+    rows_flagged: Dict[str, int]
+    top_rows: List[Dict[str, Any]]
+    isolation_forest: Optional[Dict[str, Any]] = None
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    compute_seconds: float = 0.0
+    cached: bool = False
+
+    def column_summary(self, method: str = "iqr") -> List[Dict[str, Any]]:
+        """Linhas de tabela (uma por coluna) para um método."""
+        return [{"variavel": col, **self.per_column[col][method]} for col in self.columns]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def numeric_matrix(df: pd.DataFrame, columns: Optional[Sequence[str]] = None) -> tuple[np.ndarray, List[str]]:
+    """Matriz float32 (linhas × colunas numéricas), preenchida coluna a coluna; NaN preservados."""
+    if columns is None:
+        columns = [
+            col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+            and str(col).lower() not in IGNORED_COLUMNS
+        ]
+    columns = [str(c) for c in columns]
+    if not columns:
+        raise OutlierDetectionError("Nenhuma coluna numérica para detecção de outliers")
+    # Ordem Fortran: cada coluna é contígua (ordenações e reduções por coluna rápidas)
+    X = np.empty((len(df), len(columns)), dtype=np.float32, order="F")
+    for j, col in enumerate(columns):
+        X[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+    return X, columns
+
+
+def _sorted_quantiles(S: np.ndarray, counts: np.ndarray, qs: Sequence[float]) -> List[np.ndarray]:
+    """Quantis (interpolação linear, como pandas) de colunas já ordenadas com NaN no final."""
+    cols = np.arange(S.shape[1])
+    last = np.maximum(counts - 1, 0)
+    result = []
+    for q in qs:
+        pos = q * last
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        frac = (pos - lo).astype(np.float64)
+        low_values = S[lo, cols].astype(np.float64)
+        values = low_values + frac * (S[hi, cols].astype(np.float64) - low_values)
+        values[counts == 0] = np.nan
+        result.append(values)
+    return result
+
+
+def _rate(count: int, total: int) -> float:
+    return (count / total) * 100 if total else 0.0
+
+
+def detect_outliers(df: pd.DataFrame,
+                    columns: Optional[Sequence[str]] = None,
+                    methods: Sequence[str] = SUPPORTED_METHODS,
+                    iqr_k: float = 1.5,
+                    z_threshold: float = 3.0,
+                    mad_threshold: float = 3.5,
+                    isolation_forest: bool = False,
+                    contamination: Any = "auto",
+                    top_n: int = 10) -> OutlierReport:
+    """Calcula outliers de todas as colunas numéricas em uma passada.
+
+    Args:
+        df: Dataset
+        columns: Colunas analisadas (padrão: todas as numéricas, exceto identificadores)
+        methods: Subconjunto de ``SUPPORTED_METHODS``
+        iqr_k: Multiplicador do IQR
+        z_threshold: Limite do z-score
+        mad_threshold: Limite do z robusto (MAD)
+        isolation_forest: Calcula também scores de Isolation Forest (scikit-learn)
+        contamination: Parâmetro ``contamination`` do Isolation Forest
+        top_n: Linhas mais anômalas devolvidas no resumo por linha
+
+    Returns:
+        OutlierReport
+
+    Raises:
+        OutlierDetectionError: Método desconhecido ou nenhuma coluna numérica
+    """
+    unknown = [m for m in methods if m not in SUPPORTED_METHODS]
+    if unknown:
+        raise OutlierDetectionError(f"Métodos de outlier não suportados: {unknown}")
+    started = time.perf_counter()
+    X, columns = numeric_matrix(df, columns)
+    n_rows = len(X)
+    counts = (~np.isnan(X)).sum(axis=0)
+    # Uma ordenação por coluna (NaN vão para o final) fornece todos os quantis
+    q1, median, q3 = _sorted_quantiles(np.sort(X, axis=0), counts, (0.25, 0.5, 0.75))
+    per_column: Dict[str, Dict[str, Dict[str, Any]]] = {col: {} for col in columns}
+    row_flags: Dict[str, np.ndarray] = {}
+    # Comparações com NaN são False: valores ausentes nunca são marcados
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if "iqr" in methods:
+            iqr = q3 - q1
+            lower, upper = q1 - iqr_k * iqr, q3 + iqr_k * iqr
+            below, above = X < lower.astype(np.float32), X > upper.astype(np.float32)
+            row_flags["iqr"] = (below | above).any(axis=1)
+            n_below, n_above = below.sum(axis=0), above.sum(axis=0)
+            for j, col in enumerate(columns):
+                per_column[col]["iqr"] = {
+                    "q1": float(q1[j]), "q3": float(q3[j]),
+                    "lower": float(lower[j]), "upper": float(upper[j]),
+                    "count_lower": int(n_below[j]), "count_upper": int(n_above[j]),
+                    "count": int(n_below[j] + n_above[j]),
+                    "rate": _rate(int(n_below[j] + n_above[j]), n_rows),
+                }
+
+        if "zscore" in methods:
+            # Acumulação em float64 (precisão das somas em 285k linhas)
+            total = np.nansum(X, axis=0, dtype=np.float64)
+            mean = total / np.maximum(counts, 1)
+            squares = np.nansum((X - mean.astype(np.float32)) ** 2, axis=0, dtype=np.float64)
+            std = np.sqrt(squares / np.maximum(counts - 1, 1))
+            flagged = np.abs(X - mean.astype(np.float32)) > (z_threshold * std).astype(np.float32)
+            flagged &= std > 0
+            row_flags["zscore"] = flagged.any(axis=1)
+            n_flagged = flagged.sum(axis=0)
+            for j, col in enumerate(columns):
+                per_column[col]["zscore"] = {
+                    "mean": float(mean[j]), "std": float(std[j]), "threshold": z_threshold,
+                    "count": int(n_flagged[j]), "rate": _rate(int(n_flagged[j]), n_rows),
+                }
+
+        robust_z = None
+        if "mad" in methods:
+            deviation = np.abs(X - median.astype(np.float32))
+            (mad,) = _sorted_quantiles(np.sort(deviation, axis=0), counts, (0.5,))
+            robust_z = deviation
+            robust_z *= (MAD_SCALE / mad).astype(np.float32)
+            robust_z[:, mad == 0] = 0.0
+            flagged = robust_z > mad_threshold
+            row_flags["mad"] = flagged.any(axis=1)
+            n_flagged = flagged.sum(axis=0)
+            for j, col in enumerate(columns):
+                per_column[col]["mad"] = {
+                    "median": float(median[j]), "mad": float(mad[j]), "threshold": mad_threshold,
+                    "count": int(n_flagged[j]), "rate": _rate(int(n_flagged[j]), n_rows),
+                }
+
+    for col, non_null in zip(columns, counts):
+        per_column[col]["non_null"] = int(non_null)
+
+    # Resumo por linha: z robusto máximo (ou número de métodos que marcaram a linha)
+    top_rows: List[Dict[str, Any]] = []
+    if robust_z is not None:
+        scores = np.nan_to_num(robust_z, nan=0.0)
+        worst_col = scores.argmax(axis=1)
+        row_score = scores[np.arange(n_rows), worst_col]
+    else:
+        row_score = np.sum([flags for flags in row_flags.values()], axis=0).astype(np.float32)
+        worst_col = None
+    if top_n and n_rows:
+        top = np.argsort(row_score)[::-1][:top_n]
+        index = df.index
+        for position in top:
+            if row_score[position] <= 0:
+                break
+            entry = {
+                "row": index[position].item() if hasattr(index[position], "item") else index[position],
+                "score": float(row_score[position]),
+                "methods": [m for m, flags in row_flags.items() if flags[position]],
+            }
+            if worst_col is not None:
+                entry["column"] = columns[worst_col[position]]
+            top_rows.append(entry)
+
+    forest = _isolation_forest(X, median, df.index, contamination, top_n) if isolation_forest else None
+
+    report = OutlierReport(
+        row_count=n_rows,
+        columns=columns,
+        methods=list(methods),
+        per_column=per_column,
+        rows_flagged={m: int(flags.sum()) for m, flags in row_flags.items()},
+        top_rows=top_rows,
+        isolation_forest=forest,
+        parameters={"iqr_k": iqr_k, "z_threshold": z_threshold, "mad_threshold": mad_threshold},
+        compute_seconds=time.perf_counter() - started,
+    )
+    logger.info(
+        f"🔍 Outliers calculados em {report.compute_seconds:.2f}s "
+        f"({n_rows} linhas × {len(columns)} colunas, métodos: {', '.join(report.methods)})"
+    )
+    return report
+
+
+def _isolation_forest(X: np.ndarray, median: np.ndarray, index: pd.Index,
+                      contamination: Any, top_n: int) -> Dict[str, Any]:
+    from sklearn.ensemble import IsolationForest
+
+    filled = np.where(np.isnan(X), median, X)
+    model = IsolationForest(contamination=contamination, random_state=42, n_jobs=1).fit(filled)
+    # score_samples: quanto menor, mais anômalo; invertido para "maior = mais anômalo"
+    scores = -model.score_samples(filled)
+    flagged = model.predict(filled) == -1
+    top = np.argsort(scores)[::-1][:top_n]
+    return {
+        "count": int(flagged.sum()),
+        "rate": _rate(int(flagged.sum()), len(X)),
+        "contamination": contamination,
+        "top_rows": [
+            {"row": index[p].item() if hasattr(index[p], "item") else index[p], "score": float(scores[p])}
+            for p in top
+        ],
+    }
+
+
+class OutlierEngine:
+    """Cache de relatórios de outliers por chave (fonte + versão) e parâmetros.
+
+    Args:
+        cache_entries: Relatórios mantidos em cache (LRU)
+    """
+
+    def __init__(self, cache_entries: int = 16):
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[Hashable, OutlierReport]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "hits": 0}
+
+    def _key(self, cache_key: Optional[Hashable], options: Dict[str, Any]) -> Optional[Hashable]:
+        if cache_key is None:
+            return None
+        return (cache_key, tuple(sorted((k, tuple(v) if isinstance(v, (list, tuple)) else v)
+                                        for k, v in options.items())))
+
+    def _cached(self, key: Optional[Hashable]) -> Optional[OutlierReport]:
+        if key is None:
+            return None
+        with self._lock:
+            report = self._cache.get(key)
+            if report is None:
+                return None
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+        return OutlierReport(**{**report.to_dict(), "cached": True})
+
+    def detect(self, df: pd.DataFrame, cache_key: Optional[Hashable] = None, **options: Any) -> OutlierReport:
+        """``detect_outliers`` com cache (``cache_key=None`` desativa o cache)."""
+        key = self._key(cache_key, options)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        report = detect_outliers(df, **options)
+        with self._lock:
+            self._stats["runs"] += 1
+            if key is not None:
+                self._cache[key] = report
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return report
+
+    def load_and_detect(self, loader: Callable[[], Optional[pd.DataFrame]],
+                        cache_key: Optional[Hashable] = None, **options: Any) -> Optional[OutlierReport]:
+        """Como ``detect``, mas só carrega o dataset se o relatório não estiver em cache."""
+        cached = self._cached(self._key(cache_key, options))
+        if cached is not None:
+            return cached
+        df = loader()
+        if df is None or df.empty:
+            return None
+        return self.detect(df, cache_key=cache_key, **options)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._cache)}
+
+
+_outlier_engine: Optional[OutlierEngine] = None
+_outlier_engine_lock = threading.Lock()
+
+
+def get_outlier_engine() -> OutlierEngine:
+    """Retorna o motor de outliers do processo (singleton)."""
+    global _outlier_engine
+    if _outlier_engine is None:
+        with _outlier_engine_lock:
+            if _outlier_engine is None:
+                _outlier_engine = OutlierEngine()
+    return _outlier_engine
@@ -0,0 +1,136 @@
+"""Planejador de consultas analíticas com poda de colunas.
+
+Uma pergunta sobre ``Amount`` não precisa reconstruir e converter as 31
+colunas do dataset. O planejador fica entre a classificação da consulta
+(``OrchestratorAgent._classify_query`` / handlers do
+``EmbeddingsAnalysisAgent``) e a camada de dados:
+
+1. Normaliza a pergunta (minúsculas, sem acentos)
+2. Identifica as colunas citadas pelo nome (palavra inteira)
+3. Identifica as estatísticas pedidas (média, mediana, outliers...)
+4. Decide se a leitura pode ser podada: sem colunas citadas, pedidos
+   explícitos de "todas as colunas" ou correlações com uma única coluna
+   (que precisam das demais) leem o dataset inteiro
+
+O plano resultante é repassado a ``PythonDataAnalyzer.get_data_from_embeddings``
+(``columns=``), que reconstrói e converte apenas as colunas necessárias.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# Estatística -> palavras (já normalizadas) que a solicitam; "*" final = prefixo
+STATISTIC_KEYWORDS: Dict[str, Sequence[str]] = {
+    "mean": ("media", "medias", "medio", "mean", "average"),
+    "median": ("mediana*", "median"),
+    "std": ("desvio*", "std", "standard deviation"),
+    "var": ("variancia*", "variance", "variabilidade"),
+    "min": ("minimo*", "menor", "min"),
+    "max": ("maximo*", "maior", "max"),
+    "quantile": ("quartil*", "percentil*", "quantil*", "quartile*", "percentile*", "iqr"),
+    "outliers": ("outlier*", "atipic*", "anomal*"),
+    "correlation": ("correlac*", "correlation*", "correlated"),
+    "distribution": ("distribuic*", "histograma*", "histogram*", "distribution*", "frequencia*"),
+    "count": ("quantos", "quantas", "contagem", "count"),
+}
+
+# Expressões que pedem explicitamente o dataset inteiro
+ALL_COLUMNS_PATTERNS = (
+    "todas as colunas", "todas as variaveis", "todas colunas", "todas variaveis",
+    "cada coluna", "cada variavel", "all columns", "every column",
+)
+
+
+def normalize_text(text: str) -> str:
+    """Minúsculas e sem acentos (comparação de nomes de colunas e palavras-chave)."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower().strip()
+
+
+def mentions(normalized_query: str, term: str) -> bool:
+    """Se a consulta normalizada cita ``term`` como palavra inteira ("*" final = prefixo)."""
+    prefix = term.endswith("*")
+    term = term.rstrip("*")
+    pattern = r"(?<![a-z0-9_])" + re.escape(term) + ("" if prefix else r"(?![a-z0-9_])")
+    return re.search(pattern, normalized_query) is not None
+
+
+@dataclass
+class QueryPlan:
+    """Colunas e estatísticas necessárias para responder uma consulta.
+
+    ``columns=None`` significa leitura completa (nenhuma poda possível).
+    """
+    columns: Optional[List[str]]
+    statistics: List[str] = field(default_factory=list)
+    reason: str = ""
+
+    @property
+    def pruned(self) -> bool:
+        return self.columns is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"columns": self.columns, "statistics": self.statistics, "reason": self.reason}
+
+
+def detect_statistics(query: str) -> List[str]:
+    """Estatísticas pedidas na pergunta, na ordem de ``STATISTIC_KEYWORDS``."""
+    normalized = normalize_text(query)
+    return [
+        stat for stat, keywords in STATISTIC_KEYWORDS.items()
+        if any(mentions(normalized, keyword) for keyword in keywords)
+    ]
+
+
+def match_columns(query: str, available_columns: Iterable[str]) -> List[str]:
+    """Colunas citadas pelo nome na pergunta (palavra inteira, sem diferenciar acentos/caixa).
+
+    A ordem segue ``available_columns`` (ordem do dataset).
+    """
+    normalized = normalize_text(query)
+    matched = []
+    for column in available_columns:
+        name = normalize_text(column)
+        if name and mentions(normalized, name):
+            matched.append(column)
+    return matched
+
+
+def plan_query(query: str,
+               available_columns: Optional[Sequence[str]],
+               required_columns: Iterable[str] = ()) -> QueryPlan:
+    """Monta o plano de leitura de uma consulta analítica.
+
+    Args:
+        query: Pergunta do usuário
+        available_columns: Colunas do dataset (None = desconhecidas, sem poda)
+        required_columns: Colunas sempre incluídas quando há poda (ex.: alvo de agrupamento)
+
+    Returns:
+        QueryPlan com as colunas a ler (None = todas) e as estatísticas pedidas
+    """
+    statistics = detect_statistics(query)
+    if not available_columns:
+        return QueryPlan(columns=None, statistics=statistics, reason="colunas do dataset desconhecidas")
+
+    normalized = normalize_text(query)
+    if any(pattern in normalized for pattern in ALL_COLUMNS_PATTERNS):
+        return QueryPlan(columns=None, statistics=statistics, reason="pedido explícito de todas as colunas")
+
+    matched = match_columns(query, available_columns)
+    if not matched:
+        return QueryPlan(columns=None, statistics=statistics, reason="nenhuma coluna citada")
+    if "correlation" in statistics and len(matched) < 2:
+        return QueryPlan(columns=None, statistics=statistics,
+                         reason="correlação com uma coluna precisa das demais")
+
+    selected = set(matched) | (set(required_columns) & set(available_columns))
+    columns = [c for c in available_columns if c in selected]
+    return QueryPlan(
+        columns=columns,
+        statistics=statistics,
+        reason=f"{len(columns)} de {len(available_columns)} colunas",
+    )
@@ -0,0 +1,334 @@
+"""Atalho determinístico (sem LLM) para perguntas estatísticas estruturadas.
+
+Perguntas como "qual a média de Amount?" ou "correlação entre V1 e V2"
+passavam pela recuperação de chunks e por uma síntese completa no LLM, embora
+o número exato já esteja no perfil do dataset (``DatasetProfile``). O atalho:
+
+1. Interpreta a pergunta com o planejador (``detect_statistics`` /
+   ``match_columns``) em um ``StatRequest``: estatísticas por coluna (média,
+   mediana, desvio padrão, variância, mínimo, máximo) sobre colunas citadas,
+   ou a correlação de Pearson entre exatamente duas colunas
+2. Aceita a pergunta só se, retirados os nomes das colunas, as palavras das
+   estatísticas e as palavras de ligação (``ALLOWED_WORDS``), não sobrar nada.
+   Qualquer qualificador ("em transações fraudulentas", "dos clientes
+   ativos"), filtro, agrupamento, número solto ou pedido de explicação faz a
+   pergunta seguir o fluxo normal (RAG + LLM), assim como colunas não
+   numéricas e estatísticas não suportadas
+3. Responde a partir do perfil pré-calculado com um template em português,
+   com os valores exatos também nos metadados
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.data.dataset_profile import DatasetProfile
+from src.data.query_planner import (
+    ALL_COLUMNS_PATTERNS,
+    STATISTIC_KEYWORDS,
+    detect_statistics,
+    match_columns,
+    mentions,
+    normalize_text,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Estatísticas por coluna respondidas direto do perfil (chave em DatasetProfile.numeric)
+COLUMN_STATISTICS: Dict[str, str] = {
+    "mean": "Média",
+    "median": "Mediana",
+    "std": "Desvio padrão",
+    "var": "Variância",
+    "min": "Mínimo",
+    "max": "Máximo",
+}
+
+# Únicas palavras aceitas além das colunas e das estatísticas (normalizadas):
+# ligação, verbos de pedido e referências ao próprio dataset. Qualquer outra
+# palavra pode ser um filtro ou qualificador e manda a pergunta para o LLM
+ALLOWED_WORDS = frozenset({
+    "a", "o", "as", "os", "ao", "aos", "e", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas",
+    "um", "uma", "qual", "quais", "quanto", "quanta", "seria", "sao", "me",
+    "calcule", "calcular", "informe", "diga", "mostre", "retorne", "obtenha", "traga", "valor", "valores",
+    "padrao", "coluna", "colunas", "variavel", "variaveis", "campo", "campos", "atributo", "atributos",
+    "todas", "todos", "cada", "dataset", "dados", "conjunto", "tabela", "geral", "the", "of", "what", "is",
+})
+# Só na correlação ("correlação entre A e B", "correlação de A com B")
+CORRELATION_WORDS = frozenset({"entre", "com", "coeficiente", "pearson", "and", "between"})
+# Comparativos que também acionam mínimo/máximo ("a maior média")
+_COMPARATIVES = ("maior", "menor")
+_COMPARISON_SYMBOLS = re.compile(r"[<>=!]")
+_WORD = re.compile(r"[a-z0-9_]+")
+
+
+class StatFastPathError(Exception):
+    """Falha ao responder pelo atalho estatístico."""
+    pass
+
+
+@dataclass
+class StatRequest:
+    """Pedido estatístico estruturado extraído da pergunta."""
+    statistics: List[str]
+    columns: List[str]
+
+    @property
+    def is_correlation(self) -> bool:
+        return self.statistics == ["correlation"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"statistics": self.statistics, "columns": self.columns}
+
+
+@dataclass
+class StatAnswer:
+    """Resposta do atalho: texto renderizado e valores exatos."""
+    request: StatRequest
+    response: str
+    values: Dict[str, Dict[str, Optional[float]]]
+    row_count: int
+    elapsed_ms: float = 0.0
+    profile_version: Optional[str] = None
+
+    def to_metadata(self) -> Dict[str, Any]:
+        return {
+            "stat_fast_path": True,
+            "request": self.request.to_dict(),
+            "values": self.values,
+            "row_count": self.row_count,
+            "profile_version": self.profile_version,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+        }
+
+
+@dataclass
+class StatParseResult:
+    """Resultado da interpretação: ``request=None`` indica fallback para o fluxo com LLM."""
+    request: Optional[StatRequest]
+    reason: str = ""
+
+
+def format_number(value: Optional[float]) -> str:
+    """Formata no padrão brasileiro (milhar com ponto, decimal com vírgula)."""
+    if value is None:
+        return "indisponível"
+    if float(value).is_integer() and abs(value) < 1e15:
+        text = f"{int(value):,}"
+    else:
+        magnitude = abs(value)
+        decimals = 2 if magnitude >= 100 else 4 if magnitude >= 1 else 6
+        text = f"{value:,.{decimals}f}"
+    return text.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def describe_correlation(value: float) -> str:
+    """Intensidade e direção de um coeficiente de Pearson."""
+    magnitude = abs(value)
+    if magnitude < 0.1:
+        return "desprezível"
+    strength = "fraca" if magnitude < 0.3 else "moderada" if magnitude < 0.7 else "forte"
+    return f"{strength} e {'positiva' if value > 0 else 'negativa'}"
+
+
+def quick_reject(query: str) -> Optional[str]:
+    """Checagem barata (sem perfil): motivo da recusa ou None se vale carregar o perfil."""
+    statistics = detect_statistics(query)
+    if not statistics:
+        return "nenhuma estatística pedida"
+    unsupported = [s for s in statistics if s not in COLUMN_STATISTICS and s != "correlation"]
+    if unsupported:
+        return f"estatística sem atalho: {', '.join(unsupported)}"
+    if "correlation" in statistics and len(statistics) > 1:
+        return "correlação combinada com outras estatísticas"
+    if _COMPARISON_SYMBOLS.search(normalize_text(query)):
+        return "filtro ou comparação explícita"
+    return None
+
+
+def _strip_term(text: str, term: str) -> str:
+    prefix = term.endswith("*")
+    term = term.rstrip("*")
+    pattern = r"(?<![a-z0-9_])" + re.escape(term) + (r"[a-z0-9_]*" if prefix else r"(?![a-z0-9_])")
+    return re.sub(pattern, " ", text)
+
+
+def unexplained_words(normalized: str, columns: List[str], statistics: List[str]) -> List[str]:
+    """Palavras da pergunta que não são coluna, estatística nem palavra de ligação."""
+    remainder = normalized
+    for column in sorted(columns, key=len, reverse=True):
+        remainder = _strip_term(remainder, normalize_text(column))
+    for stat in statistics:
+        for keyword in STATISTIC_KEYWORDS[stat]:
+            remainder = _strip_term(remainder, keyword)
+    allowed = ALLOWED_WORDS | (CORRELATION_WORDS if statistics == ["correlation"] else frozenset())
+    remainder = _strip_term(remainder, "por favor")
+    return [word for word in _WORD.findall(remainder) if word not in allowed]
+
+
+def parse_stat_request(query: str, profile: DatasetProfile) -> StatParseResult:
+    """Interpreta a pergunta como um pedido estatístico sobre as colunas do perfil.
+
+    Args:
+        query: Pergunta do usuário
+        profile: Perfil do dataset (colunas e estatísticas numéricas)
+
+    Returns:
+        StatParseResult com o pedido, ou ``request=None`` e o motivo do fallback
+    """
+    reason = quick_reject(query)
+    if reason:
+        return StatParseResult(None, reason)
+
+    statistics = detect_statistics(query)
+    normalized = normalize_text(query)
+    matched = match_columns(query, profile.columns)
+    non_numeric = [c for c in matched if c not in profile.numeric]
+    if non_numeric:
+        return StatParseResult(None, f"colunas não numéricas citadas: {', '.join(non_numeric)}")
+
+    if statistics != ["correlation"]:
+        if mentions(normalized, "entre"):
+            return StatParseResult(None, "'entre' sem correlação (comparação ou intervalo)")
+        if len(statistics) > 1 and any(mentions(normalized, word) for word in _COMPARATIVES):
+            return StatParseResult(None, "comparativo combinado com outra estatística")
+
+    leftover = unexplained_words(normalized, matched, statistics)
+    if leftover:
+        return StatParseResult(None, f"termos fora do pedido (possível filtro ou qualificador): {', '.join(leftover)}")
+
+    if statistics == ["correlation"]:
+        if len(matched) != 2:
+            return StatParseResult(None, f"correlação precisa de exatamente 2 colunas (citadas: {len(matched)})")
+        return StatParseResult(StatRequest(statistics, matched))
+
+    if any(pattern in normalized for pattern in ALL_COLUMNS_PATTERNS):
+        if matched:
+            return StatParseResult(None, "pedido de todas as colunas junto com colunas citadas")
+        columns = list(profile.numeric_columns)
+    else:
+        columns = matched
+    if not columns:
+        return StatParseResult(None, "nenhuma coluna citada")
+    return StatParseResult(StatRequest(statistics, columns))
+
+
+def render_answer(request: StatRequest, profile: DatasetProfile) -> Tuple[str, Dict[str, Dict[str, Optional[float]]]]:
+    """Monta o texto da resposta e os valores exatos a partir do perfil.
+
+    Raises:
+        StatFastPathError: Estatística ausente no perfil
+    """
+    if request.is_correlation:
+        first, second = request.columns
+        value = profile.correlation.get(first, {}).get(second)
+        if value is None:
+            raise StatFastPathError(f"Correlação entre '{first}' e '{second}' indisponível no perfil")
+        response = (
+            f"📊 **Correlação de Pearson entre {first} e {second}:** {format_number(value)} "
+            f"(correlação {describe_correlation(value)})\n\n"
+            f"_Cálculo exato sobre {format_number(profile.row_count)} linhas do dataset._"
+        )
+        return response, {first: {second: value}}
+
+    values: Dict[str, Dict[str, Optional[float]]] = {}
+    for column in request.columns:
+        stats = profile.numeric.get(column, {})
+        if not stats.get("count"):
+            raise StatFastPathError(f"Coluna '{column}' sem valores numéricos no perfil")
+        values[column] = {stat: stats.get(stat) for stat in request.statistics}
+
+    footer = f"_Cálculo exato sobre {format_number(profile.row_count)} linhas do dataset"
+    if len(request.columns) == 1 and len(request.statistics) == 1:
+        column, stat = request.columns[0], request.statistics[0]
+        stats = profile.numeric[column]
+        nulls = stats.get("null_count", 0)
+        if nulls:
+            footer += f" ({format_number(stats['count'])} valores não nulos)"
+        response = f"📊 **{COLUMN_STATISTICS[stat]} de {column}:** {format_number(values[column][stat])}\n\n{footer}._"
+        return response, values
+
+    header = "| Coluna | " + " | ".join(COLUMN_STATISTICS[s] for s in request.statistics) + " |"
+    separator = "|---|" + "---|" * len(request.statistics)
+    rows = [
+        f"| {column} | " + " | ".join(format_number(values[column][s]) for s in request.statistics) + " |"
+        for column in request.columns
+    ]
+    response = "📊 **Estatísticas solicitadas:**\n\n" + "\n".join([header, separator] + rows) + f"\n\n{footer}._"
+    return response, values
+
+
+class StatFastPath:
+    """Responde perguntas estatísticas estruturadas sem recuperar chunks nem chamar o LLM.
+
+    Args:
+        profile_loader: Função que retorna o perfil da versão atual do dataset
+            (ex.: ``python_analyzer.get_dataset_profile``)
+    """
+
+    def __init__(self, profile_loader: Callable[[], Optional[DatasetProfile]]):
+        self.profile_loader = profile_loader
+        self._lock = threading.Lock()
+        self._answered = 0
+        self._fallbacks: Counter = Counter()
+
+    def try_answer(self, query: str) -> Optional[StatAnswer]:
+        """Responde ``query`` pelo atalho ou retorna None (fluxo normal com LLM).
+
+        Args:
+            query: Pergunta do usuário
+
+        Returns:
+            StatAnswer com a resposta renderizada, ou None se a pergunta for ambígua
+        """
+        started = time.perf_counter()
+        reason = quick_reject(query)
+        if reason:
+            return self._fallback(query, reason)
+
+        try:
+            profile = self.profile_loader()
+        except Exception as e:
+            logger.warning(f"⚠️ Perfil do dataset indisponível para o atalho estatístico: {e}")
+            return self._fallback(query, "perfil indisponível")
+        if profile is None:
+            return self._fallback(query, "perfil indisponível")
+
+        parsed = parse_stat_request(query, profile)
+        if parsed.request is None:
+            return self._fallback(query, parsed.reason)
+        try:
+            response, values = render_answer(parsed.request, profile)
+        except StatFastPathError as e:
+            return self._fallback(query, str(e))
+
+        answer = StatAnswer(
+            request=parsed.request,
+            response=response,
+            values=values,
+            row_count=profile.row_count,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            profile_version=profile.version,
+        )
+        with self._lock:
+            self._answered += 1
+        logger.info(
+            f"⚡ Atalho estatístico: {parsed.request.statistics} de {parsed.request.columns} "
+            f"respondido em {answer.elapsed_ms:.1f}ms (sem LLM)"
+        )
+        return answer
+
+    def _fallback(self, query: str, reason: str) -> None:
+        with self._lock:
+            self._fallbacks[reason.split(":")[0]] += 1
+        logger.debug(f"↪️ Atalho estatístico recusado ({reason}): '{query[:60]}'")
+        return None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"answered": self._answered, "fallbacks": dict(self._fallbacks)}
@@ -71,6 +71,9 @@ class AsyncEmbeddingGenerator:
                     "char_count": chunk.metadata.char_count,
                     "word_count": chunk.metadata.word_count
                 }
+                # Copiar additional_info (row_start/row_end, chunk_type, etc.)
+                if chunk.metadata.additional_info:
+                    result.chunk_metadata.update(chunk.metadata.additional_info)
                 results.append(result)
             except Exception as e:
                 self.logger.error(f"Erro no chunk {chunk.metadata.chunk_index}: {e}")
@@ -5,7 +5,7 @@ otimizados para geração de embeddings e busca vetorial.
 """
 from __future__ import annotations
 import re
-from typing import List, Dict, Any, Optional, Union
+from typing import Iterator, List, Dict, Any, Optional, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -13,6 +13,9 @@ from src.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# chunk_type dos chunks de linhas de dados CSV (diferente dos chunks metadata_*)
+CSV_DATA_CHUNK_TYPE = "csv_data"
+
 
 class ChunkStrategy(Enum):
     """Estratégias de chunking disponíveis."""
@@ -94,27 +97,37 @@ class TextChunker:
         Returns:
             Lista de chunks com metadados
         """
+        return list(self.iter_chunks(text, source_id, strategy))
+    
+    def iter_chunks(self,
+                    text: str,
+                    source_id: str,
+                    strategy: ChunkStrategy = ChunkStrategy.FIXED_SIZE) -> Iterator[TextChunk]:
+        """Versão preguiçosa de ``chunk_text``: gera os chunks à medida que são criados.
+        
+        Permite que o pipeline de ingestão gere embeddings dos primeiros chunks
+        enquanto o restante do texto ainda está sendo dividido.
+        """
         if not text.strip():
             logger.warning(f"Texto vazio para source_id: {source_id}")
-            return []
+            return
             
         logger.info(f"Iniciando chunking: {len(text)} chars, estratégia: {strategy.value}")
         
         if strategy == ChunkStrategy.FIXED_SIZE:
-            return self._chunk_fixed_size(text, source_id)
+            yield from self._iter_fixed_size(text, source_id)
         elif strategy == ChunkStrategy.SENTENCE:
-            return self._chunk_by_sentence(text, source_id)
+            yield from self._chunk_by_sentence(text, source_id)
         elif strategy == ChunkStrategy.PARAGRAPH:
-            return self._chunk_by_paragraph(text, source_id)
+            yield from self._chunk_by_paragraph(text, source_id)
         elif strategy == ChunkStrategy.CSV_ROW:
-            return self._chunk_csv_data(text, source_id)
+            yield from self._iter_csv_data(text, source_id)
         else:
             logger.warning(f"Estratégia não implementada: {strategy}, usando FIXED_SIZE")
-            return self._chunk_fixed_size(text, source_id)
+            yield from self._iter_fixed_size(text, source_id)
     
-    def _chunk_fixed_size(self, text: str, source_id: str) -> List[TextChunk]:
+    def _iter_fixed_size(self, text: str, source_id: str) -> Iterator[TextChunk]:
         """Chunking por tamanho fixo com sobreposição."""
-        chunks = []
         start_pos = 0
         chunk_index = 0
         
@@ -149,7 +162,7 @@ class TextChunker:
                     overlap_with_previous=overlap
                 )
                 
-                chunks.append(TextChunk(content=content, metadata=metadata))
+                yield TextChunk(content=content, metadata=metadata)
                 chunk_index += 1
             
             # Próximo chunk com sobreposição
@@ -159,8 +172,7 @@ class TextChunker:
             if start_pos >= end_pos:
                 start_pos = end_pos
         
-        logger.info(f"Criados {len(chunks)} chunks por tamanho fixo")
-        return chunks
+        logger.info(f"Criados {chunk_index} chunks por tamanho fixo")
     
     def _chunk_by_sentence(self, text: str, source_id: str) -> List[TextChunk]:
         """Chunking por sentença."""
@@ -268,13 +280,13 @@ class TextChunker:
         logger.info(f"Criados {len(chunks)} chunks por parágrafo")
         return chunks
     
-    def _chunk_csv_data(self, csv_text: str, source_id: str) -> List[TextChunk]:
+    def _iter_csv_data(self, csv_text: str, source_id: str) -> Iterator[TextChunk]:
         """Chunking especializado para dados CSV baseado em linhas com overlap."""
         raw_lines = csv_text.splitlines()
 
         if not raw_lines:
             logger.warning("Arquivo CSV vazio para source_id: %s", source_id)
-            return []
+            return
 
         header = raw_lines[0].strip()
         if not header:
@@ -285,15 +297,15 @@ class TextChunker:
 
         if total_rows == 0:
             logger.warning("CSV sem linhas de dados para source_id: %s", source_id)
-            return []
+            return
 
         chunk_size_rows = max(1, self.csv_chunk_size_rows)
         overlap_rows = max(0, min(self.csv_overlap_rows, chunk_size_rows - 1))
         step = chunk_size_rows - overlap_rows if chunk_size_rows > overlap_rows else chunk_size_rows
 
-        chunks: List[TextChunk] = []
         chunk_index = 0
         start_row = 0
+        total_chunk_rows = 0
 
         while start_row < total_rows:
             end_row = min(start_row + chunk_size_rows, total_rows)
@@ -320,22 +332,26 @@ class TextChunker:
                     "overlap_rows": overlap_with_previous,
                     "start_row": start_row + 1,  # human-friendly (1-based)
                     "end_row": end_row,
+                    # Endereçamento estruturado (1-based, inclusivo), indexado no banco (migration 0008)
+                    "row_start": start_row + 1,
+                    "row_end": end_row,
+                    "source_id": source_id,
+                    "chunk_type": CSV_DATA_CHUNK_TYPE,
                 },
             )
 
-            chunks.append(TextChunk(content=chunk_content, metadata=chunk_metadata))
+            yield TextChunk(content=chunk_content, metadata=chunk_metadata)
             chunk_index += 1
+            total_chunk_rows += len(chunk_lines)
             start_row += step
 
-        total_chunk_rows = sum(c.metadata.additional_info.get("csv_rows", 0) for c in chunks if c.metadata.additional_info)
         logger.info(
             "Criados %s chunks CSV (linhas por chunk=%s, overlap=%s) totalizando %s linhas", 
-            len(chunks),
+            chunk_index,
             chunk_size_rows,
             overlap_rows,
             total_chunk_rows,
         )
-        return chunks
     
     def get_stats(self, chunks: List[TextChunk]) -> Dict[str, Any]:
         """Retorna estatísticas dos chunks criados."""
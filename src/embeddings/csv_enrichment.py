@@ -0,0 +1,128 @@
+"""Enriquecimento leve de chunks CSV em lote.
+
+Gera exatamente o mesmo texto que a versão original de
+``RAGAgent._enrich_csv_chunks_light``, mas processando o lote inteiro:
+
+- Tudo que depende apenas do header (colunas detectadas, coluna alvo,
+  linhas de resumo de colunas/features) é calculado uma única vez por
+  header distinto, em vez de uma vez por chunk
+- Por chunk restam apenas contagem de registros, amostra de classe
+  binária (100 linhas) e linha de exemplo. Essa varredura continua linha
+  a linha: só o último campo das primeiras linhas é inspecionado, e uma
+  versão colunar do lote (pandas) mediu ~2x mais lenta, sem ganho
+
+A função é pura (sem estado), podendo ser distribuída entre workers do
+pipeline de ingestão (``INGEST_PIPELINE_ENRICH_WORKERS``).
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from src.embeddings.chunker import TextChunk
+
+_CSV_NAME_PATTERN = re.compile(r'([\w-]+\.csv)')
+_BINARY_VALUES = frozenset(('0', '1', '"0"', '"1"'))
+_BINARY_SAMPLE_SIZE = 100
+
+
+@dataclass(frozen=True)
+class _HeaderSummary:
+    """Partes do resumo que dependem apenas do header."""
+    target_column: Optional[str]
+    columns_line: Optional[str]
+    features_line: Optional[str]
+    header_line: str
+
+
+def _summarize_header(header_line: str) -> _HeaderSummary:
+    detected_columns: List[str] = []
+    if header_line:
+        detected_columns = [col.strip().strip('"') for col in header_line.split(',')]
+        detected_columns = [col for col in detected_columns if col and not col.startswith('#')]
+
+    columns_line = None
+    if detected_columns:
+        num_cols = len(detected_columns)
+        col_sample = ', '.join(detected_columns[:3])
+        if num_cols > 3:
+            col_sample += f", ... ({num_cols} colunas no total)"
+        columns_line = f"Colunas: {col_sample}"
+
+    features_line = None
+    if len(detected_columns) > 5:
+        features_line = f"Dataset com {len(detected_columns)} features para análise"
+
+    return _HeaderSummary(
+        target_column=detected_columns[-1] if detected_columns else None,
+        columns_line=columns_line,
+        features_line=features_line,
+        header_line=header_line,
+    )
+
+
+def enrich_csv_chunks(chunks: List[TextChunk]) -> List[TextChunk]:
+    """Adiciona resumo contextual a cada chunk CSV mantendo os dados originais.
+
+    Args:
+        chunks: Chunks gerados pela estratégia CSV_ROW
+
+    Returns:
+        Novos chunks (mesmo metadata) com resumo + ``=== DADOS ORIGINAIS ===``
+    """
+    header_cache: Dict[str, _HeaderSummary] = {}
+    enriched_chunks: List[TextChunk] = []
+
+    for chunk in chunks:
+        content = chunk.content
+        info = chunk.metadata.additional_info or {}
+        start_row = info.get("start_row")
+        end_row = info.get("end_row")
+        row_span = f"linhas {start_row} a {end_row}" if start_row and end_row else "intervalo não identificado"
+
+        lines = content.split('\n')
+        header_line = lines[0]
+        data_lines = [line for line in lines[1:] if line.strip()]
+
+        header = header_cache.get(header_line)
+        if header is None:
+            header = _summarize_header(header_line)
+            header_cache[header_line] = header
+
+        csv_filename = info.get('source_file', 'dataset.csv') if chunk.metadata.additional_info else 'dataset.csv'
+        if not csv_filename.endswith('.csv'):
+            csv_match = _CSV_NAME_PATTERN.search(content)
+            if csv_match:
+                csv_filename = csv_match.group(1)
+
+        summary_lines = [f"Chunk do dataset {csv_filename} ({row_span}) - {len(data_lines)} registros"]
+        if header.columns_line:
+            summary_lines.append(header.columns_line)
+
+        if header.target_column is not None:
+            sample = data_lines[:_BINARY_SAMPLE_SIZE]
+            binary_class_count = sum(1 for line in sample if line.rsplit(',', 1)[-1].strip() in _BINARY_VALUES)
+            if binary_class_count > 0:
+                binary_ratio = (binary_class_count / min(len(data_lines), _BINARY_SAMPLE_SIZE)) * 100
+                if binary_ratio > 50:
+                    summary_lines.append(
+                        f"Coluna '{header.target_column}': Variável binária detectada "
+                        f"(~{binary_ratio:.1f}% de valores binários na amostra)"
+                    )
+
+        if header.features_line:
+            summary_lines.append(header.features_line)
+
+        if len(data_lines) >= 2:
+            first = data_lines[0]
+            sample_line = first[:150] + "..." if len(first) > 150 else first
+            summary_lines.append(f"Exemplo de registro: {sample_line}")
+
+        summary_lines.append(f"Colunas: {header.header_line}")
+
+        context_summary = "\n".join(summary_lines)
+        enriched_content = f"{context_summary}\n\n=== DADOS ORIGINAIS ===\n{content}"
+        enriched_chunks.append(TextChunk(content=enriched_content, metadata=chunk.metadata))
+
+    return enriched_chunks
@@ -35,6 +35,7 @@ except ImportError:
 
 from src.embeddings.chunker import TextChunk
 from src.utils.logging_config import get_logger
+from src.utils.single_flight import get_single_flight, make_flight_key
 from src.llm.manager import LLMManager, LLMConfig
 
 
@@ -175,10 +176,18 @@ class EmbeddingGenerator:
         self.logger.info("Mock provider inicializado (para desenvolvimento)")
     
     def generate_embedding(self, text: str) -> EmbeddingResult:
-        """Gera embedding para um texto."""
+        """Gera embedding para um texto.
+        
+        Encodes idênticos simultâneos (mesmo provedor, modelo e texto) compartilham
+        uma única execução.
+        """
         if not text.strip():
             raise ValueError("Texto vazio não pode gerar embedding")
         
+        flight_key = make_flight_key(self.provider.value, self.model, text)
+        return get_single_flight("embeddings").do(flight_key, lambda: self._generate_embedding(text))
+    
+    def _generate_embedding(self, text: str) -> EmbeddingResult:
         start_time = time.perf_counter()
         
         try:
@@ -0,0 +1,251 @@
+"""Pipeline de ingestão em estágios com filas limitadas (backpressure).
+
+Cada estágio (ex.: enriquecimento → embeddings → armazenamento) roda em seus
+próprios workers e se comunica com o próximo por uma ``queue.Queue`` de
+tamanho limitado. Assim a CPU gera embeddings enquanto a rede insere os
+lotes anteriores, e o tempo total tende ao do estágio mais lento em vez da
+soma de todos.
+
+Uso:
+    pipeline = StagedPipeline([
+        PipelineStage("embed", embed_batch, workers=2),
+        PipelineStage("store", store_batch, workers=2),
+    ])
+    outputs = pipeline.run(batches)  # na ordem dos lotes de entrada
+    pipeline.get_metrics()
+"""
+from __future__ import annotations
+
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_SENTINEL = object()
+
+
+class PipelineError(Exception):
+    """Falha em um estágio do pipeline de ingestão."""
+
+    def __init__(self, stage: str, original: BaseException):
+        self.stage = stage
+        self.original = original
+        super().__init__(f"Estágio '{stage}' falhou: {original}")
+
+
+@dataclass
+class PipelineStage:
+    """Definição de um estágio: função aplicada a cada lote e nº de workers."""
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageMetrics:
+    """Métricas de throughput de um estágio."""
+    name: str
+    workers: int
+    batches: int = 0
+    items_in: int = 0
+    items_out: int = 0
+    busy_time: float = 0.0
+    wait_time: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, items_in: int, items_out: int, busy: float, wait: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.items_in += items_in
+            self.items_out += items_out
+            self.busy_time += busy
+            self.wait_time += wait
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Throughput efetivo considerando workers em paralelo
+        effective_time = self.busy_time / self.workers if self.workers else self.busy_time
+        return {
+            "workers": self.workers,
+            "batches": self.batches,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "busy_time": round(self.busy_time, 4),
+            "wait_time": round(self.wait_time, 4),
+            "items_per_second": round(self.items_in / effective_time, 2) if effective_time > 0 else None,
+        }
+
+
+def _count(batch: Any) -> int:
+    if batch is None:
+        return 0
+    try:
+        return len(batch)
+    except TypeError:
+        return 1
+
+
+class StagedPipeline:
+    """Executa lotes através de estágios concorrentes ligados por filas limitadas."""
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = 4):
+        """Inicializa o pipeline.
+
+        Args:
+            stages: Estágios na ordem de execução
+            queue_size: Capacidade de cada fila entre estágios (backpressure)
+        """
+        if not stages:
+            raise ValueError("Pipeline precisa de ao menos um estágio")
+        self.stages = stages
+        self.queue_size = max(1, queue_size)
+        self.metrics: Dict[str, StageMetrics] = {}
+        self.source_metrics: Optional[StageMetrics] = None
+        self.total_time: float = 0.0
+
+    def run(self, batches: Iterable[Any], source_name: str = "source") -> List[Any]:
+        """Processa todos os lotes e retorna as saídas do último estágio.
+
+        Args:
+            batches: Iterável de lotes (pode ser um gerador; é consumido sob demanda)
+            source_name: Nome usado nas métricas para o produtor dos lotes
+
+        Returns:
+            Lista com as saídas não nulas do último estágio, na ordem dos lotes
+            de entrada (os workers concluem fora de ordem)
+
+        Raises:
+            PipelineError: Se algum estágio (ou o produtor) falhar
+        """
+        start = time.perf_counter()
+        self.metrics = {s.name: StageMetrics(s.name, max(1, s.workers)) for s in self.stages}
+        self.source_metrics = StageMetrics(source_name, 1)
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        outputs: List[Tuple[int, Any]] = []
+        outputs_lock = threading.Lock()
+        abort = threading.Event()
+        errors: List[PipelineError] = []
+        errors_lock = threading.Lock()
+
+        def fail(stage_name: str, exc: BaseException) -> None:
+            with errors_lock:
+                errors.append(PipelineError(stage_name, exc))
+            abort.set()
+
+        def producer() -> None:
+            iterator = iter(batches)
+            sequence = itertools.count()
+            try:
+                while not abort.is_set():
+                    t0 = time.perf_counter()
+                    try:
+                        batch = next(iterator)
+                    except StopIteration:
+                        break
+                    produced = time.perf_counter()
+                    queues[0].put((next(sequence), batch))
+                    self.source_metrics.record(_count(batch), _count(batch), produced - t0, time.perf_counter() - produced)
+            except Exception as e:
+                logger.error(f"❌ Falha ao produzir lotes ({source_name}): {e}")
+                fail(source_name, e)
+            finally:
+                for _ in range(self.metrics[self.stages[0].name].workers):
+                    queues[0].put(_SENTINEL)
+
+        threads: List[threading.Thread] = [threading.Thread(target=producer, name=f"pipeline-{source_name}", daemon=True)]
+
+        for index, stage in enumerate(self.stages):
+            stage_metrics = self.metrics[stage.name]
+            in_queue = queues[index]
+            out_queue = queues[index + 1] if index + 1 < len(self.stages) else None
+            next_workers = self.metrics[self.stages[index + 1].name].workers if out_queue is not None else 0
+            remaining = {"workers": stage_metrics.workers}
+            remaining_lock = threading.Lock()
+
+            def worker(stage=stage, stage_metrics=stage_metrics, in_queue=in_queue, out_queue=out_queue,
+                       next_workers=next_workers, remaining=remaining, remaining_lock=remaining_lock) -> None:
+                while True:
+                    t_wait = time.perf_counter()
+                    item = in_queue.get()
+                    waited = time.perf_counter() - t_wait
+                    if item is _SENTINEL:
+                        break
+                    sequence, batch = item
+                    if abort.is_set():
+                        # Continua drenando para não bloquear o estágio anterior
+                        continue
+                    t0 = time.perf_counter()
+                    try:
+                        result = stage.func(batch)
+                    except Exception as e:
+                        logger.error(f"❌ Estágio '{stage.name}' falhou: {e}")
+                        fail(stage.name, e)
+                        continue
+                    busy = time.perf_counter() - t0
+                    stage_metrics.record(_count(batch), _count(result), busy, waited)
+                    if result is None:
+                        continue
+                    if out_queue is not None:
+                        out_queue.put((sequence, result))
+                    else:
+                        with outputs_lock:
+                            outputs.append((sequence, result))
+                with remaining_lock:
+                    remaining["workers"] -= 1
+                    last = remaining["workers"] == 0
+                if last and out_queue is not None:
+                    for _ in range(next_workers):
+                        out_queue.put(_SENTINEL)
+
+            for worker_index in range(stage_metrics.workers):
+                threads.append(threading.Thread(
+                    target=worker,
+                    name=f"pipeline-{stage.name}-{worker_index}",
+                    daemon=True,
+                ))
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.total_time = time.perf_counter() - start
+        if errors:
+            raise errors[0]
+        outputs.sort(key=lambda item: item[0])
+        return [result for _, result in outputs]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas por estágio e tempo total da última execução."""
+        stages = {}
+        if self.source_metrics is not None:
+            stages[self.source_metrics.name] = self.source_metrics.to_dict()
+        stages.update({name: m.to_dict() for name, m in self.metrics.items()})
+        slowest = max(self.metrics.values(), key=lambda m: m.busy_time / m.workers, default=None)
+        return {
+            "total_time": round(self.total_time, 4),
+            "queue_size": self.queue_size,
+            "bottleneck": slowest.name if slowest else None,
+            "stages": stages,
+        }
+
+
+def iter_batches(items: Iterable[Any], batch_size: int) -> Iterable[List[Any]]:
+    """Divide um iterável (lista ou gerador) em lotes consecutivos de ``batch_size`` itens.
+
+    Geradores são consumidos sob demanda: o primeiro lote sai antes de o
+    produtor terminar.
+    """
+    batch_size = max(1, batch_size)
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
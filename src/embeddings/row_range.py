@@ -0,0 +1,150 @@
+"""Endereçamento de chunks CSV por intervalo de linhas.
+
+Chunks CSV_ROW carregam ``row_start``/``row_end`` (1-based, inclusivos) e
+``source_id`` no metadata. Este módulo concentra a lógica pura para:
+
+- Extrair o bloco CSV original (header + linhas) do ``chunk_text`` enriquecido
+- Ordenar chunks por intervalo e descartar linhas de overlap sem parsear
+  duplicatas
+- Recortar o resultado para um intervalo solicitado
+
+A busca no banco fica em ``VectorStore.get_chunks_by_row_range``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Marcador usado por RAGAgent._enrich_csv_chunks_light antes dos dados brutos
+RAW_DATA_MARKER = "=== DADOS ORIGINAIS ==="
+
+
+@dataclass
+class RowRangeChunk:
+    """Chunk CSV com intervalo de linhas conhecido."""
+    source_id: str
+    row_start: int
+    row_end: int
+    chunk_text: str
+    chunk_index: Optional[int] = None
+    embedding_id: Optional[str] = None
+
+    @property
+    def row_count(self) -> int:
+        return self.row_end - self.row_start + 1
+
+
+def _as_int(value: Any) -> Optional[int]:
+    if type(value) is int:
+        return value
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def row_range_from_metadata(metadata: Optional[Dict[str, Any]]) -> Optional[Tuple[int, int]]:
+    """Lê (row_start, row_end) do metadata, aceitando o formato legado start_row/end_row."""
+    if not metadata:
+        return None
+    row_start = _as_int(metadata.get("row_start", metadata.get("start_row")))
+    row_end = _as_int(metadata.get("row_end", metadata.get("end_row")))
+    if row_start is None or row_end is None or row_end < row_start:
+        return None
+    return row_start, row_end
+
+
+def chunk_from_record(record: Dict[str, Any]) -> Optional[RowRangeChunk]:
+    """Converte uma linha da tabela embeddings em RowRangeChunk (None se não tiver intervalo)."""
+    metadata = record.get("metadata") or {}
+    row_start = _as_int(record.get("row_start"))
+    row_end = _as_int(record.get("row_end"))
+    if row_start is None or row_end is None:
+        row_range = row_range_from_metadata(metadata)
+        if row_range is None:
+            return None
+        row_start, row_end = row_range
+    source_id = record.get("source_id") or metadata.get("source_id") or metadata.get("source") or ""
+    return RowRangeChunk(
+        source_id=source_id,
+        row_start=row_start,
+        row_end=row_end,
+        chunk_text=record.get("chunk_text") or "",
+        chunk_index=_as_int(metadata.get("chunk_index")),
+        embedding_id=record.get("id"),
+    )
+
+
+def split_csv_block(chunk_text: str) -> Tuple[str, List[str]]:
+    """Extrai (header, linhas de dados) do texto de um chunk CSV.
+
+    Ignora o resumo de enriquecimento quando presente (tudo antes de
+    ``=== DADOS ORIGINAIS ===``).
+    """
+    marker_pos = chunk_text.find(RAW_DATA_MARKER)
+    if marker_pos >= 0:
+        chunk_text = chunk_text[marker_pos + len(RAW_DATA_MARKER):]
+    lines = chunk_text.strip().split("\n")
+    if not lines[0]:
+        return "", []
+    data_lines = [line.strip() for line in lines[1:]]
+    if "" in data_lines:
+        data_lines = [line for line in data_lines if line]
+    return lines[0].strip(), data_lines
+
+
+def merge_row_ranges(
+    chunks: Iterable[RowRangeChunk],
+    row_start: Optional[int] = None,
+    row_end: Optional[int] = None,
+) -> Tuple[str, List[str], List[int]]:
+    """Junta chunks em linhas únicas, descartando overlap pelo intervalo.
+
+    Cada chunk contribui apenas com as linhas após a última já coberta; os
+    textos duplicados do overlap nunca são parseados.
+
+    Args:
+        chunks: Chunks de uma mesma fonte (qualquer ordem)
+        row_start: Primeira linha desejada (1-based, inclusiva); None = início
+        row_end: Última linha desejada (1-based, inclusiva); None = fim
+
+    Returns:
+        Tupla (header, linhas, números das linhas). Lacunas entre chunks
+        aparecem como saltos em ``números das linhas``.
+    """
+    header = ""
+    lines: List[str] = []
+    row_numbers: List[int] = []
+    next_row = row_start if row_start is not None else 1
+
+    for chunk in sorted(chunks, key=lambda c: (c.row_start, c.row_end)):
+        if chunk.row_end < next_row:
+            continue
+        if row_end is not None and chunk.row_start > row_end:
+            break
+        chunk_header, data_lines = split_csv_block(chunk.chunk_text)
+        if not header:
+            header = chunk_header
+        first = max(next_row, chunk.row_start)
+        last = chunk.row_end if row_end is None else min(chunk.row_end, row_end)
+        offset = first - chunk.row_start
+        selected = data_lines[offset:offset + (last - first + 1)]
+        lines.extend(selected)
+        row_numbers.extend(range(first, first + len(selected)))
+        next_row = last + 1
+
+    return header, lines, row_numbers
+
+
+def merge_to_csv_text(
+    chunks: Iterable[RowRangeChunk],
+    row_start: Optional[int] = None,
+    row_end: Optional[int] = None,
+) -> str:
+    """Como ``merge_row_ranges``, mas devolve texto CSV pronto para ``pd.read_csv``."""
+    header, lines, _ = merge_row_ranges(chunks, row_start, row_end)
+    if not header:
+        return ""
+    return "\n".join([header, *lines])
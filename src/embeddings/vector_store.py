@@ -17,8 +17,10 @@ from datetime import datetime
 
 from src.embeddings.chunker import TextChunk, ChunkMetadata
 from src.embeddings.generator import EmbeddingResult
+from src.embeddings.row_range import RowRangeChunk, chunk_from_record, merge_to_csv_text
 from src.vectorstore.supabase_client import supabase
 from src.utils.logging_config import get_logger
+from src.utils.single_flight import get_single_flight, make_flight_key
 
 logger = get_logger(__name__)
 
@@ -305,6 +307,16 @@ class VectorStore:
         """
         self.logger.debug(f"Buscando embeddings similares (threshold={similarity_threshold}, limit={limit})")
         
+        # Buscas idênticas simultâneas compartilham a mesma chamada RPC
+        flight_key = make_flight_key("match_embeddings", query_embedding, similarity_threshold, limit)
+        results = get_single_flight("vector_search").do(
+            flight_key,
+            lambda: self._search_similar(query_embedding, similarity_threshold, limit)
+        )
+        return list(results)
+    
+    def _search_similar(self, query_embedding: List[float], similarity_threshold: float,
+                        limit: int) -> List[VectorSearchResult]:
         try:
             # Construir a query RPC para busca vetorial
             rpc_params = {
@@ -430,6 +442,94 @@ class VectorStore:
             self.logger.error(f"Erro ao deletar embeddings da fonte {source}: {str(e)}")
             return 0
     
+    def get_chunks_by_row_range(self,
+                                source_id: str,
+                                row_start: Optional[int] = None,
+                                row_end: Optional[int] = None,
+                                page_size: int = 1000) -> List[RowRangeChunk]:
+        """Busca os chunks CSV de uma fonte que cobrem um intervalo de linhas.
+        
+        Usa as colunas indexadas ``source_id``/``row_start``/``row_end``
+        (migration 0008). Se a migration não foi aplicada, filtra por
+        ``metadata->>source`` e aplica o intervalo em memória.
+        
+        Args:
+            source_id: Identificador da fonte usado na ingestão
+            row_start: Primeira linha (1-based, inclusiva); None = início
+            row_end: Última linha (1-based, inclusiva); None = fim
+            page_size: Tamanho da página nas consultas paginadas
+        
+        Returns:
+            Chunks ordenados por row_start
+        """
+        columns = 'id, chunk_text, metadata, source_id, row_start, row_end'
+        try:
+            records = self._fetch_pages(
+                lambda: self._row_range_query(columns, source_id, row_start, row_end),
+                page_size
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Colunas de intervalo indisponíveis ({e}); usando filtro por metadata")
+            records = self._fetch_pages(
+                lambda: self.supabase.table('embeddings')
+                    .select('id, chunk_text, metadata')
+                    .eq('metadata->>source', source_id)
+                    .order('id'),
+                page_size
+            )
+        
+        chunks = []
+        for record in records:
+            chunk = chunk_from_record(record)
+            if chunk is None:
+                continue
+            if row_start is not None and chunk.row_end < row_start:
+                continue
+            if row_end is not None and chunk.row_start > row_end:
+                continue
+            chunks.append(chunk)
+        
+        chunks.sort(key=lambda c: (c.row_start, c.row_end))
+        self.logger.info(f"📑 {len(chunks)} chunks cobrem linhas {row_start or 1}-{row_end or 'fim'} de {source_id}")
+        return chunks
+    
+    def get_rows_by_range(self,
+                          source_id: str,
+                          row_start: Optional[int] = None,
+                          row_end: Optional[int] = None) -> str:
+        """Reconstrói as linhas originais (sem duplicatas de overlap) de um intervalo.
+        
+        Returns:
+            Texto CSV (header + linhas) pronto para ``pd.read_csv``; vazio se não houver dados
+        """
+        chunks = self.get_chunks_by_row_range(source_id, row_start, row_end)
+        return merge_to_csv_text(chunks, row_start, row_end)
+    
+    def _row_range_query(self, columns: str, source_id: str,
+                         row_start: Optional[int], row_end: Optional[int]):
+        query = self.supabase.table('embeddings')\
+            .select(columns)\
+            .eq('source_id', source_id)\
+            .not_.is_('row_start', 'null')
+        if row_end is not None:
+            query = query.lte('row_start', row_end)
+        if row_start is not None:
+            query = query.gte('row_end', row_start)
+        return query.order('row_start')
+    
+    @staticmethod
+    def _fetch_pages(build_query, page_size: int) -> List[Dict[str, Any]]:
+        """Executa uma consulta paginada com ``range`` até esgotar os resultados."""
+        records: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            response = build_query().range(offset, offset + page_size - 1).execute()
+            page = response.data or []
+            records.extend(page)
+            if len(page) < page_size:
+                return records
+            offset += page_size
+    
     def get_collection_stats(self, source: Optional[str] = None) -> Dict[str, Any]:
         """Retorna estatísticas da coleção de embeddings."""
         try:
@@ -0,0 +1,202 @@
+"""Roteamento adaptativo entre provedores LLM com requisições "hedged".
+
+A ordem de fallback do ``LLMManager`` (Groq → Google → OpenAI) é estática.
+``AdaptiveRouter`` mantém, por provedor/modelo e nível de complexidade
+(``ComplexityLevel`` do ``LLMRouter``), uma janela das chamadas recentes
+(latência e sucesso) e reordena os candidatos pela latência esperada:
+
+    p50 + taxa_de_erro * LLM_ROUTING_ERROR_PENALTY
+
+- Com menos de ``min_samples`` amostras o provedor recebe a melhor nota
+  conhecida (otimista): a ordem de preferência desempata e ele volta a ser
+  medido, então a rota acompanha a saúde dos provedores sozinha
+- Hedging (opcional): se o primeiro provedor passa do seu p95 sem responder,
+  uma requisição duplicada vai ao próximo; a primeira resposta válida vence e
+  a outra é cancelada (``hedged_race``)
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+from src.settings import (
+    LLM_CALL_TIMEOUT,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGING_ENABLED,
+    LLM_ROUTING_ERROR_PENALTY,
+    LLM_ROUTING_MIN_SAMPLES,
+    LLM_ROUTING_WINDOW,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+DEFAULT_TIER = "DEFAULT"
+
+
+class RollingStats:
+    """Janela deslizante de (latência, sucesso) das últimas chamadas."""
+
+    def __init__(self, window: int = LLM_ROUTING_WINDOW):
+        self._samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+
+    def record(self, latency: float, success: bool) -> None:
+        self._samples.append((latency, success))
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        latencies = [latency for latency, success in self._samples if success]
+        if not latencies:
+            return None
+        return float(np.percentile(latencies, q))
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(95)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, success in self._samples if not success) / len(self._samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50, p95 = self.p50, self.p95
+        return {
+            "samples": self.count,
+            "p50": round(p50, 4) if p50 is not None else None,
+            "p95": round(p95, 4) if p95 is not None else None,
+            "error_rate": round(self.error_rate, 4),
+        }
+
+
+class AdaptiveRouter:
+    """Ordena provedores pela latência/erro recentes e decide quando fazer hedging.
+
+    Args:
+        window: Chamadas mantidas por provedor/modelo/complexidade
+        min_samples: Amostras mínimas para a estatística valer
+        error_penalty: Segundos somados à latência esperada por unidade de taxa de erro
+        hedging_enabled: Habilita requisições duplicadas
+        hedge_min_delay: Espera mínima antes da duplicata
+        hedge_max_delay: Espera máxima antes da duplicata
+    """
+
+    def __init__(self,
+                 window: int = LLM_ROUTING_WINDOW,
+                 min_samples: int = LLM_ROUTING_MIN_SAMPLES,
+                 error_penalty: float = LLM_ROUTING_ERROR_PENALTY,
+                 hedging_enabled: bool = LLM_HEDGING_ENABLED,
+                 hedge_min_delay: float = LLM_HEDGE_MIN_DELAY,
+                 hedge_max_delay: float = LLM_CALL_TIMEOUT):
+        self.window = window
+        self.min_samples = min_samples
+        self.error_penalty = error_penalty
+        self.hedging_enabled = hedging_enabled
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self._stats: Dict[Tuple[str, str, str], RollingStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tier(tier: Optional[Hashable]) -> str:
+        return getattr(tier, "name", None) or (str(tier) if tier is not None else DEFAULT_TIER)
+
+    def _get_stats(self, provider: str, model: str, tier: Optional[Hashable]) -> RollingStats:
+        key = (provider, model, self._tier(tier))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = RollingStats(self.window)
+            return stats
+
+    def record(self, provider: str, model: str, latency: float, success: bool,
+               tier: Optional[Hashable] = None) -> None:
+        """Registra o resultado de uma chamada."""
+        stats = self._get_stats(provider, model, tier)
+        with self._lock:
+            stats.record(latency, success)
+
+    def expected_latency(self, provider: str, model: str, tier: Optional[Hashable] = None) -> Optional[float]:
+        """Latência esperada (p50 + penalidade de erro) ou None se ainda não há amostras suficientes."""
+        stats = self._get_stats(provider, model, tier)
+        with self._lock:
+            if stats.count < self.min_samples:
+                return None
+            p50 = stats.p50
+            error_rate = stats.error_rate
+        # Só falhas na janela: pior que qualquer provedor que responde
+        base = p50 if p50 is not None else self.hedge_max_delay
+        return base + error_rate * self.error_penalty
+
+    def rank(self, candidates: Sequence[Tuple[T, str, str]], tier: Optional[Hashable] = None) -> List[T]:
+        """Ordena os candidatos ``(item, provedor, modelo)`` (entrada na ordem de preferência)."""
+        scores = [self.expected_latency(provider, model, tier) for _, provider, model in candidates]
+        known = [score for score in scores if score is not None]
+        optimistic = min(known) if known else 0.0
+        order = sorted(range(len(candidates)),
+                       key=lambda i: (scores[i] if scores[i] is not None else optimistic, i))
+        return [candidates[i][0] for i in order]
+
+    def hedge_delay(self, provider: str, model: str, tier: Optional[Hashable] = None) -> Optional[float]:
+        """Espera antes da requisição duplicada (p95 do provedor) ou None se não deve haver hedging."""
+        if not self.hedging_enabled:
+            return None
+        stats = self._get_stats(provider, model, tier)
+        with self._lock:
+            p95 = stats.p95 if stats.count >= self.min_samples else None
+        if p95 is None:
+            return None
+        return min(max(p95, self.hedge_min_delay), self.hedge_max_delay)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            items = sorted(self._stats.items())
+            return {
+                "hedging_enabled": self.hedging_enabled,
+                "providers": {f"{provider}/{model}/{tier}": stats.to_dict()
+                              for (provider, model, tier), stats in items},
+            }
+
+
+async def hedged_race(primary: Callable[[], Awaitable[T]], secondary: Callable[[], Awaitable[T]],
+                      delay: float) -> Tuple[int, T]:
+    """Executa ``primary``; se não terminar em ``delay`` segundos, dispara ``secondary`` em paralelo.
+
+    Returns:
+        (índice do vencedor: 0 = primary, 1 = secondary, resultado). A chamada
+        perdedora é cancelada. Se uma falhar, a outra ainda pode vencer; se as
+        duas falharem, a última exceção é propagada.
+    """
+    tasks = {asyncio.ensure_future(primary()): 0}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return 0, next(iter(done)).result()
+        logger.info(f"🏁 Hedging: primeira chamada passou de {delay:.2f}s, disparando duplicata")
+        tasks[asyncio.ensure_future(secondary())] = 1
+        pending = set(tasks)
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return tasks[task], task.result()
+                last_error = task.exception()
+        raise last_error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,93 @@
+"""Runtime assíncrono compartilhado pela camada LLM.
+
+Os gerenciadores LLM expõem ``achat`` como API principal (clientes
+assíncronos dos provedores com pool de conexões). O ``chat`` síncrono é só
+um wrapper que submete a corrotina a um event loop de fundo mantido por
+este módulo:
+
+- ``run_sync``: executa uma corrotina a partir de código síncrono, esteja
+  ou não a thread chamadora dentro de um event loop
+- ``LoopLocalCache``: objetos presos a um event loop (``httpx.AsyncClient``,
+  clientes ``AsyncGroq``/``AsyncOpenAI``) são criados uma vez por loop e
+  descartados junto com ele, nunca compartilhados entre loops
+
+Uso:
+    response = run_sync(manager.achat("Analise estes dados..."))
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop de fundo (thread daemon) usado pelas chamadas síncronas."""
+    global _background_loop
+    if _background_loop is None:
+        with _background_loop_lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-async-loop", daemon=True)
+                thread.start()
+                _background_loop = loop
+                logger.info("🔁 Event loop de fundo da camada LLM iniciado")
+    return _background_loop
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Executa ``coro`` e bloqueia a thread chamadora até o resultado.
+
+    A corrotina roda no loop de fundo, onde os clientes assíncronos ficam
+    aquecidos entre chamadas. Se a chamada vier do próprio loop de fundo
+    (código síncrono chamado de dentro de uma corrotina dele), a corrotina
+    roda em uma thread auxiliar com loop próprio para evitar deadlock.
+
+    Args:
+        coro: Corrotina a executar
+        timeout: Segundos máximos de espera (None = sem limite)
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+
+    if running is loop:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result(timeout)
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+class LoopLocalCache:
+    """Cache de objetos por event loop (chave -> objeto, um dicionário por loop)."""
+
+    def __init__(self):
+        self._by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], T]) -> T:
+        """Retorna o objeto de ``key`` no loop em execução, criando-o com ``factory``."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entries = self._by_loop.setdefault(loop, {})
+            if key not in entries:
+                entries[key] = factory()
+            return entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_loop.clear()
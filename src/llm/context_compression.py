@@ -0,0 +1,290 @@
+"""Compressão extrativa do contexto RAG antes da síntese.
+
+A busca vetorial devolve até 10 chunks de 20–250 linhas de CSV (mais
+markdown de metadados) e, por causa do overlap do chunking, muitas linhas se
+repetem entre chunks vizinhos. Enviar tudo ao LLM custa tokens de entrada, o
+que domina a latência da geração. ``ContextCompressor`` reduz o contexto sem
+reescrever nada (só remove):
+
+1. Linhas repetidas (overlap, cabeçalhos CSV iguais) ficam só na primeira
+   ocorrência, respeitando a ordem de relevância dos chunks
+2. Chunks que acrescentam pouco aos mais bem ranqueados são descartados:
+   fração de linhas novas abaixo de ``RAG_CONTEXT_MIN_NOVELTY``, ou embedding
+   quase idêntico (``RAG_CONTEXT_REDUNDANCY_THRESHOLD``) ao de um chunk mantido
+   com pouca novidade
+3. Se ainda passar do orçamento (``RAG_CONTEXT_MAX_TOKENS``), ficam as linhas
+   estruturais (cabeçalhos, títulos, tabelas markdown) e as linhas/frases com
+   mais termos da pergunta (peso por raridade do termo no contexto), com
+   desempate pela similaridade do chunk com a consulta (embeddings já
+   calculados pela busca); as demais viram um marcador ``[... N linhas omitidas]``
+"""
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.llm.prompt_budget import TokenCounter, get_token_counter
+from src.settings import (
+    RAG_CONTEXT_MAX_TOKENS,
+    RAG_CONTEXT_MIN_NOVELTY,
+    RAG_CONTEXT_REDUNDANCY_THRESHOLD,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# Linhas de texto corrido acima deste tamanho são divididas em frases
+_LONG_LINE_CHARS = 300
+_STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "por", "com", "que", "qual", "quais", "como", "se", "ao", "aos", "ou",
+    "the", "of", "and", "is", "in", "to", "me", "sao", "ha", "existe", "existem",
+}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def _terms(text: str) -> List[str]:
+    return [term for term in _WORD_RE.findall(_normalize(text)) if term not in _STOPWORDS and len(term) > 1]
+
+
+def _line_key(line: str) -> str:
+    return " ".join(line.split()).lower()
+
+
+def _is_structural(line: str, index: int) -> bool:
+    """Cabeçalho do chunk, títulos e linhas de tabela markdown."""
+    stripped = line.strip()
+    return index == 0 or stripped.startswith("#") or stripped.startswith("|") or stripped.startswith("**")
+
+
+def _split_units(chunk: str) -> List[str]:
+    units: List[str] = []
+    for line in chunk.splitlines():
+        if not line.strip():
+            continue
+        if len(line) > _LONG_LINE_CHARS and line.count(",") < 5:
+            units.extend(part for part in _SENTENCE_RE.split(line.strip()) if part)
+        else:
+            units.append(line)
+    return units
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> Optional[float]:
+    va, vb = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+    if va.shape != vb.shape or va.size == 0:
+        return None
+    norm = float(np.linalg.norm(va) * np.linalg.norm(vb))
+    return float(va @ vb) / norm if norm else None
+
+
+@dataclass
+class CompressionResult:
+    """Chunks comprimidos (na ordem de relevância) e contagem de tokens."""
+    chunks: List[str]
+    original_tokens: int
+    compressed_tokens: int
+    dropped_chunks: int = 0
+    duplicate_lines: int = 0
+    omitted_lines: int = 0
+    kept_indices: List[int] = field(default_factory=list)
+
+    @property
+    def ratio(self) -> float:
+        """Fator de redução (original / comprimido)."""
+        return self.original_tokens / self.compressed_tokens if self.compressed_tokens else 1.0
+
+    def get_report(self) -> Dict[str, object]:
+        return {
+            "original_tokens": self.original_tokens,
+            "compressed_tokens": self.compressed_tokens,
+            "ratio": round(self.ratio, 2),
+            "chunks": len(self.chunks),
+            "dropped_chunks": self.dropped_chunks,
+            "duplicate_lines": self.duplicate_lines,
+            "omitted_lines": self.omitted_lines,
+        }
+
+
+class ContextCompressor:
+    """Deduplica, descarta chunks redundantes e extrai as linhas relevantes à pergunta.
+
+    Args:
+        max_tokens: Orçamento do contexto comprimido (0 = só deduplicação e descarte)
+        min_novelty: Fração mínima de linhas novas para manter um chunk
+        redundancy_threshold: Similaridade de embedding a partir da qual um chunk
+            com pouca novidade é considerado repetição de outro já mantido
+        counter: Contador de tokens (padrão: ``get_token_counter()``)
+    """
+
+    def __init__(self,
+                 max_tokens: int = RAG_CONTEXT_MAX_TOKENS,
+                 min_novelty: float = RAG_CONTEXT_MIN_NOVELTY,
+                 redundancy_threshold: float = RAG_CONTEXT_REDUNDANCY_THRESHOLD,
+                 counter: Optional[TokenCounter] = None):
+        self.max_tokens = max_tokens
+        self.min_novelty = min_novelty
+        self.redundancy_threshold = redundancy_threshold
+        self.counter = counter or get_token_counter()
+
+    def compress(self,
+                 query: str,
+                 chunks: Sequence[str],
+                 embeddings: Optional[Sequence[Optional[Sequence[float]]]] = None,
+                 query_embedding: Optional[Sequence[float]] = None) -> CompressionResult:
+        """Comprime ``chunks`` (ordenados do mais ao menos relevante).
+
+        Args:
+            query: Pergunta do usuário
+            chunks: Textos recuperados pela busca vetorial
+            embeddings: Embedding de cada chunk (``VectorSearchResult.embedding``), se disponível
+            query_embedding: Embedding da pergunta, se disponível
+
+        Returns:
+            ``CompressionResult`` com os chunks resultantes e o relatório de tokens
+        """
+        texts = [chunk or "" for chunk in chunks]
+        original_tokens = sum(self.counter.count(text) for text in texts)
+        embeddings = list(embeddings or [])
+        embeddings += [None] * (len(texts) - len(embeddings))
+
+        # 1-2. Deduplicação de linhas e descarte de chunks redundantes
+        seen: Set[str] = set()
+        kept: List[Tuple[int, List[Tuple[str, bool]]]] = []
+        duplicates = dropped = 0
+        for index, text in enumerate(texts):
+            units = _split_units(text)
+            fresh = []
+            for position, unit in enumerate(units):
+                key = _line_key(unit)
+                if key in seen:
+                    duplicates += 1
+                    continue
+                fresh.append((unit, _is_structural(unit, position)))
+            content_total = sum(1 for position, unit in enumerate(units) if not _is_structural(unit, position))
+            if content_total:
+                novelty = sum(1 for _, structural in fresh if not structural) / content_total
+            else:
+                # Chunk só de títulos/tabelas markdown
+                novelty = len(fresh) / max(1, len(units))
+            if not fresh or (kept and self._redundant(index, novelty, embeddings, kept)):
+                dropped += 1
+                continue
+            seen.update(_line_key(unit) for unit, _ in fresh)
+            kept.append((index, fresh))
+
+        # 3. Extração das linhas mais relevantes até o orçamento
+        omitted = 0
+        total = sum(self.counter.count(unit) + 1 for _, units in kept for unit, _ in units)
+        if self.max_tokens > 0 and total > self.max_tokens:
+            kept, omitted = self._extract(query, kept, embeddings, query_embedding)
+
+        compressed = []
+        for _, units in kept:
+            compressed.append("\n".join(unit for unit, _ in units))
+        result = CompressionResult(
+            chunks=compressed,
+            original_tokens=original_tokens,
+            compressed_tokens=sum(self.counter.count(text) for text in compressed),
+            dropped_chunks=dropped,
+            duplicate_lines=duplicates,
+            omitted_lines=omitted,
+            kept_indices=[index for index, _ in kept],
+        )
+        logger.info(
+            f"🗜️ Contexto RAG: {result.original_tokens} → {result.compressed_tokens} tokens "
+            f"({result.ratio:.1f}x; {duplicates} linhas repetidas, {dropped} chunks redundantes, "
+            f"{omitted} linhas omitidas)"
+        )
+        return result
+
+    def _redundant(self, index: int, novelty: float,
+                   embeddings: List[Optional[Sequence[float]]],
+                   kept: List[Tuple[int, List[Tuple[str, bool]]]]) -> bool:
+        if novelty < self.min_novelty:
+            return True
+        if embeddings[index] is None or novelty >= 0.5:
+            return False
+        for kept_index, _ in kept:
+            if embeddings[kept_index] is None:
+                continue
+            similarity = _cosine(embeddings[index], embeddings[kept_index])
+            if similarity is not None and similarity >= self.redundancy_threshold:
+                return True
+        return False
+
+    def _extract(self, query: str,
+                 kept: List[Tuple[int, List[Tuple[str, bool]]]],
+                 embeddings: List[Optional[Sequence[float]]],
+                 query_embedding: Optional[Sequence[float]]) -> Tuple[List[Tuple[int, List[Tuple[str, bool]]]], int]:
+        """Mantém estruturais + linhas de maior pontuação; o resto vira marcador por chunk."""
+        query_terms = set(_terms(query))
+        unit_terms = {(c, u): set(_terms(unit)) for c, (_, units) in enumerate(kept)
+                      for u, (unit, structural) in enumerate(units) if not structural}
+        document_frequency = Counter(term for terms in unit_terms.values() for term in terms & query_terms)
+        n_units = max(1, len(unit_terms))
+
+        def chunk_relevance(position: int) -> float:
+            index = kept[position][0]
+            if query_embedding is not None and embeddings[index] is not None:
+                similarity = _cosine(query_embedding, embeddings[index])
+                if similarity is not None:
+                    return similarity
+            return -position  # sem embeddings: ordem da busca
+
+        relevance = [chunk_relevance(c) for c in range(len(kept))]
+
+        def score(key: Tuple[int, int]) -> Tuple[float, float, int]:
+            matched = unit_terms[key] & query_terms
+            weight = sum(math.log(1 + n_units / document_frequency[term]) for term in matched)
+            return (weight, relevance[key[0]], -key[1])
+
+        selected: Set[Tuple[int, int]] = set()
+        used = 0
+        # Estruturais primeiro (cabeçalhos dão sentido às linhas)
+        for c, (_, units) in enumerate(kept):
+            for u, (unit, structural) in enumerate(units):
+                if structural:
+                    selected.add((c, u))
+                    used += self.counter.count(unit) + 1
+        for key in sorted(unit_terms, key=score, reverse=True):
+            cost = self.counter.count(kept[key[0]][1][key[1]][0]) + 1
+            if used + cost > self.max_tokens:
+                continue
+            selected.add(key)
+            used += cost
+
+        result, omitted = [], 0
+        for c, (index, units) in enumerate(kept):
+            chunk_units = [(unit, structural) for u, (unit, structural) in enumerate(units) if (c, u) in selected]
+            missing = len(units) - len(chunk_units)
+            if missing and all(structural for _, structural in chunk_units):
+                omitted += missing
+                continue  # nenhuma linha de conteúdo coube: só o cabeçalho não acrescenta nada
+            if missing:
+                omitted += missing
+                chunk_units.append((f"[... {missing} linhas omitidas]", True))
+            result.append((index, chunk_units))
+        if not result and kept:
+            # Só os estruturais já estouram o orçamento: mantém o chunk mais relevante
+            result = [kept[0]]
+        return result, omitted
+
+
+def compress_rag_context(query: str,
+                         chunks: Sequence[str],
+                         embeddings: Optional[Sequence[Optional[Sequence[float]]]] = None,
+                         query_embedding: Optional[Sequence[float]] = None) -> List[str]:
+    """Atalho: chunks comprimidos com os limites configurados."""
+    return ContextCompressor().compress(query, chunks, embeddings, query_embedding).chunks
@@ -5,8 +5,16 @@ Este módulo fornece uma camada de abstração usando LangChain para:
 - ChatGoogleGenerativeAI (Google Gemini)
 - ChatGroq (Groq)
 - Fallback automático quando um provedor falha
+- Timeout, retentativas e circuit breaker por provedor (``src.llm.resilience``)
+- Limites de concorrência e de taxa por provedor/modelo (``src.llm.rate_limiter``)
+- Cache local de respostas (``src.llm.response_cache``)
+- Streaming de tokens quando a requisição é transmitida (``src.llm.streaming``)
+- Coalescência de chamadas idênticas simultâneas (``src.utils.single_flight``)
 - Configuração de temperatura, top_p, max_tokens
 
+As chamadas usam ``ainvoke`` dos modelos LangChain: ``achat`` é a API
+principal para código assíncrono e ``chat`` um wrapper síncrono sobre ela.
+
 Integração incremental mantendo compatibilidade com sistema legado.
 """
 
@@ -16,6 +24,7 @@ from pathlib import Path
 from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass
+import dataclasses
 import time
 
 # Adiciona o diretório raiz do projeto ao PYTHONPATH
@@ -23,7 +32,13 @@ root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
 from src.utils.logging_config import get_logger
-from src.settings import GROQ_API_KEY, OPENAI_API_KEY, GOOGLE_API_KEY
+from src.llm.async_runtime import LoopLocalCache, run_sync
+from src.llm.rate_limiter import estimate_request_tokens, get_rate_limiter
+from src.llm.resilience import get_provider_resilience
+from src.llm.response_cache import get_llm_response_cache, normalize_prompt
+from src.llm.streaming import TokenSink, claim_token_sink
+from src.utils.single_flight import get_single_flight, make_flight_key
+from src.settings import GROQ_API_KEY, OPENAI_API_KEY, GOOGLE_API_KEY, LLM_READ_TIMEOUT, LLM_CACHE_ENABLED
 
 # Imports LangChain
 try:
@@ -45,6 +60,12 @@ except ImportError as e:
 logger = get_logger(__name__)
 
 
+def _total_tokens(message: Any) -> Optional[int]:
+    """Tokens totais informados pelo provedor na mensagem do LangChain (se houver)."""
+    metadata = getattr(message, 'response_metadata', None) or {}
+    return metadata.get('token_usage', {}).get('total_tokens')
+
+
 class LLMProvider(Enum):
     """Provedores LLM disponíveis via LangChain."""
     GROQ = "groq"
@@ -62,6 +83,7 @@ class LLMResponse:
     processing_time: float = 0.0
     error: Optional[str] = None
     success: bool = True
+    cached: bool = False
 
 
 @dataclass
@@ -99,8 +121,8 @@ class LangChainLLMManager:
             LLMProvider.OPENAI   # Terceiro: OpenAI (fallback)
         ]
         
-        # Cache de clientes LangChain
-        self._clients = {}
+        # Cache de clientes LangChain (por event loop: os clientes assíncronos ficam presos ao loop)
+        self._clients = LoopLocalCache()
         self._provider_status = {}
         
         # Verificar disponibilidade dos provedores
@@ -168,47 +190,50 @@ class LangChainLLMManager:
         return None
     
     def _get_client(self, provider: LLMProvider, config: LLMConfig):
-        """Obtém ou cria cliente LangChain para o provedor especificado."""
+        """Obtém ou cria cliente LangChain para o provedor no event loop atual."""
         cache_key = f"{provider.value}_{config.temperature}_{config.max_tokens}"
         
-        if cache_key in self._clients:
-            return self._clients[cache_key]
-        
-        client = None
-        model = config.model or self._get_default_model(provider)
-        
-        # Justificativa: top_p = 0.25 reduz aleatoriedade, tornando respostas mais precisas e confiáveis para conteúdos técnicos.
-        if provider == LLMProvider.GROQ:
-            client = ChatGroq(
-                api_key=GROQ_API_KEY,
-                model=model,
-                temperature=config.temperature,
-                max_tokens=config.max_tokens,
-                model_kwargs={"top_p": config.top_p}
-            )
-        
-        elif provider == LLMProvider.GOOGLE:
-            client = ChatGoogleGenerativeAI(
-                google_api_key=GOOGLE_API_KEY,
-                model=model,
-                temperature=config.temperature,
-                max_output_tokens=config.max_tokens,
-                top_p=config.top_p
-            )
-        
-        elif provider == LLMProvider.OPENAI:
-            client = ChatOpenAI(
-                api_key=OPENAI_API_KEY,
-                model=model,
-                temperature=config.temperature,
-                max_tokens=config.max_tokens,
-                model_kwargs={"top_p": config.top_p}
-            )
-        
-        if client:
-            self._clients[cache_key] = client
-        
-        return client
+        def create():
+            client = None
+            model = config.model or self._get_default_model(provider)
+            
+            # Justificativa: top_p = 0.25 reduz aleatoriedade, tornando respostas mais precisas e confiáveis para conteúdos técnicos.
+            if provider == LLMProvider.GROQ:
+                client = ChatGroq(
+                    api_key=GROQ_API_KEY,
+                    model=model,
+                    temperature=config.temperature,
+                    max_tokens=config.max_tokens,
+                    model_kwargs={"top_p": config.top_p},
+                    timeout=LLM_READ_TIMEOUT,
+                    max_retries=0  # retentativas ficam a cargo de src.llm.resilience
+                )
+            
+            elif provider == LLMProvider.GOOGLE:
+                client = ChatGoogleGenerativeAI(
+                    google_api_key=GOOGLE_API_KEY,
+                    model=model,
+                    temperature=config.temperature,
+                    max_output_tokens=config.max_tokens,
+                    top_p=config.top_p,
+                    timeout=LLM_READ_TIMEOUT,
+                    max_retries=0
+                )
+            
+            elif provider == LLMProvider.OPENAI:
+                client = ChatOpenAI(
+                    api_key=OPENAI_API_KEY,
+                    model=model,
+                    temperature=config.temperature,
+                    max_tokens=config.max_tokens,
+                    model_kwargs={"top_p": config.top_p},
+                    timeout=LLM_READ_TIMEOUT,
+                    max_retries=0  # retentativas ficam a cargo de src.llm.resilience
+                )
+            
+            return client
+            
+        return self._clients.get_or_create(cache_key, create)
     
     def _get_default_model(self, provider: LLMProvider) -> str:
         """Retorna o modelo padrão para cada provedor."""
@@ -220,14 +245,23 @@ class LangChainLLMManager:
         return defaults.get(provider, "unknown")
     
     def chat(self, prompt: str, config: Optional[LLMConfig] = None, 
-             system_prompt: Optional[str] = None, provider: Optional[LLMProvider] = None) -> LLMResponse:
-        """Envia mensagem para o LLM e retorna resposta.
+             system_prompt: Optional[str] = None, provider: Optional[LLMProvider] = None,
+             use_cache: bool = True, cache_query: Optional[str] = None) -> LLMResponse:
+        """Versão síncrona de ``achat`` (executa no event loop de fundo da camada LLM)."""
+        return run_sync(self.achat(prompt, config, system_prompt, provider, use_cache, cache_query))
+    
+    async def achat(self, prompt: str, config: Optional[LLMConfig] = None, 
+                    system_prompt: Optional[str] = None, provider: Optional[LLMProvider] = None,
+                    use_cache: bool = True, cache_query: Optional[str] = None) -> LLMResponse:
+        """Envia mensagem para o LLM e retorna resposta (não bloqueia o event loop).
         
         Args:
             prompt: Mensagem do usuário
             config: Configuração LLM (temperatura, max_tokens, etc)
             system_prompt: Prompt de sistema opcional
             provider: Provedor específico (se None, usa ativo)
+            use_cache: Consulta/alimenta o cache local de respostas
+            cache_query: Pergunta do usuário (chave da camada semântica do cache)
         
         Returns:
             LLMResponse com conteúdo e metadados
@@ -236,11 +270,38 @@ class LangChainLLMManager:
             config = LLMConfig()
         
         target_provider = provider or self.active_provider
+        sink = claim_token_sink()
+        if sink is not None:
+            return await self._achat(prompt, config, system_prompt, target_provider, use_cache, cache_query, sink)
         
+        # Chamadas idênticas simultâneas compartilham a mesma execução
+        flight_key = make_flight_key(
+            "langchain", id(self), target_provider.value, dataclasses.asdict(config),
+            normalize_prompt(system_prompt), normalize_prompt(prompt), use_cache
+        )
+        return await get_single_flight("llm").ado(
+            flight_key,
+            lambda: self._achat(prompt, config, system_prompt, target_provider, use_cache, cache_query, None)
+        )
+    
+    async def _achat(self, prompt: str, config: LLMConfig, system_prompt: Optional[str],
+                     target_provider: LLMProvider, use_cache: bool, cache_query: Optional[str],
+                     sink: Optional[TokenSink]) -> LLMResponse:
+        """Provedor alvo com fallback para os demais (corpo de ``achat``)."""
         try:
-            return self._call_provider(target_provider, prompt, config, system_prompt)
+            return await self._acall_provider(target_provider, prompt, config, system_prompt,
+                                              use_cache, cache_query, sink)
         except Exception as e:
             self.logger.error(f"Erro com {target_provider.value}: {str(e)}")
+            if sink is not None and sink.emitted:
+                # Resposta parcial já transmitida: fallback recomeçaria o texto
+                return LLMResponse(
+                    content="",
+                    provider=target_provider,
+                    model="unknown",
+                    error=f"Streaming interrompido: {str(e)}",
+                    success=False
+                )
             
             # Tentar fallback
             for fallback_provider in self.preferred_providers:
@@ -250,7 +311,8 @@ class LangChainLLMManager:
                 if self._provider_status.get(fallback_provider, {}).get("available"):
                     self.logger.warning(f"Tentando fallback para {fallback_provider.value}")
                     try:
-                        return self._call_provider(fallback_provider, prompt, config, system_prompt)
+                        return await self._acall_provider(fallback_provider, prompt, config, system_prompt,
+                                                         use_cache, cache_query, sink)
                     except Exception as fallback_error:
                         self.logger.error(f"Fallback {fallback_provider.value} falhou: {str(fallback_error)}")
             
@@ -263,13 +325,28 @@ class LangChainLLMManager:
                 success=False
             )
     
-    def _call_provider(self, provider: LLMProvider, prompt: str, 
-                      config: LLMConfig, system_prompt: Optional[str]) -> LLMResponse:
-        """Chama um provedor específico via LangChain."""
+    async def _acall_provider(self, provider: LLMProvider, prompt: str, 
+                              config: LLMConfig, system_prompt: Optional[str],
+                              use_cache: bool = True, cache_query: Optional[str] = None,
+                              sink: Optional[TokenSink] = None) -> LLMResponse:
+        """Chama um provedor específico via LangChain (``astream`` se houver ``sink``)."""
         start_time = time.time()
         
-        client = self._get_client(provider, config)
         model = config.model or self._get_default_model(provider)
+        cache = get_llm_response_cache() if use_cache and LLM_CACHE_ENABLED else None
+        cache_args = (
+            f"langchain:{provider.value}", model,
+            {"temperature": config.temperature, "max_tokens": config.max_tokens, "top_p": config.top_p},
+            prompt,
+        )
+        if cache is not None:
+            cached = await cache.aget(*cache_args, system_prompt, query=cache_query)
+            if cached is not None:
+                if sink is not None:
+                    sink.emit(cached.content)
+                return dataclasses.replace(cached, processing_time=time.time() - start_time, cached=True)
+        
+        client = self._get_client(provider, config)
         
         # Construir mensagens
         messages = []
@@ -277,18 +354,25 @@ class LangChainLLMManager:
             messages.append(SystemMessage(content=system_prompt))
         messages.append(HumanMessage(content=prompt))
         
-        # Invocar LLM via LangChain
-        response = client.invoke(messages)
-        
-        processing_time = time.time() - start_time
+        # Invocar LLM via LangChain (limite de taxa compartilhado com o LLMManager)
+        resilience = get_provider_resilience(provider.value)
+        limiter = get_rate_limiter(provider.value, model)
+        tokens = estimate_request_tokens(prompt, system_prompt, config.max_tokens) if limiter.counts_tokens else 0
+        if sink is None:
+            response = await resilience.call(lambda: client.ainvoke(messages),
+                                             limiter=limiter, tokens=tokens, usage=_total_tokens)
+        else:
+            emitted_before = sink.emitted
+            response = await resilience.call(lambda: self._astream_messages(client, messages, sink),
+                                             retry_if=lambda: sink.emitted == emitted_before,
+                                             limiter=limiter, tokens=tokens, usage=_total_tokens)
         
         # Extrair tokens se disponível
-        tokens_used = None
-        if hasattr(response, 'response_metadata'):
-            metadata = response.response_metadata
-            tokens_used = metadata.get('token_usage', {}).get('total_tokens')
+        tokens_used = _total_tokens(response)
+        
+        processing_time = time.time() - start_time
         
-        return LLMResponse(
+        result = LLMResponse(
             content=response.content,
             provider=provider,
             model=model,
@@ -296,6 +380,18 @@ class LangChainLLMManager:
             processing_time=processing_time,
             success=True
         )
+        if cache is not None and result.content:
+            await cache.aput(*cache_args, result, system_prompt, query=cache_query)
+        return result
+    
+    @staticmethod
+    async def _astream_messages(client: Any, messages: List[Any], sink: TokenSink) -> Any:
+        """Consome ``client.astream`` repassando os trechos ao sink; devolve a mensagem agregada."""
+        response = None
+        async for chunk in client.astream(messages):
+            sink.emit(chunk.content)
+            response = chunk if response is None else response + chunk
+        return response if response is not None else AIMessage(content="")
     
     def get_provider_status(self) -> Dict[str, Any]:
         """Retorna status de todos os provedores."""
@@ -6,18 +6,32 @@ Este módulo fornece uma camada de abstração para diferentes provedores LLM:
 - Google Gemini (gemini-1.5-flash)
 - OpenAI (gpt-3.5-turbo)
 - Fallback automático quando um provedor falha
+- Timeout, retentativas e circuit breaker por provedor (``src.llm.resilience``)
+- Roteamento adaptativo por latência/erros e hedging (``src.llm.adaptive_routing``)
+- Limites de concorrência e de taxa por provedor/modelo (``src.llm.rate_limiter``)
+- Cache local de respostas (``src.llm.response_cache``)
+- Streaming de tokens quando a requisição é transmitida (``src.llm.streaming``)
+- Coalescência de chamadas idênticas simultâneas (``src.utils.single_flight``)
+
+As chamadas usam os clientes assíncronos dos provedores (``AsyncGroq``,
+``AsyncOpenAI``, ``generate_content_async``) com pool de conexões httpx.
+``achat`` é a API principal para código assíncrono; ``chat`` é um wrapper
+síncrono sobre ela.
 
 Uso:
     manager = LLMManager()
+    response = await manager.achat("Analise estes dados...")
     response = manager.chat("Analise estes dados...")
 """
 
 from __future__ import annotations
 import sys
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass
+import asyncio
+import dataclasses
 import time
 
 # Adiciona o diretório raiz do projeto ao PYTHONPATH
@@ -25,7 +39,25 @@ root_dir = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(root_dir))
 
 from src.utils.logging_config import get_logger
-from src.settings import GROQ_API_KEY, OPENAI_API_KEY, GOOGLE_API_KEY
+from src.llm.adaptive_routing import AdaptiveRouter, hedged_race
+from src.llm.async_runtime import LoopLocalCache, run_sync
+from src.llm.llm_router import ComplexityLevel
+from src.llm.rate_limiter import (
+    RateLimitExceededError,
+    estimate_request_tokens,
+    get_rate_limiter,
+    get_rate_limiter_metrics,
+)
+from src.llm.resilience import CircuitOpenError, get_provider_resilience
+from src.llm.response_cache import get_llm_response_cache, normalize_prompt
+from src.llm.streaming import TokenSink, claim_token_sink
+from src.utils.single_flight import get_single_flight, make_flight_key
+from src.settings import (
+    GROQ_API_KEY, OPENAI_API_KEY, GOOGLE_API_KEY,
+    LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_MAX_KEEPALIVE,
+    LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_CACHE_ENABLED,
+    LLM_ADAPTIVE_ROUTING_ENABLED,
+)
 
 logger = get_logger(__name__)
 
@@ -47,6 +79,7 @@ class LLMResponse:
     processing_time: float = 0.0
     error: Optional[str] = None
     success: bool = True
+    cached: bool = False
 
 
 @dataclass
@@ -58,14 +91,36 @@ class LLMConfig:
     model: Optional[str] = None  # Se None, usa modelo padrão do provedor
 
 
+# Função assíncrona que atende um provedor: (prompt, config, system_prompt) -> LLMResponse
+ProviderCaller = Callable[[str, LLMConfig, Optional[str]], Awaitable[LLMResponse]]
+# Versão em streaming: (prompt, config, system_prompt) -> trechos de texto
+ProviderStreamer = Callable[[str, LLMConfig, Optional[str]], AsyncIterator[str]]
+
+
+def _caller_as_streamer(caller: ProviderCaller) -> ProviderStreamer:
+    """Adapta um provedor sem streaming: a resposta inteira vira um único trecho."""
+    async def stream(prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        response = await caller(prompt, config, system_prompt)
+        yield response.content
+    return stream
+
+
 class LLMManager:
     """Gerenciador centralizado para diferentes provedores LLM com fallback automático."""
     
-    def __init__(self, preferred_providers: Optional[List[LLMProvider]] = None):
+    def __init__(self,
+                 preferred_providers: Optional[List[LLMProvider]] = None,
+                 provider_callers: Optional[Dict[LLMProvider, ProviderCaller]] = None,
+                 provider_streamers: Optional[Dict[LLMProvider, ProviderStreamer]] = None,
+                 router: Optional[AdaptiveRouter] = None):
         """Inicializa o gerenciador LLM.
         
         Args:
             preferred_providers: Lista ordenada de provedores preferenciais
+            provider_callers: Implementações assíncronas substitutas por provedor
+                (provedores injetados são considerados disponíveis; útil em testes)
+            provider_streamers: Versões em streaming das implementações injetadas
+            router: Roteador adaptativo (latência/erros por provedor e hedging)
         """
         self.logger = logger
         self.preferred_providers = preferred_providers or [
@@ -74,9 +129,27 @@ class LLMManager:
             LLMProvider.OPENAI   # Terceiro: OpenAI (fallback)
         ]
         
-        # Cache de clientes inicializados
-        self._clients = {}
+        # Clientes assíncronos (por event loop) e implementação de cada provedor
+        self._async_clients = LoopLocalCache()
         self._provider_status = {}
+        self._injected_providers = set(provider_callers or {})
+        self._provider_callers: Dict[LLMProvider, ProviderCaller] = {
+            LLMProvider.GROQ: self._acall_groq,
+            LLMProvider.GOOGLE: self._acall_google,
+            LLMProvider.OPENAI: self._acall_openai,
+            **(provider_callers or {}),
+        }
+        self._provider_streamers: Dict[LLMProvider, ProviderStreamer] = {
+            LLMProvider.GROQ: self._astream_groq,
+            LLMProvider.GOOGLE: self._astream_google,
+            LLMProvider.OPENAI: self._astream_openai,
+            **{provider: _caller_as_streamer(caller) for provider, caller in (provider_callers or {}).items()},
+            **(provider_streamers or {}),
+        }
+        # Timeout/retentativas/circuit breaker e coalescência (estado compartilhado no processo)
+        self._single_flight = get_single_flight("llm")
+        self._router = router or AdaptiveRouter()
+        self._resilience = {provider: get_provider_resilience(provider.value) for provider in LLMProvider}
         
         # Verificar disponibilidade dos provedores
         self._check_provider_availability()
@@ -118,9 +191,12 @@ class LLMManager:
         Returns:
             Tuple[bool, str]: (disponível, mensagem)
         """
+        if provider in self._injected_providers:
+            return True, "Provedor injetado"
+        
         if provider == LLMProvider.GROQ:
             try:
-                from groq import Groq
+                from groq import AsyncGroq
                 if not GROQ_API_KEY:
                     return False, "API key não configurada"
                 return True, "Groq disponível"
@@ -154,29 +230,37 @@ class LLMManager:
                 return provider
         return None
     
+    def _get_http_client(self):
+        """Pool HTTP assíncrono compartilhado pelos clientes do event loop atual."""
+        import httpx
+        return self._async_clients.get_or_create("http", lambda: httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        ))
+    
     def _get_client(self, provider: LLMProvider):
-        """Obtém ou cria cliente para o provedor especificado."""
-        if provider in self._clients:
-            return self._clients[provider]
-        
-        client = None
-        if provider == LLMProvider.GROQ:
-            from groq import Groq
-            client = Groq(api_key=GROQ_API_KEY)
-        
-        elif provider == LLMProvider.GOOGLE:
-            import google.generativeai as genai
-            genai.configure(api_key=GOOGLE_API_KEY)
-            client = genai.GenerativeModel('models/gemini-2.0-flash')
-        
-        elif provider == LLMProvider.OPENAI:
-            import openai
-            client = openai.OpenAI(api_key=OPENAI_API_KEY)
-        
-        if client:
-            self._clients[provider] = client
+        """Obtém ou cria cliente assíncrono para o provedor no event loop atual."""
+        def create():
+            if provider == LLMProvider.GROQ:
+                from groq import AsyncGroq
+                # Retentativas ficam a cargo de src.llm.resilience
+                return AsyncGroq(api_key=GROQ_API_KEY, http_client=self._get_http_client(), max_retries=0)
+            
+            if provider == LLMProvider.GOOGLE:
+                import google.generativeai as genai
+                genai.configure(api_key=GOOGLE_API_KEY)
+                return genai.GenerativeModel('models/gemini-2.0-flash')
+            
+            if provider == LLMProvider.OPENAI:
+                import openai
+                return openai.AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=self._get_http_client(), max_retries=0)
+            
+            return None
         
-        return client
+        return self._async_clients.get_or_create(provider, create)
     
     def _get_default_model(self, provider: LLMProvider) -> str:
         """Retorna o modelo padrão para cada provedor."""
@@ -187,7 +271,7 @@ class LLMManager:
         }
         return defaults.get(provider, "unknown")
     
-    def _call_groq(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> LLMResponse:
+    async def _acall_groq(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> LLMResponse:
         """Chama a API do Groq."""
         start_time = time.time()
         client = self._get_client(LLMProvider.GROQ)
@@ -199,7 +283,7 @@ class LLMManager:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=config.temperature,
@@ -223,7 +307,7 @@ class LLMManager:
             processing_time=processing_time
         )
     
-    def _call_google(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> LLMResponse:
+    async def _acall_google(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> LLMResponse:
         """Chama a API do Google Gemini."""
         start_time = time.time()
         client = self._get_client(LLMProvider.GOOGLE)
@@ -234,13 +318,14 @@ class LLMManager:
         else:
             combined_prompt = prompt
         
-        response = client.generate_content(
+        response = await client.generate_content_async(
             combined_prompt,
             generation_config={
                 'temperature': config.temperature,
                 'max_output_tokens': config.max_tokens,
                 'top_p': config.top_p,
-            }
+            },
+            request_options={'timeout': LLM_READ_TIMEOUT}
         )
         
         processing_time = time.time() - start_time
@@ -253,7 +338,7 @@ class LLMManager:
             processing_time=processing_time
         )
     
-    def _call_openai(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> LLMResponse:
+    async def _acall_openai(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> LLMResponse:
         """Chama a API da OpenAI."""
         start_time = time.time()
         client = self._get_client(LLMProvider.OPENAI)
@@ -265,7 +350,7 @@ class LLMManager:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=messages,
             temperature=config.temperature,
@@ -285,56 +370,244 @@ class LLMManager:
             processing_time=processing_time
         )
     
-    def chat(self, 
-             prompt: str, 
-             config: Optional[LLMConfig] = None,
-             force_provider: Optional[LLMProvider] = None,
-             system_prompt: Optional[str] = None) -> LLMResponse:
-        """Envia prompt para LLM com fallback automático.
+    def _chat_messages(self, prompt: str, system_prompt: Optional[str]) -> List[Dict[str, str]]:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    async def _astream_groq(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Chama a API do Groq em modo streaming."""
+        client = self._get_client(LLMProvider.GROQ)
+        stream = await client.chat.completions.create(
+            model=config.model or self._get_default_model(LLMProvider.GROQ),
+            messages=self._chat_messages(prompt, system_prompt),
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            top_p=config.top_p,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _astream_google(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Chama a API do Google Gemini em modo streaming."""
+        client = self._get_client(LLMProvider.GOOGLE)
+        combined_prompt = f"{system_prompt}\n\nUsuário: {prompt}" if system_prompt else prompt
+        response = await client.generate_content_async(
+            combined_prompt,
+            generation_config={
+                'temperature': config.temperature,
+                'max_output_tokens': config.max_tokens,
+                'top_p': config.top_p,
+            },
+            stream=True,
+            request_options={'timeout': LLM_READ_TIMEOUT}
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+    
+    async def _astream_openai(self, prompt: str, config: LLMConfig, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Chama a API da OpenAI em modo streaming."""
+        client = self._get_client(LLMProvider.OPENAI)
+        stream = await client.chat.completions.create(
+            model=config.model or self._get_default_model(LLMProvider.OPENAI),
+            messages=self._chat_messages(prompt, system_prompt),
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+            top_p=config.top_p,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def _acall_streaming(self, provider: LLMProvider, prompt: str, config: LLMConfig,
+                               system_prompt: Optional[str], sink: TokenSink) -> LLMResponse:
+        """Consome o streaming do provedor repassando cada trecho ao sink da requisição."""
+        start_time = time.time()
+        parts = []
+        async for text in self._provider_streamers[provider](prompt, config, system_prompt):
+            if text:
+                parts.append(text)
+                sink.emit(text)
+        return LLMResponse(
+            content="".join(parts),
+            provider=provider,
+            model=self._cache_params(provider, config)[0],
+            processing_time=time.time() - start_time
+        )
+    
+    def _cache_params(self, provider: LLMProvider, config: LLMConfig) -> Tuple[str, Dict[str, Any]]:
+        """Modelo e parâmetros de geração que compõem a chave do cache de respostas."""
+        model = config.model or self._get_default_model(provider)
+        return model, {"temperature": config.temperature, "max_tokens": config.max_tokens, "top_p": config.top_p}
+    
+    async def achat(self, 
+                    prompt: str, 
+                    config: Optional[LLMConfig] = None,
+                    force_provider: Optional[LLMProvider] = None,
+                    system_prompt: Optional[str] = None,
+                    use_cache: bool = True,
+                    cache_query: Optional[str] = None,
+                    complexity: Optional[ComplexityLevel] = None) -> LLMResponse:
+        """Envia prompt para LLM com fallback automático (não bloqueia o event loop).
         
         Args:
             prompt: Texto do prompt
             config: Configurações para a chamada
             force_provider: Forçar uso de provedor específico
             system_prompt: Prompt de sistema para definir comportamento/personalidade
+            use_cache: Consulta/alimenta o cache local de respostas
+            cache_query: Pergunta do usuário (chave da camada semântica do cache)
+            complexity: Nível de complexidade da consulta (estatísticas de roteamento por nível)
         
         Returns:
             LLMResponse com resultado ou erro
         """
         config = config or LLMConfig()
+        start_time = time.time()
         
-        # Determinar ordem de tentativa dos provedores
+        # Determinar ordem de tentativa dos provedores: ordem de preferência reordenada pela
+        # latência/taxa de erro recentes (roteamento adaptativo), pulando os de circuito aberto
+        # (voltam sozinhos após a sondagem meio-aberta)
         if force_provider:
             providers_to_try = [force_provider]
         else:
-            # Começar com o provedor ativo, depois tentar outros disponíveis
-            available_providers = [
+            providers_to_try = [
                 p for p in self.preferred_providers 
                 if self._provider_status.get(p, {}).get("available", False)
             ]
-            
-            if self.active_provider in available_providers:
-                # Mover provedor ativo para o início
-                available_providers.remove(self.active_provider)
-                providers_to_try = [self.active_provider] + available_providers
-            else:
-                providers_to_try = available_providers
+            if LLM_ADAPTIVE_ROUTING_ENABLED:
+                providers_to_try = self._router.rank(
+                    [(p, p.value, self._cache_params(p, config)[0]) for p in providers_to_try], complexity
+                )
+        
+        # Requisição em streaming (/chat/stream): esta chamada transmite a resposta final
+        sink = claim_token_sink()
+        if sink is not None:
+            return await self._achat(prompt, config, providers_to_try, system_prompt,
+                                     use_cache, cache_query, sink, start_time, complexity)
+        
+        # Chamadas idênticas simultâneas compartilham a mesma execução
+        flight_key = make_flight_key(
+            id(self), [p.value for p in providers_to_try], dataclasses.asdict(config),
+            normalize_prompt(system_prompt), normalize_prompt(prompt), use_cache
+        )
+        return await self._single_flight.ado(
+            flight_key,
+            lambda: self._achat(prompt, config, providers_to_try, system_prompt,
+                                use_cache, cache_query, None, start_time, complexity)
+        )
+    
+    async def _timed_call(self, provider: LLMProvider, config: LLMConfig,
+                          complexity: Optional[ComplexityLevel],
+                          fn: Callable[[], Awaitable[LLMResponse]],
+                          retry_if: Optional[Callable[[], bool]] = None,
+                          tokens: Optional[Callable[[], int]] = None) -> LLMResponse:
+        """Chamada com limite de taxa e resiliência, registrando latência e sucesso no roteador adaptativo.
+        
+        ``tokens`` estima os tokens da requisição; só é chamado se o limitador
+        do modelo tiver orçamento de tokens.
+        
+        Raises:
+            RateLimitExceededError: limitador local recusou a chamada (provedor não foi chamado)
+            CircuitOpenError: circuito do provedor aberto
+        """
+        model = self._cache_params(provider, config)[0]
+        limiter = get_rate_limiter(provider.value, model)
+        estimated = tokens() if tokens is not None and limiter.counts_tokens else 0
+        started: List[float] = []
+        
+        def attempt() -> Awaitable[LLMResponse]:
+            # A latência conta a partir da primeira tentativa (sem a espera na fila do limitador)
+            if not started:
+                started.append(time.perf_counter())
+            return fn()
+        
+        def elapsed() -> float:
+            return time.perf_counter() - started[0] if started else 0.0
+        
+        try:
+            response = await self._resilience[provider].call(
+                attempt, retry_if=retry_if, limiter=limiter, tokens=estimated,
+                usage=lambda r: r.tokens_used
+            )
+        except (CircuitOpenError, RateLimitExceededError, asyncio.CancelledError):
+            # Cancelada (perdedora do hedging, cliente desconectado): não há latência
+            # completa nem falha do provedor a registrar
+            raise
+        except Exception:
+            self._router.record(provider.value, model, elapsed(), False, complexity)
+            raise
+        self._router.record(provider.value, model, elapsed(), response.success, complexity)
+        return response
+    
+    async def _achat(self, prompt: str, config: LLMConfig, providers_to_try: List[LLMProvider],
+                     system_prompt: Optional[str], use_cache: bool, cache_query: Optional[str],
+                     sink: Optional[TokenSink], start_time: float,
+                     complexity: Optional[ComplexityLevel] = None) -> LLMResponse:
+        """Cache, resiliência, hedging e fallback entre ``providers_to_try`` (corpo de ``achat``)."""
+        cache = get_llm_response_cache() if use_cache and LLM_CACHE_ENABLED else None
+        if cache is not None:
+            for provider in providers_to_try:
+                model, params = self._cache_params(provider, config)
+                cached = await cache.aget(provider.value, model, params, prompt, system_prompt, query=cache_query)
+                if cached is not None:
+                    self.logger.debug(f"⚡ Resposta LLM servida do cache ({provider.value})")
+                    if sink is not None:
+                        sink.emit(cached.content)
+                    return dataclasses.replace(cached, processing_time=time.time() - start_time, cached=True)
         
         last_error = None
-        
-        # Tentar cada provedor na ordem de preferência
-        for provider in providers_to_try:
+        estimated_tokens: List[int] = []
+        
+        def tokens() -> int:
+            # Estimativa (tiktoken sobre o prompt inteiro) feita uma vez e só se necessária
+            if not estimated_tokens:
+                estimated_tokens.append(estimate_request_tokens(prompt, system_prompt, config.max_tokens))
+            return estimated_tokens[0]
+        
+        def plain_call(target: LLMProvider) -> Awaitable[LLMResponse]:
+            caller = self._provider_callers[target]
+            return self._timed_call(target, config, complexity, lambda: caller(prompt, config, system_prompt),
+                                    tokens=tokens)
+        
+        # Tentar cada provedor na ordem definida
+        remaining = [p for p in providers_to_try if p in self._provider_callers]
+        while remaining:
+            provider = remaining.pop(0)
+            hedge_started = []
             try:
                 self.logger.debug(f"Tentando provedor: {provider.value}")
-                
-                if provider == LLMProvider.GROQ:
-                    response = self._call_groq(prompt, config, system_prompt)
-                elif provider == LLMProvider.GOOGLE:
-                    response = self._call_google(prompt, config, system_prompt)
-                elif provider == LLMProvider.OPENAI:
-                    response = self._call_openai(prompt, config, system_prompt)
+                if sink is not None:
+                    # Sem retentativa depois que algum trecho já foi transmitido
+                    emitted_before = sink.emitted
+                    response = await self._timed_call(
+                        provider, config, complexity,
+                        lambda: self._acall_streaming(provider, prompt, config, system_prompt, sink),
+                        retry_if=lambda: sink.emitted == emitted_before,
+                        tokens=tokens
+                    )
                 else:
-                    continue
+                    hedge = next((p for p in remaining if self._resilience[p].is_available()), None)
+                    delay = self._router.hedge_delay(
+                        provider.value, self._cache_params(provider, config)[0], complexity
+                    ) if hedge else None
+                    if delay is None:
+                        response = await plain_call(provider)
+                    else:
+                        # Hedging: duplicata no próximo provedor se este passar do seu p95
+                        def hedge_call(target: LLMProvider = hedge) -> Awaitable[LLMResponse]:
+                            hedge_started.append(target)
+                            return plain_call(target)
+                        
+                        winner, response = await hedged_race(lambda: plain_call(provider), hedge_call, delay)
+                        if winner == 1:
+                            provider = hedge
                 
                 # Sucesso! Atualizar provedor ativo se necessário
                 if provider != self.active_provider:
@@ -342,17 +615,28 @@ class LLMManager:
                     self.active_provider = provider
                 
                 self.logger.debug(f"✅ Resposta obtida via {provider.value} em {response.processing_time:.2f}s")
+                if cache is not None and response.success and response.content:
+                    model, params = self._cache_params(provider, config)
+                    await cache.aput(provider.value, model, params, prompt, response, system_prompt, query=cache_query)
                 return response
                 
+            except (CircuitOpenError, RateLimitExceededError) as e:
+                # Provedor indisponível ou sem vaga agora: passa ao próximo sem chamá-lo
+                last_error = last_error or str(e)
+                self.logger.debug(f"⏭️ {e}")
+                for tried in hedge_started:
+                    remaining.remove(tried)
+                continue
+            
             except Exception as e:
                 last_error = str(e)
                 self.logger.warning(f"❌ Falha no provedor {provider.value}: {last_error}")
-                
-                # Marcar provedor como indisponível temporariamente
-                if provider in self._provider_status:
-                    self._provider_status[provider]["available"] = False
-                    self._provider_status[provider]["message"] = f"Erro: {last_error}"
-                
+                if sink is not None and sink.emitted:
+                    # Resposta parcial já transmitida: outro provedor recomeçaria o texto
+                    break
+                for tried in hedge_started:
+                    # A duplicata também falhou
+                    remaining.remove(tried)
                 continue
         
         # Todos os provedores falharam
@@ -367,6 +651,17 @@ class LLMManager:
             success=False
         )
     
+    def chat(self, 
+             prompt: str, 
+             config: Optional[LLMConfig] = None,
+             force_provider: Optional[LLMProvider] = None,
+             system_prompt: Optional[str] = None,
+             use_cache: bool = True,
+             cache_query: Optional[str] = None,
+             complexity: Optional[ComplexityLevel] = None) -> LLMResponse:
+        """Versão síncrona de ``achat`` (executa no event loop de fundo da camada LLM)."""
+        return run_sync(self.achat(prompt, config, force_provider, system_prompt, use_cache, cache_query, complexity))
+    
     def get_status(self) -> Dict[str, Any]:
         """Retorna status de todos os provedores."""
         return {
@@ -374,7 +669,12 @@ class LLMManager:
             "preferred_order": [p.value for p in self.preferred_providers],
             "provider_status": {
                 p.value: status for p, status in self._provider_status.items()
-            }
+            },
+            "circuit_breakers": {
+                p.value: self._resilience[p].get_metrics() for p in self.preferred_providers
+            },
+            "routing": self._router.get_metrics(),
+            "rate_limits": get_rate_limiter_metrics()
         }
     
     def refresh_providers(self) -> None:
@@ -0,0 +1,250 @@
+"""Montagem de prompts com orçamento de tokens (contagem via tiktoken).
+
+Os prompts concatenam instruções, chunks recuperados, análises do CSV e
+histórico da conversa sem medir o tamanho. Aqui cada parte vira um
+``PromptSegment`` com prioridade; quando o total passa do orçamento
+(``LLM_PROMPT_MAX_TOKENS``), os segmentos de menor prioridade são cortados
+primeiro:
+
+- Segmentos ``required`` (instruções, pergunta) nunca são cortados
+- Segmentos com itens (chunks, mensagens do histórico) perdem itens inteiros
+  pela extremidade de menor valor antes de qualquer truncamento de texto
+- ``keep="head"`` preserva o início (chunks ordenados por relevância);
+  ``keep="tail"`` preserva o fim (histórico: mensagens mais recentes)
+
+A contagem usa o encoding do tiktoken (``LLM_PROMPT_ENCODING``); se ele não
+puder ser carregado (ex.: sem acesso à rede para baixar o BPE), usa a
+estimativa de ~4 caracteres por token.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+
+from src.settings import LLM_PROMPT_ENCODING, LLM_PROMPT_MAX_TOKENS
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_CHARS_PER_TOKEN = 4
+_TRUNCATION_MARKER = "[...]"
+# Sobra mínima para incluir um item parcialmente (abaixo disso o item é descartado)
+_MIN_PARTIAL_TOKENS = 32
+
+
+class TokenCounter:
+    """Conta e trunca textos em tokens do encoding configurado."""
+
+    def __init__(self, encoding_name: str = LLM_PROMPT_ENCODING):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get_encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception as e:
+                        logger.warning(f"⚠️ tiktoken indisponível ({e}); usando estimativa de {_CHARS_PER_TOKEN} caracteres por token")
+                    self._loaded = True
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        """Se a contagem usa o tiktoken (False = estimativa)."""
+        return self._get_encoding() is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return -(-len(text) // _CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int, keep: str = "head") -> str:
+        """Reduz ``text`` a no máximo ``max_tokens`` (marcador incluso), preservando o início ou o fim."""
+        if self.count(text) <= max_tokens:
+            return text
+        budget = max_tokens - self.count(_TRUNCATION_MARKER) - 1
+        if budget <= 0:
+            return ""
+        encoding = self._get_encoding()
+        if encoding is None:
+            chars = budget * _CHARS_PER_TOKEN
+            kept = text[:chars] if keep == "head" else text[-chars:]
+        else:
+            tokens = encoding.encode(text, disallowed_special=())
+            kept = encoding.decode(tokens[:budget] if keep == "head" else tokens[-budget:])
+        return f"{kept} {_TRUNCATION_MARKER}" if keep == "head" else f"{_TRUNCATION_MARKER} {kept}"
+
+
+@dataclass
+class PromptSegment:
+    """Parte de um prompt.
+
+    Args:
+        name: Identificador (aparece no relatório de tokens)
+        content: Texto ou lista de itens (chunks, mensagens)
+        priority: Maior = mais importante (cortado por último)
+        required: Nunca cortar
+        keep: ``"head"`` preserva o início, ``"tail"`` preserva o fim
+        separator: Separador entre itens
+        min_tokens: Tokens preservados mesmo sob pressão do orçamento
+    """
+    name: str
+    content: Union[str, Sequence[str]]
+    priority: int = 0
+    required: bool = False
+    keep: str = "head"
+    separator: str = "\n"
+    min_tokens: int = 0
+
+    def render(self) -> str:
+        if isinstance(self.content, str):
+            return self.content
+        return self.separator.join(item for item in self.content if item)
+
+
+@dataclass
+class PromptAssembly:
+    """Resultado da montagem: textos finais por segmento e contagem de tokens."""
+    texts: Dict[str, str]
+    tokens: Dict[str, int]
+    original_tokens: Dict[str, int]
+    max_tokens: int
+    joiner: str = "\n"
+    trimmed: List[str] = field(default_factory=list)
+    exact: bool = True
+
+    @property
+    def text(self) -> str:
+        return self.joiner.join(text for text in self.texts.values() if text)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.tokens.values())
+
+    @property
+    def original_total_tokens(self) -> int:
+        return sum(self.original_tokens.values())
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total_tokens > self.max_tokens
+
+    def get_report(self) -> Dict[str, object]:
+        return {
+            "total_tokens": self.total_tokens,
+            "original_tokens": self.original_total_tokens,
+            "max_tokens": self.max_tokens,
+            "segments": dict(self.tokens),
+            "trimmed": list(self.trimmed),
+            "exact_count": self.exact,
+        }
+
+
+class PromptBudget:
+    """Distribui um orçamento de tokens entre segmentos de prompt por prioridade.
+
+    Args:
+        max_tokens: Orçamento total do prompt
+        counter: Contador de tokens (padrão: ``get_token_counter()``)
+    """
+
+    def __init__(self, max_tokens: int = LLM_PROMPT_MAX_TOKENS, counter: Optional[TokenCounter] = None):
+        self.max_tokens = max_tokens
+        self.counter = counter or get_token_counter()
+
+    def assemble(self, segments: Sequence[PromptSegment], joiner: str = "\n",
+                 reserved_tokens: int = 0, label: str = "prompt") -> PromptAssembly:
+        """Monta os segmentos (na ordem dada) respeitando o orçamento.
+
+        Args:
+            segments: Partes do prompt
+            joiner: Separador entre segmentos
+            reserved_tokens: Tokens já consumidos fora dos segmentos (ex.: system prompt)
+            label: Nome do prompt nos logs
+
+        Returns:
+            ``PromptAssembly`` com o texto final e a contagem por segmento
+        """
+        texts = {segment.name: segment.render() for segment in segments}
+        tokens = {name: self.counter.count(text) for name, text in texts.items()}
+        assembly = PromptAssembly(texts=texts, tokens=tokens, original_tokens=dict(tokens),
+                                  max_tokens=self.max_tokens, joiner=joiner, exact=self.counter.exact)
+
+        budget = self.max_tokens - reserved_tokens - self.counter.count(joiner) * max(len(segments) - 1, 0)
+        excess = assembly.total_tokens - budget
+        if excess > 0:
+            # Menor prioridade primeiro; empate: o segmento mais ao fim do prompt
+            trimmable = [(i, s) for i, s in enumerate(segments) if not s.required]
+            order = sorted(trimmable, key=lambda item: (item[1].priority, -item[0]))
+            for _, segment in order:
+                if excess <= 0:
+                    break
+                current = tokens[segment.name]
+                target = max(segment.min_tokens, current - excess)
+                if target >= current:
+                    continue
+                texts[segment.name] = self._trim(segment, target)
+                tokens[segment.name] = self.counter.count(texts[segment.name])
+                excess -= current - tokens[segment.name]
+                assembly.trimmed.append(segment.name)
+
+        if assembly.trimmed:
+            logger.info(
+                f"🧮 {label}: {assembly.total_tokens + reserved_tokens} tokens "
+                f"(antes {assembly.original_total_tokens + reserved_tokens}, limite {self.max_tokens}); "
+                f"cortados: {', '.join(assembly.trimmed)}"
+            )
+        else:
+            logger.debug(f"🧮 {label}: {assembly.total_tokens + reserved_tokens} tokens (limite {self.max_tokens})")
+        if excess > 0:
+            logger.warning(f"⚠️ {label} excede o orçamento mesmo após cortes ({excess} tokens acima)")
+        return assembly
+
+    def _trim(self, segment: PromptSegment, max_tokens: int) -> str:
+        if isinstance(segment.content, str):
+            return self.counter.truncate(segment.content, max_tokens, segment.keep)
+
+        items = [item for item in segment.content if item]
+        if segment.keep == "tail":
+            items = items[::-1]
+        separator_tokens = self.counter.count(segment.separator)
+        kept: List[str] = []
+        used = 0
+        for item in items:
+            cost = self.counter.count(item) + (separator_tokens if kept else 0)
+            if used + cost <= max_tokens:
+                kept.append(item)
+                used += cost
+                continue
+            remaining = max_tokens - used - (separator_tokens if kept else 0)
+            if remaining >= _MIN_PARTIAL_TOKENS or not kept:
+                partial = self.counter.truncate(item, remaining, segment.keep)
+                if partial:
+                    kept.append(partial)
+            break
+        if segment.keep == "tail":
+            kept = kept[::-1]
+        return segment.separator.join(kept)
+
+
+_token_counter: Optional[TokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Retorna o contador de tokens do processo (singleton)."""
+    global _token_counter
+    if _token_counter is None:
+        with _token_counter_lock:
+            if _token_counter is None:
+                _token_counter = TokenCounter()
+    return _token_counter
@@ -0,0 +1,394 @@
+"""Limites de concorrência e de taxa por provedor/modelo LLM.
+
+Sem limite, uma rajada de perguntas dispara dezenas de chamadas simultâneas ao
+mesmo provedor: a cota estoura, chegam 429 em sequência e as retentativas e
+fallbacks pioram a situação. Cada provedor/modelo (``groq``, ``google``,
+``openai``, ``sonar``...) tem aqui um ``ProviderRateLimiter`` único no
+processo, compartilhado por ``LLMManager``, ``LangChainLLMManager``,
+``GroqLLMAgent``, ``GoogleLLMAgent`` e ``sonar_client``:
+
+- Concorrência máxima de chamadas em andamento
+- Token bucket de requisições por minuto e outro de tokens por minuto; os
+  tokens são estimados antes da chamada (prompt + ``max_tokens``) e ajustados
+  pelo uso real informado na resposta
+- Fila justa (FIFO): quem chegou antes é atendido antes, inclusive entre
+  threads e event loops diferentes
+- Descarte antecipado (``RateLimitExceededError``): fila cheia, espera máxima
+  excedida ou orçamento que só liberaria depois da espera máxima
+
+Os limites padrão vêm de ``LLM_MAX_CONCURRENCY``, ``LLM_REQUESTS_PER_MINUTE``
+e ``LLM_TOKENS_PER_MINUTE``; ``LLM_RATE_LIMITS`` ajusta por provedor ou
+provedor:modelo (``"groq=30/6000/4,google:gemini-2.0-flash=15"`` =
+requisições/tokens por minuto/concorrência; 0 = sem limite).
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from src.llm.prompt_budget import get_token_counter
+from src.settings import (
+    LLM_LIMITER_MAX_QUEUE,
+    LLM_LIMITER_MAX_WAIT,
+    LLM_MAX_CONCURRENCY,
+    LLM_RATE_LIMITS,
+    LLM_REQUESTS_PER_MINUTE,
+    LLM_TOKENS_PER_MINUTE,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class RateLimitExceededError(Exception):
+    """Chamada recusada pelo limitador local (fila cheia ou espera máxima excedida)."""
+    pass
+
+
+class TokenBucket:
+    """Token bucket com reposição contínua (``per_minute`` por minuto, rajada de um minuto).
+
+    O nível pode ficar negativo quando o uso real supera a estimativa: a dívida
+    é paga pelas próximas chamadas.
+    """
+
+    def __init__(self, per_minute: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos até haver ``amount`` disponível (0 = já disponível)."""
+        self._refill()
+        if self._level >= amount:
+            return 0.0
+        return (amount - self._level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self._level -= amount
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+    @property
+    def level(self) -> float:
+        self._refill()
+        return self._level
+
+
+class _Waiter:
+    """Chamada na fila; acordada por outra thread/loop quando pode tentar de novo."""
+
+    def __init__(self, tokens: int, loop: Optional[asyncio.AbstractEventLoop]):
+        self.tokens = tokens
+        self.loop = loop
+        self.event = asyncio.Event() if loop is not None else threading.Event()
+
+    def wake(self) -> None:
+        if self.loop is None:
+            self.event.set()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass  # loop já encerrado
+
+
+class RatePermit:
+    """Vaga concedida pelo limitador; liberada ao sair do ``slot``/``aslot``.
+
+    ``set_usage`` informa os tokens realmente consumidos (ajusta o orçamento).
+    """
+
+    def __init__(self, limiter: "ProviderRateLimiter", tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.actual_tokens: Optional[int] = None
+        self._released = False
+
+    def set_usage(self, total_tokens: Optional[int]) -> None:
+        if total_tokens:
+            self.actual_tokens = int(total_tokens)
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.limiter._release(self)
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """Limites de um provedor/modelo (0 = sem limite)."""
+    requests_per_minute: float = LLM_REQUESTS_PER_MINUTE
+    tokens_per_minute: float = LLM_TOKENS_PER_MINUTE
+    max_concurrency: int = LLM_MAX_CONCURRENCY
+
+
+class ProviderRateLimiter:
+    """Concorrência, orçamentos por minuto e fila justa de um provedor/modelo.
+
+    Args:
+        name: Nome usado em logs, erros e métricas (ex.: ``groq:llama-3.3-70b-versatile``)
+        limits: Concorrência e orçamentos por minuto
+        max_queue: Chamadas aguardando; acima disso a chamada é recusada na hora
+        max_wait: Espera máxima (segundos) na fila
+    """
+
+    def __init__(self,
+                 name: str,
+                 limits: Optional[RateLimits] = None,
+                 max_queue: int = LLM_LIMITER_MAX_QUEUE,
+                 max_wait: float = LLM_LIMITER_MAX_WAIT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.limits = limits or RateLimits()
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._clock = clock
+        self._requests = TokenBucket(self.limits.requests_per_minute, clock) if self.limits.requests_per_minute > 0 else None
+        self._tokens = TokenBucket(self.limits.tokens_per_minute, clock) if self.limits.tokens_per_minute > 0 else None
+        self._lock = threading.Lock()
+        self._queue: Deque[_Waiter] = deque()
+        self._active = 0
+        self._stats = {"granted": 0, "queued": 0, "shed": 0, "wait_seconds": 0.0, "max_queue_length": 0}
+
+    @property
+    def counts_tokens(self) -> bool:
+        """Se há orçamento de tokens (só então vale estimar os tokens da chamada)."""
+        return self._tokens is not None
+
+    # ------------------------------------------------------------------ fila
+
+    def _try_grant(self, waiter: _Waiter) -> Optional[float]:
+        """Com o lock: concede a vaga (None) ou devolve quanto esperar (``inf`` = até ser acordado)."""
+        if self._queue[0] is not waiter:
+            return math.inf
+        if self.limits.max_concurrency > 0 and self._active >= self.limits.max_concurrency:
+            return math.inf
+        wait = max(self._requests.wait_time(1) if self._requests else 0.0,
+                   self._tokens.wait_time(waiter.tokens) if self._tokens else 0.0)
+        if wait > 0:
+            return wait
+        if self._requests:
+            self._requests.take(1)
+        if self._tokens:
+            self._tokens.take(waiter.tokens)
+        self._active += 1
+        self._stats["granted"] += 1
+        self._queue.popleft()
+        if self._queue:
+            self._queue[0].wake()  # o próximo da fila pode tentar em seguida
+        return None
+
+    def _enqueue(self, tokens: int, loop: Optional[asyncio.AbstractEventLoop]) -> Tuple[_Waiter, Optional[float]]:
+        if self._tokens is not None:
+            # Uma chamada maior que o orçamento inteiro nunca caberia: limita à rajada
+            tokens = int(min(tokens, self._tokens.capacity))
+        with self._lock:
+            if self.max_queue > 0 and len(self._queue) >= self.max_queue:
+                self._stats["shed"] += 1
+                raise self._shed_error(f"fila cheia ({len(self._queue)} chamadas aguardando)")
+            waiter = _Waiter(tokens, loop)
+            self._queue.append(waiter)
+            self._stats["max_queue_length"] = max(self._stats["max_queue_length"], len(self._queue))
+            wait = self._try_grant(waiter)
+            if wait is not None and math.isfinite(wait) and wait > self.max_wait:
+                # O orçamento só liberaria depois da espera máxima: recusa já
+                self._remove(waiter)
+                raise self._shed_error(f"orçamento por minuto esgotado (libera em {wait:.1f}s)")
+            if wait is not None:
+                self._stats["queued"] += 1
+        return waiter, wait
+
+    def _remove(self, waiter: _Waiter, shed: bool = True) -> None:
+        """Com o lock: tira da fila uma chamada que desistiu."""
+        was_head = bool(self._queue) and self._queue[0] is waiter
+        try:
+            self._queue.remove(waiter)
+        except ValueError:
+            return
+        if shed:
+            self._stats["shed"] += 1
+        if was_head and self._queue:
+            self._queue[0].wake()
+
+    def _shed_error(self, reason: str) -> RateLimitExceededError:
+        logger.warning(f"🚦 {self.name}: chamada recusada pelo limitador local — {reason}")
+        return RateLimitExceededError(f"Limite local de {self.name} atingido: {reason}")
+
+    def _timeout_error(self, waiter: _Waiter) -> RateLimitExceededError:
+        with self._lock:
+            self._remove(waiter)
+        return self._shed_error(f"espera máxima de {self.max_wait:.1f}s excedida")
+
+    def _granted(self, tokens: int, started: float) -> RatePermit:
+        waited = self._clock() - started
+        if waited > 0:
+            with self._lock:
+                self._stats["wait_seconds"] += waited
+        return RatePermit(self, tokens)
+
+    def _release(self, permit: RatePermit) -> None:
+        with self._lock:
+            self._active -= 1
+            if self._tokens is not None and permit.actual_tokens is not None:
+                difference = permit.tokens - permit.actual_tokens
+                if difference > 0:
+                    self._tokens.give_back(difference)
+                elif difference < 0:
+                    self._tokens.take(-difference)
+            if self._queue:
+                self._queue[0].wake()
+
+    # -------------------------------------------------------------- síncrono
+
+    def acquire(self, tokens: int = 0) -> RatePermit:
+        """Aguarda a vez (bloqueando a thread) e reserva a vaga.
+
+        Raises:
+            RateLimitExceededError: fila cheia ou espera máxima excedida
+        """
+        started = self._clock()
+        waiter, wait = self._enqueue(tokens, None)
+        deadline = started + self.max_wait
+        while wait is not None:
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                raise self._timeout_error(waiter)
+            waiter.event.wait(min(wait, remaining))
+            waiter.event.clear()
+            with self._lock:
+                wait = self._try_grant(waiter)
+        return self._granted(waiter.tokens, started)
+
+    @contextmanager
+    def slot(self, tokens: int = 0) -> Iterator[RatePermit]:
+        """``with limiter.slot(tokens) as permit:`` — vaga liberada ao sair."""
+        permit = self.acquire(tokens)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    # ------------------------------------------------------------- assíncrono
+
+    async def aacquire(self, tokens: int = 0) -> RatePermit:
+        """Versão assíncrona de ``acquire`` (não bloqueia o event loop)."""
+        started = self._clock()
+        waiter, wait = self._enqueue(tokens, asyncio.get_running_loop())
+        deadline = started + self.max_wait
+        try:
+            while wait is not None:
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    raise self._timeout_error(waiter)
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), min(wait, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                waiter.event.clear()
+                with self._lock:
+                    wait = self._try_grant(waiter)
+        except asyncio.CancelledError:
+            with self._lock:
+                self._remove(waiter, shed=False)
+            raise
+        return self._granted(waiter.tokens, started)
+
+    @asynccontextmanager
+    async def aslot(self, tokens: int = 0) -> AsyncIterator[RatePermit]:
+        """``async with limiter.aslot(tokens) as permit:`` — vaga liberada ao sair."""
+        permit = await self.aacquire(tokens)
+        try:
+            yield permit
+        finally:
+            permit.release()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self._active,
+                "queue_length": len(self._queue),
+                "max_concurrency": self.limits.max_concurrency,
+                "requests_per_minute": self.limits.requests_per_minute,
+                "tokens_per_minute": self.limits.tokens_per_minute,
+                "tokens_available": round(self._tokens.level) if self._tokens else None,
+                **{key: round(value, 3) if isinstance(value, float) else value
+                   for key, value in self._stats.items()},
+            }
+
+
+def parse_rate_limits(spec: str) -> Dict[str, RateLimits]:
+    """Interpreta ``LLM_RATE_LIMITS``: ``"provedor[:modelo]=rpm[/tpm[/concorrência]],..."``."""
+    overrides: Dict[str, RateLimits] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        key, sep, values = item.partition("=")
+        if not sep:
+            logger.warning(f"⚠️ LLM_RATE_LIMITS: item ignorado '{item}' (esperado provedor=rpm/tpm/concorrência)")
+            continue
+        numbers = [value.strip() for value in values.split("/")]
+        defaults = RateLimits()
+        try:
+            overrides[key.strip().lower()] = RateLimits(
+                requests_per_minute=float(numbers[0]) if numbers[0] else defaults.requests_per_minute,
+                tokens_per_minute=float(numbers[1]) if len(numbers) > 1 and numbers[1] else defaults.tokens_per_minute,
+                max_concurrency=int(numbers[2]) if len(numbers) > 2 and numbers[2] else defaults.max_concurrency,
+            )
+        except ValueError:
+            logger.warning(f"⚠️ LLM_RATE_LIMITS: valores inválidos em '{item}'")
+    return overrides
+
+
+def estimate_request_tokens(prompt: str, system_prompt: Optional[str] = None, max_tokens: Optional[int] = None) -> int:
+    """Tokens reservados para uma chamada: prompt + system prompt + resposta máxima."""
+    counter = get_token_counter()
+    return counter.count(prompt or "") + counter.count(system_prompt or "") + int(max_tokens or 0)
+
+
+_limiters: Dict[str, ProviderRateLimiter] = {}
+_limiters_lock = threading.Lock()
+_overrides: Optional[Dict[str, RateLimits]] = None
+
+
+def get_rate_limiter(provider: str, model: Optional[str] = None) -> ProviderRateLimiter:
+    """Retorna o limitador do provedor/modelo (único no processo)."""
+    global _overrides
+    name = f"{provider}:{model}" if model else provider
+    if name not in _limiters:
+        with _limiters_lock:
+            if name not in _limiters:
+                if _overrides is None:
+                    _overrides = parse_rate_limits(LLM_RATE_LIMITS)
+                limits = _overrides.get(name.lower()) or _overrides.get(provider.lower()) or RateLimits()
+                _limiters[name] = ProviderRateLimiter(name, limits)
+    return _limiters[name]
+
+
+def get_rate_limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Vagas em uso, fila e descartes de cada provedor/modelo já utilizado."""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.get_metrics() for name, limiter in sorted(limiters.items())}
+
+
+def reset_rate_limiters() -> None:
+    """Descarta todos os limitadores (útil para testes)."""
+    global _overrides
+    with _limiters_lock:
+        _limiters.clear()
+        _overrides = None
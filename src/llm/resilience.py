@@ -0,0 +1,345 @@
+"""Resiliência das chamadas aos provedores LLM.
+
+Cada provedor (groq, google, openai) tem um ``ProviderResilience`` único no
+processo, compartilhado pelos gerenciadores LLM:
+
+- Timeout por tentativa (``asyncio.wait_for``), além dos timeouts de
+  conexão/leitura configurados nos clientes HTTP
+- Retentativas limitadas com backoff exponencial e jitter ("full jitter")
+  apenas para erros transitórios (timeout, conexão, 429, 5xx); ``Retry-After``
+  é respeitado até o atraso máximo
+- Circuit breaker: após ``failure_threshold`` falhas consecutivas o circuito
+  abre e o provedor é pulado; passados ``recovery_timeout`` segundos o
+  circuito fica meio-aberto e libera chamadas de sondagem, que o fecham
+  (sucesso) ou reabrem (falha). Não é preciso ``refresh_providers``.
+  Erros do cliente (400, 401, 422...) não contam como falha do provedor, e
+  uma sondagem cancelada devolve a vaga sem alterar o circuito.
+
+``get_resilience_metrics()`` expõe o estado e os contadores por provedor.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from src.llm.rate_limiter import ProviderRateLimiter, RateLimitExceededError
+from src.settings import (
+    LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_BREAKER_HALF_OPEN_CALLS,
+    LLM_BREAKER_RECOVERY_SECONDS,
+    LLM_CALL_TIMEOUT,
+    LLM_RETRY_BASE_DELAY,
+    LLM_RETRY_MAX_ATTEMPTS,
+    LLM_RETRY_MAX_DELAY,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Nomes das exceções transitórias dos SDKs (groq/openai/google/httpx)
+RETRYABLE_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "RateLimitError", "InternalServerError",
+    "ServiceUnavailable", "DeadlineExceeded", "ResourceExhausted", "TooManyRequests",
+    "TimeoutException", "ConnectError", "ReadTimeout", "ConnectTimeout", "RemoteProtocolError",
+}
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+# Erros da requisição (não do provedor): não contam para o circuit breaker
+CLIENT_ERROR_NAMES = {
+    "BadRequestError", "AuthenticationError", "PermissionDeniedError", "NotFoundError",
+    "UnprocessableEntityError", "InvalidArgument", "Unauthenticated", "PermissionDenied",
+}
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada: circuito do provedor aberto."""
+    pass
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable_error(error: BaseException) -> bool:
+    """Erros transitórios: timeout, falha de conexão, 429 e 5xx."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_client_error(error: BaseException) -> bool:
+    """Erros 4xx não transitórios (requisição inválida, credencial, modelo inexistente)."""
+    status = _status_code(error)
+    if status is not None:
+        return 400 <= status < 500 and status not in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in CLIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Valor do cabeçalho ``Retry-After`` (segundos) da resposta de erro, se houver."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        value = headers.get("retry-after") if headers is not None else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Retentativas com backoff exponencial e jitter."""
+    max_attempts: int = LLM_RETRY_MAX_ATTEMPTS
+    base_delay: float = LLM_RETRY_BASE_DELAY
+    max_delay: float = LLM_RETRY_MAX_DELAY
+
+    def compute_delay(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        """Atraso antes da tentativa ``attempt + 1`` (``attempt`` começa em 1)."""
+        retry_after = retry_after_seconds(error) if error is not None else None
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_delay)
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class CircuitBreaker:
+    """Circuit breaker fechado/aberto/meio-aberto por falhas consecutivas."""
+
+    def __init__(self,
+                 failure_threshold: int = LLM_BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout: float = LLM_BREAKER_RECOVERY_SECONDS,
+                 half_open_max_calls: int = LLM_BREAKER_HALF_OPEN_CALLS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+        self._last_error: Optional[str] = None
+
+    def _refresh_state(self) -> None:
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_in_flight = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """Reserva uma chamada; no estado meio-aberto libera só as sondagens."""
+        with self._lock:
+            self._refresh_state()
+            if self._state == CircuitState.CLOSED:
+                return True
+            if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != CircuitState.CLOSED:
+                logger.info("✅ Circuito fechado após sondagem bem-sucedida")
+            self._state = CircuitState.CLOSED
+            self._half_open_in_flight = 0
+
+    def release(self) -> None:
+        """Devolve a vaga de sondagem sem registrar resultado (cancelamento, erro do cliente)."""
+        with self._lock:
+            if self._state == CircuitState.HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = str(error) if error is not None else None
+            if self._state == CircuitState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != CircuitState.OPEN:
+                    self._stats["opened"] += 1
+                self._state = CircuitState.OPEN
+                self._opened_at = self._clock()
+                self._half_open_in_flight = 0
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh_state()
+            retry_in = 0.0
+            if self._state == CircuitState.OPEN:
+                retry_in = max(0.0, self.recovery_timeout - (self._clock() - self._opened_at))
+            return {
+                "state": self._state.value,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_seconds": round(retry_in, 1),
+                "last_error": self._last_error,
+                **self._stats,
+            }
+
+
+class ProviderResilience:
+    """Timeout, retentativas e circuit breaker de um provedor."""
+
+    def __init__(self,
+                 name: str,
+                 timeout: Optional[float] = LLM_CALL_TIMEOUT,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep):
+        self.name = name
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "attempts": 0, "retries": 0, "timeouts": 0, "client_errors": 0}
+
+    def is_available(self) -> bool:
+        """Provedor aceitaria uma chamada agora (circuito fechado ou meio-aberto)."""
+        return self.breaker.state != CircuitState.OPEN
+
+    async def call(self, fn: Callable[[], Awaitable[T]],
+                   retry_if: Optional[Callable[[], bool]] = None,
+                   limiter: Optional[ProviderRateLimiter] = None,
+                   tokens: int = 0,
+                   usage: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        """Executa ``fn`` com timeout, retentativas e controle do circuito.
+
+        Args:
+            fn: Fábrica da corrotina (chamada a cada tentativa)
+            retry_if: Condição adicional para retentar (ex.: streaming que ainda
+                não transmitiu nenhum token)
+            limiter: Limitador de taxa; a vaga é obtida a cada tentativa (fora do
+                timeout) e devolvida antes do backoff
+            tokens: Tokens estimados de cada tentativa (só com orçamento de tokens)
+            usage: Extrai do resultado os tokens realmente consumidos
+
+        Raises:
+            CircuitOpenError: circuito aberto (a chamada não foi feita)
+            RateLimitExceededError: limitador recusou a tentativa (não conta como falha)
+            Exception: último erro após esgotar as tentativas
+        """
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"Circuito aberto para o provedor {self.name}")
+
+        with self._lock:
+            self._stats["calls"] += 1
+        try:
+            return await self._call_with_retries(fn, retry_if, limiter, tokens, usage)
+        except BaseException as e:
+            if not isinstance(e, Exception):
+                # Cancelamento (perdedor do hedging, cliente desconectado): a
+                # sondagem não terminou, então só devolve a vaga
+                self.breaker.release()
+            raise
+
+    async def _call_with_retries(self, fn: Callable[[], Awaitable[T]],
+                                 retry_if: Optional[Callable[[], bool]],
+                                 limiter: Optional[ProviderRateLimiter] = None,
+                                 tokens: int = 0,
+                                 usage: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        attempts = max(1, self.retry_policy.max_attempts)
+        attempt = 0
+        while True:
+            attempt += 1
+            permit = None
+            if limiter is not None:
+                try:
+                    permit = await limiter.aacquire(tokens)
+                except RateLimitExceededError:
+                    # Sem vaga local: o provedor não foi chamado
+                    self.breaker.release()
+                    raise
+            with self._lock:
+                self._stats["attempts"] += 1
+            try:
+                result = await (asyncio.wait_for(fn(), self.timeout) if self.timeout else fn())
+            except Exception as e:
+                error = e
+                if isinstance(e, asyncio.TimeoutError):
+                    with self._lock:
+                        self._stats["timeouts"] += 1
+                    error = asyncio.TimeoutError(f"Timeout de {self.timeout}s no provedor {self.name}")
+                if attempt >= attempts or not is_retryable_error(error) or (retry_if and not retry_if()):
+                    if is_client_error(error):
+                        with self._lock:
+                            self._stats["client_errors"] += 1
+                        self.breaker.release()
+                    else:
+                        self.breaker.record_failure(error)
+                    raise error
+                if permit is not None:
+                    permit.release()  # a vaga não fica presa durante o backoff
+                delay = self.retry_policy.compute_delay(attempt, error)
+                with self._lock:
+                    self._stats["retries"] += 1
+                logger.warning(
+                    f"🔁 {self.name}: tentativa {attempt}/{attempts} falhou ({type(error).__name__}); "
+                    f"nova tentativa em {delay:.2f}s"
+                )
+                await self._sleep(delay)
+            else:
+                if permit is not None and usage is not None:
+                    permit.set_usage(usage(result))
+                self.breaker.record_success()
+                return result
+            finally:
+                if permit is not None:
+                    permit.release()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        return {**self.breaker.get_metrics(), **stats}
+
+
+_providers: Dict[str, ProviderResilience] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider_resilience(name: str) -> ProviderResilience:
+    """Retorna o ``ProviderResilience`` do provedor (único no processo)."""
+    if name not in _providers:
+        with _providers_lock:
+            if name not in _providers:
+                _providers[name] = ProviderResilience(name)
+    return _providers[name]
+
+
+def get_resilience_metrics() -> Dict[str, Dict[str, Any]]:
+    """Estado do circuito e contadores de cada provedor já utilizado."""
+    with _providers_lock:
+        providers = dict(_providers)
+    return {name: resilience.get_metrics() for name, resilience in sorted(providers.items())}
+
+
+def reset_provider_resilience() -> None:
+    """Descarta o estado de todos os provedores (útil para testes)."""
+    with _providers_lock:
+        _providers.clear()
@@ -0,0 +1,311 @@
+"""Cache local de respostas LLM, compartilhado por todo o processo.
+
+As mesmas perguntas analíticas ("qual a média de Amount?") chegam ao LLM
+repetidamente via ``LLMManager``, ``LangChainLLMManager``,
+``synthesize_response`` e ``RAGDataAgent``. Este cache devolve a resposta
+anterior sem chamar o provedor:
+
+- Camada exata: chave = hash de (provedor, modelo, parâmetros, system prompt
+  e prompt normalizados: minúsculas, espaços colapsados)
+- Camada semântica (opcional, ``LLM_CACHE_SEMANTIC_ENABLED``): embeddings da
+  pergunta do usuário; similaridade de cosseno >= ``semantic_threshold`` com
+  uma pergunta já respondida no mesmo escopo (provedor/modelo/parâmetros/
+  system prompt) devolve a resposta dela
+- TTL por entrada e limites de entradas/memória (despejo LRU)
+- Versão do dataset: as entradas guardam a geração do ``DatasetCache``
+  (incrementada a cada ingestão) e deixam de valer quando ela muda
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import numpy as np
+
+from src.settings import (
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_MAX_MB,
+    LLM_CACHE_SEMANTIC_ENABLED,
+    LLM_CACHE_SEMANTIC_THRESHOLD,
+    LLM_CACHE_TTL,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_EMBEDDING_MEMO_SIZE = 256
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    """Normalização usada nas chaves: NFKC, minúsculas e espaços colapsados."""
+    if not text:
+        return ""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().lower()
+
+
+def _digest(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _value_size(value: Any) -> int:
+    content = getattr(value, "content", value)
+    if isinstance(content, str):
+        return len(content.encode("utf-8")) + 256
+    return sys.getsizeof(content) + 256
+
+
+def _default_embed_fn() -> Callable[[str], Sequence[float]]:
+    from src.embeddings.generator import EmbeddingGenerator, EmbeddingProvider
+    generator = EmbeddingGenerator(provider=EmbeddingProvider.SENTENCE_TRANSFORMER)
+    return lambda text: generator.generate_embedding(text).embedding
+
+
+@dataclass
+class _Entry:
+    value: Any
+    version: Hashable
+    expires_at: float
+    size_bytes: int
+    scope: str
+    vector: Optional[np.ndarray] = None
+    hits: int = 0
+    created_at: float = field(default_factory=time.time)
+
+
+class LLMResponseCache:
+    """Cache de respostas LLM com camada exata e semântica.
+
+    Args:
+        ttl: Segundos de validade de cada resposta
+        max_entries: Número máximo de respostas
+        max_bytes: Orçamento de memória (tamanho aproximado das respostas)
+        semantic_enabled: Ativa a camada semântica
+        semantic_threshold: Similaridade mínima (cosseno) para reaproveitar uma resposta
+        embed_fn: Função texto -> embedding (padrão: sentence-transformers, carregado sob demanda)
+        version_provider: Versão atual dos dados (padrão: geração do ``DatasetCache``)
+    """
+
+    def __init__(self,
+                 ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024,
+                 semantic_enabled: bool = LLM_CACHE_SEMANTIC_ENABLED,
+                 semantic_threshold: float = LLM_CACHE_SEMANTIC_THRESHOLD,
+                 embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+                 version_provider: Optional[Callable[[], Hashable]] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.semantic_enabled = semantic_enabled
+        self.semantic_threshold = semantic_threshold
+        self._embed_fn = embed_fn
+        self._version_provider = version_provider or self._dataset_generation
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._scopes: Dict[str, Dict[str, np.ndarray]] = {}
+        self._embedding_memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._embed_lock = threading.Lock()
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0,
+                       "evictions": 0, "expired": 0, "stale": 0}
+
+    # ------------------------------------------------------------------
+    # Chaves, versão e embeddings
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _dataset_generation() -> Hashable:
+        from src.data.dataset_cache import get_dataset_cache
+        return get_dataset_cache().current_version(None, None)[0]
+
+    @staticmethod
+    def make_scope(provider: str, model: str, params: Optional[Dict[str, Any]],
+                   system_prompt: Optional[str] = None) -> str:
+        return _digest(provider, model, params or {}, normalize_prompt(system_prompt))
+
+    @classmethod
+    def make_key(cls, provider: str, model: str, params: Optional[Dict[str, Any]],
+                 prompt: str, system_prompt: Optional[str] = None) -> str:
+        return _digest(cls.make_scope(provider, model, params, system_prompt), normalize_prompt(prompt))
+
+    def _current_version(self) -> Hashable:
+        try:
+            return self._version_provider()
+        except Exception as e:
+            logger.warning(f"⚠️ Falha ao obter versão dos dados para o cache LLM: {e}")
+            return None
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        normalized = normalize_prompt(text)
+        with self._lock:
+            if normalized in self._embedding_memo:
+                self._embedding_memo.move_to_end(normalized)
+                return self._embedding_memo[normalized]
+        try:
+            with self._embed_lock:
+                if self._embed_fn is None:
+                    self._embed_fn = _default_embed_fn()
+            vector = np.asarray(self._embed_fn(normalized), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"⚠️ Camada semântica do cache LLM desativada: {e}")
+            self.semantic_enabled = False
+            return None
+        norm = float(np.linalg.norm(vector))
+        if not norm:
+            return None
+        vector = vector / norm
+        with self._lock:
+            self._embedding_memo[normalized] = vector
+            while len(self._embedding_memo) > _EMBEDDING_MEMO_SIZE:
+                self._embedding_memo.popitem(last=False)
+        return vector
+
+    # ------------------------------------------------------------------
+    # Consulta e armazenamento
+    # ------------------------------------------------------------------
+    def _valid_entry(self, key: str, version: Hashable, now: float) -> Optional[_Entry]:
+        """Entrada válida (TTL e versão) ou None; entradas inválidas são removidas. Requer o lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._stats["expired"] += 1
+        elif entry.version != version:
+            self._stats["stale"] += 1
+        else:
+            return entry
+        self._remove(key)
+        return None
+
+    def _hit(self, key: str, entry: _Entry, stat: str) -> Any:
+        entry.hits += 1
+        self._entries.move_to_end(key)
+        self._stats[stat] += 1
+        return entry.value
+
+    def get(self, provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str,
+            system_prompt: Optional[str] = None, query: Optional[str] = None) -> Optional[Any]:
+        """Resposta em cache para a chamada (camada exata, depois semântica com ``query``).
+
+        Args:
+            provider: Provedor (ex.: ``groq``)
+            model: Modelo efetivamente usado
+            params: Parâmetros de geração (temperatura, max_tokens...)
+            prompt: Prompt completo enviado ao modelo
+            system_prompt: Prompt de sistema
+            query: Pergunta do usuário (chave da camada semântica)
+
+        Returns:
+            Valor armazenado ou None (miss)
+        """
+        version = self._current_version()
+        key = self.make_key(provider, model, params, prompt, system_prompt)
+        scope = self.make_scope(provider, model, params, system_prompt)
+        with self._lock:
+            entry = self._valid_entry(key, version, time.time())
+            if entry is not None:
+                return self._hit(key, entry, "hits")
+            if not (self.semantic_enabled and query and self._scopes.get(scope)):
+                self._stats["misses"] += 1
+                return None
+
+        vector = self._embed(query)
+        with self._lock:
+            candidates = self._scopes.get(scope)
+            if vector is not None and candidates:
+                keys = list(candidates)
+                scores = np.stack([candidates[k] for k in keys]) @ vector
+                best = int(np.argmax(scores))
+                if float(scores[best]) >= self.semantic_threshold:
+                    entry = self._valid_entry(keys[best], version, time.time())
+                    if entry is not None:
+                        return self._hit(keys[best], entry, "semantic_hits")
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, provider: str, model: str, params: Optional[Dict[str, Any]], prompt: str, value: Any,
+            system_prompt: Optional[str] = None, query: Optional[str] = None) -> None:
+        """Armazena a resposta de uma chamada (``query`` indexa a camada semântica)."""
+        version = self._current_version()
+        key = self.make_key(provider, model, params, prompt, system_prompt)
+        scope = self.make_scope(provider, model, params, system_prompt)
+        vector = self._embed(query) if self.semantic_enabled and query else None
+        size = _value_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(value=value, version=version, expires_at=time.time() + self.ttl,
+                                        size_bytes=size, scope=scope, vector=vector)
+            self._total_bytes += size
+            if vector is not None:
+                self._scopes.setdefault(scope, {})[key] = vector
+            self._stats["stores"] += 1
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    async def aget(self, *args, **kwargs) -> Optional[Any]:
+        """``get`` sem bloquear o event loop (embedding da camada semântica em thread)."""
+        if self.semantic_enabled and kwargs.get("query"):
+            return await asyncio.to_thread(self.get, *args, **kwargs)
+        return self.get(*args, **kwargs)
+
+    async def aput(self, *args, **kwargs) -> None:
+        """``put`` sem bloquear o event loop."""
+        if self.semantic_enabled and kwargs.get("query"):
+            await asyncio.to_thread(self.put, *args, **kwargs)
+        else:
+            self.put(*args, **kwargs)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size_bytes
+        scope = self._scopes.get(entry.scope)
+        if scope is not None:
+            scope.pop(key, None)
+            if not scope:
+                del self._scopes[entry.scope]
+
+    def invalidate(self) -> None:
+        """Descarta todas as respostas."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self._total_bytes = 0
+        logger.info("🔄 Cache de respostas LLM invalidado")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "semantic_enabled": self.semantic_enabled,
+            }
+
+
+_llm_response_cache: Optional[LLMResponseCache] = None
+_llm_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """Retorna o cache de respostas LLM do processo (singleton)."""
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        with _llm_response_cache_lock:
+            if _llm_response_cache is None:
+                _llm_response_cache = LLMResponseCache()
+    return _llm_response_cache
@@ -0,0 +1,118 @@
+"""Streaming de tokens das chamadas LLM até a resposta HTTP.
+
+O pipeline de uma pergunta (orquestrador → handlers → agentes → LLM) não
+precisa mudar para transmitir tokens: ``stream_with_tokens`` executa a
+corrotina com um ``TokenSink`` no contexto (``contextvars``), e a primeira
+chamada LLM assíncrona que o reivindica (``claim_token_sink``) passa a
+consumir o provedor em modo streaming, repassando cada trecho ao sink
+conforme ele chega.
+
+- Apenas uma chamada por requisição transmite (a resposta final); chamadas
+  auxiliares posteriores (ex.: correção dos guardrails) rodam normalmente
+- Chamadas síncronas (``chat`` via ``run_sync``) não transmitem
+- O resultado final da corrotina é sempre entregue e é a resposta oficial
+  (pode incluir pós-processamento sobre os tokens transmitidos)
+- Com ``cancel_on_close=False`` a corrotina segue até o fim mesmo que o
+  cliente desconecte (ex.: para persistir a conversa na memória)
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Set, Tuple
+
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_token_sink: contextvars.ContextVar[Optional["TokenSink"]] = contextvars.ContextVar("llm_token_sink", default=None)
+
+
+class TokenSink:
+    """Fila de trechos de texto produzidos pela chamada LLM que transmite a resposta."""
+
+    def __init__(self):
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self.emitted = 0
+        self._claimed = False
+        self._loop = asyncio.get_running_loop()
+        self._lock = threading.Lock()
+
+    def claim(self) -> bool:
+        """Reserva o sink para a chamada atual (somente a primeira consegue)."""
+        with self._lock:
+            if self._claimed:
+                return False
+            self._claimed = True
+            return True
+
+    def emit(self, text: str) -> None:
+        if not text:
+            return
+        self.emitted += 1
+        try:
+            same_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            same_loop = False
+        if same_loop:
+            self.queue.put_nowait(text)
+        else:
+            # Chamada LLM em outra thread (ex.: ``asyncio.to_thread`` herda o contexto)
+            self._loop.call_soon_threadsafe(self.queue.put_nowait, text)
+
+
+def claim_token_sink() -> Optional[TokenSink]:
+    """Sink da requisição em streaming, se houver e ainda não tiver sido reivindicado."""
+    sink = _token_sink.get()
+    return sink if sink is not None and sink.claim() else None
+
+
+# Corrotinas que seguem rodando após o consumidor desistir (referência forte até terminarem)
+_detached_tasks: Set["asyncio.Future[Any]"] = set()
+
+
+def _detached_done(task: "asyncio.Future[Any]") -> None:
+    _detached_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"❌ Falha no processamento após desconexão do cliente: {task.exception()}")
+
+
+async def stream_with_tokens(coro_factory: Callable[[], Awaitable[Any]],
+                             cancel_on_close: bool = True) -> AsyncIterator[Tuple[str, Any]]:
+    """Executa ``coro_factory()`` transmitindo os tokens produzidos pelas chamadas LLM.
+
+    Args:
+        coro_factory: Fábrica da corrotina (executada como task com o sink no contexto)
+        cancel_on_close: Cancela a corrotina se o consumidor encerrar o iterador
+            antes do fim (cliente desconectado); com False ela termina em segundo plano
+
+    Yields:
+        ``("token", texto)`` a cada trecho recebido do provedor e, por último,
+        ``("result", resultado da corrotina)``. Exceções da corrotina são propagadas.
+    """
+    sink = TokenSink()
+    reset_token = _token_sink.set(sink)
+    try:
+        task = asyncio.ensure_future(coro_factory())  # a task herda o contexto com o sink
+    finally:
+        _token_sink.reset(reset_token)
+
+    try:
+        while not task.done():
+            getter = asyncio.ensure_future(sink.queue.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield "token", getter.result()
+            else:
+                getter.cancel()
+        while not sink.queue.empty():
+            yield "token", sink.queue.get_nowait()
+        yield "result", task.result()
+    finally:
+        if not task.done():
+            if cancel_on_close:
+                task.cancel()
+            else:
+                _detached_tasks.add(task)
+                task.add_done_callback(_detached_done)
@@ -0,0 +1,134 @@
+"""Compilação de templates de prompt com prefixo estático estável.
+
+``str.format`` refaz o parse do template inteiro a cada chamada. Aqui o parse
+(``string.Formatter``) é feito uma única vez por template e o resultado
+separa:
+
+- ``static_prefix``: texto literal antes do primeiro placeholder, idêntico em
+  todas as chamadas; a contagem de tokens é calculada uma vez e reaproveitada
+- parte dinâmica: sequência de (literal, campo); por chamada só os campos são
+  formatados, os literais já estão prontos
+
+Provedores com cache de prefixo (OpenAI, Groq, Gemini) só reaproveitam o
+processamento quando os primeiros tokens da requisição são idênticos. Por isso
+o conteúdo estável (instruções, personalidade) deve ir no system prompt, antes
+de qualquer valor dinâmico, e dados/consulta vão no fim, na mensagem do
+usuário (``split``).
+"""
+from __future__ import annotations
+
+import string
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Mapping, Optional, Tuple
+
+from src.llm.prompt_budget import get_token_counter
+
+_formatter = string.Formatter()
+
+
+@dataclass(frozen=True)
+class _Field:
+    literal: str
+    name: str
+    conversion: Optional[str]
+    format_spec: str
+    nested_spec: bool
+
+
+class CompiledTemplate:
+    """Template analisado uma vez; renderiza apenas os campos dinâmicos.
+
+    Args:
+        content: Texto no formato de ``str.format`` (somente placeholders nomeados)
+
+    Raises:
+        ValueError: Template malformado ou com placeholders posicionais
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        try:
+            parsed = list(_formatter.parse(content))
+        except ValueError as e:
+            raise ValueError(f"Template de prompt inválido: {e}") from e
+
+        literals, fields = [], []
+        for literal, name, format_spec, conversion in parsed:
+            if name is None:
+                literals.append(literal)
+                continue
+            if not name or name[0].isdigit():
+                raise ValueError(f"Placeholder posicional '{{{name}}}' não suportado; use nomes")
+            fields.append(_Field("".join(literals) + literal, name, conversion,
+                                 format_spec or "", "{" in (format_spec or "")))
+            literals = []
+
+        self._fields: Tuple[_Field, ...] = tuple(fields)
+        self._tail = "".join(literals)
+        # Sem campos: o template inteiro é estático
+        self.static_prefix = fields[0].literal if fields else self._tail
+        names = []
+        for field in fields:
+            names.append(field.name)
+            if field.nested_spec:
+                names.extend(name for _, name, _, _ in _formatter.parse(field.format_spec) if name)
+        self.variables: Tuple[str, ...] = tuple(dict.fromkeys(_root_name(name) for name in names))
+        self._static_tokens: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_static(self) -> bool:
+        return not self._fields
+
+    @property
+    def static_tokens(self) -> int:
+        """Tokens do prefixo estático (contados uma vez)."""
+        if self._static_tokens is None:
+            with self._lock:
+                if self._static_tokens is None:
+                    self._static_tokens = get_token_counter().count(self.static_prefix)
+        return self._static_tokens
+
+    def render_dynamic(self, variables: Mapping[str, Any]) -> str:
+        """Renderiza tudo depois do prefixo estático.
+
+        Raises:
+            KeyError: Variável ausente (mesmo comportamento de ``str.format``)
+        """
+        if not self._fields:
+            return ""
+        parts = []
+        for i, field in enumerate(self._fields):
+            if i:
+                parts.append(field.literal)
+            value, _ = _formatter.get_field(field.name, (), variables)
+            value = _formatter.convert_field(value, field.conversion)
+            spec = _formatter.vformat(field.format_spec, (), variables) if field.nested_spec else field.format_spec
+            parts.append(format(value, spec))
+        parts.append(self._tail)
+        return "".join(parts)
+
+    def render(self, variables: Optional[Mapping[str, Any]] = None) -> str:
+        """Equivalente a ``content.format(**variables)``."""
+        if not self._fields:
+            return self.static_prefix
+        return self.static_prefix + self.render_dynamic(variables or {})
+
+    def split(self, variables: Optional[Mapping[str, Any]] = None) -> Tuple[str, str]:
+        """Retorna ``(prefixo estático, parte dinâmica renderizada)``."""
+        return self.static_prefix, self.render_dynamic(variables or {})
+
+
+def _root_name(field_name: str) -> str:
+    for i, char in enumerate(field_name):
+        if char in ".[":
+            return field_name[:i]
+    return field_name
+
+
+@lru_cache(maxsize=256)
+def compile_template(content: str) -> CompiledTemplate:
+    """Compila ``content`` (resultado reaproveitado para o mesmo texto)."""
+    return CompiledTemplate(content)
@@ -5,12 +5,17 @@ Este módulo fornece:
 - Contextos específicos para diferentes domínios
 - Templates reutilizáveis para construção de prompts
 - Configurações de personalidade e comportamento dos agentes
+- Templates compilados uma vez (``src.prompts.compiler``): por chamada só as
+  variáveis são renderizadas, e o prefixo estático fica separado para o cache
+  de prefixo dos provedores
 """
 from __future__ import annotations
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 from dataclasses import dataclass
 
+from src.prompts.compiler import CompiledTemplate, compile_template
+
 
 class AgentRole(Enum):
     """Papéis/funções dos agentes no sistema."""
@@ -44,6 +49,11 @@ class PromptManager:
     
     def __init__(self):
         self.prompts = self._initialize_prompts()
+        self._compiled: Dict[Tuple[str, str], CompiledTemplate] = {
+            (role_key, prompt_key): compile_template(template.content)
+            for role_key, templates in self.prompts.items()
+            for prompt_key, template in templates.items()
+        }
     
     def _initialize_prompts(self) -> Dict[str, Dict[str, PromptTemplate]]:
         """Inicializa todos os prompts do sistema."""
@@ -256,16 +266,15 @@ Similaridade média: {avg_similarity:.3f}
         
         return prompts
     
-    def get_prompt(self, agent_role: AgentRole, prompt_key: str, **variables) -> str:
-        """Recupera um prompt formatado para um agente específico.
+    def get_compiled(self, agent_role: AgentRole, prompt_key: str) -> CompiledTemplate:
+        """Recupera o template compilado de um prompt.
         
         Args:
             agent_role: Papel do agente
             prompt_key: Chave do prompt específico
-            **variables: Variáveis para substituição no template
             
         Returns:
-            Prompt formatado pronto para uso
+            Template compilado (parse feito uma única vez)
         """
         role_key = agent_role.value
         
@@ -275,10 +284,49 @@ Similaridade média: {avg_similarity:.3f}
         if prompt_key not in self.prompts[role_key]:
             raise ValueError(f"Prompt '{prompt_key}' não encontrado para agente '{role_key}'")
         
-        template = self.prompts[role_key][prompt_key]
+        compiled = self._compiled.get((role_key, prompt_key))
+        if compiled is None:
+            compiled = self._compiled[(role_key, prompt_key)] = compile_template(self.prompts[role_key][prompt_key].content)
+        return compiled
+    
+    def get_prompt(self, agent_role: AgentRole, prompt_key: str, **variables) -> str:
+        """Recupera um prompt formatado para um agente específico.
+        
+        Args:
+            agent_role: Papel do agente
+            prompt_key: Chave do prompt específico
+            **variables: Variáveis para substituição no template
+            
+        Returns:
+            Prompt formatado pronto para uso
+        """
+        compiled = self.get_compiled(agent_role, prompt_key)
+        
+        try:
+            return compiled.render(variables)
+        except KeyError as e:
+            missing_var = str(e).strip("'")
+            raise ValueError(f"Variável '{missing_var}' necessária para prompt '{prompt_key}' não fornecida")
+    
+    def get_prompt_parts(self, agent_role: AgentRole, prompt_key: str, **variables) -> Tuple[str, str]:
+        """Recupera um prompt dividido em prefixo estático e parte dinâmica.
+        
+        O prefixo é idêntico em todas as chamadas: envie-o no início da
+        requisição (system prompt) para aproveitar o cache de prefixo do
+        provedor, e a parte dinâmica no fim (mensagem do usuário).
+        
+        Args:
+            agent_role: Papel do agente
+            prompt_key: Chave do prompt específico
+            **variables: Variáveis para substituição no template
+            
+        Returns:
+            Tupla (prefixo estático, parte dinâmica)
+        """
+        compiled = self.get_compiled(agent_role, prompt_key)
         
         try:
-            return template.content.format(**variables)
+            return compiled.split(variables)
         except KeyError as e:
             missing_var = str(e).strip("'")
             raise ValueError(f"Variável '{missing_var}' necessária para prompt '{prompt_key}' não fornecida")
@@ -332,6 +380,7 @@ Similaridade média: {avg_similarity:.3f}
             content=content,
             variables=variables or []
         )
+        self._compiled[(role_key, prompt_key)] = compile_template(content)
 
 
 # Singleton instance
@@ -0,0 +1,600 @@
+"""Fila de jobs de ingestão executada dentro do processo da API.
+
+Substitui o disparo de ``run_auto_ingest.py --once`` via ``subprocess`` a cada
+upload. Cada upload vira um job que é:
+
+1. Deduplicado pelo hash SHA-256 do conteúdo (arquivos idênticos reaproveitam
+   o job já enfileirado/em execução/concluído)
+2. Persistido em SQLite (estado, progresso, erro, timestamps)
+3. Executado por um pool limitado de workers (``INGEST_JOB_MAX_WORKERS``)
+   que reutiliza os componentes já carregados no processo (ingestor,
+   gerenciador de arquivos, modelos de embeddings)
+4. Consultável (status/progresso) e cancelável
+
+Uso:
+    from src.services.ingest_job_queue import get_ingest_job_queue
+
+    queue = get_ingest_job_queue()
+    job, deduplicated = queue.submit(content_bytes, "dados.csv")
+    queue.get_job(job.job_id)
+    queue.cancel(job.job_id)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import queue
+import re
+import sqlite3
+import threading
+import uuid
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from src.data.dataset_cache import get_dataset_cache
+from src.settings import (
+    EDA_DATA_DIR_PROCESSANDO,
+    INGEST_JOB_DB_PATH,
+    INGEST_JOB_MAX_WORKERS,
+    INGEST_JOB_MAX_QUEUE,
+)
+
+logger = logging.getLogger("eda.ingest_job_queue")
+
+
+# Estados possíveis de um job
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+FINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED)
+
+
+class IngestJobQueueError(Exception):
+    """Exceção base para erros da fila de jobs de ingestão."""
+    pass
+
+
+class IngestQueueFullError(IngestJobQueueError):
+    """Fila atingiu o limite de jobs pendentes."""
+    pass
+
+
+class IngestJobCancelled(IngestJobQueueError):
+    """Sinaliza que o job foi cancelado durante a execução."""
+    pass
+
+
+@dataclass
+class IngestJob:
+    """Estado de um job de ingestão."""
+    job_id: str
+    filename: str
+    file_hash: str
+    file_path: str
+    status: str = STATUS_QUEUED
+    progress: float = 0.0
+    stage: str = "enfileirado"
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    cancel_requested: bool = False
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class IngestJobContext:
+    """Contexto entregue ao executor de ingestão.
+
+    Permite reportar progresso e verificar pedidos de cancelamento entre
+    as etapas do processamento.
+    """
+
+    def __init__(self, job_queue: "IngestJobQueue", job_id: str, cancel_event: threading.Event):
+        self._queue = job_queue
+        self.job_id = job_id
+        self._cancel_event = cancel_event
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def report(self, progress: float, stage: str) -> None:
+        """Atualiza progresso (0.0 a 1.0) e etapa atual do job."""
+        self._queue._update(self.job_id, progress=max(0.0, min(1.0, progress)), stage=stage)
+
+    def check_cancelled(self) -> None:
+        """Levanta IngestJobCancelled se o cancelamento foi solicitado."""
+        if self.cancelled:
+            raise IngestJobCancelled(f"Job {self.job_id} cancelado")
+
+
+# Assinatura do executor: recebe caminho do arquivo e contexto, retorna resultado serializável
+IngestRunner = Callable[[Path, IngestJobContext], Optional[Dict[str, Any]]]
+
+
+_shared_components: Dict[str, Any] = {}
+_shared_components_lock = threading.Lock()
+
+
+def _get_shared_component(name: str, factory: Callable[[], Any]) -> Any:
+    """Cria sob demanda (uma única vez por processo) componentes pesados."""
+    with _shared_components_lock:
+        if name not in _shared_components:
+            _shared_components[name] = factory()
+        return _shared_components[name]
+
+
+def _refresh_dataset_profile() -> None:
+    """Pré-calcula o perfil da nova versão do dataset.
+
+    Falhas não abortam o job.
+    """
+    try:
+        from src.tools.python_analyzer import PythonDataAnalyzer
+
+        get_dataset_cache().invalidate()
+        analyzer = PythonDataAnalyzer(caller_agent="ingestion_agent")
+        analyzer.get_dataset_profile(refresh=True)
+    except Exception as e:
+        logger.warning(f"⚠️ Perfil do dataset não calculado após a ingestão: {e}")
+
+
+def default_ingest_runner(file_path: Path, ctx: IngestJobContext) -> Dict[str, Any]:
+    """Executor padrão: mesmo fluxo de ``run_auto_ingest.py --once`` sem subprocess.
+
+    Arquiva o último arquivo processado, executa a ingestão com o
+    ``DataIngestor`` compartilhado, pré-calcula o perfil do dataset e move o
+    arquivo para ``processado/``.
+    Os componentes são instanciados uma única vez e reutilizados pelos jobs.
+    """
+    from src.data.csv_file_manager import create_csv_file_manager
+    from src.agent.data_ingestor import DataIngestor
+
+    file_manager = _get_shared_component("file_manager", create_csv_file_manager)
+    data_ingestor = _get_shared_component("data_ingestor", DataIngestor)
+
+    ctx.check_cancelled()
+    ctx.report(0.05, "validando arquivo")
+    if not file_manager.validate_csv(file_path):
+        raise IngestJobQueueError(f"CSV inválido: {file_path.name}")
+
+    ctx.report(0.1, "arquivando último processado")
+    file_manager.archive_last_processed_file()
+
+    ctx.check_cancelled()
+    ctx.report(0.2, "ingestão no Supabase")
+    data_ingestor.ingest_csv(str(file_path))
+
+    # A partir daqui a base já foi alterada: o job segue até o fim
+    ctx.report(0.8, "calculando perfil do dataset")
+    _refresh_dataset_profile()
+
+    ctx.report(0.9, "movendo para processado")
+    processed_path = file_manager.move_to_processed(file_path)
+
+    return {"processed_path": str(processed_path)}
+
+
+class IngestJobQueue:
+    """Fila de ingestão com pool limitado de workers e estado em SQLite."""
+
+    def __init__(
+        self,
+        runner: Optional[IngestRunner] = None,
+        db_path: Optional[Path] = None,
+        storage_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        autostart: bool = True,
+    ):
+        """Inicializa a fila.
+
+        Args:
+            runner: Função que executa a ingestão de um arquivo
+            db_path: Caminho do banco SQLite de jobs
+            storage_dir: Diretório onde os uploads aguardam processamento
+            max_workers: Número de workers simultâneos
+            max_queue: Limite de jobs pendentes
+            autostart: Inicia os workers imediatamente
+        """
+        self.runner = runner or default_ingest_runner
+        self.db_path = Path(db_path or INGEST_JOB_DB_PATH)
+        self.storage_dir = Path(storage_dir or EDA_DATA_DIR_PROCESSANDO)
+        self.max_workers = max(1, max_workers or INGEST_JOB_MAX_WORKERS)
+        self.max_queue = max(1, max_queue or INGEST_JOB_MAX_QUEUE)
+
+        self._lock = threading.RLock()
+        self._pending: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._workers: List[threading.Thread] = []
+        self._stopping = False
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_db()
+        self._recover_jobs()
+
+        logger.info("Ingest Job Queue inicializada")
+        logger.info(f"  DB: {self.db_path}")
+        logger.info(f"  Workers: {self.max_workers} | Limite da fila: {self.max_queue}")
+
+        if autostart:
+            self.start()
+
+    # ------------------------------------------------------------------
+    # Persistência
+    # ------------------------------------------------------------------
+    def _init_db(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ingest_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    stage TEXT,
+                    error TEXT,
+                    result TEXT,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ingest_jobs_hash ON ingest_jobs(file_hash)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs(status)")
+            self._conn.commit()
+
+    def _row_to_job(self, row: sqlite3.Row) -> IngestJob:
+        return IngestJob(
+            job_id=row["job_id"],
+            filename=row["filename"],
+            file_hash=row["file_hash"],
+            file_path=row["file_path"],
+            status=row["status"],
+            progress=row["progress"],
+            stage=row["stage"],
+            error=row["error"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            cancel_requested=bool(row["cancel_requested"]),
+            created_at=row["created_at"],
+            started_at=row["started_at"],
+            finished_at=row["finished_at"],
+        )
+
+    def _insert(self, job: IngestJob) -> None:
+        data = job.to_dict()
+        data["result"] = json.dumps(job.result) if job.result is not None else None
+        data["cancel_requested"] = int(job.cancel_requested)
+        columns = ", ".join(data.keys())
+        placeholders = ", ".join("?" for _ in data)
+        with self._lock:
+            self._conn.execute(f"INSERT INTO ingest_jobs ({columns}) VALUES ({placeholders})", tuple(data.values()))
+            self._conn.commit()
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        if "cancel_requested" in fields:
+            fields["cancel_requested"] = int(fields["cancel_requested"])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE ingest_jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id),
+            )
+            self._conn.commit()
+
+    def _recover_jobs(self) -> None:
+        """Recupera jobs após reinício: reenfileira pendentes e falha os interrompidos."""
+        with self._lock:
+            interrupted = self._conn.execute(
+                "SELECT job_id, file_path FROM ingest_jobs WHERE status = ?", (STATUS_RUNNING,)
+            ).fetchall()
+            for row in interrupted:
+                self._update(
+                    row["job_id"],
+                    status=STATUS_FAILED,
+                    error="Job interrompido por reinício do serviço",
+                    finished_at=datetime.now().isoformat(),
+                )
+                self._discard_file(row["file_path"])
+            queued = self._conn.execute(
+                "SELECT * FROM ingest_jobs WHERE status = ? ORDER BY created_at", (STATUS_QUEUED,)
+            ).fetchall()
+
+        for row in queued:
+            job = self._row_to_job(row)
+            if Path(job.file_path).exists():
+                self._enqueue(job.job_id)
+            else:
+                self._update(
+                    job.job_id,
+                    status=STATUS_FAILED,
+                    error="Arquivo do upload não encontrado após reinício",
+                    finished_at=datetime.now().isoformat(),
+                )
+
+        if interrupted or queued:
+            logger.info(f"♻️ Jobs recuperados: {len(queued)} reenfileirados, {len(interrupted)} interrompidos")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def submit(self, content: bytes, filename: str) -> Tuple[IngestJob, bool]:
+        """Enfileira um upload para ingestão.
+
+        Args:
+            content: Conteúdo bruto do arquivo
+            filename: Nome original do arquivo
+
+        Returns:
+            Tupla (job, deduplicated). ``deduplicated`` é True quando um job
+            existente para o mesmo conteúdo foi reaproveitado.
+
+        Raises:
+            IngestQueueFullError: Se a fila atingiu o limite de pendentes
+        """
+        file_hash = hashlib.sha256(content).hexdigest()
+
+        with self._lock:
+            existing = self.find_by_hash(file_hash)
+            if existing:
+                logger.info(f"🔁 Upload duplicado ({filename}) reaproveitando job {existing.job_id} [{existing.status}]")
+                return existing, True
+
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM ingest_jobs WHERE status = ?", (STATUS_QUEUED,)
+            ).fetchone()[0]
+            if pending >= self.max_queue:
+                raise IngestQueueFullError(f"Fila de ingestão cheia ({pending} jobs pendentes)")
+
+            job_id = uuid.uuid4().hex
+            safe_name = re.sub(r"[^\w.-]", "_", Path(filename).name) or "upload.csv"
+            file_path = self.storage_dir / f"{job_id[:12]}_{safe_name}"
+            file_path.write_bytes(content)
+
+            job = IngestJob(
+                job_id=job_id,
+                filename=filename,
+                file_hash=file_hash,
+                file_path=str(file_path),
+            )
+            self._insert(job)
+
+        self._enqueue(job_id)
+        logger.info(f"📥 Job {job_id} enfileirado: {filename}")
+        return job, False
+
+    def find_by_hash(self, file_hash: str) -> Optional[IngestJob]:
+        """Retorna o job reaproveitável para o hash informado.
+
+        Considera jobs enfileirados/em execução e o último job concluído (cujo
+        conteúdo é o que está na base). Um arquivo antigo reenviado depois de
+        outro dataset ter sido ingerido gera um novo job.
+        """
+        placeholders = ", ".join("?" for _ in ACTIVE_STATUSES)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT * FROM ingest_jobs WHERE file_hash = ? AND status IN ({placeholders}) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (file_hash, *ACTIVE_STATUSES),
+            ).fetchone()
+            if row is None:
+                latest = self._conn.execute(
+                    "SELECT * FROM ingest_jobs WHERE status = ? ORDER BY finished_at DESC LIMIT 1",
+                    (STATUS_COMPLETED,),
+                ).fetchone()
+                if latest is not None and latest["file_hash"] == file_hash:
+                    row = latest
+        return self._row_to_job(row) if row else None
+
+    def get_job(self, job_id: str) -> Optional[IngestJob]:
+        """Retorna o estado atual de um job."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM ingest_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[IngestJob]:
+        """Lista jobs (mais recentes primeiro), opcionalmente filtrando por status."""
+        with self._lock:
+            if status:
+                rows = self._conn.execute(
+                    "SELECT * FROM ingest_jobs WHERE status = ? ORDER BY created_at DESC LIMIT ?",
+                    (status, limit),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT * FROM ingest_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[IngestJob]:
+        """Cancela um job.
+
+        Jobs enfileirados são cancelados imediatamente. Jobs em execução são
+        marcados para cancelamento e interrompidos na próxima verificação do
+        executor (a etapa em andamento não é abortada).
+
+        Returns:
+            Estado atualizado do job ou None se não existir
+        """
+        with self._lock:
+            job = self.get_job(job_id)
+            if job is None:
+                return None
+            if job.status == STATUS_QUEUED:
+                self._update(
+                    job_id,
+                    status=STATUS_CANCELLED,
+                    stage="cancelado",
+                    cancel_requested=True,
+                    finished_at=datetime.now().isoformat(),
+                )
+                self._discard_file(job.file_path)
+                logger.info(f"🛑 Job {job_id} cancelado antes de iniciar")
+            elif job.status == STATUS_RUNNING:
+                self._update(job_id, cancel_requested=True)
+                event = self._cancel_events.get(job_id)
+                if event:
+                    event.set()
+                logger.info(f"🛑 Cancelamento solicitado para job em execução {job_id}")
+            return self.get_job(job_id)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Resumo da fila (contagem por status e configuração)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS total FROM ingest_jobs GROUP BY status"
+            ).fetchall()
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "workers_alive": sum(1 for w in self._workers if w.is_alive()),
+            "jobs": {row["status"]: row["total"] for row in rows},
+        }
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """Inicia os workers (idempotente)."""
+        with self._lock:
+            if self._workers:
+                return
+            self._stopping = False
+            for index in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"ingest-worker-{index}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """Encerra os workers após concluírem o job atual."""
+        with self._lock:
+            self._stopping = True
+            workers = list(self._workers)
+            self._workers = []
+        for _ in workers:
+            self._pending.put(None)
+        if wait:
+            for worker in workers:
+                worker.join(timeout)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Aguarda até não haver jobs pendentes ou em execução (útil em testes)."""
+        deadline = None if timeout is None else datetime.now().timestamp() + timeout
+        while True:
+            counts = self.get_status()["jobs"]
+            if not any(counts.get(status) for status in ACTIVE_STATUSES):
+                return True
+            if deadline is not None and datetime.now().timestamp() >= deadline:
+                return False
+            threading.Event().wait(0.02)
+
+    def _enqueue(self, job_id: str) -> None:
+        self._pending.put(job_id)
+
+    def _worker_loop(self) -> None:
+        while True:
+            job_id = self._pending.get()
+            if job_id is None:
+                return
+            try:
+                self._run_job(job_id)
+            except Exception as e:  # proteção do worker
+                logger.error(f"❌ Erro inesperado no worker ao processar job {job_id}: {e}")
+
+    def _run_job(self, job_id: str) -> None:
+        with self._lock:
+            job = self.get_job(job_id)
+            if job is None or job.status != STATUS_QUEUED:
+                return
+            cancel_event = threading.Event()
+            self._cancel_events[job_id] = cancel_event
+            self._update(
+                job_id,
+                status=STATUS_RUNNING,
+                stage="iniciando",
+                started_at=datetime.now().isoformat(),
+            )
+
+        logger.info(f"🚀 Iniciando job {job_id}: {job.filename}")
+        ctx = IngestJobContext(self, job_id, cancel_event)
+        try:
+            try:
+                result = self.runner(Path(job.file_path), ctx)
+            finally:
+                # A ingestão altera a tabela embeddings mesmo quando falha no meio
+                get_dataset_cache().invalidate()
+            self._update(
+                job_id,
+                status=STATUS_COMPLETED,
+                progress=1.0,
+                stage="concluído",
+                result=result,
+                finished_at=datetime.now().isoformat(),
+            )
+            logger.info(f"✅ Job {job_id} concluído")
+        except IngestJobCancelled:
+            self._update(
+                job_id,
+                status=STATUS_CANCELLED,
+                stage="cancelado",
+                finished_at=datetime.now().isoformat(),
+            )
+            self._discard_file(job.file_path)
+            logger.info(f"🛑 Job {job_id} cancelado durante a execução")
+        except Exception as e:
+            self._update(
+                job_id,
+                status=STATUS_FAILED,
+                stage="falhou",
+                error=str(e),
+                finished_at=datetime.now().isoformat(),
+            )
+            # Um novo envio do mesmo arquivo gera outro job (e outra cópia)
+            self._discard_file(job.file_path)
+            logger.error(f"❌ Job {job_id} falhou: {e}")
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+
+    @staticmethod
+    def _discard_file(file_path: str) -> None:
+        try:
+            Path(file_path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"⚠️ Não foi possível remover {file_path}: {e}")
+
+
+_ingest_job_queue: Optional[IngestJobQueue] = None
+_ingest_job_queue_lock = threading.Lock()
+
+
+def get_ingest_job_queue() -> IngestJobQueue:
+    """Retorna a instância singleton da fila de ingestão do processo."""
+    global _ingest_job_queue
+    with _ingest_job_queue_lock:
+        if _ingest_job_queue is None:
+            _ingest_job_queue = IngestJobQueue()
+        return _ingest_job_queue
@@ -86,6 +86,24 @@ GOOGLE_DRIVE_POST_PROCESS_ACTION: str = os.getenv("GOOGLE_DRIVE_POST_PROCESS_ACT
 AUTO_INGEST_POLLING_INTERVAL: int = int(os.getenv("AUTO_INGEST_POLLING_INTERVAL", "300"))
 AUTO_INGEST_FILE_PATTERN: str = os.getenv("AUTO_INGEST_FILE_PATTERN", r".*\.csv$")
 
+# Fila de jobs de ingestão (uploads via API processados no mesmo processo)
+# INGEST_JOB_DB_PATH: arquivo SQLite com o estado persistente dos jobs
+# INGEST_JOB_MAX_WORKERS: número máximo de ingestões simultâneas
+# INGEST_JOB_MAX_QUEUE: limite de jobs pendentes (novos uploads são recusados acima disso)
+# INGEST_JOB_RETRY_AFTER: segundos sugeridos no Retry-After quando a fila está cheia
+INGEST_JOB_DB_PATH: Path = Path(os.getenv("INGEST_JOB_DB_PATH", "data/ingest_jobs.sqlite3"))
+INGEST_JOB_MAX_WORKERS: int = int(os.getenv("INGEST_JOB_MAX_WORKERS", "1"))
+INGEST_JOB_MAX_QUEUE: int = int(os.getenv("INGEST_JOB_MAX_QUEUE", "50"))
+INGEST_JOB_RETRY_AFTER: int = int(os.getenv("INGEST_JOB_RETRY_AFTER", "30"))
+
+# Pipeline de ingestão em estágios (enriquecimento → embeddings → armazenamento)
+# Cada estágio roda com seus próprios workers ligados por filas limitadas
+INGEST_PIPELINE_BATCH_SIZE: int = int(os.getenv("INGEST_PIPELINE_BATCH_SIZE", "50"))
+INGEST_PIPELINE_QUEUE_SIZE: int = int(os.getenv("INGEST_PIPELINE_QUEUE_SIZE", "4"))
+INGEST_PIPELINE_ENRICH_WORKERS: int = int(os.getenv("INGEST_PIPELINE_ENRICH_WORKERS", "1"))
+INGEST_PIPELINE_EMBED_WORKERS: int = int(os.getenv("INGEST_PIPELINE_EMBED_WORKERS", "2"))
+INGEST_PIPELINE_STORE_WORKERS: int = int(os.getenv("INGEST_PIPELINE_STORE_WORKERS", "2"))
+
 # ========================================================================
 # CONFIGURAÇÕES DE BANCO (Postgres/Supabase)
 # ========================================================================
@@ -97,6 +115,157 @@ DB_NAME: str | None = os.getenv("DB_NAME")
 DB_USER: str | None = os.getenv("DB_USER")
 DB_PASSWORD: str | None = os.getenv("DB_PASSWORD")
 
+# Leitura da tabela embeddings (reconstrução de dados)
+# EMBEDDINGS_READ_PAGE_SIZE: registros por página (não exceder o max-rows do PostgREST)
+# EMBEDDINGS_READ_MAX_WORKERS: páginas buscadas em paralelo
+# EMBEDDINGS_READ_PARTITIONS: partições do espaço de ids percorridas por keyset
+EMBEDDINGS_READ_PAGE_SIZE: int = int(os.getenv("EMBEDDINGS_READ_PAGE_SIZE", "1000"))
+EMBEDDINGS_READ_MAX_WORKERS: int = int(os.getenv("EMBEDDINGS_READ_MAX_WORKERS", "4"))
+EMBEDDINGS_READ_PARTITIONS: int = int(os.getenv("EMBEDDINGS_READ_PARTITIONS", "16"))
+
+# Cache de datasets reconstruídos (compartilhado pelos agentes de análise)
+# DATASET_CACHE_MAX_MB: orçamento de memória (despejo LRU acima disso)
+# DATASET_CACHE_VERSION_TTL: segundos entre consultas da versão do dataset no banco
+DATASET_CACHE_ENABLED: bool = os.getenv("DATASET_CACHE_ENABLED", "true").lower() == "true"
+DATASET_CACHE_MAX_MB: int = int(os.getenv("DATASET_CACHE_MAX_MB", "512"))
+DATASET_CACHE_VERSION_TTL: float = float(os.getenv("DATASET_CACHE_VERSION_TTL", "30"))
+
+# Perfil pré-calculado dos datasets (estatísticas exatas por fonte/versão)
+DATASET_PROFILE_DB_PATH: Path = Path(os.getenv("DATASET_PROFILE_DB_PATH", "data/dataset_profiles.sqlite3"))
+DATASET_PROFILE_HISTOGRAM_BINS: int = int(os.getenv("DATASET_PROFILE_HISTOGRAM_BINS", "30"))
+
+# Modo de análise aproximada (amostras estratificadas + intervalos de confiança)
+# APPROX_ANALYTICS_DEFAULT: usa o modo aproximado quando o contexto não especifica
+# APPROX_SAMPLE_SIZES: tamanhos das amostras aninhadas (escalonamento crescente)
+# APPROX_MAX_REL_ERROR: meia-largura máxima do IC relativa ao valor estimado
+APPROX_ANALYTICS_DEFAULT: bool = os.getenv("APPROX_ANALYTICS_DEFAULT", "false").lower() == "true"
+APPROX_SAMPLE_SIZES: tuple[int, ...] = tuple(
+    int(size) for size in os.getenv("APPROX_SAMPLE_SIZES", "2000,20000,100000").split(",") if size.strip()
+)
+APPROX_CONFIDENCE: float = float(os.getenv("APPROX_CONFIDENCE", "0.95"))
+APPROX_MAX_REL_ERROR: float = float(os.getenv("APPROX_MAX_REL_ERROR", "0.05"))
+
+# Clustering (MiniBatchKMeans com escolha automática de k)
+# CLUSTERING_SAMPLE_SIZE: linhas usadas na escolha de k e na inicialização dos centróides
+# CLUSTERING_BATCH_SIZE: tamanho dos mini-batches do refinamento
+# CLUSTERING_K_RANGE: valores de k avaliados quando o número de clusters não é informado
+# CLUSTERING_CACHE_ENTRIES: resultados mantidos em cache (por fonte/versão/parâmetros)
+# CLUSTERING_TRACE_MEMORY: mede o pico de memória com tracemalloc (custoso e global ao
+#   processo; apenas para benchmarks/testes). Desligado, reporta só a variação do RSS
+CLUSTERING_SAMPLE_SIZE: int = int(os.getenv("CLUSTERING_SAMPLE_SIZE", "20000"))
+CLUSTERING_BATCH_SIZE: int = int(os.getenv("CLUSTERING_BATCH_SIZE", "4096"))
+CLUSTERING_K_RANGE: tuple[int, ...] = tuple(
+    int(k) for k in os.getenv("CLUSTERING_K_RANGE", "2,3,4,5,6,7,8").split(",") if k.strip()
+)
+CLUSTERING_CACHE_ENTRIES: int = int(os.getenv("CLUSTERING_CACHE_ENTRIES", "16"))
+CLUSTERING_TRACE_MEMORY: bool = os.getenv("CLUSTERING_TRACE_MEMORY", "false").lower() == "true"
+
+# Execução isolada de código Python (pool de workers pré-aquecidos)
+# PYTHON_EXEC_POOL_SIZE: workers simultâneos (0 = execução no próprio processo, serializada)
+# PYTHON_EXEC_WALL_TIMEOUT: segundos de relógio por chamada (worker é substituído ao exceder)
+# PYTHON_EXEC_ACQUIRE_TIMEOUT: espera máxima por um worker livre (não consome o tempo de execução)
+# PYTHON_EXEC_CPU_SECONDS / PYTHON_EXEC_MEMORY_MB: limites de CPU e memória por worker
+PYTHON_EXEC_POOL_SIZE: int = int(os.getenv("PYTHON_EXEC_POOL_SIZE", "2"))
+PYTHON_EXEC_WALL_TIMEOUT: float = float(os.getenv("PYTHON_EXEC_WALL_TIMEOUT", "30"))
+PYTHON_EXEC_ACQUIRE_TIMEOUT: float = float(os.getenv("PYTHON_EXEC_ACQUIRE_TIMEOUT", "10"))
+PYTHON_EXEC_CPU_SECONDS: int = int(os.getenv("PYTHON_EXEC_CPU_SECONDS", "20"))
+PYTHON_EXEC_MEMORY_MB: int = int(os.getenv("PYTHON_EXEC_MEMORY_MB", "1024"))
+PYTHON_EXEC_MAX_OUTPUT_CHARS: int = int(os.getenv("PYTHON_EXEC_MAX_OUTPUT_CHARS", "100000"))
+
+# Otimização de dtypes dos DataFrames em memória (reconstruções, DataLoader, /csv/upload)
+# DTYPE_OPTIMIZATION_ENABLED: aplica a otimização antes de cachear/armazenar
+# DTYPE_FLOAT32_RTOL: erro relativo máximo aceito em float64 -> float32 (0 = manter float64)
+# DTYPE_CATEGORY_MAX_RATIO: razão máxima únicos/linhas para converter texto em category
+# DTYPE_ARROW_STRINGS: demais colunas de texto como string[pyarrow]
+DTYPE_OPTIMIZATION_ENABLED: bool = os.getenv("DTYPE_OPTIMIZATION_ENABLED", "true").lower() == "true"
+DTYPE_FLOAT32_RTOL: float = float(os.getenv("DTYPE_FLOAT32_RTOL", "1e-6"))
+DTYPE_CATEGORY_MAX_RATIO: float = float(os.getenv("DTYPE_CATEGORY_MAX_RATIO", "0.5"))
+DTYPE_ARROW_STRINGS: bool = os.getenv("DTYPE_ARROW_STRINGS", "false").lower() == "true"
+
+# Clientes HTTP assíncronos dos provedores LLM (pool compartilhado por event loop)
+# LLM_HTTP_MAX_CONNECTIONS: conexões simultâneas por pool
+# LLM_HTTP_MAX_KEEPALIVE: conexões ociosas mantidas abertas para reuso
+LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50"))
+LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20"))
+
+# Resiliência das chamadas LLM (timeouts, retentativas e circuit breaker por provedor)
+# LLM_CONNECT_TIMEOUT / LLM_READ_TIMEOUT: timeouts HTTP de conexão e leitura (segundos)
+# LLM_CALL_TIMEOUT: prazo máximo de cada tentativa (0 = sem limite)
+# LLM_RETRY_*: tentativas por chamada e backoff exponencial com jitter (erros transitórios)
+# LLM_BREAKER_*: falhas consecutivas para abrir o circuito, segundos até a sondagem e sondagens simultâneas
+LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_READ_TIMEOUT: float = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_CALL_TIMEOUT: float = float(os.getenv("LLM_CALL_TIMEOUT", "90"))
+LLM_RETRY_MAX_ATTEMPTS: int = int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RECOVERY_SECONDS: float = float(os.getenv("LLM_BREAKER_RECOVERY_SECONDS", "30"))
+LLM_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("LLM_BREAKER_HALF_OPEN_CALLS", "1"))
+
+# Cache local de respostas LLM (camada exata + semântica opcional)
+# LLM_CACHE_TTL: segundos de validade de cada resposta
+# LLM_CACHE_MAX_ENTRIES / LLM_CACHE_MAX_MB: limites de tamanho (despejo LRU)
+# LLM_CACHE_SEMANTIC_ENABLED: reaproveita respostas de perguntas semelhantes (embeddings)
+# LLM_CACHE_SEMANTIC_THRESHOLD: similaridade de cosseno mínima na camada semântica
+LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL: float = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_MAX_MB: int = int(os.getenv("LLM_CACHE_MAX_MB", "64"))
+LLM_CACHE_SEMANTIC_ENABLED: bool = os.getenv("LLM_CACHE_SEMANTIC_ENABLED", "false").lower() == "true"
+LLM_CACHE_SEMANTIC_THRESHOLD: float = float(os.getenv("LLM_CACHE_SEMANTIC_THRESHOLD", "0.95"))
+
+# Orçamento de tokens dos prompts enviados aos LLMs
+# LLM_PROMPT_MAX_TOKENS: limite do prompt montado (system + usuário); segmentos de menor prioridade são cortados primeiro
+# LLM_PROMPT_ENCODING: encoding do tiktoken usado na contagem
+LLM_PROMPT_MAX_TOKENS: int = int(os.getenv("LLM_PROMPT_MAX_TOKENS", "6000"))
+LLM_PROMPT_ENCODING: str = os.getenv("LLM_PROMPT_ENCODING", "cl100k_base")
+
+# Coalescência de chamadas idênticas simultâneas (LLM, embeddings de consulta, busca vetorial)
+SINGLE_FLIGHT_ENABLED: bool = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# Roteamento adaptativo entre provedores LLM (latência e taxa de erro recentes)
+# LLM_ROUTING_WINDOW: chamadas mais recentes consideradas por provedor/modelo/complexidade
+# LLM_ROUTING_MIN_SAMPLES: amostras mínimas antes de reordenar (abaixo disso vale a ordem de preferência)
+# LLM_ROUTING_ERROR_PENALTY: segundos somados à latência esperada por unidade de taxa de erro
+# LLM_HEDGING_ENABLED: dispara requisição duplicada ao próximo provedor quando o primeiro passa do seu p95
+# LLM_HEDGE_MIN_DELAY: espera mínima (segundos) antes da requisição duplicada
+LLM_ADAPTIVE_ROUTING_ENABLED: bool = os.getenv("LLM_ADAPTIVE_ROUTING_ENABLED", "true").lower() == "true"
+LLM_ROUTING_WINDOW: int = int(os.getenv("LLM_ROUTING_WINDOW", "100"))
+LLM_ROUTING_MIN_SAMPLES: int = int(os.getenv("LLM_ROUTING_MIN_SAMPLES", "5"))
+LLM_ROUTING_ERROR_PENALTY: float = float(os.getenv("LLM_ROUTING_ERROR_PENALTY", "5"))
+LLM_HEDGING_ENABLED: bool = os.getenv("LLM_HEDGING_ENABLED", "false").lower() == "true"
+LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+
+# Limites por provedor/modelo das chamadas LLM e Sonar (fila justa com espera máxima)
+# LLM_MAX_CONCURRENCY: chamadas simultâneas por provedor/modelo (0 = sem limite)
+# LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE: orçamentos dos token buckets (0 = sem limite)
+# LLM_LIMITER_MAX_QUEUE: chamadas aguardando vaga; acima disso a chamada é recusada na hora
+# LLM_LIMITER_MAX_WAIT: espera máxima (segundos) na fila antes de recusar a chamada
+# LLM_RATE_LIMITS: ajustes por provedor[:modelo] no formato rpm/tpm/concorrência,
+#   ex.: "groq=30/6000/4,google:gemini-2.0-flash=15"
+LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE: float = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_LIMITER_MAX_QUEUE: int = int(os.getenv("LLM_LIMITER_MAX_QUEUE", "64"))
+LLM_LIMITER_MAX_WAIT: float = float(os.getenv("LLM_LIMITER_MAX_WAIT", "15"))
+LLM_RATE_LIMITS: str = os.getenv("LLM_RATE_LIMITS", "")
+
+# Compressão extrativa do contexto RAG antes da síntese (deduplicação, descarte e extração de linhas)
+# RAG_CONTEXT_COMPRESSION_ENABLED: comprime os chunks recuperados antes de enviá-los ao LLM
+# RAG_CONTEXT_MAX_TOKENS: orçamento do contexto comprimido (0 = só deduplicação e descarte)
+# RAG_CONTEXT_MIN_NOVELTY: fração mínima de linhas novas para um chunk ser mantido
+# RAG_CONTEXT_REDUNDANCY_THRESHOLD: similaridade de embedding que marca um chunk como repetição de outro
+RAG_CONTEXT_COMPRESSION_ENABLED: bool = os.getenv("RAG_CONTEXT_COMPRESSION_ENABLED", "true").lower() == "true"
+RAG_CONTEXT_MAX_TOKENS: int = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "1500"))
+RAG_CONTEXT_MIN_NOVELTY: float = float(os.getenv("RAG_CONTEXT_MIN_NOVELTY", "0.2"))
+RAG_CONTEXT_REDUNDANCY_THRESHOLD: float = float(os.getenv("RAG_CONTEXT_REDUNDANCY_THRESHOLD", "0.97"))
+
+# Atalho determinístico para perguntas estatísticas estruturadas ("média de X", "correlação entre A e B")
+# STAT_FAST_PATH_ENABLED: responde direto do perfil do dataset, sem recuperar chunks nem chamar o LLM;
+#   perguntas ambíguas (filtros, agrupamentos, explicações) seguem o fluxo normal
+STAT_FAST_PATH_ENABLED: bool = os.getenv("STAT_FAST_PATH_ENABLED", "true").lower() == "true"
+
 def build_db_dsn() -> str:
     """Monta DSN para conexão psycopg.
 
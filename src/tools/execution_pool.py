@@ -0,0 +1,395 @@
+"""Pool de processos pré-aquecidos para execução isolada de código Python.
+
+``PythonDataAnalyzer.execute_safe_python`` rodava ``exec`` no processo do
+servidor trocando ``sys.stdout`` globalmente (requisições simultâneas
+misturavam saídas) e sem nenhum limite de tempo. Este módulo executa cada
+snippet em um worker separado:
+
+- Workers iniciados uma vez e reaproveitados (sem custo de startup por chamada)
+- Workers criados por ``forkserver`` (ou ``spawn``), nunca por ``fork`` do
+  servidor: o processo da API tem várias threads (tracemalloc, limitadores,
+  fila de ingestão) e um ``fork`` poderia herdar locks presos. Os datasets
+  quentes são enviados uma única vez a cada worker; dentro do worker o pandas
+  roda com copy-on-write, então um snippet que altera ``df`` não contamina as
+  chamadas seguintes
+- Saída capturada por chamada (cada worker atende uma chamada por vez)
+- Espera por um worker livre limitada separadamente (``acquire_seconds``);
+  o tempo de parede da execução só começa a contar quando o worker é obtido
+- Limites por chamada: tempo de parede (o worker é encerrado e substituído),
+  tempo de CPU (``RLIMIT_CPU`` + ``SIGXCPU``) e memória (``RLIMIT_AS``)
+
+Limites de CPU/memória dependem do módulo ``resource`` (Unix); em outras
+plataformas apenas o tempo de parede é aplicado.
+"""
+from __future__ import annotations
+
+import atexit
+import builtins
+import io
+import math
+import multiprocessing
+import pickle
+import queue
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.settings import (
+    PYTHON_EXEC_ACQUIRE_TIMEOUT,
+    PYTHON_EXEC_CPU_SECONDS,
+    PYTHON_EXEC_MAX_OUTPUT_CHARS,
+    PYTHON_EXEC_MEMORY_MB,
+    PYTHON_EXEC_POOL_SIZE,
+    PYTHON_EXEC_WALL_TIMEOUT,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import resource
+    import signal
+    RESOURCE_LIMITS_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_LIMITS_AVAILABLE = False
+
+# Builtins liberados para os snippets
+SAFE_BUILTIN_NAMES = frozenset({
+    'len', 'sum', 'min', 'max', 'abs', 'round', 'sorted',
+    'enumerate', 'zip', 'range', 'list', 'dict', 'tuple', 'set',
+    'str', 'int', 'float', 'bool', 'print'
+})
+
+
+class ExecutionError(Exception):
+    """Falha do pool de execução (worker indisponível ou encerrado)."""
+    pass
+
+
+class _CpuTimeExceeded(BaseException):
+    """Levantada pelo handler de SIGXCPU (BaseException: não é capturada pelo snippet)."""
+    pass
+
+
+@dataclass
+class ExecutionLimits:
+    """Limites aplicados a cada chamada."""
+    wall_seconds: float = PYTHON_EXEC_WALL_TIMEOUT
+    acquire_seconds: float = PYTHON_EXEC_ACQUIRE_TIMEOUT
+    cpu_seconds: int = PYTHON_EXEC_CPU_SECONDS
+    memory_mb: int = PYTHON_EXEC_MEMORY_MB
+    max_output_chars: int = PYTHON_EXEC_MAX_OUTPUT_CHARS
+
+
+def _safe_builtins() -> Dict[str, Any]:
+    return {name: getattr(builtins, name) for name in SAFE_BUILTIN_NAMES}
+
+
+def run_snippet(code: str,
+                context: Optional[Dict[str, Any]] = None,
+                datasets: Optional[Dict[str, Any]] = None,
+                max_output_chars: int = PYTHON_EXEC_MAX_OUTPUT_CHARS) -> Dict[str, Any]:
+    """Executa um snippet com builtins restritos e saída capturada.
+
+    O snippet recebe ``pd``, ``np``, os datasets quentes e o contexto; o valor
+    de ``result`` ao final é devolvido.
+
+    Returns:
+        Dicionário com success, result, output, error e execution_time
+    """
+    start_time = time.time()
+    namespace: Dict[str, Any] = {'__builtins__': _safe_builtins(), 'pd': pd, 'np': np}
+    # Cópias rasas: com copy-on-write, alterações do snippet não afetam o dataset quente
+    namespace.update({name: df.copy(deep=False) if isinstance(df, pd.DataFrame) else df
+                      for name, df in (datasets or {}).items()})
+    namespace.update(context or {})
+
+    captured_output = io.StringIO()
+    old_stdout = sys.stdout
+    sys.stdout = captured_output
+    try:
+        exec(code, namespace)
+        success, error = True, None
+    except _CpuTimeExceeded:
+        success, error = False, "Limite de tempo de CPU excedido"
+    except MemoryError:
+        success, error = False, "Limite de memória excedido"
+    except Exception as e:
+        success, error = False, f"Erro na execução: {str(e)}\n{traceback.format_exc()}"
+    finally:
+        sys.stdout = old_stdout
+
+    output = captured_output.getvalue()
+    if len(output) > max_output_chars:
+        output = output[:max_output_chars] + "\n... [saída truncada]"
+    return {
+        'success': success,
+        'result': namespace.get('result') if success else None,
+        'output': output,
+        'error': error,
+        'execution_time': time.time() - start_time,
+    }
+
+
+# ----------------------------------------------------------------------
+# Processo worker
+# ----------------------------------------------------------------------
+def _raise_cpu_exceeded(signum, frame):
+    raise _CpuTimeExceeded()
+
+
+def _apply_memory_limit(memory_mb: int) -> None:
+    """Limita o espaço de endereçamento a (uso atual + ``memory_mb``)."""
+    try:
+        import psutil
+        current = psutil.Process().memory_info().vms
+    except Exception:
+        return
+    limit = current + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+
+def _set_cpu_budget(cpu_seconds: Optional[int]) -> None:
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if cpu_seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # Arredonda o uso atual para cima: o orçamento da chamada nunca fica abaixo de cpu_seconds
+    soft = math.ceil(usage.ru_utime + usage.ru_stime) + max(1, int(cpu_seconds))
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, datasets: Dict[str, Any], limits: ExecutionLimits) -> None:
+    pd.options.mode.copy_on_write = True
+    if RESOURCE_LIMITS_AVAILABLE:
+        signal.signal(signal.SIGXCPU, _raise_cpu_exceeded)
+        if limits.memory_mb:
+            _apply_memory_limit(limits.memory_mb)
+
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        code, context = request
+        if RESOURCE_LIMITS_AVAILABLE and limits.cpu_seconds:
+            _set_cpu_budget(limits.cpu_seconds)
+        try:
+            response = run_snippet(code, context, datasets, limits.max_output_chars)
+        finally:
+            if RESOURCE_LIMITS_AVAILABLE and limits.cpu_seconds:
+                _set_cpu_budget(None)
+        try:
+            pickle.dumps(response['result'])
+        except Exception:
+            response['result'] = repr(response['result'])
+        conn.send(response)
+
+
+class _Worker:
+    def __init__(self, mp_context, datasets: Dict[str, Any], limits: ExecutionLimits, generation: int):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=_worker_main, args=(child_conn, datasets, limits), daemon=True, name="python-exec-worker"
+        )
+        self.process.start()
+        child_conn.close()
+        self.generation = generation
+        self.calls = 0
+
+    def stop(self, kill: bool = False) -> None:
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ExecutionPool:
+    """Pool de workers pré-aquecidos.
+
+    Args:
+        size: Número de workers (chamadas simultâneas)
+        limits: Limites padrão por chamada
+        start_method: ``forkserver`` (padrão quando disponível) ou ``spawn``
+    """
+
+    def __init__(self, size: int = PYTHON_EXEC_POOL_SIZE,
+                 limits: Optional[ExecutionLimits] = None,
+                 start_method: Optional[str] = None):
+        if size < 1:
+            raise ExecutionError("O pool precisa de ao menos um worker")
+        if start_method is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.size = size
+        self.limits = limits or ExecutionLimits()
+        self._mp = multiprocessing.get_context(start_method)
+        self._datasets: Dict[str, Any] = {}
+        self._datasets_version: Any = None
+        self._generation = 0
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"calls": 0, "timeouts": 0, "queue_timeouts": 0, "crashes": 0, "recycled": 0}
+        for _ in range(size):
+            self._add_worker()
+        logger.info(f"🔥 Pool de execução Python iniciado ({size} workers, {start_method})")
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def _add_worker(self) -> None:
+        worker = _Worker(self._mp, self._datasets, self.limits, self._generation)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker, kill: bool) -> None:
+        worker.stop(kill=kill)
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            closed = self._closed
+        if not closed:
+            self._add_worker()
+
+    def _release(self, worker: _Worker) -> None:
+        if worker.generation != self._generation:
+            # Datasets quentes mudaram: o worker renasce com a versão nova
+            self._stats["recycled"] += 1
+            self._replace(worker, kill=False)
+        else:
+            self._idle.put(worker)
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    @property
+    def datasets_version(self) -> Any:
+        return self._datasets_version
+
+    def set_datasets(self, datasets: Dict[str, Any], version: Any = None) -> None:
+        """Publica os datasets quentes; workers são recriados para herdá-los.
+
+        Chamadas em andamento terminam com a versão anterior; workers ocupados
+        são recriados ao serem devolvidos ao pool.
+        """
+        if version is not None and version == self._datasets_version:
+            return
+        with self._lock:
+            self._datasets = dict(datasets)
+            self._datasets_version = version
+            self._generation += 1
+        idle: List[_Worker] = []
+        while True:
+            try:
+                idle.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in idle:
+            self._release(worker)
+        logger.info(f"♻️ Datasets quentes do pool atualizados ({', '.join(datasets) or 'nenhum'})")
+
+    def execute(self, code: str, context: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None,
+                acquire_timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Executa um snippet em um worker livre.
+
+        Args:
+            code: Código Python (o valor final de ``result`` é devolvido)
+            context: Variáveis adicionais (precisam ser serializáveis com pickle)
+            timeout: Tempo de parede máximo da execução, contado a partir da
+                obtenção do worker (padrão ``limits.wall_seconds``)
+            acquire_timeout: Espera máxima por um worker livre (padrão ``limits.acquire_seconds``)
+
+        Returns:
+            Dicionário com success, result, output, error e execution_time
+        """
+        timeout = self.limits.wall_seconds if timeout is None else timeout
+        acquire_timeout = self.limits.acquire_seconds if acquire_timeout is None else acquire_timeout
+        start_time = time.time()
+        try:
+            payload = pickle.dumps((code, context or {}))
+        except Exception as e:
+            return self._failure(f"Contexto não serializável para o worker: {e}", start_time)
+        try:
+            worker = self._idle.get(timeout=acquire_timeout)
+        except queue.Empty:
+            self._stats["queue_timeouts"] += 1
+            return self._failure(f"Nenhum worker livre em {acquire_timeout:.0f}s (pool ocupado)", start_time)
+
+        self._stats["calls"] += 1
+        try:
+            worker.conn.send_bytes(payload)
+            if not worker.conn.poll(timeout):
+                self._stats["timeouts"] += 1
+                logger.warning(f"⏱️ Snippet excedeu {timeout:.0f}s; worker encerrado e substituído")
+                self._replace(worker, kill=True)
+                return self._failure(f"Tempo limite de execução excedido ({timeout:.0f}s)", start_time)
+            response = worker.conn.recv()
+        except (EOFError, OSError) as e:
+            self._stats["crashes"] += 1
+            logger.warning(f"⚠️ Worker de execução encerrado: {e}")
+            self._replace(worker, kill=True)
+            return self._failure(f"Worker encerrado durante a execução (limite de CPU/memória?): {e}", start_time)
+
+        worker.calls += 1
+        self._release(worker)
+        return response
+
+    @staticmethod
+    def _failure(error: str, start_time: float) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'result': None,
+            'output': '',
+            'error': error,
+            'execution_time': time.time() - start_time,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            alive = sum(1 for w in self._workers if w.process.is_alive())
+        return {**self._stats, "workers": alive, "idle": self._idle.qsize(), "generation": self._generation}
+
+
+_execution_pool: Optional[ExecutionPool] = None
+_execution_pool_lock = threading.Lock()
+
+
+def get_execution_pool() -> ExecutionPool:
+    """Retorna o pool de execução do processo (singleton, criado no primeiro uso)."""
+    global _execution_pool
+    if _execution_pool is None:
+        with _execution_pool_lock:
+            if _execution_pool is None:
+                _execution_pool = ExecutionPool()
+                atexit.register(_execution_pool.shutdown)
+    return _execution_pool
@@ -18,9 +18,10 @@ sys.path.insert(0, str(root_dir))
 
 import pandas as pd
 import numpy as np
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
 import io
+import threading
 import traceback
 import warnings
 
@@ -28,6 +29,23 @@ import warnings
 warnings.filterwarnings('ignore')
 
 from src.utils.logging_config import get_logger
+from src.data.chunk_reconstruction import (
+    parse_header_columns,
+    reconstruct_dataframe,
+    reconstruct_dataframe_from_frame,
+    ChunkReconstructionError,
+)
+from src.data.dataset_cache import get_dataset_cache
+from src.data.dataset_profile import DatasetProfile, compute_dataset_profile, get_dataset_profile_store
+from src.data.approximate_analytics import ApproximateQueryEngine, StratifiedSampleSet, get_sample_registry
+from src.data.outlier_engine import OutlierReport, get_outlier_engine
+from src.data.query_planner import QueryPlan, plan_query
+from src.embeddings.chunker import CSV_DATA_CHUNK_TYPE
+from src.embeddings.row_range import split_csv_block
+from src.data.dtype_optimizer import optimize_dtypes
+from src.settings import DATASET_CACHE_ENABLED, DTYPE_OPTIMIZATION_ENABLED, PYTHON_EXEC_POOL_SIZE
+from src.tools.execution_pool import SAFE_BUILTIN_NAMES, get_execution_pool, run_snippet
+from src.vectorstore.embeddings_reader import EmbeddingsReader, EmbeddingsReaderError
 
 # Import do cliente Supabase para recuperação de dados
 try:
@@ -37,6 +55,9 @@ except ImportError as e:
     SUPABASE_CLIENT_AVAILABLE = False
     supabase = None
 
+# Execução no próprio processo (PYTHON_EXEC_POOL_SIZE=0) troca sys.stdout globalmente
+_inprocess_exec_lock = threading.Lock()
+
 
 class UnauthorizedCSVAccessError(Exception):
     """Exceção lançada quando acesso não autorizado a CSV é detectado."""
@@ -129,22 +150,31 @@ class PythonDataAnalyzer:
         
         # Namespaces seguros para execução
         self.safe_globals = {
-            '__builtins__': {
-                'len', 'sum', 'min', 'max', 'abs', 'round', 'sorted',
-                'enumerate', 'zip', 'range', 'list', 'dict', 'tuple', 'set',
-                'str', 'int', 'float', 'bool', 'print'
-            },
+            '__builtins__': set(SAFE_BUILTIN_NAMES),
             'pd': pd,
             'np': np,
         }
     
-    def get_data_from_embeddings(self, limit: int = None, metadata_filter: Dict = None, parse_chunk_text: bool = True) -> Optional[pd.DataFrame]:
+    def get_data_from_embeddings(self, limit: int = None, metadata_filter: Dict = None, parse_chunk_text: bool = True,
+                                 source: Optional[str] = None, chunk_type: Optional[str] = None,
+                                 columns: Optional[List[str]] = None, optimize: bool = True) -> Optional[pd.DataFrame]:
         """Recupera dados APENAS da tabela embeddings (CONFORMIDADE).
         
+        A leitura é projetada (sem a coluna ``embedding``), paginada por keyset
+        em ``id`` e paralela (ver ``EmbeddingsReader``); as páginas alimentam a
+        reconstrução à medida que chegam. Reconstruções são compartilhadas
+        pelo cache de datasets do processo (``get_dataset_cache``).
+        
         Args:
             limit: Limite de registros (None para todos)
             metadata_filter: Filtros por metadata
             parse_chunk_text: Se True, parseia o conteúdo CSV do chunk_text para reconstruir colunas originais (PADRÃO: True)
+            source: Filtra por fonte (source_id)
+            chunk_type: Filtra por tipo de chunk (ex.: ``csv_data``)
+            columns: Reconstrói/converte apenas estas colunas (ver ``plan_query_columns``);
+                uma leitura completa já em cache é apenas projetada
+            optimize: Compacta os dtypes (float32/int) antes do cache; com False
+                os dados vêm em precisão total, sem passar pelo cache
             
         Returns:
             DataFrame com os dados PARSEADOS do CSV original ou None se falhar
@@ -153,39 +183,266 @@ class PythonDataAnalyzer:
             self.logger.error("Cliente Supabase não disponível")
             return None
         
+        columns = list(columns) if columns is not None else None
+        
+        def load() -> Optional[pd.DataFrame]:
+            return self._load_data_from_embeddings(limit, metadata_filter, parse_chunk_text, source, chunk_type, columns,
+                                                   optimize=optimize)
+        
+        if not DATASET_CACHE_ENABLED or not parse_chunk_text or not optimize:
+            return load()
+        
+        # Reconstruções completas são compartilhadas entre agentes (cache versionado)
+        variant = (limit, chunk_type, tuple(sorted((metadata_filter or {}).items())))
+        version_provider = lambda: self._get_embeddings_version(source)
         try:
-            self.logger.info("✅ Recuperando dados da tabela embeddings (CONFORMIDADE)")
+            cache = get_dataset_cache()
+            if columns is not None:
+                # Leitura completa já em cache: basta projetar as colunas
+                df = cache.peek(source, variant, version_provider, columns=columns)
+                if df is not None:
+                    self.logger.info(f"⚡ Colunas {columns} projetadas do dataset em cache")
+                    return df
+                variant = (*variant, tuple(columns))
+            return cache.get_or_load(
+                source,
+                load,
+                variant=variant,
+                version_provider=version_provider,
+            )
+        except Exception as e:
+            self.logger.error(f"Erro ao recuperar dados da tabela embeddings: {str(e)}")
+            return None
+    
+    def _get_embeddings_version(self, source: Optional[str] = None) -> Optional[str]:
+        """Token de versão do dataset: ``created_at`` mais recente (muda a cada ingestão)."""
+        query = supabase.table('embeddings').select('created_at')
+        if source:
+            query = query.eq('metadata->>source', source)
+        result = query.order('created_at', desc=True).limit(1).execute()
+        return result.data[0].get('created_at') if result.data else None
+    
+    def get_dataset_columns(self, source: Optional[str] = None) -> Optional[List[str]]:
+        """Colunas do dataset atual sem reconstruí-lo.
+        
+        Usa o perfil pré-calculado da versão atual quando existir; senão lê o
+        header de um único chunk CSV.
+        
+        Args:
+            source: Fonte do dataset (None = todas)
             
-            query = supabase.table('embeddings').select('*')
+        Returns:
+            Lista de colunas ou None se não houver dados
+        """
+        if not SUPABASE_CLIENT_AVAILABLE or not supabase:
+            return None
+        try:
+            _, version = get_dataset_cache().current_version(source, lambda: self._get_embeddings_version(source))
+            profile = get_dataset_profile_store().get(source, version)
+            if profile is not None:
+                return list(profile.columns)
+            
+            reader = EmbeddingsReader(supabase, source=source, chunk_type=CSV_DATA_CHUNK_TYPE, limit=1)
+            for record in reader.read_all():
+                header, _ = split_csv_block(record.get('chunk_text') or '')
+                if header:
+                    return parse_header_columns(header)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha ao obter colunas do dataset: {e}")
+        return None
+    
+    def plan_query_columns(self, query: str, source: Optional[str] = None) -> QueryPlan:
+        """Plano de leitura da consulta: colunas e estatísticas necessárias (ver ``query_planner``)."""
+        plan = plan_query(query, self.get_dataset_columns(source))
+        self.logger.info(f"🧭 Plano da consulta: colunas={plan.columns or 'todas'} "
+                         f"estatísticas={plan.statistics} ({plan.reason})")
+        return plan
+    
+    def load_for_query(self, query: str, source: Optional[str] = None,
+                       plan: Optional[QueryPlan] = None) -> Tuple[Optional[pd.DataFrame], QueryPlan]:
+        """Carrega apenas as colunas que a consulta usa.
+        
+        Args:
+            query: Pergunta do usuário
+            source: Fonte do dataset (None = todas)
+            plan: Plano já calculado (ex.: pelo handler); None = planejar aqui
             
-            # Aplicar filtros se especificados
-            if metadata_filter:
-                for key, value in metadata_filter.items():
-                    query = query.eq(f'metadata->{key}', value)
+        Returns:
+            Tupla (DataFrame podado ou completo, plano usado)
+        """
+        plan = plan or self.plan_query_columns(query, source)
+        if source is None:
+            df = self.reconstruct_original_data(columns=plan.columns)
+        else:
+            df = self.get_data_from_embeddings(limit=None, parse_chunk_text=True, source=source, columns=plan.columns)
+        return df, plan
+    
+    def get_dataset_profile(self, source: Optional[str] = None, refresh: bool = False) -> Optional[DatasetProfile]:
+        """Retorna o perfil pré-calculado da versão atual do dataset.
+        
+        O perfil é buscado no store pela versão da ingestão (token do banco);
+        se ainda não existir (ou ``refresh=True``), é calculado a partir do
+        dataset reconstruído em precisão total (antes da compactação de
+        dtypes do cache) e persistido.
+        
+        Args:
+            source: Fonte do dataset (None = todas)
+            refresh: Recalcula mesmo se já existir (usado após a ingestão)
             
-            if limit:
-                query = query.limit(limit)
+        Returns:
+            DatasetProfile ou None se não houver dados (ou versão do dataset)
+        """
+        if not SUPABASE_CLIENT_AVAILABLE or not supabase:
+            return None
+        _, version = get_dataset_cache().current_version(source, lambda: self._get_embeddings_version(source))
+        if version is None:
+            # Sem versão não há como chavear o perfil no store
+            return None
+        store = get_dataset_profile_store()
+        
+        if not refresh:
+            profile = store.get(source, version)
+            if profile is not None:
+                self.logger.info(f"⚡ Perfil do dataset servido do store (versão {version})")
+                return profile
+        
+        # Estatísticas "exatas" do perfil não podem vir dos float32 do cache
+        if source is None:
+            df = self.reconstruct_original_data(optimize=False)
+        else:
+            df = self.get_data_from_embeddings(limit=None, parse_chunk_text=True, source=source, optimize=False)
+        if df is None or df.empty:
+            return None
+        
+        profile = compute_dataset_profile(df, source=source, version=version)
+        try:
+            store.save(profile)
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha ao persistir perfil do dataset: {e}")
+        return profile
+    
+    def detect_outliers(self, source: Optional[str] = None, **options: Any) -> Optional[OutlierReport]:
+        """Detecta outliers (IQR, z-score, MAD e, opcionalmente, Isolation Forest) em uma passada.
+        
+        O relatório é cacheado por fonte, versão do dataset e parâmetros; o
+        dataset só é carregado quando não há relatório em cache. Com
+        ``columns=`` (plano da consulta) apenas essas colunas são reconstruídas.
+        
+        Args:
+            source: Fonte do dataset (None = todas)
+            **options: Parâmetros de ``detect_outliers`` (columns, methods, iqr_k, isolation_forest...)
             
-            result = query.execute()
+        Returns:
+            OutlierReport ou None se não houver dados
+        """
+        columns = options.get('columns')
+        
+        def load() -> Optional[pd.DataFrame]:
+            if source is None:
+                return self.reconstruct_original_data(columns=columns) if columns else self.reconstruct_original_data()
+            return self.get_data_from_embeddings(limit=None, parse_chunk_text=True, source=source, columns=columns)
+        
+        cache_key = None
+        if SUPABASE_CLIENT_AVAILABLE and supabase:
+            cache_key = (source, get_dataset_cache().current_version(source, lambda: self._get_embeddings_version(source)))
+        return get_outlier_engine().load_and_detect(load, cache_key=cache_key, **options)
+    
+    def get_approximate_engine(self, source: Optional[str] = None) -> Optional[ApproximateQueryEngine]:
+        """Retorna o motor de consultas aproximadas da versão atual do dataset.
+        
+        As amostras estratificadas são construídas uma única vez por versão
+        (a partir do dataset em cache); o cálculo exato, quando a precisão
+        pedida não é atingida, usa o mesmo dataset em cache.
+        
+        Args:
+            source: Fonte do dataset (None = todas)
             
-            if not result.data:
-                self.logger.warning("Nenhum dado encontrado na tabela embeddings")
+        Returns:
+            ApproximateQueryEngine ou None se não houver dados
+        """
+        def load_full() -> Optional[pd.DataFrame]:
+            if source is None:
+                return self.reconstruct_original_data()
+            return self.get_data_from_embeddings(limit=None, parse_chunk_text=True, source=source)
+        
+        def build() -> Optional[StratifiedSampleSet]:
+            df = load_full()
+            if df is None or df.empty:
                 return None
+            return StratifiedSampleSet(df)
+        
+        version = None
+        if SUPABASE_CLIENT_AVAILABLE and supabase:
+            version = get_dataset_cache().current_version(source, lambda: self._get_embeddings_version(source))
+        sample_set = get_sample_registry().get_or_build((source, version), build)
+        if sample_set is None:
+            return None
+        return ApproximateQueryEngine(sample_set, exact_loader=load_full)
+    
+    def _load_data_from_embeddings(self, limit: Optional[int], metadata_filter: Optional[Dict],
+                                   parse_chunk_text: bool, source: Optional[str],
+                                   chunk_type: Optional[str],
+                                   columns: Optional[List[str]] = None,
+                                   optimize: bool = True) -> Optional[pd.DataFrame]:
+        """Leitura + reconstrução sem cache (ver ``get_data_from_embeddings``)."""
+        try:
+            self.logger.info("✅ Recuperando dados da tabela embeddings (CONFORMIDADE)")
             
-            df = pd.DataFrame(result.data)
-            self.logger.info(f"✅ Dados recuperados: {len(df)} registros da tabela embeddings")
+            reader = EmbeddingsReader(
+                supabase,
+                source=source,
+                chunk_type=chunk_type,
+                metadata_filter=metadata_filter,
+                limit=limit,
+            )
+            records: List[Dict[str, Any]] = []
             
-            # SEMPRE tentar parsear chunk_text para reconstruir dados originais do CSV
-            if 'chunk_text' in df.columns:
+            def stream_records():
+                for page in reader.iter_pages():
+                    records.extend(page)
+                    yield from page
+            
+            if parse_chunk_text:
+                # Os chunks são agrupados/ordenados enquanto as páginas chegam
                 self.logger.info("🔄 Parseando chunk_text para reconstruir colunas originais do CSV...")
-                parsed_df = self._parse_chunk_text_to_dataframe(df)
+                try:
+                    parsed_df = reconstruct_dataframe(stream_records(), columns=columns)
+                    if len(parsed_df) == 0:
+                        parsed_df = None
+                except ChunkReconstructionError as e:
+                    self.logger.info(f"ℹ️ Reconstrução vetorizada indisponível ({e}), usando parser legado")
+                    parsed_df = None
+                except EmbeddingsReaderError:
+                    raise
+                except Exception as e:
+                    self.logger.warning(f"⚠️ Falha na reconstrução vetorizada: {e}, usando parser legado")
+                    parsed_df = None
+                
+                self.logger.info(f"✅ Dados recuperados: {reader.records_read} registros em {reader.pages_read} páginas da tabela embeddings")
+                if not records:
+                    self.logger.warning("Nenhum dado encontrado na tabela embeddings")
+                    return None
+                
+                if parsed_df is None:
+                    parsed_df = self._parse_chunk_text_to_dataframe_legacy(pd.DataFrame(records))
+                    if parsed_df is not None and columns is not None:
+                        parsed_df = parsed_df[[c for c in parsed_df.columns if c in columns]]
                 if parsed_df is not None:
+                    if optimize and DTYPE_OPTIMIZATION_ENABLED:
+                        # float32/int compactos antes de entrar nos caches do processo
+                        parsed_df, _ = optimize_dtypes(parsed_df, inplace=True)
                     self.logger.info(f"✅ Dados parseados com sucesso: {len(parsed_df)} linhas, {len(parsed_df.columns)} colunas originais")
                     self.logger.info(f"📊 Colunas reconstruídas: {list(parsed_df.columns)}")
                     return parsed_df
-                else:
-                    self.logger.warning("⚠️ Falha ao parsear chunk_text, retornando dados brutos da tabela embeddings")
-            
+                self.logger.warning("⚠️ Falha ao parsear chunk_text, retornando dados brutos da tabela embeddings")
+            else:
+                records = reader.read_all()
+                self.logger.info(f"✅ Dados recuperados: {len(records)} registros da tabela embeddings")
+                if not records:
+                    self.logger.warning("Nenhum dado encontrado na tabela embeddings")
+                    return None
+            
+            df = pd.DataFrame(records)
             # Fallback: Remover colunas com tipos não-hashable (metadata, embedding) para evitar erros
             if 'metadata' in df.columns:
                 df = df.drop(columns=['metadata'])
@@ -201,6 +458,30 @@ class PythonDataAnalyzer:
     def _parse_chunk_text_to_dataframe(self, embeddings_df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """Parseia o conteúdo CSV dentro do chunk_text para reconstruir DataFrame original.
         
+        Usa o motor vetorizado (ordenação por row_start, descarte de overlap e
+        parse em uma passada). Chunks sem intervalo de linhas caem no parser
+        legado linha a linha.
+        
+        Args:
+            embeddings_df: DataFrame com coluna chunk_text contendo CSV
+            
+        Returns:
+            DataFrame com colunas originais do CSV ou None se falhar
+        """
+        try:
+            df = reconstruct_dataframe_from_frame(embeddings_df)
+            if len(df) > 0:
+                return df
+            self.logger.warning("⚠️ Reconstrução vetorizada sem linhas, usando parser legado")
+        except ChunkReconstructionError as e:
+            self.logger.info(f"ℹ️ Reconstrução vetorizada indisponível ({e}), usando parser legado")
+        except Exception as e:
+            self.logger.warning(f"⚠️ Falha na reconstrução vetorizada: {e}, usando parser legado")
+        return self._parse_chunk_text_to_dataframe_legacy(embeddings_df)
+    
+    def _parse_chunk_text_to_dataframe_legacy(self, embeddings_df: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """Parser legado linha a linha (chunks sem row_start/row_end).
+        
         Args:
             embeddings_df: DataFrame com coluna chunk_text contendo CSV
             
@@ -369,9 +650,14 @@ class PythonDataAnalyzer:
             self.logger.error(f"Erro ao recuperar dados do Supabase: {str(e)}")
             return None
     
-    def reconstruct_original_data(self) -> Optional[pd.DataFrame]:
+    def reconstruct_original_data(self, columns: Optional[List[str]] = None,
+                                  optimize: bool = True) -> Optional[pd.DataFrame]:
         """Reconstrói dados originais APENAS da tabela embeddings do Supabase.
         
+        Args:
+            columns: Reconstrói apenas estas colunas (None = todas; ver ``load_for_query``)
+            optimize: Compacta os dtypes e usa o cache (False = precisão total, sem cache)
+            
         Returns:
             DataFrame com dados parseados do chunk_text ou None se falhar
             
@@ -382,7 +668,7 @@ class PythonDataAnalyzer:
             
             # ÚNICA FONTE DE DADOS: Tabela embeddings do Supabase
             # O método get_data_from_embeddings() já parseia chunk_text automaticamente
-            df = self.get_data_from_embeddings(limit=None, parse_chunk_text=True)
+            df = self.get_data_from_embeddings(limit=None, parse_chunk_text=True, columns=columns, optimize=optimize)
             
             if df is not None:
                 self.logger.info(f"✅ Dados reconstruídos: {len(df)} registros, {len(df.columns)} colunas (CONFORMIDADE TOTAL)")
@@ -454,9 +740,9 @@ class PythonDataAnalyzer:
             Dicionário com estatísticas calculadas
         """
         try:
-            # Obter dados reais
-            df = self.reconstruct_original_data()
-            if df is None:
+            # Estatísticas exatas pré-calculadas (perfil da versão atual do dataset)
+            profile = self.get_dataset_profile()
+            if profile is None:
                 return {"error": "Não foi possível acessar dados reais"}
             
             self.logger.info(f"Calculando estatísticas reais para: {query_type}")
@@ -464,56 +750,21 @@ class PythonDataAnalyzer:
             # SISTEMA GENÉRICO: Analisar qualquer dataset
             result = {
                 "data_source": "dataset genérico",
-                "total_records": len(df),
-                "total_columns": len(df.columns),
-                "columns": list(df.columns)
+                "total_records": profile.row_count,
+                "total_columns": len(profile.columns),
+                "columns": list(profile.columns)
             }
             
             if query_type in ["tipos_dados", "all"]:
-                # Análise genérica de tipos de dados
-                numeric_cols = []
-                categorical_cols = []
-                datetime_cols = []
-                
-                for col in df.columns:
-                    try:
-                        col_dtype = df[col].dtype
-                        
-                        if col_dtype in ['int64', 'float64', 'int32', 'float32', 'int8', 'int16', 'float16']:
-                            numeric_cols.append(col)
-                        elif col_dtype == 'object':
-                            # Verificar se é categórico real (strings/texto) ou se deveria ser numérico
-                            try:
-                                # Tentar converter para numérico para detectar números como strings
-                                pd.to_numeric(df[col].dropna().head(100))
-                                # Se conseguiu converter, pode ser numérico mal formatado
-                                numeric_cols.append(col)
-                            except (ValueError, TypeError):
-                                # Verificar se é categórico (poucos valores únicos) ou texto
-                                categorical_cols.append(col)
-                        elif 'datetime' in str(col_dtype).lower():
-                            datetime_cols.append(col)
-                        else:
-                            # Para tipos desconhecidos, tentar detectar se é numérico
-                            try:
-                                if col_dtype.kind in 'biufc':  # boolean, int, unsigned, float, complex
-                                    numeric_cols.append(col)
-                                else:
-                                    categorical_cols.append(col)
-                            except:
-                                categorical_cols.append(col)
-                    except Exception as e:
-                        self.logger.warning(f"Erro ao analisar dtype da coluna '{col}': {str(e)}")
-                        categorical_cols.append(col)
-                
+                tipos = profile.column_types
                 result.update({
                     "tipos_dados": {
-                        "numericos": numeric_cols,
-                        "categoricos": categorical_cols,
-                        "datetime": datetime_cols,
-                        "total_numericos": len(numeric_cols),
-                        "total_categoricos": len(categorical_cols),
-                        "total_datetime": len(datetime_cols)
+                        "numericos": tipos["numericos"],
+                        "categoricos": tipos["categoricos"],
+                        "datetime": tipos["datetime"],
+                        "total_numericos": len(tipos["numericos"]),
+                        "total_categoricos": len(tipos["categoricos"]),
+                        "total_datetime": len(tipos["datetime"])
                     }
                 })
             
@@ -521,33 +772,31 @@ class PythonDataAnalyzer:
                 # Estatísticas genéricas para colunas numéricas
                 estatisticas = {}
                 
-                for col in df.select_dtypes(include=['number']).columns:
+                for col, col_stats in profile.numeric.items():
+                    if not col_stats.get("count"):
+                        continue
                     estatisticas[col] = {
-                        "tipo": str(df[col].dtype),
-                        "count": int(df[col].count()),
-                        "mean": float(df[col].mean()),
-                        "std": float(df[col].std()),
-                        "min": float(df[col].min()),
-                        "max": float(df[col].max()),
-                        "median": float(df[col].median()),
-                        "q25": float(df[col].quantile(0.25)),
-                        "q75": float(df[col].quantile(0.75))
+                        "tipo": col_stats["dtype"],
+                        "count": col_stats["count"],
+                        "mean": col_stats["mean"],
+                        "std": col_stats["std"],
+                        "min": col_stats["min"],
+                        "max": col_stats["max"],
+                        "median": col_stats["median"],
+                        "q25": col_stats["q25"],
+                        "q75": col_stats["q75"]
                     }
                 
                 # Estatísticas para colunas categóricas
-                for col in df.select_dtypes(include=['object']).columns:
-                    try:
-                        value_counts = df[col].value_counts()
-                        if len(value_counts) <= 20:  # Só mostrar se não há muitas categorias
-                            estatisticas[col] = {
-                                "tipo": str(df[col].dtype),
-                                "unique_values": df[col].unique().tolist()[:10],  # Máximo 10 valores
-                                "value_counts": value_counts.head(10).to_dict(),
-                                "percentages": (value_counts.head(10) / len(df) * 100).round(2).to_dict()
-                            }
-                    except Exception as e:
-                        self.logger.warning(f"Erro ao calcular estatísticas para coluna categórica '{col}': {str(e)}")
-                        continue
+                for col, col_stats in profile.categorical.items():
+                    if col_stats["unique_count"] <= 20:  # Só mostrar se não há muitas categorias
+                        top = dict(list(col_stats["value_counts"].items())[:10])
+                        estatisticas[col] = {
+                            "tipo": col_stats["dtype"],
+                            "unique_values": col_stats["unique_values"],  # Máximo 10 valores
+                            "value_counts": top,
+                            "percentages": {k: round(v / profile.row_count * 100, 2) for k, v in top.items()}
+                        }
                 
                 result.update({"estatisticas": estatisticas})
             
@@ -556,25 +805,25 @@ class PythonDataAnalyzer:
                 distribuicao = {}
                 
                 # Para cada coluna categórica, calcular distribuição
-                for col in df.select_dtypes(include=['object']).columns:
-                    value_counts = df[col].value_counts()
-                    if len(value_counts) <= 10:  # Só para colunas com poucas categorias
-                        dist_dict = {}
-                        for value, count in value_counts.items():
-                            percentage = count / len(df) * 100
-                            dist_dict[str(value)] = {
-                                "count": int(count),
-                                "percentage": float(percentage)
+                for col, col_stats in profile.categorical.items():
+                    if col_stats["unique_count"] <= 10:  # Só para colunas com poucas categorias
+                        distribuicao[col] = {
+                            value: {
+                                "count": count,
+                                "percentage": count / profile.row_count * 100
                             }
-                        distribuicao[col] = dist_dict
+                            for value, count in col_stats["value_counts"].items()
+                        }
                 
                 # Estatísticas de range para colunas numéricas
                 numeric_ranges = {}
-                for col in df.select_dtypes(include=['number']).columns:
+                for col, col_stats in profile.numeric.items():
+                    if not col_stats.get("count"):
+                        continue
                     numeric_ranges[col] = {
-                        "range_min": float(df[col].min()),
-                        "range_max": float(df[col].max()),
-                        "range_amplitude": float(df[col].max() - df[col].min())
+                        "range_min": col_stats["min"],
+                        "range_max": col_stats["max"],
+                        "range_amplitude": col_stats["max"] - col_stats["min"]
                     }
                 
                 result.update({
@@ -589,149 +838,100 @@ class PythonDataAnalyzer:
             self.logger.error(error_msg)
             return {"error": error_msg}
     
-    def execute_safe_python(self, code: str, context: Dict[str, Any] = None) -> PythonAnalysisResult:
+    def execute_safe_python(self, code: str, context: Dict[str, Any] = None,
+                            timeout: Optional[float] = None) -> PythonAnalysisResult:
         """Executa código Python de forma segura.
         
+        O código roda em um worker do pool de execução (saída capturada por
+        chamada, limites de tempo de parede, CPU e memória). Com
+        ``PYTHON_EXEC_POOL_SIZE=0`` roda no próprio processo, uma chamada por vez.
+        
         Args:
             code: Código Python para executar
             context: Contexto adicional (DataFrames, variáveis)
+            timeout: Tempo de parede máximo em segundos (padrão ``PYTHON_EXEC_WALL_TIMEOUT``)
             
         Returns:
             Resultado da execução
         """
-        import time
-        start_time = time.time()
-        
-        # Capturar output
-        old_stdout = sys.stdout
-        sys.stdout = captured_output = io.StringIO()
-        
-        try:
-            # Preparar namespace seguro
-            local_vars = self.safe_globals.copy()
-            if context:
-                local_vars.update(context)
-            
-            # Executar código
-            exec(code, {"__builtins__": {}}, local_vars)
-            
-            # Capturar resultado
-            output = captured_output.getvalue()
-            execution_time = time.time() - start_time
-            
-            return PythonAnalysisResult(
-                success=True,
-                result=local_vars.get('result'),
-                output=output,
-                execution_time=execution_time
-            )
-            
-        except Exception as e:
-            execution_time = time.time() - start_time
-            error_msg = f"Erro na execução: {str(e)}\n{traceback.format_exc()}"
-            
-            return PythonAnalysisResult(
-                success=False,
-                result=None,
-                output=captured_output.getvalue(),
-                error=error_msg,
-                execution_time=execution_time
-            )
-        
-        finally:
-            sys.stdout = old_stdout
+        if PYTHON_EXEC_POOL_SIZE > 0:
+            response = get_execution_pool().execute(code, context, timeout=timeout)
+        else:
+            # sys.stdout é global: execuções no próprio processo são serializadas
+            with _inprocess_exec_lock:
+                response = run_snippet(code, context)
+        return PythonAnalysisResult(**response)
     
-    def calculate_clustering_analysis(self, n_clusters: int = 3) -> Dict[str, Any]:
+    def calculate_clustering_analysis(self, n_clusters: Optional[int] = None,
+                                      source: Optional[str] = None) -> Dict[str, Any]:
         """
-        Calcula análise de clustering (KMeans) nos dados numéricos do dataset.
+        Calcula análise de clustering (MiniBatchKMeans) nos dados numéricos do dataset.
+        
+        O resultado é cacheado por fonte, versão do dataset e parâmetros; o
+        dataset só é carregado quando não há resultado em cache.
         
         Args:
-            n_clusters: Número de clusters desejados (padrão: 3)
+            n_clusters: Número de clusters desejados (None = escolha automática por silhouette)
+            source: Fonte do dataset (None = todas)
             
         Returns:
-            Dicionário com informações sobre os clusters encontrados
+            Dicionário com informações sobre os clusters encontrados, tempo e memória da execução
         """
         try:
-            from sklearn.cluster import KMeans
-            from sklearn.preprocessing import StandardScaler
+            from src.data.clustering_engine import ClusteringError, get_clustering_engine
             
-            # 1. Recuperar dados do Supabase usando reconstruct_original_data
-            df = self.reconstruct_original_data()
+            def load() -> Optional[pd.DataFrame]:
+                if source is None:
+                    return self.reconstruct_original_data()
+                return self.get_data_from_embeddings(limit=None, parse_chunk_text=True, source=source)
             
-            if df is None or df.empty:
-                return {
-                    "error": "Nenhum dado disponível para análise de clustering",
-                    "suggestion": "Certifique-se de que os dados foram ingeridos na tabela embeddings"
-                }
-            
-            # 2. Selecionar apenas colunas numéricas
-            numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-            
-            # Remover colunas irrelevantes como ID, índice, etc.
-            numeric_cols = [col for col in numeric_cols if col.lower() not in ['id', 'index', 'unnamed: 0']]
+            cache_key = None
+            if SUPABASE_CLIENT_AVAILABLE and supabase:
+                cache_key = (source, get_dataset_cache().current_version(source, lambda: self._get_embeddings_version(source)))
             
-            if len(numeric_cols) == 0:
+            try:
+                clustering = get_clustering_engine().load_and_run(load, n_clusters=n_clusters, cache_key=cache_key)
+            except ClusteringError as e:
                 return {
-                    "error": "Nenhuma coluna numérica encontrada para clustering",
-                    "available_columns": df.columns.tolist()
-                }
-            
-            self.logger.info(f"🔬 Aplicando KMeans com {n_clusters} clusters em {len(numeric_cols)} variáveis numéricas")
-            
-            # 3. Preparar dados para clustering
-            X = df[numeric_cols].copy()
-            
-            # Remover linhas com valores nulos
-            X = X.dropna()
-            
-            if len(X) == 0:
-                return {
-                    "error": "Todos os dados têm valores nulos nas colunas numéricas"
+                    "error": str(e),
+                    "suggestion": "Certifique-se de que os dados foram ingeridos na tabela embeddings"
                 }
             
-            # 4. Normalizar dados (importante para KMeans)
-            scaler = StandardScaler()
-            X_scaled = scaler.fit_transform(X)
-            
-            # 5. Aplicar KMeans
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-            cluster_labels = kmeans.fit_predict(X_scaled)
-            
-            # 6. Contar pontos por cluster
-            unique, counts = np.unique(cluster_labels, return_counts=True)
-            cluster_distribution = dict(zip(unique.tolist(), counts.tolist()))
-            
-            # 7. Calcular percentuais
-            total_points = len(cluster_labels)
+            cluster_distribution = clustering.cluster_distribution
+            total_points = clustering.total_points
             cluster_percentages = {
                 cluster: (count / total_points) * 100 
                 for cluster, count in cluster_distribution.items()
             }
             
-            # 8. Calcular centróides (características médias de cada cluster)
-            centroids = kmeans.cluster_centers_
-            
-            # 9. Verificar balanceamento
+            # Verificar balanceamento
             max_cluster_pct = max(cluster_percentages.values())
             min_cluster_pct = min(cluster_percentages.values())
             is_balanced = (max_cluster_pct / min_cluster_pct) < 3.0  # threshold arbitrário
             
-            # 10. Construir resposta estruturada
             result = {
                 "success": True,
-                "n_clusters": n_clusters,
+                "n_clusters": clustering.n_clusters,
                 "total_points": total_points,
-                "numeric_variables_used": numeric_cols,
+                "numeric_variables_used": clustering.numeric_columns,
                 "cluster_distribution": cluster_distribution,
                 "cluster_percentages": cluster_percentages,
                 "is_balanced": is_balanced,
                 "balance_ratio": max_cluster_pct / min_cluster_pct if min_cluster_pct > 0 else float('inf'),
-                "inertia": float(kmeans.inertia_),  # Soma das distâncias quadradas aos centróides
+                "inertia": clustering.inertia,  # Soma das distâncias quadradas aos centróides
+                "centroids": clustering.centroids,
+                "method": clustering.method,
+                "k_selection": clustering.k_selection,
+                "sample_size": clustering.sample_size,
+                "elapsed_seconds": clustering.elapsed_seconds,
+                "memory_delta_mb": clustering.memory_delta_mb,
+                "peak_memory_mb": clustering.peak_memory_mb,
+                "cached": clustering.cached,
                 "interpretation": self._interpret_clustering_results(
                     cluster_distribution,
                     cluster_percentages,
                     is_balanced,
-                    numeric_cols
+                    clustering.numeric_columns
                 )
             }
             
@@ -0,0 +1,153 @@
+"""Coalescência ("single-flight") de chamadas idênticas em andamento.
+
+Quando vários usuários ou widgets do dashboard fazem a mesma pergunta ao
+mesmo tempo, cada um dispararia seu próprio embedding, RPC
+``match_embeddings`` e geração LLM. Com ``SingleFlight`` a primeira chamada
+de uma chave executa e as simultâneas idênticas aguardam o mesmo resultado
+(ou a mesma exceção). Nada é guardado depois que a chamada termina — isso é
+papel dos caches.
+
+- ``do``: chamadas síncronas (threads); uma reentrada da mesma chave na
+  própria thread líder executa diretamente, sem deadlock
+- ``ado``: corrotinas; o trabalho roda numa task compartilhada protegida por
+  ``asyncio.shield``, então o cancelamento de um chamador não cancela os
+  demais. Chamadas de event loops diferentes não são coalescidas.
+
+Cada área (``llm``, ``embeddings``, ``vector_search``) tem uma instância
+única no processo (``get_single_flight``); ``get_single_flight_metrics()``
+expõe os contadores.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from src.settings import SINGLE_FLIGHT_ENABLED
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+def _json_default(value: Any) -> Any:
+    # Arrays numpy (embeddings) entram completos; ``str`` os abreviaria com "..."
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def make_flight_key(*parts: Any) -> str:
+    """Chave estável para as entradas (já normalizadas) de uma chamada."""
+    payload = json.dumps(parts, sort_keys=True, default=_json_default, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.future: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+        self.thread_id = threading.get_ident()
+
+
+class SingleFlight:
+    """Compartilha uma execução entre chamadas idênticas simultâneas.
+
+    Args:
+        name: Nome usado em logs e métricas
+        enabled: Se False, toda chamada executa normalmente
+    """
+
+    def __init__(self, name: str, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Tuple[asyncio.AbstractEventLoop, Hashable], "asyncio.Task[Any]"] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """Executa ``fn`` ou aguarda a execução idêntica em andamento (síncrono)."""
+        if not self.enabled:
+            return fn()
+        with self._lock:
+            in_flight = self._calls.get(key)
+            if in_flight is not None and in_flight.thread_id != threading.get_ident():
+                self._stats["coalesced"] += 1
+            else:
+                self._stats["executions"] += 1
+                if in_flight is None:
+                    call = self._calls[key] = _Call()
+
+        if in_flight is not None:
+            if in_flight.thread_id == threading.get_ident():
+                return fn()  # reentrada na thread líder
+            logger.debug(f"🔗 {self.name}: aguardando chamada idêntica em andamento")
+            return in_flight.future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.future.set_exception(e)
+            raise
+        else:
+            call.future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Executa ``fn()`` ou aguarda a execução idêntica em andamento (assíncrono)."""
+        if not self.enabled:
+            return await fn()
+        flight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._tasks.get(flight_key)
+            reentrant = task is not None and task is asyncio.current_task()
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._tasks[flight_key] = task
+                task.add_done_callback(lambda done: self._forget(flight_key, done))
+                self._stats["executions"] += 1
+            elif not reentrant:
+                self._stats["coalesced"] += 1
+                logger.debug(f"🔗 {self.name}: aguardando chamada idêntica em andamento")
+        if reentrant:
+            return await fn()
+        return await asyncio.shield(task)
+
+    def _forget(self, flight_key: Tuple[asyncio.AbstractEventLoop, Hashable], task: "asyncio.Task[Any]") -> None:
+        with self._lock:
+            if self._tasks.get(flight_key) is task:
+                del self._tasks[flight_key]
+        if not task.cancelled():
+            task.exception()  # evita "exception was never retrieved" se ninguém mais aguarda
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls) + len(self._tasks), "enabled": self.enabled}
+
+
+_flights: Dict[str, SingleFlight] = {}
+_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Retorna o ``SingleFlight`` da área (único no processo)."""
+    if name not in _flights:
+        with _flights_lock:
+            if name not in _flights:
+                _flights[name] = SingleFlight(name)
+    return _flights[name]
+
+
+def get_single_flight_metrics() -> Dict[str, Dict[str, Any]]:
+    """Contadores de execuções e chamadas coalescidas por área."""
+    with _flights_lock:
+        flights = dict(_flights)
+    return {name: flight.get_metrics() for name, flight in sorted(flights.items())}
@@ -0,0 +1,246 @@
+"""Leitura paginada, projetada e paralela da tabela embeddings.
+
+Substitui o ``select('*')`` sem paginação usado na reconstrução de dados:
+
+- Projeção: seleciona apenas as colunas necessárias (nunca o vetor
+  ``embedding``, que sozinho é a maior parte do payload)
+- Paginação por keyset em ``id`` (``id > último``), sem depender de
+  OFFSET nem do limite silencioso de linhas do PostgREST
+- Paralelismo limitado: o espaço de UUIDs é dividido em partições
+  independentes, cada uma percorrida por keyset em um worker
+- Filtros por fonte (``source_id``) e ``chunk_type``
+- Streaming: as páginas são entregues ao consumidor à medida que chegam
+
+Obs.: ``page_size`` não deve passar do ``max-rows`` do PostgREST (1000 no
+Supabase); uma página menor que ``page_size`` encerra a partição.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.settings import (
+    EMBEDDINGS_READ_MAX_WORKERS,
+    EMBEDDINGS_READ_PAGE_SIZE,
+    EMBEDDINGS_READ_PARTITIONS,
+)
+from src.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Colunas geradas pela migration 0008 (source_id/row_start/row_end)
+PROJECTED_COLUMNS: Tuple[str, ...] = ("id", "chunk_text", "metadata", "source_id", "row_start", "row_end")
+# Projeção para bancos sem a migration 0008
+LEGACY_COLUMNS: Tuple[str, ...] = ("id", "chunk_text", "metadata")
+
+_UUID_SPACE = 1 << 128
+_DONE = object()
+
+
+class EmbeddingsReaderError(Exception):
+    """Falha na leitura paginada da tabela embeddings."""
+    pass
+
+
+class _PartitionFailure:
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def uuid_partitions(count: int) -> List[Tuple[Optional[str], Optional[str]]]:
+    """Divide o espaço de UUIDs em ``count`` intervalos [inferior, superior).
+
+    O primeiro intervalo não tem limite inferior e o último não tem limite
+    superior, de modo que qualquer id (inclusive fora do padrão) é coberto.
+    """
+    count = max(1, int(count))
+    bounds = [str(uuid.UUID(int=i * _UUID_SPACE // count)) for i in range(1, count)]
+    lowers: List[Optional[str]] = [None, *bounds]
+    uppers: List[Optional[str]] = [*bounds, None]
+    return list(zip(lowers, uppers))
+
+
+class EmbeddingsReader:
+    """Leitor da tabela embeddings com keyset pagination e partições paralelas.
+
+    Args:
+        client: Cliente Supabase (``supabase.table(...)``)
+        source: Filtra por fonte (``source_id``; ``metadata->>source`` sem a migration 0008)
+        chunk_type: Filtra por ``metadata->>chunk_type`` (ex.: ``csv_data``)
+        metadata_filter: Filtros adicionais ``metadata->>chave = valor``
+        columns: Colunas desejadas (padrão: ``PROJECTED_COLUMNS``)
+        limit: Máximo de registros (leitura sequencial por id quando definido)
+        page_size: Registros por página
+        max_workers: Partições lidas simultaneamente
+        partitions: Número de partições do espaço de ids
+    """
+
+    def __init__(self,
+                 client: Any,
+                 source: Optional[str] = None,
+                 chunk_type: Optional[str] = None,
+                 metadata_filter: Optional[Dict[str, Any]] = None,
+                 columns: Optional[Sequence[str]] = None,
+                 limit: Optional[int] = None,
+                 page_size: int = EMBEDDINGS_READ_PAGE_SIZE,
+                 max_workers: int = EMBEDDINGS_READ_MAX_WORKERS,
+                 partitions: int = EMBEDDINGS_READ_PARTITIONS):
+        if client is None:
+            raise EmbeddingsReaderError("Cliente Supabase não disponível")
+        self.client = client
+        self.source = source
+        self.chunk_type = chunk_type
+        self.metadata_filter = dict(metadata_filter or {})
+        self.columns = tuple(columns or PROJECTED_COLUMNS)
+        self.limit = limit
+        self.page_size = max(1, int(page_size))
+        self.max_workers = max(1, int(max_workers))
+        self.partitions = max(1, int(partitions))
+        self._has_row_range_columns: Optional[bool] = None
+        self.pages_read = 0
+        self.records_read = 0
+
+    # ------------------------------------------------------------------
+    # Montagem das consultas
+    # ------------------------------------------------------------------
+    def _detect_row_range_columns(self) -> bool:
+        """Verifica uma única vez se as colunas geradas da migration 0008 existem."""
+        if self._has_row_range_columns is None:
+            try:
+                self.client.table('embeddings').select('id, source_id').limit(1).execute()
+                self._has_row_range_columns = True
+            except Exception as e:
+                logger.warning(f"⚠️ Colunas source_id/row_start indisponíveis ({e}); usando metadata")
+                self._has_row_range_columns = False
+        return self._has_row_range_columns
+
+    def _select_clause(self) -> str:
+        columns = self.columns
+        if not self._detect_row_range_columns():
+            columns = tuple(c for c in columns if c not in ("source_id", "row_start", "row_end"))
+        if "id" not in columns:
+            columns = ("id", *columns)
+        return ", ".join(columns)
+
+    def _base_query(self, select_clause: str):
+        query = self.client.table('embeddings').select(select_clause)
+        if self.source:
+            if self._detect_row_range_columns():
+                query = query.eq('source_id', self.source)
+            else:
+                query = query.eq('metadata->>source', self.source)
+        if self.chunk_type:
+            query = query.eq('metadata->>chunk_type', self.chunk_type)
+        for key, value in self.metadata_filter.items():
+            query = query.eq(f'metadata->>{key}', value)
+        return query
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+    def _scan_partition(self, lower: Optional[str], upper: Optional[str],
+                        select_clause: str, stop: Optional[threading.Event] = None,
+                        limit: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Percorre uma partição por keyset (``id > último``) em páginas."""
+        last_id: Optional[str] = None
+        remaining = limit
+        while stop is None or not stop.is_set():
+            size = self.page_size if remaining is None else min(self.page_size, remaining)
+            if size <= 0:
+                return
+            query = self._base_query(select_clause)
+            if last_id is not None:
+                query = query.gt('id', last_id)
+            elif lower is not None:
+                query = query.gte('id', lower)
+            if upper is not None:
+                query = query.lt('id', upper)
+            page = query.order('id').limit(size).execute().data or []
+            if page:
+                yield page
+                last_id = page[-1]['id']
+                if remaining is not None:
+                    remaining -= len(page)
+            if len(page) < size:
+                return
+
+    def iter_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """Entrega as páginas à medida que chegam (ordem entre partições não garantida).
+
+        Raises:
+            EmbeddingsReaderError: Se alguma partição falhar
+        """
+        select_clause = self._select_clause()
+        self.pages_read = 0
+        self.records_read = 0
+
+        if self.limit is not None or self.partitions == 1 or self.max_workers == 1:
+            partitions = [(None, None)] if self.limit is not None else uuid_partitions(self.partitions)
+            try:
+                for lower, upper in partitions:
+                    for page in self._scan_partition(lower, upper, select_clause, limit=self.limit):
+                        self._count(page)
+                        yield page
+            except Exception as e:
+                raise EmbeddingsReaderError(f"Falha ao ler embeddings: {e}") from e
+            return
+
+        yield from self._iter_pages_parallel(select_clause)
+
+    def _iter_pages_parallel(self, select_clause: str) -> Iterator[List[Dict[str, Any]]]:
+        partitions = uuid_partitions(self.partitions)
+        pages: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_workers * 2)
+        stop = threading.Event()
+
+        def put(item: Any) -> None:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def worker(lower: Optional[str], upper: Optional[str]) -> None:
+            try:
+                for page in self._scan_partition(lower, upper, select_clause, stop=stop):
+                    put(page)
+            except Exception as e:
+                put(_PartitionFailure(e))
+            finally:
+                put(_DONE)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embeddings-reader")
+        try:
+            for lower, upper in partitions:
+                executor.submit(worker, lower, upper)
+            finished = 0
+            while finished < len(partitions):
+                item = pages.get()
+                if item is _DONE:
+                    finished += 1
+                elif isinstance(item, _PartitionFailure):
+                    raise EmbeddingsReaderError(f"Falha ao ler embeddings: {item.error}") from item.error
+                else:
+                    self._count(item)
+                    yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _count(self, page: List[Dict[str, Any]]) -> None:
+        self.pages_read += 1
+        self.records_read += len(page)
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Como ``iter_pages``, mas registro a registro."""
+        for page in self.iter_pages():
+            yield from page
+
+    def read_all(self) -> List[Dict[str, Any]]:
+        """Lê todos os registros (ordenados por id)."""
+        records = list(self.iter_records())
+        records.sort(key=lambda r: str(r.get('id')))
+        return records
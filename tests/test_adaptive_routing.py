@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import pytest
+
+from src.llm.adaptive_routing import AdaptiveRouter, RollingStats, hedged_race
+from src.llm.llm_router import ComplexityLevel
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.resilience import reset_provider_resilience
+
+
+@pytest.fixture(autouse=True)
+def fresh_resilience(monkeypatch):
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", False)
+    reset_provider_resilience()
+    yield
+    reset_provider_resilience()
+
+
+class FakeProvider:
+    """Provedor local com latência ajustável em tempo de execução."""
+
+    def __init__(self, provider, latency):
+        self.provider = provider
+        self.latency = latency
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self, prompt, config, system_prompt=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return LLMResponse(content=self.provider.value, provider=self.provider, model="fake")
+
+
+def make_manager(router, **latencies):
+    fakes = {LLMProvider[name.upper()]: FakeProvider(LLMProvider[name.upper()], latency)
+             for name, latency in latencies.items()}
+    manager = LLMManager(preferred_providers=list(fakes), provider_callers=dict(fakes), router=router)
+    return manager, fakes
+
+
+def test_rolling_stats_and_ranking():
+    stats = RollingStats(window=4)
+    for latency in (9.0, 1.0, 2.0, 3.0, 4.0):
+        stats.record(latency, True)
+    assert stats.count == 4 and stats.p50 == 2.5  # a amostra mais antiga saiu da janela
+
+    router = AdaptiveRouter(min_samples=3, error_penalty=5.0)
+    candidates = [("groq", "groq", "m"), ("google", "google", "m"), ("openai", "openai", "m")]
+    assert router.rank(candidates) == ["groq", "google", "openai"]  # sem dados: ordem de preferência
+
+    for _ in range(4):
+        router.record("groq", "m", 1.0, True)
+        router.record("google", "m", 0.1, True)
+    assert router.rank(candidates) == ["google", "openai", "groq"]  # sem amostras = otimista
+
+    for _ in range(4):
+        router.record("google", "m", 0.1, False)
+    assert router.expected_latency("google", "m") == pytest.approx(0.1 + 0.5 * 5.0)
+    assert router.rank(candidates)[0] in ("groq", "openai") and router.rank(candidates)[-1] == "google"
+
+    # Estatísticas separadas por nível de complexidade
+    assert router.rank(candidates, ComplexityLevel.COMPLEX) == ["groq", "google", "openai"]
+
+
+@pytest.mark.asyncio
+async def test_routing_follows_provider_latency():
+    router = AdaptiveRouter(min_samples=3)
+    manager, fakes = make_manager(router, groq=0.08, google=0.01)
+    groq, google = fakes[LLMProvider.GROQ], fakes[LLMProvider.GOOGLE]
+
+    for i in range(3):
+        assert (await manager.achat(f"aquecimento {i}")).content == "groq"
+    # Google ainda sem amostras: otimista, mas a ordem de preferência desempata a favor do Groq
+    groq.latency = 0.2
+    google_calls = google.calls
+    for i in range(3):
+        await manager.achat(f"lento {i}", LLMConfig())
+    assert google.calls == google_calls
+
+    # Groq fica lento e falha: depois de medir o Google, ele passa a ser o primeiro
+    async def failing(prompt, config, system_prompt=None):
+        groq.calls += 1
+        raise ValueError("erro do provedor")
+
+    manager._provider_callers[LLMProvider.GROQ] = failing
+    for i in range(3):
+        assert (await manager.achat(f"falha {i}")).content == "google"
+    manager._provider_callers[LLMProvider.GROQ] = groq
+    calls = groq.calls
+    assert (await manager.achat("depois")).content == "google"
+    assert groq.calls == calls
+    assert manager.get_status()["routing"]["providers"]
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_when_primary_exceeds_p95():
+    router = AdaptiveRouter(min_samples=3, hedging_enabled=True, hedge_min_delay=0.01)
+    manager, fakes = make_manager(router, groq=0.02, google=0.02)
+    groq, google = fakes[LLMProvider.GROQ], fakes[LLMProvider.GOOGLE]
+
+    for i in range(3):
+        await manager.achat(f"aquecimento {i}")
+    assert google.calls == 0
+
+    groq.latency = 2.0  # degradação súbita
+    start = time.perf_counter()
+    response = await manager.achat("pergunta")
+    elapsed = time.perf_counter() - start
+
+    assert response.provider == LLMProvider.GOOGLE and elapsed < 0.5
+    assert groq.cancelled == 1 and google.calls == 1
+    # A perdedora cancelada não entra nas estatísticas como sucesso rápido
+    groq_stats = [v for k, v in router.get_metrics()["providers"].items() if k.startswith("groq/")]
+    assert [s["samples"] for s in groq_stats] == [3] and groq_stats[0]["error_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_hedged_race_falls_back_to_surviving_call():
+    async def slow_failure():
+        await asyncio.sleep(0.05)
+        raise ConnectionError("primário caiu")
+
+    async def ok():
+        await asyncio.sleep(0.1)
+        return "secundário"
+
+    assert await hedged_race(slow_failure, ok, delay=0.01) == (1, "secundário")
+
+    async def fast():
+        return "primário"
+
+    assert await hedged_race(fast, ok, delay=1.0) == (0, "primário")
+
+    with pytest.raises(ConnectionError):
+        await hedged_race(slow_failure, slow_failure, delay=0.01)
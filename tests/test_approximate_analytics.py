@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.agent.csv_analysis_agent as csv_analysis_agent
+import src.tools.python_analyzer as python_analyzer
+from src.data.approximate_analytics import (
+    ApproximateAnalyticsError,
+    ApproximateQueryEngine,
+    StratifiedSampleSet,
+    choose_strata_column,
+    get_sample_registry,
+)
+from src.data.dataset_cache import get_dataset_cache
+from src.tools.python_analyzer import PythonDataAnalyzer
+
+
+def make_df(rows=20000, seed=11):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Time": np.arange(rows),
+        "V1": rng.normal(size=rows),
+        "V2": rng.normal(size=rows),
+        "Amount": rng.exponential(80, size=rows).round(2),
+        "Class": (rng.random(rows) < 0.002).astype(int),
+    })
+    df.loc[df["Class"] == 1, "V1"] -= 4
+    return df
+
+
+@pytest.fixture
+def engine():
+    df = make_df()
+    sample_set = StratifiedSampleSet(df, sizes=(500, 2000, 8000))
+    return ApproximateQueryEngine(sample_set, exact_loader=lambda: df), df
+
+
+def test_strata_column_and_rare_class_represented(engine):
+    eng, df = engine
+    sample_set = eng.sample_set
+    assert choose_strata_column(df) == "Class"
+    assert sample_set.strata_column == "Class"
+
+    smallest = sample_set.level(500)
+    fraud = smallest[smallest["Class"] == 1]
+    assert len(fraud) == min(int(df["Class"].sum()), 30)
+    # Pesos reconstituem o tamanho da população
+    assert smallest["_weight"].sum() == pytest.approx(len(df))
+
+
+def test_confidence_intervals_cover_true_values(engine):
+    eng, df = engine
+    mean = eng.estimate("mean", "Amount")
+    assert not mean.exact
+    assert mean.ci_low <= df["Amount"].mean() <= mean.ci_high
+
+    q90 = eng.estimate("quantile", "Amount", q=0.9)
+    assert q90.ci_low <= df["Amount"].quantile(0.9) <= q90.ci_high
+
+    corr = eng.estimate("correlation", "V1", other="Class")
+    assert corr.ci_low <= df["V1"].corr(df["Class"]) <= corr.ci_high
+
+    skew = eng.estimate("skewness", "Amount", max_abs_error=0.5)
+    assert skew.ci_low <= df["Amount"].skew() <= skew.ci_high
+
+
+def test_escalates_to_exact_when_precision_requires(engine):
+    eng, df = engine
+    result = eng.estimate("mean", "Amount", max_rel_error=0.0001)
+    assert result.exact
+    assert result.sample_size == len(df)
+    assert result.value == pytest.approx(df["Amount"].mean())
+
+    for statistic, expected in (("skewness", df["Amount"].skew()), ("kurtosis", df["Amount"].kurt()),
+                                ("std", df["Amount"].std())):
+        exact = eng.estimate(statistic, "Amount", max_abs_error=1e-9)
+        assert exact.exact and exact.value == pytest.approx(expected)
+
+    rate = eng.estimate("outlier_rate", "Amount", max_abs_error=1e-6)
+    q1, q3 = df["Amount"].quantile([0.25, 0.75])
+    expected = ((df["Amount"] < q1 - 1.5 * (q3 - q1)) | (df["Amount"] > q3 + 1.5 * (q3 - q1))).mean()
+    assert rate.exact
+    assert rate.value == pytest.approx(expected)
+
+
+def test_sample_set_built_incrementally_from_chunks():
+    df = make_df()
+    # Primeiro pedaço sem nenhuma fraude: o rótulo conhecido ainda vira estrato
+    df = pd.concat([df[df["Class"] == 0].head(3000), df.drop(df[df["Class"] == 0].head(3000).index)])
+    chunks = [df.iloc[start:start + 3000] for start in range(0, len(df), 3000)]
+
+    sample_set = StratifiedSampleSet.from_chunks(chunks, sizes=(500, 2000, 8000))
+    assert sample_set.strata_column == "Class"
+    assert sample_set.population_size == len(df)
+    assert sample_set.strata_sizes == {"0": int((df["Class"] == 0).sum()), "1": int(df["Class"].sum())}
+    assert len(sample_set.frame) == sum(sample_set._allocations[8000].values())
+
+    smallest = sample_set.level(500)
+    assert len(smallest[smallest["Class"] == 1]) == min(int(df["Class"].sum()), 30)
+    assert smallest["_weight"].sum() == pytest.approx(len(df))
+    # Aninhadas: a amostra menor está contida na maior
+    assert set(smallest["Time"]) <= set(sample_set.level(2000)["Time"])
+
+    engine = ApproximateQueryEngine(sample_set, exact_loader=lambda: df)
+    mean = engine.estimate("mean", "Amount")
+    assert mean.ci_low <= df["Amount"].mean() <= mean.ci_high
+
+
+def test_unsupported_statistic_or_column(engine):
+    eng, _ = engine
+    with pytest.raises(ApproximateAnalyticsError):
+        eng.estimate("mode", "Amount")
+    with pytest.raises(ApproximateAnalyticsError):
+        eng.estimate("mean", "missing")
+
+
+def test_agent_approximate_mode(monkeypatch):
+    df = make_df()
+    monkeypatch.setattr(python_analyzer, "supabase", object())
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", True)
+    monkeypatch.setattr(PythonDataAnalyzer, "reconstruct_original_data", lambda self: df)
+    monkeypatch.setattr(PythonDataAnalyzer, "_get_embeddings_version", lambda self, source=None: "v-approx")
+    monkeypatch.setattr(csv_analysis_agent, "SUPABASE_AVAILABLE", True)
+    get_dataset_cache().invalidate()
+    get_sample_registry().clear()
+
+    agent = csv_analysis_agent.EmbeddingsAnalysisAgent()
+    result = agent._handle_outliers_query_from_embeddings("outliers", {"approximate": True})
+    metadata = result["metadata"]
+    assert metadata["approximate"] is True
+    assert metadata["strata_column"] == "Class"
+    assert {e["column"] for e in metadata["estimates"]} == {"Time", "V1", "V2", "Amount"}
+
+    correlation = agent._handle_correlation_query_from_embeddings("correlação", {"approximate": True})
+    assert len(correlation["metadata"]["estimates"]) == 10
+    get_sample_registry().clear()
+    get_dataset_cache().invalidate()
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from src.llm.async_runtime import LoopLocalCache, get_background_loop, run_sync
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.resilience import reset_provider_resilience
+
+
+@pytest.fixture(autouse=True)
+def fresh_resilience(monkeypatch):
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", False)
+    reset_provider_resilience()
+    yield
+    reset_provider_resilience()
+
+
+def fake_provider(provider, latency=0.2, fail=False, calls=None):
+    async def call(prompt, config, system_prompt=None):
+        if calls is not None:
+            calls.append(prompt)
+        await asyncio.sleep(latency)
+        if fail:
+            raise RuntimeError(f"{provider.value} fora do ar")
+        return LLMResponse(content=f"{provider.value}: {prompt}", provider=provider,
+                           model="fake", processing_time=latency)
+    return call
+
+
+def make_manager(**callers):
+    return LLMManager(
+        preferred_providers=[LLMProvider.GROQ, LLMProvider.GOOGLE],
+        provider_callers={LLMProvider[name.upper()]: caller for name, caller in callers.items()},
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_achat_calls_overlap():
+    manager = make_manager(groq=fake_provider(LLMProvider.GROQ, latency=0.2))
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(manager.achat(f"p{i}", LLMConfig()) for i in range(10)))
+    elapsed = time.perf_counter() - start
+
+    assert [r.content for r in responses] == [f"groq: p{i}" for i in range(10)]
+    assert elapsed < 1.0  # serializado levaria 2s
+
+
+def test_sync_chat_wraps_achat_inside_and_outside_event_loop():
+    manager = make_manager(groq=fake_provider(LLMProvider.GROQ, latency=0.01))
+    assert manager.chat("fora").content == "groq: fora"
+
+    async def handler():
+        return manager.chat("dentro")
+
+    assert asyncio.run(handler()).content == "groq: dentro"
+
+    # Código síncrono chamado de dentro do próprio loop de fundo não trava
+    async def nested():
+        return manager.chat("aninhado")
+
+    assert run_sync(nested(), timeout=5).content == "groq: aninhado"
+
+
+@pytest.mark.asyncio
+async def test_achat_falls_back_to_next_provider():
+    calls = []
+    manager = make_manager(
+        groq=fake_provider(LLMProvider.GROQ, latency=0.01, fail=True, calls=calls),
+        google=fake_provider(LLMProvider.GOOGLE, latency=0.01, calls=calls),
+    )
+
+    response = await manager.achat("oi")
+    assert response.success and response.provider == LLMProvider.GOOGLE
+    assert manager.active_provider == LLMProvider.GOOGLE and calls == ["oi", "oi"]
+
+    failing = make_manager(groq=fake_provider(LLMProvider.GROQ, latency=0.01, fail=True))
+    response = await failing.achat("oi")
+    assert not response.success and "fora do ar" in response.error
+
+
+def test_loop_local_cache_isolates_event_loops():
+    cache = LoopLocalCache()
+
+    async def get():
+        return cache.get_or_create("client", object)
+
+    async def twice():
+        return await get(), await get()
+
+    first, again = asyncio.run(twice())
+    assert first is again
+    assert asyncio.run(get()) is not first
+    assert run_sync(get()) is run_sync(get())
+    assert get_background_loop().is_running()
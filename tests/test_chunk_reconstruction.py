@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.chunk_reconstruction import (
+    ChunkReconstructionError,
+    iter_dataframe_windows,
+    reconstruct_dataframe,
+    reconstruct_dataframe_from_frame,
+)
+from src.embeddings.chunker import ChunkStrategy, TextChunker
+from src.embeddings.csv_enrichment import enrich_csv_chunks
+from src.tools.python_analyzer import PythonDataAnalyzer
+
+
+def make_csv(rows: int, seed: int = 7) -> str:
+    rng = np.random.default_rng(seed)
+    header = '"Time",' + ",".join(f'"V{i}"' for i in range(1, 6)) + ',"Amount","Class"'
+    lines = [header]
+    for i in range(rows):
+        values = ",".join(repr(float(v)) for v in rng.normal(size=5))
+        lines.append(f"{i},{values},{rng.uniform(0, 500):.2f},\"{int(rng.random() < 0.1)}\"")
+    return "\n".join(lines)
+
+
+def embeddings_frame(csv_text: str, source: str = "creditcard") -> pd.DataFrame:
+    chunker = TextChunker(csv_chunk_size_rows=20, csv_overlap_rows=4)
+    chunks = enrich_csv_chunks(chunker.chunk_text(csv_text, source, ChunkStrategy.CSV_ROW))
+    records = []
+    for chunk in chunks:
+        metadata = {"source": source, "chunk_index": chunk.metadata.chunk_index}
+        metadata.update(chunk.metadata.additional_info)
+        records.append({"id": f"{source}-{chunk.metadata.chunk_index}", "chunk_text": chunk.content, "metadata": metadata})
+    # Chunk analítico sem intervalo de linhas e ordem embaralhada (como no banco)
+    records.append({"id": "meta", "chunk_text": "Numéricas: Time, V1, V2", "metadata": {"chunk_type": "metadata_types"}})
+    return pd.DataFrame(records).sample(frac=1.0, random_state=1).reset_index(drop=True)
+
+
+@pytest.fixture
+def analyzer():
+    return PythonDataAnalyzer(caller_agent="test_system")
+
+
+def test_matches_legacy_parser_without_overlap_duplicates(analyzer):
+    csv_text = make_csv(250)
+    frame = embeddings_frame(csv_text)
+
+    fast = reconstruct_dataframe_from_frame(frame)
+    # Referência: parser legado sobre o CSV inteiro (um único bloco, sem overlap)
+    legacy = analyzer._parse_chunk_text_to_dataframe_legacy(pd.DataFrame([{"chunk_text": csv_text}]))
+
+    assert list(fast.columns) == list(legacy.columns)
+    assert len(fast) == 250
+    pd.testing.assert_frame_equal(fast.reset_index(drop=True), legacy.reset_index(drop=True), check_dtype=True)
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_engines_agree(engine):
+    pytest.importorskip("pyarrow") if engine == "pyarrow" else None
+    frame = embeddings_frame(make_csv(60))
+    df = reconstruct_dataframe_from_frame(frame, engine=engine)
+    assert df["Time"].tolist() == list(range(60))
+    assert df["Class"].dtype == np.int64
+
+
+def test_windows_match_full_reconstruction():
+    frame = embeddings_frame(make_csv(250))
+    records = frame.to_dict("records")
+
+    windows = list(iter_dataframe_windows(records, window_rows=60))
+    assert [len(w) for w in windows] == [60, 60, 60, 60, 10]
+    pd.testing.assert_frame_equal(pd.concat(windows, ignore_index=True), reconstruct_dataframe(records))
+
+
+def test_row_range_subset():
+    frame = embeddings_frame(make_csv(100))
+    df = reconstruct_dataframe_from_frame(frame, row_start=31, row_end=45)
+    assert df["Time"].tolist() == list(range(30, 45))
+
+
+def test_analyzer_uses_fast_path_and_falls_back(analyzer):
+    frame = embeddings_frame(make_csv(40))
+    df = analyzer._parse_chunk_text_to_dataframe(frame)
+    assert len(df) == 40
+
+    legacy_only = pd.DataFrame([{"chunk_text": '"a","b"\n1,2\n3,4', "metadata": {}}])
+    df = analyzer._parse_chunk_text_to_dataframe(legacy_only)
+    assert df["a"].tolist() == [1, 3]
+
+
+def test_error_without_row_ranges():
+    with pytest.raises(ChunkReconstructionError):
+        reconstruct_dataframe([{"chunk_text": "a,b\n1,2", "metadata": {}}])
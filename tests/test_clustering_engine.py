@@ -0,0 +1,89 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.data.clustering_engine as clustering_engine
+import src.tools.python_analyzer as python_analyzer
+from src.data.clustering_engine import ClusteringEngine, ClusteringError
+from src.data.dataset_cache import get_dataset_cache
+from src.tools.python_analyzer import PythonDataAnalyzer
+
+
+def make_blobs(rows_per_blob=3000, seed=5):
+    rng = np.random.default_rng(seed)
+    centers = np.array([[0, 0, 0], [8, 8, 0], [0, 8, 8], [8, 0, 8]], dtype=float)
+    points = np.vstack([rng.normal(c, 0.7, size=(rows_per_blob, 3)) for c in centers])
+    df = pd.DataFrame(points, columns=["V1", "V2", "V3"])
+    df.insert(0, "id", np.arange(len(df)))
+    df["tipo"] = "x"
+    return df
+
+
+def test_automatic_k_recovers_blobs():
+    engine = ClusteringEngine(sample_size=4000, batch_size=1024, k_range=range(2, 7), trace_memory=True)
+    result = engine.run(make_blobs())
+
+    assert result.n_clusters == 4
+    assert result.method == "minibatch_kmeans"
+    assert result.numeric_columns == ["V1", "V2", "V3"]
+    assert sorted(result.cluster_distribution.values()) == [3000] * 4
+    assert max(result.k_selection, key=result.k_selection.get) == 4
+    assert result.elapsed_seconds > 0
+    assert result.peak_memory_mb > 0
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_tracing_is_opt_in():
+    result = ClusteringEngine(sample_size=2000, k_range=range(2, 4)).run(make_blobs(500))
+    assert result.peak_memory_mb is None and not tracemalloc.is_tracing()
+    assert isinstance(result.memory_delta_mb, float)
+
+
+def test_results_cached_per_key_and_parameters():
+    engine = ClusteringEngine(sample_size=2000, batch_size=1024, k_range=range(2, 5))
+    df = make_blobs(500)
+    first = engine.run(df, n_clusters=3, cache_key=("creditcard", "v1"))
+    again = engine.run(df, n_clusters=3, cache_key=("creditcard", "v1"))
+    assert not first.cached and again.cached
+    assert again.cluster_distribution == first.cluster_distribution
+
+    engine.run(df, n_clusters=2, cache_key=("creditcard", "v1"))
+    engine.run(df, n_clusters=3, cache_key=("creditcard", "v2"))
+    assert engine.get_stats() == {"runs": 3, "hits": 1, "entries": 3}
+
+    loads = []
+    engine.load_and_run(lambda: loads.append(1) or df, n_clusters=3, cache_key=("creditcard", "v1"))
+    assert loads == []
+
+
+def test_no_numeric_columns():
+    with pytest.raises(ClusteringError):
+        ClusteringEngine().run(pd.DataFrame({"tipo": ["a", "b"]}))
+
+
+def test_analyzer_reports_clustering(monkeypatch):
+    df = make_blobs(500)
+    loads = []
+
+    def reconstruct(self):
+        loads.append(1)
+        return df
+
+    monkeypatch.setattr(python_analyzer, "supabase", object())
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", True)
+    monkeypatch.setattr(PythonDataAnalyzer, "reconstruct_original_data", reconstruct)
+    monkeypatch.setattr(PythonDataAnalyzer, "_get_embeddings_version", lambda self, source=None: "v-cluster")
+    monkeypatch.setattr(clustering_engine, "_clustering_engine", ClusteringEngine(sample_size=2000, k_range=range(2, 6)))
+    get_dataset_cache().invalidate()
+
+    analyzer = PythonDataAnalyzer(caller_agent="test_system")
+    result = analyzer.calculate_clustering_analysis()
+    assert result["success"] and result["n_clusters"] == 4
+    assert result["total_points"] == 2000
+    assert "elapsed_seconds" in result and "peak_memory_mb" in result
+
+    assert analyzer.calculate_clustering_analysis()["cached"] is True
+    assert loads == [1]
+    get_dataset_cache().invalidate()
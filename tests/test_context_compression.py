@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from src.llm.context_compression import ContextCompressor
+from src.llm.prompt_budget import get_token_counter
+
+HEADER = "Time,V1,V2,Amount,Class"
+
+
+def csv_rows(start, end):
+    return [f"{i},{i * 0.01:.4f},{-i * 0.02:.4f},{i * 1.5:.2f},{i % 2}" for i in range(start, end)]
+
+
+def overlapping_chunks(n_chunks=10, rows=100, overlap=20):
+    step = rows - overlap
+    return ["\n".join([HEADER] + csv_rows(i * step, i * step + rows)) for i in range(n_chunks)]
+
+
+@pytest.fixture
+def counter():
+    return get_token_counter()
+
+
+def test_overlap_rows_and_repeated_headers_are_deduplicated(counter):
+    chunks = overlapping_chunks(n_chunks=3, rows=50, overlap=10)
+    result = ContextCompressor(max_tokens=0, counter=counter).compress("linhas do csv", chunks)
+
+    lines = [line for chunk in result.chunks for line in chunk.split("\n")]
+    assert lines.count(HEADER) == 1
+    assert len(lines) == len(set(lines)) == 1 + 130  # cabeçalho + linhas únicas
+    assert result.duplicate_lines == 2 * (10 + 1) and result.dropped_chunks == 0
+    assert result.compressed_tokens < result.original_tokens
+
+
+def test_chunks_adding_little_are_dropped(counter):
+    base = [HEADER] + csv_rows(0, 40)
+    mostly_repeated = [HEADER] + csv_rows(5, 40) + csv_rows(100, 102)
+    different = [HEADER] + csv_rows(200, 240)
+    embeddings = [np.ones(8), np.ones(8), -np.ones(8)]
+
+    compressor = ContextCompressor(max_tokens=0, min_novelty=0.2, counter=counter)
+    result = compressor.compress("csv", ["\n".join(c) for c in (base, mostly_repeated, different)], embeddings)
+    assert result.kept_indices == [0, 2] and result.dropped_chunks == 1
+
+    # Novidade moderada só cai se o embedding for quase idêntico a um chunk mantido
+    half_new = [HEADER] + csv_rows(0, 30) + csv_rows(300, 310)
+    chunks = ["\n".join(base), "\n".join(half_new)]
+    assert compressor.compress("csv", chunks, [np.ones(8), np.ones(8)]).kept_indices == [0]
+    assert compressor.compress("csv", chunks, [np.ones(8), -np.ones(8)]).kept_indices == [0, 1]
+    assert compressor.compress("csv", chunks).kept_indices == [0, 1]
+
+
+def test_budget_keeps_structure_and_query_relevant_lines(counter):
+    metadata = "\n".join([
+        "## Estatísticas do dataset",
+        "| Coluna | Média | Desvio |",
+        "|---|---|---|",
+        "| Amount | 88.35 | 250.12 |",
+        "A coluna Amount tem média de 88.35 e forte assimetria à direita.",
+        "A coluna Time registra segundos desde a primeira transação.",
+        "Fraudes representam 0,17% das transações (coluna Class).",
+    ] + [f"Observação genérica número {i} sobre o processo de ingestão." for i in range(60)])
+    chunks = [metadata] + overlapping_chunks()
+
+    budget = 400
+    result = ContextCompressor(max_tokens=budget, counter=counter).compress("Qual a média de Amount?", chunks)
+    text = "\n".join(result.chunks)
+
+    assert result.ratio >= 4
+    assert result.compressed_tokens <= budget * 1.2  # marcadores de omissão fora da conta
+    assert "| Amount | 88.35 | 250.12 |" in text and "## Estatísticas do dataset" in text
+    assert "A coluna Amount tem média de 88.35 e forte assimetria à direita." in text
+    assert "linhas omitidas]" in text
+    assert result.get_report()["omitted_lines"] == result.omitted_lines > 0
+
+
+def test_small_context_is_untouched(counter):
+    chunks = ["## Resumo\nO dataset tem 31 colunas.", "\n".join([HEADER] + csv_rows(0, 5))]
+    result = ContextCompressor(max_tokens=2000, counter=counter).compress("quantas colunas?", chunks)
+    assert result.chunks == chunks and result.omitted_lines == 0
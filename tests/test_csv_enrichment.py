@@ -0,0 +1,102 @@
+import re
+
+from src.embeddings.chunker import ChunkMetadata, ChunkStrategy, TextChunk, TextChunker
+from src.embeddings.csv_enrichment import enrich_csv_chunks
+
+
+def reference_enrich(chunks):
+    """Implementação original de RAGAgent._enrich_csv_chunks_light (referência)."""
+    enriched_chunks = []
+    for chunk in chunks:
+        info = chunk.metadata.additional_info or {}
+        start_row = info.get("start_row")
+        end_row = info.get("end_row")
+        row_span = f"linhas {start_row} a {end_row}" if start_row and end_row else "intervalo não identificado"
+        lines = chunk.content.split('\n')
+        header_line = lines[0] if lines else ""
+        data_lines = [line for line in lines[1:] if line.strip()]
+        csv_filename = chunk.metadata.additional_info.get('source_file', 'dataset.csv') if chunk.metadata.additional_info else 'dataset.csv'
+        if not csv_filename.endswith('.csv'):
+            csv_match = re.search(r'([\w-]+\.csv)', chunk.content)
+            if csv_match:
+                csv_filename = csv_match.group(1)
+        detected_columns = []
+        if header_line:
+            detected_columns = [col.strip().strip('"') for col in header_line.split(',')]
+            detected_columns = [col for col in detected_columns if col and not col.startswith('#')]
+        target_column = None
+        binary_class_count = 0
+        if detected_columns and len(detected_columns) > 0:
+            target_column = detected_columns[-1]
+            for line in data_lines[:100]:
+                parts = line.split(',')
+                if parts and parts[-1].strip() in ['0', '1', '"0"', '"1"']:
+                    binary_class_count += 1
+        summary_lines = [f"Chunk do dataset {csv_filename} ({row_span}) - {len(data_lines)} registros"]
+        if detected_columns:
+            num_cols = len(detected_columns)
+            col_sample = ', '.join(detected_columns[:3])
+            if num_cols > 3:
+                col_sample += f", ... ({num_cols} colunas no total)"
+            summary_lines.append(f"Colunas: {col_sample}")
+        if binary_class_count > 0:
+            binary_ratio = (binary_class_count / min(len(data_lines), 100)) * 100
+            if binary_ratio > 50:
+                if target_column:
+                    summary_lines.append(f"Coluna '{target_column}': Variável binária detectada (~{binary_ratio:.1f}% de valores binários na amostra)")
+                else:
+                    summary_lines.append(f"Classificação binária detectada (~{binary_ratio:.1f}% na amostra)")
+        if len(detected_columns) > 5:
+            summary_lines.append(f"Dataset com {len(detected_columns)} features para análise")
+        if len(data_lines) >= 2:
+            sample_line = data_lines[0][:150] + "..." if len(data_lines[0]) > 150 else data_lines[0]
+            summary_lines.append(f"Exemplo de registro: {sample_line}")
+        summary_lines.append(f"Colunas: {header_line}")
+        context_summary = "\n".join(summary_lines)
+        enriched_content = f"{context_summary}\n\n=== DADOS ORIGINAIS ===\n{chunk.content}"
+        enriched_chunks.append(TextChunk(content=enriched_content, metadata=chunk.metadata))
+    return enriched_chunks
+
+
+def make_chunk(content, additional_info=None):
+    metadata = ChunkMetadata(
+        source="s", chunk_index=0, strategy=ChunkStrategy.CSV_ROW,
+        char_count=len(content), word_count=len(content.split()),
+        start_position=0, end_position=0, additional_info=additional_info,
+    )
+    return TextChunk(content=content, metadata=metadata)
+
+
+def assert_same_output(chunks):
+    expected = [c.content for c in reference_enrich(chunks)]
+    actual = [c.content for c in enrich_csv_chunks(chunks)]
+    assert actual == expected
+
+
+def test_identical_output_for_chunker_output():
+    header = '"Time",' + ",".join(f'"V{i}"' for i in range(1, 29)) + ',"Amount","Class"'
+    rows = [f"{i}," + ",".join(f"{(i * j) % 7 - 3.25}" for j in range(1, 29)) + f",{i * 2.5},{i % 50 == 0:d}" for i in range(300)]
+    chunker = TextChunker(csv_chunk_size_rows=20, csv_overlap_rows=4)
+    chunks = chunker.chunk_text("\n".join([header, *rows]), "creditcard", ChunkStrategy.CSV_ROW)
+    assert_same_output(chunks)
+
+
+def test_identical_output_for_edge_cases():
+    long_row = ",".join(["123456789.123"] * 30)
+    chunks = [
+        make_chunk("a,b\n1,0", {"start_row": 1, "end_row": 1}),
+        make_chunk("a,b,c,d\n1,2,x\n\n3,4,y", {"start_row": 2, "end_row": 3}),
+        make_chunk('"#id",,"valor"\n1,"1"\n2,"0"\n3,7', None),
+        make_chunk("x,y\n" + long_row + "\n" + long_row, {"source_file": "arquivo", "start_row": 5}),
+        make_chunk("x,y\nvem de vendas-2024.csv,1\n2,1", {"source_file": "sem_extensao"}),
+        make_chunk("", {}),
+        make_chunk("só header", {"start_row": 0, "end_row": 0}),
+    ]
+    assert_same_output(chunks)
+
+
+def test_metadata_is_preserved():
+    chunk = make_chunk("a,b\n1,2", {"start_row": 1, "end_row": 1})
+    (enriched,) = enrich_csv_chunks([chunk])
+    assert enriched.metadata is chunk.metadata
+    assert enriched.content.endswith("=== DADOS ORIGINAIS ===\na,b\n1,2")
@@ -2,11 +2,27 @@ import os
 import io
 import pytest
 from fastapi.testclient import TestClient
+import api_completa
 from api_completa import app
+from src.services.ingest_job_queue import IngestJobQueue
 
 client = TestClient(app)
 
-def test_csv_upload_success():
+
+@pytest.fixture(autouse=True)
+def isolated_ingest_queue(tmp_path, monkeypatch):
+    # Os uploads não podem cair na fila real (data/ do repositório nem Supabase)
+    job_queue = IngestJobQueue(
+        runner=lambda file_path, ctx: {},
+        db_path=tmp_path / "jobs.sqlite3",
+        storage_dir=tmp_path / "processando",
+        autostart=False,
+    )
+    monkeypatch.setattr(api_completa, "get_ingest_job_queue", lambda: job_queue)
+    yield job_queue
+    job_queue.shutdown()
+
+def test_csv_upload_success(isolated_ingest_queue):
     # Cria um CSV simples em memória
     csv_content = 'col1,col2\n1,2\n3,4'
     file = io.BytesIO(csv_content.encode('utf-8'))
@@ -23,6 +39,37 @@ def test_csv_upload_success():
     assert data['rows'] == 2
     assert data['columns'] == 2
     assert data['message'].startswith('CSV carregado')
+    job = isolated_ingest_queue.get_job(data['ingest_job_id'])
+    assert job.filename == 'test_upload.csv'
+
+
+def test_csv_upload_rejected_when_ingest_queue_is_full(isolated_ingest_queue):
+    isolated_ingest_queue.max_queue = 1
+    isolated_ingest_queue.submit(b'a,b\n1,2', 'pendente.csv')
+    files_before = dict(api_completa.uploaded_files)
+
+    response = client.post(
+        '/csv/upload',
+        files={'file': ('test_upload.csv', io.BytesIO(b'col1,col2\n1,2\n3,4'), 'text/csv')}
+    )
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(api_completa.INGEST_JOB_RETRY_AFTER)
+    assert 'Fila de ingestão cheia' in response.json()['detail']
+    # Upload recusado não fica registrado como disponível para análise
+    assert api_completa.uploaded_files == files_before
+
+
+def test_csv_upload_fails_when_ingest_cannot_be_enqueued(isolated_ingest_queue, monkeypatch):
+    def broken_submit(content, filename):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(isolated_ingest_queue, "submit", broken_submit)
+    response = client.post(
+        '/csv/upload',
+        files={'file': ('test_upload.csv', io.BytesIO(b'col1,col2\n1,2'), 'text/csv')}
+    )
+    assert response.status_code == 500
+    assert 'disco cheio' in response.json()['detail']
 
 
 def test_csv_upload_invalid_extension():
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.dataset_cache import DatasetCache
+
+
+def frame(rows=100, value=1.0):
+    return pd.DataFrame({"a": [value] * rows, "b": range(rows)})
+
+
+class CountingLoader:
+    def __init__(self, df=None, delay=0.0):
+        self.df = frame() if df is None else df
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.df
+
+
+def test_hit_returns_independent_copy():
+    cache = DatasetCache()
+    loader = CountingLoader()
+    first = cache.get_or_load("creditcard", loader)
+    first["a"] = 0
+    second = cache.get_or_load("creditcard", loader)
+    assert loader.calls == 1
+    assert second["a"].eq(1.0).all()
+    assert cache.get_stats()["hits"] == 1
+
+    # Acertos não duplicam os dados: a cópia é rasa
+    third = cache.get_or_load("creditcard", loader)
+    assert np.shares_memory(third["b"].to_numpy(), second["b"].to_numpy())
+    third["c"] = 1
+    assert "c" not in cache.get_or_load("creditcard", loader).columns
+
+
+def test_invalidate_and_version_change_reload():
+    cache = DatasetCache(version_ttl=0)
+    loader = CountingLoader()
+    version = {"token": "v1"}
+    get = lambda source: cache.get_or_load(source, loader, version_provider=lambda: version["token"])
+
+    get("a"), get("a")
+    assert loader.calls == 1
+    version["token"] = "v2"
+    get("a")
+    assert loader.calls == 2
+    cache.invalidate("a")
+    get("a")
+    assert loader.calls == 3
+    # Leituras de todas as fontes também são invalidadas por uma fonte específica
+    get(None)
+    cache.invalidate("b")
+    get(None)
+    assert loader.calls == 5
+
+
+def test_single_flight_loads_once():
+    cache = DatasetCache()
+    loader = CountingLoader(delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("s", loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loader.calls == 1
+    assert len(results) == 8 and all(len(r) == 100 for r in results)
+    assert cache.get_stats()["coalesced"] == 7
+
+
+def test_errors_and_none_are_not_cached():
+    cache = DatasetCache()
+    with pytest.raises(ValueError):
+        cache.get_or_load("s", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert cache.get_or_load("s", lambda: None) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_memory_budget_evicts_least_recently_used():
+    size = int(frame().memory_usage(deep=True).sum())
+    cache = DatasetCache(max_bytes=size * 2)
+    for source in ("a", "b"):
+        cache.get_or_load(source, CountingLoader())
+    cache.get_or_load("a", CountingLoader())  # "a" passa a ser o mais recente
+    cache.get_or_load("c", CountingLoader())
+    loader_b = CountingLoader()
+    cache.get_or_load("b", loader_b)
+    assert loader_b.calls == 1
+    assert cache.get_stats()["evictions"] >= 1
+    assert cache.get_or_load("too-big", lambda: frame(rows=10_000)) is not None
+    assert cache.get_stats()["size_bytes"] <= size * 2
+
+
+def test_load_finished_after_invalidation_is_not_stored():
+    cache = DatasetCache()
+    started = threading.Event()
+
+    def slow_loader():
+        started.set()
+        time.sleep(0.1)
+        return frame()
+
+    thread = threading.Thread(target=lambda: cache.get_or_load("s", slow_loader))
+    thread.start()
+    started.wait()
+    cache.invalidate()
+    thread.join()
+    assert cache.get_stats()["entries"] == 0
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.agent.csv_analysis_agent as csv_analysis_agent
+import src.data.dataset_profile as dataset_profile
+import src.tools.python_analyzer as python_analyzer
+from src.data.dataset_cache import get_dataset_cache
+from src.data.dataset_profile import DatasetProfileStore, compute_dataset_profile
+from src.data.outlier_engine import get_outlier_engine
+from src.embeddings.chunker import ChunkStrategy, TextChunker
+from src.embeddings.csv_enrichment import enrich_csv_chunks
+from src.tools.python_analyzer import PythonDataAnalyzer
+
+
+def make_df(rows=500, seed=3):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Time": np.arange(rows),
+        "V1": rng.normal(size=rows),
+        "Amount": rng.exponential(50, size=rows).round(2),
+        "Class": (rng.random(rows) < 0.05).astype(int),
+        "tipo": rng.choice(["a", "b", "c"], size=rows),
+    })
+
+
+def test_profile_matches_pandas():
+    df = make_df()
+    profile = compute_dataset_profile(df, source="creditcard", version="v1")
+
+    assert profile.row_count == 500
+    assert profile.column_types["numericos"] == ["Time", "V1", "Amount", "Class"]
+    assert profile.column_types["categoricos"] == ["tipo"]
+
+    amount = profile.numeric["Amount"]
+    assert amount["mean"] == pytest.approx(df["Amount"].mean())
+    assert amount["std"] == pytest.approx(df["Amount"].std())
+    assert amount["median"] == pytest.approx(df["Amount"].median())
+    assert amount["skewness"] == pytest.approx(df["Amount"].skew())
+    assert amount["mode"] == pytest.approx(df["Amount"].mode().iloc[0])
+    q1, q3 = df["Amount"].quantile([0.25, 0.75])
+    assert amount["outliers_upper"] == int((df["Amount"] > q3 + 1.5 * (q3 - q1)).sum())
+    assert profile.correlation["V1"]["Amount"] == pytest.approx(df["V1"].corr(df["Amount"]))
+    assert sum(profile.histograms["V1"]["counts"]) == 500
+    assert profile.categorical["tipo"]["unique_count"] == 3
+
+
+def test_store_round_trip_and_prunes_old_versions(tmp_path):
+    store = DatasetProfileStore(tmp_path / "profiles.sqlite3")
+    for version in ("v1", "v2", "v3", "v4"):
+        store.save(compute_dataset_profile(make_df(50), version=version))
+
+    reopened = DatasetProfileStore(tmp_path / "profiles.sqlite3")
+    profile = reopened.get(None, "v4")
+    assert profile.row_count == 50
+    assert profile.numeric["V1"]["mean"] == pytest.approx(make_df(50)["V1"].mean())
+    assert reopened.get(None, "v1") is None
+    assert len(reopened.list_versions()) == dataset_profile.PROFILE_VERSIONS_KEPT
+
+
+@pytest.fixture
+def analyzer_with_data(monkeypatch, tmp_path):
+    """Analyzer com dataset e versão controlados (sem Supabase)."""
+    state = {"df": make_df(), "version": "2025-01-01T00:00:00", "loads": 0}
+
+    def reconstruct(self, columns=None, optimize=True):
+        state["loads"] += 1
+        return state["df"]
+
+    monkeypatch.setattr(python_analyzer, "supabase", object())
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", True)
+    monkeypatch.setattr(PythonDataAnalyzer, "reconstruct_original_data", reconstruct)
+    monkeypatch.setattr(PythonDataAnalyzer, "_get_embeddings_version", lambda self, source=None: state["version"])
+    monkeypatch.setattr(dataset_profile, "_profile_store", DatasetProfileStore(tmp_path / "p.sqlite3"))
+    get_dataset_cache().invalidate()
+    yield state
+    get_dataset_cache().invalidate()
+
+
+def test_profile_uses_full_precision_before_dtype_downcast(monkeypatch, tmp_path):
+    df = pd.DataFrame({
+        "Amount": np.round(np.random.default_rng(5).exponential(50, size=401), 2) + 20.08,
+        "Class": np.arange(401) % 2,
+    })
+
+    class FakeReader:
+        records_read = pages_read = 1
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def iter_pages(self):
+            yield [{"chunk_text": "", "metadata": {}}]
+
+    monkeypatch.setattr(python_analyzer, "supabase", object())
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", True)
+    monkeypatch.setattr(python_analyzer, "DTYPE_OPTIMIZATION_ENABLED", True)
+    monkeypatch.setattr(python_analyzer, "EmbeddingsReader", FakeReader)
+    monkeypatch.setattr(python_analyzer, "reconstruct_dataframe",
+                        lambda records, columns=None: (list(records), df.copy())[1])
+    monkeypatch.setattr(PythonDataAnalyzer, "_get_embeddings_version", lambda self, source=None: "v1")
+    monkeypatch.setattr(dataset_profile, "_profile_store", DatasetProfileStore(tmp_path / "p.sqlite3"))
+    get_dataset_cache().invalidate()
+
+    analyzer = PythonDataAnalyzer(caller_agent="test_system")
+    # O dataset em cache continua compactado...
+    assert analyzer.reconstruct_original_data()["Amount"].dtype == np.float32
+    # ...mas o perfil é calculado sobre os float64 originais
+    amount = analyzer.get_dataset_profile().numeric["Amount"]
+    assert amount["median"] == df["Amount"].median()
+    assert amount["mean"] == df["Amount"].mean()
+    assert amount["skewness"] == df["Amount"].skew()
+    assert amount["kurtosis"] == df["Amount"].kurtosis()
+    get_dataset_cache().invalidate()
+
+
+def test_analyzer_serves_profile_per_version(analyzer_with_data):
+    analyzer = PythonDataAnalyzer(caller_agent="test_system")
+    first = analyzer.get_dataset_profile()
+    again = analyzer.get_dataset_profile()
+    assert again is first
+    assert analyzer_with_data["loads"] == 1
+
+    analyzer_with_data["version"] = "2025-02-01T00:00:00"
+    get_dataset_cache().invalidate()
+    assert analyzer.get_dataset_profile().version == "2025-02-01T00:00:00"
+    assert analyzer_with_data["loads"] == 2
+
+    stats = analyzer.calculate_real_statistics("all")
+    assert stats["total_records"] == 500
+    assert stats["estatisticas"]["V1"]["mean"] == pytest.approx(analyzer_with_data["df"]["V1"].mean())
+    assert stats["distribuicao"]["tipo"]["a"]["count"] == int((analyzer_with_data["df"]["tipo"] == "a").sum())
+    assert analyzer_with_data["loads"] == 2
+
+
+def test_profile_without_version_skips_store(analyzer_with_data, monkeypatch):
+    analyzer_with_data["version"] = None
+    get_dataset_cache().invalidate()
+
+    def no_store():
+        raise AssertionError("store não deveria ser aberto sem versão")
+
+    monkeypatch.setattr(python_analyzer, "get_dataset_profile_store", no_store)
+    assert PythonDataAnalyzer(caller_agent="test_system").get_dataset_profile() is None
+    assert analyzer_with_data["loads"] == 0
+
+
+def test_handlers_answer_from_profile(analyzer_with_data, monkeypatch):
+    monkeypatch.setattr(csv_analysis_agent, "SUPABASE_AVAILABLE", True)
+    agent = csv_analysis_agent.EmbeddingsAnalysisAgent()
+    df = analyzer_with_data["df"]
+
+    variability = agent._handle_variability_query_from_embeddings("variabilidade", None)
+    rows = {r["variavel"]: r for r in variability["metadata"]["variability_data"]}
+    assert rows["Amount"]["desvio_padrao"] == pytest.approx(df["Amount"].std())
+
+    central = agent._handle_central_tendency_query_from_embeddings("média", None)
+    rows = {r["variavel"]: r for r in central["metadata"]["central_tendency"]}
+    assert rows["V1"]["mediana"] == pytest.approx(df["V1"].median())
+
+    correlation = agent._handle_correlation_query_from_embeddings("correlação", None)
+    assert correlation["metadata"]["correlation_matrix"]["V1"]["Amount"] == pytest.approx(df["V1"].corr(df["Amount"]))
+    assert analyzer_with_data["loads"] == 1
+
+    # Outliers vêm do relatório do outlier engine, também cacheado por versão
+    get_outlier_engine().clear()
+    outliers = agent._handle_outliers_query_from_embeddings("outliers", None)
+    assert outliers["metadata"]["total_records"] == 500
+    agent._handle_outliers_query_from_embeddings("outliers", None)
+    assert analyzer_with_data["loads"] == 2
+
+
+def test_handlers_fall_back_to_loaded_embeddings(monkeypatch):
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", False)
+    monkeypatch.setattr(csv_analysis_agent, "SUPABASE_AVAILABLE", True)
+    df = make_df(rows=120)
+    chunker = TextChunker(csv_chunk_size_rows=20, csv_overlap_rows=4)
+    chunks = enrich_csv_chunks(chunker.chunk_text(df.to_csv(index=False), "creditcard", ChunkStrategy.CSV_ROW))
+    agent = csv_analysis_agent.EmbeddingsAnalysisAgent()
+    agent.current_embeddings = [
+        {"chunk_text": c.content, "metadata": {"source": "creditcard", **c.metadata.additional_info}}
+        for c in chunks
+    ]
+
+    profile = agent._get_dataset_profile()
+    assert profile.row_count == 120
+    assert profile.numeric["Amount"]["median"] == pytest.approx(df["Amount"].median())
+    report = agent._get_outlier_report(columns=["Amount"])
+    assert report.row_count == 120 and report.columns == ["Amount"]
+    assert agent._get_approximate_engine() is not None
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.dtype_optimizer import optimize_dtypes
+
+
+def make_df(rows=5000, seed=2):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Time": np.arange(rows, dtype=np.int64),
+        "V1": rng.normal(size=rows),
+        "Amount": rng.exponential(80, size=rows).round(2),
+        "Class": rng.integers(0, 2, size=rows),
+        "merchant": rng.choice(["loja_a", "loja_b", "loja_c"], size=rows).astype(object),
+        "note": [f"obs {i}" for i in range(rows)],
+        "flag": rng.random(rows) < 0.5,
+    })
+
+
+def test_downcasts_within_tolerance_and_reports_savings():
+    df = make_df()
+    optimized, report = optimize_dtypes(df)
+
+    assert optimized["Time"].dtype == np.uint16
+    assert optimized["Class"].dtype == np.uint8
+    assert optimized["V1"].dtype == np.float32 and optimized["Amount"].dtype == np.float32
+    assert str(optimized["merchant"].dtype) == "category"
+    assert optimized["note"].dtype == object and optimized["flag"].dtype == bool
+    assert df["V1"].dtype == np.float64  # original intacto
+
+    np.testing.assert_allclose(optimized["Amount"].to_numpy(np.float64), df["Amount"], rtol=1e-6)
+    assert optimized["merchant"].astype(object).equals(df["merchant"])
+    assert report.saved_bytes > 0 and report.reduction_ratio > 2
+    assert report.to_dict()["conversions"]["Time"] == ["int64", "uint16"]
+
+
+def test_keeps_columns_that_would_lose_precision():
+    df = pd.DataFrame({
+        "id": [1, -2, 2 ** 40],
+        "precise": [1.0 + 1e-9, 2.0, np.nan],
+        "huge": [1e300, 0.0, 1.0],
+    })
+    optimized, report = optimize_dtypes(df, float_rtol=1e-6)
+    assert optimized["id"].dtype == np.int64
+    assert optimized["precise"].dtype == np.float32  # 1e-9 dentro da tolerância
+    assert optimized["huge"].dtype == np.float64
+    assert optimize_dtypes(df, float_rtol=1e-12)[0]["precise"].dtype == np.float64
+    assert set(report.conversions) == {"precise"}
+
+
+def test_arrow_strings_optional():
+    pytest.importorskip("pyarrow")
+    optimized, _ = optimize_dtypes(make_df(200), arrow_strings=True)
+    assert str(optimized["note"].dtype) == "string"
+    assert str(optimized["merchant"].dtype) == "category"
+
+
+def test_data_loader_reports_optimization(tmp_path):
+    pytest.importorskip("chardet")
+    from src.data.data_loader import DataLoader
+
+    path = tmp_path / "dados.csv"
+    make_df(500).to_csv(path, index=False)
+
+    df, info = DataLoader(caller_agent="ingestion_agent").load_from_file(str(path))
+    assert df["Amount"].dtype == np.float32
+    assert info["dtype_optimization"]["saved_mb"] > 0
+
+    df, info = DataLoader(caller_agent="ingestion_agent", optimize_memory=False).load_from_file(str(path))
+    assert df["Amount"].dtype == np.float64 and info["dtype_optimization"] is None
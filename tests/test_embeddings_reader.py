@@ -0,0 +1,161 @@
+import threading
+import uuid
+
+import pandas as pd
+import pytest
+
+import src.tools.python_analyzer as python_analyzer
+from src.data.dataset_cache import get_dataset_cache
+from src.tools.python_analyzer import PythonDataAnalyzer
+from src.vectorstore.embeddings_reader import (
+    EmbeddingsReader,
+    EmbeddingsReaderError,
+    uuid_partitions,
+)
+from test_chunk_reconstruction import embeddings_frame, make_csv
+
+
+class FakeQuery:
+    """Subconjunto do query builder do PostgREST usado pelo leitor."""
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self._limit = None
+        self.select_clause = None
+
+    def select(self, clause):
+        self.select_clause = clause
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: _value(r, column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda r: str(r[column]) > value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda r: str(r[column]) >= value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda r: str(r[column]) < value)
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def execute(self):
+        columns = [c.strip() for c in self.select_clause.split(",")]
+        missing = [c for c in columns if c not in self.table.columns]
+        if missing:
+            raise RuntimeError(f"column {missing[0]} does not exist")
+        rows = sorted((r for r in self.table.rows if all(f(r) for f in self.filters)), key=lambda r: r["id"])
+        # Limite silencioso do servidor (max-rows)
+        rows = rows[:min(self._limit or self.table.max_rows, self.table.max_rows)]
+        with self.table.lock:
+            self.table.requests.append(self.select_clause)
+        return type("Response", (), {"data": [{c: r.get(c) for c in columns} for r in rows]})()
+
+
+def _value(record, column):
+    if column.startswith("metadata->>"):
+        return (record.get("metadata") or {}).get(column[len("metadata->>"):])
+    return record.get(column)
+
+
+class FakeTable:
+    def __init__(self, rows, columns, max_rows=1000):
+        self.rows = rows
+        self.columns = set(columns)
+        self.max_rows = max_rows
+        self.requests = []
+        self.lock = threading.Lock()
+
+
+class FakeClient:
+    def __init__(self, table):
+        self._table = table
+
+    def table(self, name):
+        assert name == "embeddings"
+        return FakeQuery(self._table)
+
+
+def make_table(frame, with_row_columns=True, max_rows=1000):
+    rows = []
+    for record in frame.to_dict("records"):
+        metadata = record["metadata"]
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "chunk_text": record["chunk_text"],
+            "metadata": metadata,
+            "embedding": "[" + ",".join(["0.1"] * 384) + "]",
+            "source_id": metadata.get("source_id") or metadata.get("source"),
+            "row_start": metadata.get("row_start"),
+            "row_end": metadata.get("row_end"),
+        })
+    columns = ["id", "chunk_text", "metadata", "embedding"]
+    if with_row_columns:
+        columns += ["source_id", "row_start", "row_end"]
+    return FakeTable(rows, columns, max_rows=max_rows)
+
+
+def test_uuid_partitions_cover_whole_space():
+    parts = uuid_partitions(4)
+    assert parts[0][0] is None and parts[-1][1] is None
+    assert [p[1] for p in parts[:-1]] == [p[0] for p in parts[1:]]
+    assert uuid_partitions(1) == [(None, None)]
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_reads_every_row_past_server_cap_without_embedding(max_workers):
+    table = make_table(embeddings_frame(make_csv(400)), max_rows=7)
+    reader = EmbeddingsReader(FakeClient(table), page_size=7, max_workers=max_workers, partitions=8)
+    records = reader.read_all()
+    assert sorted(r["id"] for r in records) == sorted(r["id"] for r in table.rows)
+    assert all("embedding" not in r for r in records)
+    assert reader.pages_read > 1
+
+
+def test_filters_by_source_and_chunk_type():
+    frame = pd.concat([embeddings_frame(make_csv(60), "a"), embeddings_frame(make_csv(30), "b")])
+    table = make_table(frame)
+    records = EmbeddingsReader(FakeClient(table), source="b", chunk_type="csv_data", partitions=4).read_all()
+    assert records
+    assert {r["source_id"] for r in records} == {"b"}
+    assert all(r["metadata"]["chunk_type"] == "csv_data" for r in records)
+
+
+def test_falls_back_without_generated_columns():
+    table = make_table(embeddings_frame(make_csv(60), "a"), with_row_columns=False)
+    records = EmbeddingsReader(FakeClient(table), source="a", partitions=2).read_all()
+    assert len(records) == len(table.rows) - 1  # chunk de metadata não tem source
+    assert set(records[0]) == {"id", "chunk_text", "metadata"}
+
+
+def test_limit_and_partition_errors():
+    table = make_table(embeddings_frame(make_csv(200)), max_rows=10)
+    assert len(EmbeddingsReader(FakeClient(table), limit=9, page_size=4).read_all()) == 9
+
+    table.columns.discard("chunk_text")
+    table.columns.add("source_id")
+    with pytest.raises(EmbeddingsReaderError):
+        EmbeddingsReader(FakeClient(table), partitions=4).read_all()
+
+
+def test_analyzer_streams_pages_into_reconstruction(monkeypatch):
+    table = make_table(embeddings_frame(make_csv(300)), max_rows=50)
+    monkeypatch.setattr(python_analyzer, "supabase", FakeClient(table))
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", True)
+    get_dataset_cache().invalidate()
+
+    df = PythonDataAnalyzer(caller_agent="test_system").get_data_from_embeddings()
+    assert df["Time"].tolist() == list(range(300))
+    assert all(clause.count("embedding") == 0 for clause in table.requests)
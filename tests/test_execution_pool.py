@@ -0,0 +1,103 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.tools.execution_pool as execution_pool
+import src.tools.python_analyzer as python_analyzer
+from src.tools.execution_pool import ExecutionLimits, ExecutionPool
+from src.tools.python_analyzer import PythonDataAnalyzer
+
+
+@pytest.fixture
+def pool():
+    pool = ExecutionPool(2, ExecutionLimits(wall_seconds=5, cpu_seconds=1, memory_mb=256))
+    yield pool
+    pool.shutdown()
+
+
+def test_output_captured_per_call_concurrently(pool):
+    results = {}
+
+    def call(i):
+        results[i] = pool.execute(f"for _ in range(3): print({i})\nresult = {i} * 2")
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i, response in results.items():
+        assert response["success"]
+        assert response["output"].split() == [str(i)] * 3
+        assert response["result"] == i * 2
+
+
+def test_hot_dataset_shared_and_not_mutated(pool):
+    pool.set_datasets({"df": pd.DataFrame({"a": np.arange(100)})}, version="v1")
+    assert pool.execute("df['a'] = 0\nresult = int(df['a'].sum())")["result"] == 0
+    assert pool.execute("result = int(df['a'].sum())")["result"] == 4950
+    assert pool.get_stats()["generation"] == 1
+
+    # Mesma versão: workers não são recriados
+    pool.set_datasets({"df": pd.DataFrame({"a": [1]})}, version="v1")
+    assert pool.get_stats()["generation"] == 1
+
+
+def test_limits_stop_runaway_snippets(pool):
+    cpu = pool.execute("while True: pass")
+    assert not cpu["success"]
+    assert "CPU" in cpu["error"]
+
+    memory = pool.execute("x = np.ones(200_000_000)")
+    assert not memory["success"]
+    assert "memória" in memory["error"]
+
+    started = time.time()
+    wall = pool.execute("while True: pass", timeout=0.5)
+    assert "Tempo limite" in wall["error"]
+    assert time.time() - started < 2
+    assert pool.get_stats()["timeouts"] == 1
+
+    # Worker substituído continua atendendo
+    assert pool.execute("result = len([1, 2, 3])")["result"] == 3
+    assert pool.get_stats()["workers"] == 2
+
+
+def test_restricted_builtins(pool):
+    response = pool.execute("import os")
+    assert not response["success"]
+
+
+def test_analyzer_uses_pool_or_inprocess(monkeypatch, pool):
+    monkeypatch.setattr(execution_pool, "_execution_pool", pool)
+    analyzer = PythonDataAnalyzer(caller_agent="test_system")
+    result = analyzer.execute_safe_python("print('ok')\nresult = df['x'].mean()",
+                                          context={"df": pd.DataFrame({"x": [1, 2, 3]})})
+    assert result.success and result.result == 2.0
+    assert result.output == "ok\n"
+
+    monkeypatch.setattr(python_analyzer, "PYTHON_EXEC_POOL_SIZE", 0)
+    result = analyzer.execute_safe_python("print('local')\nresult = abs(-2)")
+    assert result.success and result.result == 2 and result.output == "local\n"
+
+
+def test_waiting_for_a_worker_does_not_consume_execution_time():
+    pool = ExecutionPool(1, ExecutionLimits(wall_seconds=5, cpu_seconds=1, memory_mb=256, acquire_seconds=2))
+    try:
+        worker = pool._idle.get()  # worker ocupado por outra chamada
+        threading.Timer(0.5, pool._idle.put, args=(worker,)).start()
+        response = pool.execute("result = 1 + 1", timeout=0.3)
+        assert response["success"] and response["result"] == 2
+
+        worker = pool._idle.get()
+        busy = pool.execute("result = 1", acquire_timeout=0.1)
+        assert "Nenhum worker livre" in busy["error"]
+        pool._idle.put(worker)
+        stats = pool.get_stats()
+        assert stats["queue_timeouts"] == 1 and stats["timeouts"] == 0 and stats["workers"] == 1
+    finally:
+        pool.shutdown()
@@ -0,0 +1,136 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from src.services.ingest_job_queue import (
+    IngestJobQueue,
+    IngestQueueFullError,
+    STATUS_CANCELLED,
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    STATUS_QUEUED,
+)
+
+
+CSV_A = b"a,b\n1,2\n3,4\n"
+CSV_B = b"a,b\n5,6\n7,8\n"
+
+
+class FakeRunner:
+    """Executor de ingestão falso que registra chamadas e pode ser bloqueado."""
+    def __init__(self, block: bool = False, fail: bool = False):
+        self.calls = []
+        self.release = threading.Event()
+        self.started = threading.Event()
+        if not block:
+            self.release.set()
+        self.fail = fail
+
+    def __call__(self, path, ctx):
+        self.calls.append(path)
+        ctx.report(0.5, "processando")
+        self.started.set()
+        self.release.wait(5)
+        ctx.check_cancelled()
+        if self.fail:
+            raise RuntimeError("falha simulada")
+        return {"rows": 2}
+
+
+def make_queue(tmp_path, runner, **kwargs):
+    return IngestJobQueue(
+        runner=runner,
+        db_path=tmp_path / "jobs.sqlite3",
+        storage_dir=tmp_path / "uploads",
+        **kwargs,
+    )
+
+
+def test_job_completes_and_persists_result(tmp_path):
+    runner = FakeRunner()
+    q = make_queue(tmp_path, runner)
+    job, dedup = q.submit(CSV_A, "dados.csv")
+    assert not dedup
+    assert q.wait_idle(timeout=5)
+
+    done = q.get_job(job.job_id)
+    assert done.status == STATUS_COMPLETED
+    assert done.progress == 1.0
+    assert done.result == {"rows": 2}
+    assert len(runner.calls) == 1
+    q.shutdown()
+
+
+def test_identical_upload_is_deduplicated(tmp_path):
+    runner = FakeRunner(block=True)
+    q = make_queue(tmp_path, runner)
+    first, _ = q.submit(CSV_A, "dados.csv")
+    second, dedup = q.submit(CSV_A, "copia.csv")
+    assert dedup
+    assert second.job_id == first.job_id
+
+    runner.release.set()
+    assert q.wait_idle(timeout=5)
+    # Mesmo conteúdo já é o último ingerido: continua deduplicado
+    third, dedup = q.submit(CSV_A, "dados.csv")
+    assert dedup and third.job_id == first.job_id
+    assert len(runner.calls) == 1
+    q.shutdown()
+
+
+def test_reupload_after_other_dataset_creates_new_job(tmp_path):
+    q = make_queue(tmp_path, FakeRunner())
+    first, _ = q.submit(CSV_A, "a.csv")
+    q.wait_idle(timeout=5)
+    q.submit(CSV_B, "b.csv")
+    q.wait_idle(timeout=5)
+    again, dedup = q.submit(CSV_A, "a.csv")
+    assert not dedup
+    assert again.job_id != first.job_id
+    q.shutdown()
+
+
+def test_cancel_queued_and_running_jobs(tmp_path):
+    runner = FakeRunner(block=True)
+    q = make_queue(tmp_path, runner, max_workers=1)
+    running, _ = q.submit(CSV_A, "a.csv")
+    assert runner.started.wait(5)
+    queued, _ = q.submit(CSV_B, "b.csv")
+
+    assert q.cancel(queued.job_id).status == STATUS_CANCELLED
+    assert q.cancel(running.job_id).cancel_requested
+    runner.release.set()
+    assert q.wait_idle(timeout=5)
+
+    assert q.get_job(running.job_id).status == STATUS_CANCELLED
+    assert len(runner.calls) == 1
+    assert q.cancel("inexistente") is None
+    q.shutdown()
+
+
+def test_failure_is_recorded(tmp_path):
+    q = make_queue(tmp_path, FakeRunner(fail=True))
+    job, _ = q.submit(CSV_A, "a.csv")
+    q.wait_idle(timeout=5)
+    failed = q.get_job(job.job_id)
+    assert failed.status == STATUS_FAILED
+    assert "falha simulada" in failed.error
+    assert not Path(failed.file_path).exists()  # o upload não fica órfão em processando/
+    q.shutdown()
+
+
+def test_queue_limit_and_recovery_after_restart(tmp_path):
+    q = make_queue(tmp_path, FakeRunner(), max_queue=1, autostart=False)
+    job, _ = q.submit(CSV_A, "a.csv")
+    with pytest.raises(IngestQueueFullError):
+        q.submit(CSV_B, "b.csv")
+    assert q.get_job(job.job_id).status == STATUS_QUEUED
+
+    # Nova instância sobre o mesmo SQLite reenfileira jobs pendentes
+    runner = FakeRunner()
+    restarted = make_queue(tmp_path, runner)
+    assert restarted.wait_idle(timeout=5)
+    assert restarted.get_job(job.job_id).status == STATUS_COMPLETED
+    assert len(runner.calls) == 1
+    restarted.shutdown()
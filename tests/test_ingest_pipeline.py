@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from src.embeddings.ingest_pipeline import (
+    PipelineError,
+    PipelineStage,
+    StagedPipeline,
+    iter_batches,
+)
+
+
+def test_iter_batches_splits_in_order():
+    assert list(iter_batches(list(range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(iter_batches((i for i in range(7)), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_outputs_follow_input_order_and_generator_is_consumed_lazily():
+    produced = []
+
+    def chunks():
+        for i in range(40):
+            produced.append(i)
+            yield i
+
+    seen_at = []
+
+    def store(batch):
+        seen_at.append(len(produced))
+        # Lotes iniciais mais lentos: concluem depois dos seguintes
+        time.sleep(0.02 if batch[0] < 10 else 0.0)
+        return batch
+
+    pipeline = StagedPipeline([PipelineStage("store", store, workers=4)], queue_size=1)
+    outputs = pipeline.run(iter_batches(chunks(), 5))
+
+    assert [x for batch in outputs for x in batch] == list(range(40))
+    assert min(seen_at) < 40  # processamento começou antes do fim do chunking
+
+
+def test_pipeline_processes_all_items_through_stages():
+    pipeline = StagedPipeline([
+        PipelineStage("double", lambda b: [x * 2 for x in b], workers=2),
+        PipelineStage("sum", lambda b: sum(b), workers=3),
+    ], queue_size=2)
+    outputs = pipeline.run(iter_batches(list(range(100)), 10))
+
+    assert sorted(outputs) == sorted(sum(x * 2 for x in range(i, i + 10)) for i in range(0, 100, 10))
+    metrics = pipeline.get_metrics()
+    assert metrics["stages"]["double"]["items_in"] == 100
+    assert metrics["stages"]["sum"]["batches"] == 10
+    assert metrics["stages"]["source"]["items_out"] == 100
+
+
+def test_stages_overlap_instead_of_running_in_sequence():
+    delay = 0.05
+
+    def slow(batch):
+        time.sleep(delay)
+        return batch
+
+    pipeline = StagedPipeline([
+        PipelineStage("embed", slow, workers=1),
+        PipelineStage("store", slow, workers=1),
+    ], queue_size=2)
+    start = time.perf_counter()
+    pipeline.run(iter_batches(list(range(8)), 1))
+    elapsed = time.perf_counter() - start
+
+    # Sequencial levaria 16 * delay; em pipeline ~ (8 + 1) * delay
+    assert elapsed < 13 * delay
+
+
+def test_bounded_queue_applies_backpressure():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield [i]
+
+    def blocked(batch):
+        release.wait(5)
+        return batch
+
+    pipeline = StagedPipeline([PipelineStage("store", blocked, workers=1)], queue_size=2)
+    runner = threading.Thread(target=pipeline.run, args=(source(),))
+    runner.start()
+    time.sleep(0.1)
+    # 1 em processamento + 2 na fila + 1 aguardando put
+    assert len(produced) <= 4
+    release.set()
+    runner.join(5)
+    assert len(produced) == 20
+
+
+def test_stage_failure_is_raised_with_stage_name():
+    def boom(batch):
+        if 5 in batch:
+            raise ValueError("falha no lote")
+        return batch
+
+    pipeline = StagedPipeline([
+        PipelineStage("embed", boom, workers=2),
+        PipelineStage("store", lambda b: b, workers=1),
+    ], queue_size=1)
+    with pytest.raises(PipelineError) as exc:
+        pipeline.run(iter_batches(list(range(50)), 1))
+    assert exc.value.stage == "embed"
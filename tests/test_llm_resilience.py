@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    ProviderResilience,
+    RetryPolicy,
+    is_retryable_error,
+    reset_provider_resilience,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", False)
+    reset_provider_resilience()
+    yield
+    reset_provider_resilience()
+
+
+def make_resilience(name, clock, attempts=3, timeout=None, threshold=2):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    resilience = ProviderResilience(
+        name,
+        timeout=timeout,
+        retry_policy=RetryPolicy(max_attempts=attempts, base_delay=0.1, max_delay=1.0),
+        breaker=CircuitBreaker(failure_threshold=threshold, recovery_timeout=30, clock=clock),
+        sleep=sleep,
+    )
+    return resilience, sleeps
+
+
+def test_breaker_opens_probes_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30, half_open_max_calls=1, clock=clock)
+
+    breaker.record_failure(RuntimeError("x"))
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure(RuntimeError("x"))
+    assert breaker.state == CircuitState.OPEN and not breaker.allow_request()
+
+    clock.now = 31
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request() and not breaker.allow_request()  # uma sondagem por vez
+    breaker.record_failure(RuntimeError("ainda fora"))
+    assert breaker.state == CircuitState.OPEN
+
+    clock.now = 62
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    metrics = breaker.get_metrics()
+    assert metrics["opened"] == 2 and metrics["rejected"] == 2 and metrics["successes"] == 1
+
+
+def test_retries_only_transient_errors_with_bounded_backoff():
+    resilience, sleeps = make_resilience("groq", FakeClock(), attempts=3)
+    outcomes = [RateLimitError("429"), asyncio.TimeoutError(), "ok"]
+
+    async def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    assert asyncio.run(resilience.call(flaky)) == "ok"
+    assert len(sleeps) == 2 and all(0 <= s <= 0.2 for s in sleeps)
+
+    async def bad_request():
+        raise ValueError("prompt inválido")
+
+    with pytest.raises(ValueError):
+        asyncio.run(resilience.call(bad_request))
+    assert len(sleeps) == 2
+    assert resilience.get_metrics()["retries"] == 2
+    assert is_retryable_error(RateLimitError()) and not is_retryable_error(ValueError())
+
+
+def test_timeout_bounds_hung_calls():
+    resilience, _ = make_resilience("groq", FakeClock(), attempts=2, timeout=0.05, threshold=5)
+
+    async def hung():
+        await asyncio.sleep(10)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(resilience.call(hung))
+    metrics = resilience.get_metrics()
+    assert metrics["timeouts"] == 2 and metrics["consecutive_failures"] == 1
+
+
+def test_manager_skips_open_circuit_and_returns_to_preferred_provider():
+    clock = FakeClock()
+    groq_up = {"value": False}
+    calls = []
+
+    def fake(provider, up=lambda: True):
+        async def call(prompt, config, system_prompt=None):
+            calls.append(provider.value)
+            if not up():
+                raise RateLimitError("429")
+            return LLMResponse(content=provider.value, provider=provider, model="fake")
+        return call
+
+    manager = LLMManager(
+        preferred_providers=[LLMProvider.GROQ, LLMProvider.GOOGLE],
+        provider_callers={
+            LLMProvider.GROQ: fake(LLMProvider.GROQ, lambda: groq_up["value"]),
+            LLMProvider.GOOGLE: fake(LLMProvider.GOOGLE),
+        },
+    )
+    manager._resilience[LLMProvider.GROQ], _ = make_resilience("groq", clock, attempts=1, threshold=2)
+
+    assert [manager.chat("q", LLMConfig()).content for _ in range(3)] == ["google"] * 3
+    assert calls == ["groq", "google", "groq", "google", "google"]  # circuito abriu na 2ª falha
+    assert manager.get_status()["circuit_breakers"]["groq"]["state"] == "open"
+
+    groq_up["value"] = True
+    clock.now = 31
+    assert manager.chat("q").content == "groq"
+    assert manager.get_status()["circuit_breakers"]["groq"]["state"] == "closed"
+
+    resilience, _ = make_resilience("x", clock, threshold=1)
+    resilience.breaker.record_failure()
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(resilience.call(lambda: asyncio.sleep(0)))
+
+
+def test_client_errors_do_not_count_as_provider_failures():
+    resilience, sleeps = make_resilience("groq", FakeClock(), attempts=3, threshold=1)
+
+    async def bad_request():
+        raise BadRequestError("400")
+
+    for _ in range(3):
+        with pytest.raises(BadRequestError):
+            asyncio.run(resilience.call(bad_request))
+    metrics = resilience.get_metrics()
+    assert sleeps == [] and metrics["client_errors"] == 3
+    assert metrics["state"] == "closed" and metrics["consecutive_failures"] == 0
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    clock = FakeClock()
+    resilience, _ = make_resilience("groq", clock, attempts=1, threshold=1)
+    resilience.breaker.record_failure()
+    clock.now = 31
+
+    async def scenario():
+        probe = asyncio.ensure_future(resilience.call(lambda: asyncio.sleep(10)))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        assert resilience.breaker.state == CircuitState.HALF_OPEN
+        return await resilience.call(lambda: asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+    assert resilience.breaker.state == CircuitState.CLOSED
@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import src.llm.response_cache as response_cache
+from src.data.dataset_cache import get_dataset_cache
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.resilience import reset_provider_resilience
+from src.llm.response_cache import LLMResponseCache
+
+PARAMS = {"temperature": 0.2, "max_tokens": 512}
+VOCAB = ["media", "amount", "mediana", "class", "qual", "a", "de", "valor", "medio"]
+
+
+def bag_of_words(text):
+    words = text.replace("?", "").split()
+    return [float(sum(word == term for word in words)) for term in VOCAB]
+
+
+def test_exact_tier_normalizes_prompt_and_respects_params():
+    cache = LLMResponseCache(version_provider=lambda: 1)
+    cache.put("groq", "llama", PARAMS, "Qual a média de   Amount?", "88.35")
+
+    assert cache.get("groq", "llama", PARAMS, "qual a média de amount?") == "88.35"
+    assert cache.get("groq", "llama", {**PARAMS, "temperature": 0.9}, "qual a média de amount?") is None
+    assert cache.get("google", "llama", PARAMS, "qual a média de amount?") is None
+    assert cache.get("groq", "llama", PARAMS, "qual a média de amount?", system_prompt="outro") is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_ttl_version_and_size_bounds():
+    version = {"value": 1}
+    cache = LLMResponseCache(ttl=0.05, version_provider=lambda: version["value"])
+    cache.put("groq", "m", PARAMS, "p1", "r1")
+    time.sleep(0.06)
+    assert cache.get("groq", "m", PARAMS, "p1") is None
+
+    cache = LLMResponseCache(max_entries=2, version_provider=lambda: version["value"])
+    for i in range(3):
+        cache.put("groq", "m", PARAMS, f"p{i}", f"r{i}")
+    assert cache.get("groq", "m", PARAMS, "p0") is None
+    assert cache.get("groq", "m", PARAMS, "p2") == "r2"
+
+    version["value"] = 2  # nova ingestão
+    assert cache.get("groq", "m", PARAMS, "p2") is None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["stale"] == 1 and stats["entries"] == 1
+
+    small = LLMResponseCache(max_bytes=600, version_provider=lambda: 1)
+    small.put("groq", "m", PARAMS, "a", "x" * 200)
+    small.put("groq", "m", PARAMS, "b", "y" * 200)
+    assert small.get("groq", "m", PARAMS, "a") is None and small.get_stats()["size_bytes"] <= 600
+
+
+def test_semantic_tier_reuses_similar_questions():
+    cache = LLMResponseCache(semantic_enabled=True, semantic_threshold=0.85,
+                             embed_fn=bag_of_words, version_provider=lambda: 1)
+    cache.put("groq", "m", PARAMS, "prompt com contexto 1", "88.35", query="qual a media de amount?")
+
+    assert cache.get("groq", "m", PARAMS, "prompt com contexto 2", query="qual a media de amount") == "88.35"
+    assert cache.get("groq", "m", PARAMS, "prompt com contexto 3", query="mediana de class") is None
+    assert cache.get("groq", "m", {"temperature": 1.0}, "prompt 4", query="qual a media de amount") is None
+    assert cache.get_stats()["semantic_hits"] == 1
+
+
+def test_manager_serves_repeated_questions_from_cache(monkeypatch):
+    reset_provider_resilience()
+    monkeypatch.setattr(response_cache, "_llm_response_cache", LLMResponseCache())
+    get_dataset_cache().invalidate()
+    calls = []
+
+    async def groq(prompt, config, system_prompt=None):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return LLMResponse(content="A média de Amount é 88.35", provider=LLMProvider.GROQ, model="fake")
+
+    manager = LLMManager(preferred_providers=[LLMProvider.GROQ], provider_callers={LLMProvider.GROQ: groq})
+    first = manager.chat("Qual a média de Amount?", LLMConfig())
+    again = manager.chat("qual a média de amount?", LLMConfig())
+    assert again.cached and not first.cached and again.content == first.content
+    assert again.processing_time < 0.05 and len(calls) == 1
+
+    manager.chat("qual a média de amount?", LLMConfig(), use_cache=False)
+    assert len(calls) == 2
+
+    get_dataset_cache().invalidate()  # ingestão concluída
+    assert not manager.chat("qual a média de amount?", LLMConfig()).cached
+    assert len(calls) == 3
+    reset_provider_resilience()
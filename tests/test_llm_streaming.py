@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.resilience import reset_provider_resilience
+from src.llm.response_cache import LLMResponseCache
+from src.llm.streaming import claim_token_sink, stream_with_tokens
+
+
+@pytest.fixture(autouse=True)
+def fresh_resilience(monkeypatch):
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", False)
+    reset_provider_resilience()
+    yield
+    reset_provider_resilience()
+
+
+def fake_streamer(tokens, delay=0.05, fail_after=None):
+    async def stream(prompt, config, system_prompt=None):
+        for i, token in enumerate(tokens):
+            if fail_after is not None and i == fail_after:
+                raise ConnectionError("conexão caiu")
+            await asyncio.sleep(delay)
+            yield token
+    return stream
+
+
+async def fake_caller(prompt, config, system_prompt=None):
+    return LLMResponse(content="completo", provider=LLMProvider.GOOGLE, model="fake")
+
+
+def make_manager(groq_stream, google_caller=fake_caller):
+    return LLMManager(
+        preferred_providers=[LLMProvider.GROQ, LLMProvider.GOOGLE],
+        provider_callers={LLMProvider.GROQ: fake_caller, LLMProvider.GOOGLE: google_caller},
+        provider_streamers={LLMProvider.GROQ: groq_stream},
+    )
+
+
+async def collect(coro_factory):
+    events = []
+    start = time.perf_counter()
+    async for kind, value in stream_with_tokens(coro_factory):
+        events.append((kind, value, time.perf_counter() - start))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_first_token_arrives_before_completion():
+    manager = make_manager(fake_streamer(["Olá", ", ", "mundo"], delay=0.1))
+
+    events = await collect(lambda: manager.achat("oi", LLMConfig()))
+
+    tokens = [e for e in events if e[0] == "token"]
+    assert [t[1] for t in tokens] == ["Olá", ", ", "mundo"]
+    assert tokens[0][2] < 0.2 and events[-1][2] >= 0.3
+    kind, response, _ = events[-1]
+    assert kind == "result" and response.success and response.content == "Olá, mundo"
+
+
+@pytest.mark.asyncio
+async def test_only_first_llm_call_streams():
+    manager = make_manager(fake_streamer(["a", "b"], delay=0.01))
+
+    async def pipeline():
+        first = await manager.achat("resposta")
+        second = await manager.achat("correção")  # chamada auxiliar: não transmite
+        return first.content, second.content
+
+    events = await collect(pipeline)
+    assert [e[1] for e in events if e[0] == "token"] == ["a", "b"]
+    assert events[-1][1] == ("ab", "completo")
+
+    # Fora de uma requisição em streaming nenhuma chamada reivindica sink
+    assert claim_token_sink() is None
+    assert (await manager.achat("sem stream")).content == "completo"
+
+
+@pytest.mark.asyncio
+async def test_no_fallback_after_partial_output():
+    google_calls = []
+
+    async def google(prompt, config, system_prompt=None):
+        google_calls.append(prompt)
+        return LLMResponse(content="google", provider=LLMProvider.GOOGLE, model="fake")
+
+    manager = make_manager(fake_streamer(["parcial", "x"], delay=0.01, fail_after=1), google)
+    events = await collect(lambda: manager.achat("oi"))
+    assert [e[1] for e in events if e[0] == "token"] == ["parcial"]
+    assert not events[-1][1].success and google_calls == []
+
+    # Falha antes do primeiro token: fallback normal, resposta inteira como um trecho
+    manager = make_manager(fake_streamer(["x"], fail_after=0), google)
+    events = await collect(lambda: manager.achat("oi"))
+    assert [e[1] for e in events if e[0] == "token"] == ["google"]
+    assert events[-1][1].provider == LLMProvider.GOOGLE
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_is_emitted_as_single_token(monkeypatch):
+    cache = LLMResponseCache(version_provider=lambda: 1)
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr("src.llm.manager.get_llm_response_cache", lambda: cache)
+    manager = make_manager(fake_streamer(["um ", "dois"], delay=0.01))
+
+    await collect(lambda: manager.achat("pergunta"))
+    events = await collect(lambda: manager.achat("pergunta"))
+    assert [e[1] for e in events if e[0] == "token"] == ["um dois"]
+    assert events[-1][1].cached
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_or_lets_processing_finish():
+    manager = make_manager(fake_streamer(["a", "b", "c"], delay=0.02))
+    remembered = []
+
+    async def answer_and_remember():
+        response = await manager.achat("oi")
+        remembered.append(response.content)  # ex.: persistência na memória
+        return response
+
+    for cancel_on_close in (True, False):
+        events = stream_with_tokens(answer_and_remember, cancel_on_close=cancel_on_close)
+        assert await events.__anext__() == ("token", "a")
+        await events.aclose()  # cliente desconectou
+        await asyncio.sleep(0.2)
+
+    assert remembered == ["abc"]
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.outlier_engine import OutlierDetectionError, OutlierEngine, detect_outliers
+
+
+def make_df(rows=2000, seed=9):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": np.arange(rows),
+        "V1": rng.normal(size=rows),
+        "Amount": rng.exponential(60, size=rows).round(2),
+        "tipo": rng.choice(["a", "b"], size=rows),
+    })
+    df.loc[7, "V1"] = 25.0
+    df.loc[[3, 11], "Amount"] = np.nan
+    return df
+
+
+def test_iqr_matches_pandas_per_column():
+    df = make_df()
+    report = detect_outliers(df)
+
+    assert report.columns == ["V1", "Amount"]
+    for col in report.columns:
+        values = df[col].dropna()
+        q1, q3 = values.quantile([0.25, 0.75])
+        lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        iqr = report.per_column[col]["iqr"]
+        assert iqr["q1"] == pytest.approx(q1, rel=1e-5)
+        assert iqr["count_lower"] == int((values < lower).sum())
+        assert iqr["count_upper"] == int((values > upper).sum())
+        assert report.per_column[col]["zscore"]["std"] == pytest.approx(values.std(), rel=1e-4)
+        mad = (values - values.median()).abs().median()
+        assert report.per_column[col]["mad"]["mad"] == pytest.approx(mad, rel=1e-4)
+    assert report.per_column["Amount"]["non_null"] == 1998
+
+
+def test_row_summary_points_to_extreme_row():
+    report = detect_outliers(make_df(), top_n=3)
+    worst = report.top_rows[0]
+    assert worst["row"] == 7
+    assert worst["column"] == "V1"
+    assert set(worst["methods"]) == {"iqr", "zscore", "mad"}
+    assert report.rows_flagged["mad"] <= report.rows_flagged["iqr"]
+
+
+def test_isolation_forest_optional():
+    report = detect_outliers(make_df(), methods=("iqr",), isolation_forest=True, contamination=0.01)
+    assert report.isolation_forest["count"] == 20
+    scores = [r["score"] for r in report.isolation_forest["top_rows"]]
+    assert len(scores) == 10 and scores == sorted(scores, reverse=True)
+    assert "zscore" not in report.per_column["V1"]
+
+
+def test_errors():
+    with pytest.raises(OutlierDetectionError):
+        detect_outliers(make_df(), methods=("dbscan",))
+    with pytest.raises(OutlierDetectionError):
+        detect_outliers(pd.DataFrame({"tipo": ["a"]}))
+
+
+def test_engine_caches_per_key_and_options():
+    engine = OutlierEngine()
+    df = make_df()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return df
+
+    first = engine.load_and_detect(loader, cache_key=("creditcard", "v1"))
+    again = engine.load_and_detect(loader, cache_key=("creditcard", "v1"))
+    assert again.cached and not first.cached
+    assert again.rows_flagged == first.rows_flagged
+    assert loads == [1]
+
+    engine.load_and_detect(loader, cache_key=("creditcard", "v1"), iqr_k=3.0)
+    engine.load_and_detect(loader, cache_key=("creditcard", "v2"))
+    assert loads == [1, 1, 1]
+    assert engine.get_stats() == {"runs": 3, "hits": 1, "entries": 3}
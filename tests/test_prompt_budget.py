@@ -0,0 +1,69 @@
+import pytest
+
+from src.llm.prompt_budget import PromptBudget, PromptSegment, get_token_counter
+
+
+@pytest.fixture
+def counter():
+    return get_token_counter()
+
+
+def test_prompt_within_budget_is_unchanged(counter):
+    segments = [
+        PromptSegment("instrucoes", "Você é um assistente.", required=True),
+        PromptSegment("chunks", ["chunk 1", "chunk 2"], priority=1),
+        PromptSegment("consulta", "Qual a média de Amount?", required=True),
+    ]
+    assembly = PromptBudget(max_tokens=1000, counter=counter).assemble(segments)
+
+    assert assembly.text == "Você é um assistente.\nchunk 1\nchunk 2\nQual a média de Amount?"
+    assert assembly.trimmed == []
+    report = assembly.get_report()
+    assert report["total_tokens"] == report["original_tokens"] == sum(report["segments"].values())
+
+
+def test_lowest_priority_segments_are_trimmed_first(counter):
+    instructions = "Responda em português. " * 10
+    history = ["- Usuário perguntou: " + "histórico antigo " * 20] * 5
+    chunks = [f"chunk {i}: " + "estatística " * 40 for i in range(5)]
+    segments = [
+        PromptSegment("instrucoes", instructions, required=True),
+        PromptSegment("historico", history, priority=1, keep="tail"),
+        PromptSegment("chunks", chunks, priority=2, separator="\n\n"),
+        PromptSegment("consulta", "Qual a média de Amount?", required=True),
+    ]
+    budget = counter.count(instructions) + counter.count("\n\n".join(chunks)) + 20
+    assembly = PromptBudget(max_tokens=budget, counter=counter).assemble(segments)
+
+    assert assembly.total_tokens <= budget
+    assert assembly.trimmed == ["historico"]  # chunks têm prioridade maior e couberam
+    assert assembly.texts["instrucoes"] == instructions
+    assert assembly.texts["chunks"] == "\n\n".join(chunks)
+
+    tight = PromptBudget(max_tokens=counter.count(instructions) + 200, counter=counter).assemble(segments)
+    assert tight.trimmed == ["historico", "chunks"]
+    assert tight.texts["historico"] == "" and tight.texts["chunks"].startswith("chunk 0")
+    assert tight.total_tokens <= tight.max_tokens
+    assert "Qual a média de Amount?" in tight.text
+
+
+def test_item_segments_drop_whole_items_from_low_value_end(counter):
+    messages = [f"- mensagem {i}: " + "texto " * 30 for i in range(6)]
+    per_item = counter.count(messages[0]) + counter.count("\n")
+    budget = PromptBudget(max_tokens=per_item * 2 + 10, counter=counter)
+
+    recent = budget.assemble([PromptSegment("historico", messages, keep="tail")])
+    assert recent.texts["historico"].split("\n") == messages[-2:]
+
+    relevant = budget.assemble([PromptSegment("chunks", messages, keep="head")])
+    assert relevant.texts["chunks"].split("\n") == messages[:2]
+
+
+def test_truncate_keeps_requested_end(counter):
+    text = "início " + "meio " * 200 + "fim"
+    head = counter.truncate(text, 20, keep="head")
+    tail = counter.truncate(text, 20, keep="tail")
+
+    assert head.startswith("início") and head.endswith("[...]")
+    assert tail.endswith("fim") and tail.startswith("[...]")
+    assert counter.count(head) <= 20 and counter.count(tail) <= 20
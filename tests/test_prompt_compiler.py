@@ -0,0 +1,61 @@
+import pytest
+
+from src.prompts.compiler import CompiledTemplate, compile_template
+from src.prompts.manager import AgentRole, PromptManager
+
+
+SEARCH_VARIABLES = {
+    "query": "Qual a média de Amount?",
+    "num_results": 3,
+    "avg_similarity": 0.87654,
+    "context_chunks": "chunk 1\nchunk 2",
+}
+
+
+def test_render_matches_str_format():
+    content = "Instruções fixas {{literal}}.\nConsulta: {query!r} | {score:.2f} | {dados[a]} | {valor:>{largura}}"
+    variables = {"query": "média", "score": 0.98765, "dados": {"a": "x"}, "valor": 7, "largura": 4}
+    compiled = CompiledTemplate(content)
+
+    assert compiled.render(variables) == content.format(**variables)
+    assert compiled.static_prefix == "Instruções fixas {literal}.\nConsulta: "
+    assert compiled.variables == ("query", "score", "dados", "valor", "largura")
+
+    prefix, dynamic = compiled.split(variables)
+    assert prefix + dynamic == content.format(**variables)
+    with pytest.raises(KeyError):
+        compiled.render({"query": "x"})
+
+
+def test_static_template_and_cached_compilation():
+    static = compile_template("Você é um assistente.\nResponda em português.")
+    assert static.is_static and static.render() == static.content
+    assert static.split() == (static.content, "")
+    assert static.static_tokens > 0
+
+    assert compile_template(static.content) is static
+    with pytest.raises(ValueError):
+        CompiledTemplate("Valor: {}")
+    with pytest.raises(ValueError):
+        CompiledTemplate("Chave aberta: {query")
+
+
+def test_prompt_manager_uses_compiled_templates():
+    manager = PromptManager()
+    template = manager.prompts[AgentRole.RAG_SPECIALIST.value]["search_context"].content
+
+    assert manager.get_prompt(AgentRole.RAG_SPECIALIST, "search_context", **SEARCH_VARIABLES) == \
+        template.format(**SEARCH_VARIABLES)
+    assert manager.get_system_prompt(AgentRole.ORCHESTRATOR) == \
+        manager.prompts[AgentRole.ORCHESTRATOR.value]["system_base"].content
+
+    prefix, dynamic = manager.get_prompt_parts(AgentRole.RAG_SPECIALIST, "search_context", **SEARCH_VARIABLES)
+    assert prefix == "🔍 **CONTEXTO DE BUSCA RECUPERADO**\n\nConsulta: "
+    assert dynamic.startswith("Qual a média de Amount?") and "0.877" in dynamic
+
+    with pytest.raises(ValueError, match="avg_similarity"):
+        manager.get_prompt(AgentRole.RAG_SPECIALIST, "search_context", query="x", num_results=1, context_chunks="")
+
+    manager.add_custom_prompt(AgentRole.CSV_ANALYST, "resumo", "Resuma a coluna {coluna}.", variables=["coluna"])
+    assert manager.get_prompt(AgentRole.CSV_ANALYST, "resumo", coluna="Amount") == "Resuma a coluna Amount."
+    assert manager.get_compiled(AgentRole.CSV_ANALYST, "resumo").variables == ("coluna",)
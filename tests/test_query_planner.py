@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.tools.python_analyzer as python_analyzer
+from src.data.chunk_reconstruction import ChunkReconstructionError, reconstruct_dataframe_from_frame
+from src.data.dataset_cache import DatasetCache, get_dataset_cache
+from src.data.query_planner import mentions, plan_query
+from src.embeddings.chunker import ChunkStrategy, TextChunker
+from src.tools.python_analyzer import PythonDataAnalyzer
+
+COLUMNS = ["Time"] + [f"V{i}" for i in range(1, 29)] + ["Amount", "Class"]
+
+
+def embeddings_frame(rows: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    lines = ['"Time","V1","V2","Amount","Class"']
+    for i in range(rows):
+        v1, v2 = rng.normal(size=2)
+        lines.append(f"{i},{v1!r},{v2!r},{rng.uniform(0, 500):.2f},\"{int(rng.random() < 0.1)}\"")
+    chunks = TextChunker(csv_chunk_size_rows=20, csv_overlap_rows=4).chunk_text(
+        "\n".join(lines), "creditcard", ChunkStrategy.CSV_ROW)
+    return pd.DataFrame([
+        {"id": f"c-{c.metadata.chunk_index}", "chunk_text": c.content,
+         "metadata": {"source": "creditcard", "chunk_index": c.metadata.chunk_index, **c.metadata.additional_info}}
+        for c in chunks
+    ])
+
+
+def test_mentions_matches_whole_words_and_prefixes():
+    assert mentions("qual a media de amount", "media")
+    assert not mentions("qual a mediana de amount", "media")
+    assert mentions("qual a mediana de amount", "median*")
+    assert not mentions("valores de v10", "v1")
+
+
+def test_plan_prunes_to_cited_columns():
+    plan = plan_query("Qual a média e o desvio padrão de AMOUNT?", COLUMNS)
+    assert plan.columns == ["Amount"]
+    assert plan.statistics == ["mean", "std"]
+
+    plan = plan_query("mediana de v10 por class", COLUMNS)
+    assert plan.columns == ["V10", "Class"] and plan.statistics == ["median"]
+    # V1 não casa com V10
+    assert plan_query("mínimo de V10", COLUMNS).columns == ["V10"]
+
+
+@pytest.mark.parametrize("query", [
+    "Quais são os tipos de dados?",
+    "Existem outliers em todas as colunas?",
+    "Qual a correlação de Amount com as demais variáveis?",
+])
+def test_plan_reads_everything_when_needed(query):
+    assert plan_query(query, COLUMNS).columns is None
+    assert plan_query("média de Amount", None).columns is None
+
+
+@pytest.mark.parametrize("engine", ["c", "pyarrow"])
+def test_reconstruction_parses_only_requested_columns(engine):
+    frame = embeddings_frame(120)
+    full = reconstruct_dataframe_from_frame(frame, engine=engine)
+    pruned = reconstruct_dataframe_from_frame(frame, engine=engine, columns=["Class", "Amount", "Missing"])
+
+    assert list(pruned.columns) == ["Amount", "Class"]
+    pd.testing.assert_frame_equal(pruned, full[["Amount", "Class"]])
+    with pytest.raises(ChunkReconstructionError):
+        reconstruct_dataframe_from_frame(frame, engine=engine, columns=["Missing"])
+
+
+def test_cache_peek_projects_without_loading():
+    cache = DatasetCache()
+    assert cache.peek("creditcard", columns=["a"]) is None
+    cache.get_or_load("creditcard", lambda: pd.DataFrame({"a": [1, 2], "b": [3, 4]}))
+
+    projected = cache.peek("creditcard", columns=["b"])
+    assert list(projected.columns) == ["b"]
+    assert cache.peek("creditcard", columns=["c"]) is None
+    cache.invalidate("creditcard")
+    assert cache.peek("creditcard") is None
+
+
+def test_analyzer_loads_only_planned_columns(monkeypatch):
+    df = reconstruct_dataframe_from_frame(embeddings_frame(80))
+    loads = []
+
+    def load(self, limit, metadata_filter, parse_chunk_text, source, chunk_type, columns=None, optimize=True):
+        loads.append(columns)
+        return df if columns is None else df[columns]
+
+    monkeypatch.setattr(python_analyzer, "supabase", object())
+    monkeypatch.setattr(python_analyzer, "SUPABASE_CLIENT_AVAILABLE", True)
+    monkeypatch.setattr(PythonDataAnalyzer, "_load_data_from_embeddings", load)
+    monkeypatch.setattr(PythonDataAnalyzer, "_get_embeddings_version", lambda self, source=None: "v-plan")
+    monkeypatch.setattr(PythonDataAnalyzer, "get_dataset_columns", lambda self, source=None: list(df.columns))
+    get_dataset_cache().invalidate()
+
+    analyzer = PythonDataAnalyzer(caller_agent="test_system")
+    pruned, plan = analyzer.load_for_query("Qual a média de amount?")
+    assert list(pruned.columns) == ["Amount"] and plan.statistics == ["mean"]
+    assert loads == [["Amount"]]
+
+    # Com o dataset completo em cache, a leitura podada é só uma projeção
+    analyzer.reconstruct_original_data()
+    pruned, _ = analyzer.load_for_query("máximo de V1 e V2")
+    assert list(pruned.columns) == ["V1", "V2"]
+    assert loads == [["Amount"], None]
+    get_dataset_cache().invalidate()
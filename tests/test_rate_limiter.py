@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.llm import rate_limiter
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.rate_limiter import (
+    ProviderRateLimiter,
+    RateLimitExceededError,
+    RateLimits,
+    get_rate_limiter,
+    parse_rate_limits,
+    reset_rate_limiters,
+)
+from src.llm.resilience import ProviderResilience, RetryPolicy, reset_provider_resilience
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", False)
+    reset_provider_resilience()
+    reset_rate_limiters()
+    yield
+    reset_provider_resilience()
+    reset_rate_limiters()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_serves_callers_in_arrival_order():
+    limiter = ProviderRateLimiter("teste", RateLimits(0, 0, max_concurrency=2), max_wait=5)
+    active, peak, order = 0, 0, []
+
+    async def call(i):
+        nonlocal active, peak
+        async with limiter.aslot():
+            order.append(i)
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+    tasks = []
+    for i in range(8):
+        tasks.append(asyncio.ensure_future(call(i)))
+        await asyncio.sleep(0)  # chegada ordenada
+    await asyncio.gather(*tasks)
+
+    assert peak == 2 and order == list(range(8))
+    metrics = limiter.get_metrics()
+    assert metrics["granted"] == 8 and metrics["in_flight"] == 0 and metrics["queue_length"] == 0
+
+
+@pytest.mark.asyncio
+async def test_sheds_when_queue_full_or_wait_exceeded():
+    limiter = ProviderRateLimiter("teste", RateLimits(0, 0, max_concurrency=1), max_queue=1, max_wait=0.05)
+    permit = await limiter.aacquire()
+
+    waiting = asyncio.ensure_future(limiter.aacquire())
+    await asyncio.sleep(0)
+    with pytest.raises(RateLimitExceededError, match="fila cheia"):
+        await limiter.aacquire()  # recusada na hora, sem esperar
+
+    with pytest.raises(RateLimitExceededError, match="espera máxima"):
+        await waiting
+    permit.release()
+
+    async with limiter.aslot():
+        pass
+    assert limiter.get_metrics()["shed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_token_budget_sheds_early_and_refunds_actual_usage():
+    # 600 tokens/minuto = 10 tokens/s; rajada de 600
+    limiter = ProviderRateLimiter("teste", RateLimits(0, 600, max_concurrency=0), max_wait=1)
+    async with limiter.aslot(300):
+        pass
+    permit = await limiter.aacquire(300)
+
+    start = time.perf_counter()
+    with pytest.raises(RateLimitExceededError, match="orçamento"):
+        await limiter.aacquire(300)  # só liberaria em ~30s: recusa sem esperar 1s
+    assert time.perf_counter() - start < 0.5
+
+    permit.set_usage(50)  # a chamada usou bem menos que o estimado
+    permit.release()
+    async with limiter.aslot(200):
+        pass
+
+
+def test_threads_share_the_limit():
+    limiter = ProviderRateLimiter("teste", RateLimits(0, 0, max_concurrency=3), max_wait=5)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def call():
+        with limiter.slot():
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(12)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert state["peak"] == 3 and limiter.get_metrics()["granted"] == 12
+
+
+def test_rate_limit_overrides(monkeypatch):
+    overrides = parse_rate_limits("groq=30/6000/4, google:gemini-2.0-flash=15, inválido")
+    assert overrides["groq"] == RateLimits(30, 6000, 4)
+    assert overrides["google:gemini-2.0-flash"].requests_per_minute == 15
+
+    monkeypatch.setattr(rate_limiter, "LLM_RATE_LIMITS", "groq=30/6000/4")
+    reset_rate_limiters()
+    assert get_rate_limiter("groq", "llama").limits == RateLimits(30, 6000, 4)
+    assert get_rate_limiter("groq", "llama") is get_rate_limiter("groq", "llama")
+    assert get_rate_limiter("openai").limits == RateLimits()
+
+
+@pytest.mark.asyncio
+async def test_llm_manager_falls_back_when_provider_sheds():
+    calls = {"groq": 0, "google": 0}
+
+    def fake(provider):
+        async def call(prompt, config, system_prompt=None):
+            calls[provider.value] += 1
+            await asyncio.sleep(0.1)
+            return LLMResponse(content=provider.value, provider=provider, model="fake", tokens_used=10)
+        return call
+
+    config = LLMConfig(model="fake")
+    rate_limiter._limiters["groq:fake"] = ProviderRateLimiter(
+        "groq:fake", RateLimits(0, 0, max_concurrency=1), max_wait=0.01
+    )
+    manager = LLMManager(preferred_providers=[LLMProvider.GROQ, LLMProvider.GOOGLE],
+                         provider_callers={p: fake(p) for p in (LLMProvider.GROQ, LLMProvider.GOOGLE)})
+
+    responses = await asyncio.gather(*(manager.achat(f"pergunta {i}", config) for i in range(3)))
+
+    assert all(r.success for r in responses)
+    assert calls == {"groq": 1, "google": 2}
+    assert manager.get_status()["rate_limits"]["groq:fake"]["shed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_acquire_the_limiter_per_attempt(monkeypatch):
+    limiter = ProviderRateLimiter("groq:fake", RateLimits(0, 0, max_concurrency=1), max_wait=1)
+    rate_limiter._limiters["groq:fake"] = limiter
+    in_flight_during_backoff = []
+
+    async def sleep(delay):
+        in_flight_during_backoff.append(limiter.get_metrics()["in_flight"])
+
+    resilience = ProviderResilience("groq", retry_policy=RetryPolicy(max_attempts=3, base_delay=0.1),
+                                    sleep=sleep)
+    attempts = []
+
+    async def flaky(prompt, config, system_prompt=None):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise asyncio.TimeoutError()
+        return LLMResponse(content="ok", provider=LLMProvider.GROQ, model="fake", tokens_used=10)
+
+    estimates = []
+    monkeypatch.setattr("src.llm.manager.estimate_request_tokens", lambda *a: estimates.append(a) or 50)
+    manager = LLMManager(preferred_providers=[LLMProvider.GROQ], provider_callers={LLMProvider.GROQ: flaky})
+    manager._resilience[LLMProvider.GROQ] = resilience
+
+    response = await manager.achat("pergunta", LLMConfig(model="fake"))
+
+    assert response.success and len(attempts) == 3
+    assert in_flight_during_backoff == [0, 0]  # a vaga não fica presa no backoff
+    assert limiter.get_metrics()["granted"] == 3 and limiter.get_metrics()["in_flight"] == 0
+    assert estimates == []  # sem orçamento de tokens não há estimativa
+
+    rate_limiter._limiters["groq:fake"] = ProviderRateLimiter("groq:fake", RateLimits(0, 6000, 0))
+    attempts.clear()
+    await manager.achat("outra pergunta", LLMConfig(model="fake"))
+    assert len(estimates) == 1
@@ -0,0 +1,81 @@
+from src.embeddings.chunker import TextChunker, ChunkStrategy, CSV_DATA_CHUNK_TYPE
+from src.embeddings.row_range import (
+    RAW_DATA_MARKER,
+    RowRangeChunk,
+    chunk_from_record,
+    merge_row_ranges,
+    merge_to_csv_text,
+    split_csv_block,
+)
+
+
+def make_csv(rows: int) -> str:
+    lines = ['"id","valor","Class"']
+    lines += [f"{i},{i * 1.5},{i % 2}" for i in range(1, rows + 1)]
+    return "\n".join(lines)
+
+
+def chunks_as_records(csv_text: str, enrich: bool = False):
+    chunker = TextChunker(csv_chunk_size_rows=20, csv_overlap_rows=4)
+    records = []
+    for chunk in chunker.chunk_text(csv_text, "dados_v1", ChunkStrategy.CSV_ROW):
+        text = chunk.content
+        if enrich:
+            text = f"Chunk do dataset dados.csv\nColunas: id\n\n{RAW_DATA_MARKER}\n{text}"
+        metadata = {"source": chunk.metadata.source, "chunk_index": chunk.metadata.chunk_index}
+        metadata.update(chunk.metadata.additional_info)
+        records.append({"id": str(chunk.metadata.chunk_index), "chunk_text": text, "metadata": metadata})
+    return records
+
+
+def test_csv_chunks_carry_structured_row_range():
+    chunker = TextChunker(csv_chunk_size_rows=20, csv_overlap_rows=4)
+    chunks = chunker.chunk_text(make_csv(50), "dados_v1", ChunkStrategy.CSV_ROW)
+    info = [c.metadata.additional_info for c in chunks]
+
+    assert [(i["row_start"], i["row_end"]) for i in info] == [(1, 20), (17, 36), (33, 50), (49, 50)]
+    assert all(i["source_id"] == "dados_v1" for i in info)
+    assert all(i["chunk_type"] == CSV_DATA_CHUNK_TYPE for i in info)
+
+    lazy = chunker.iter_chunks(make_csv(50), "dados_v1", ChunkStrategy.CSV_ROW)
+    assert next(lazy).content == chunks[0].content
+    assert [c.metadata.chunk_index for c in lazy] == [1, 2, 3]
+
+
+def test_merge_drops_overlap_rows():
+    chunks = [chunk_from_record(r) for r in chunks_as_records(make_csv(50), enrich=True)]
+    header, lines, numbers = merge_row_ranges(reversed(chunks))
+
+    assert header == '"id","valor","Class"'
+    assert numbers == list(range(1, 51))
+    assert [int(line.split(",")[0]) for line in lines] == list(range(1, 51))
+
+
+def test_merge_clips_to_requested_range():
+    chunks = [chunk_from_record(r) for r in chunks_as_records(make_csv(50))]
+    text = merge_to_csv_text(chunks, row_start=15, row_end=40)
+    rows = text.split("\n")[1:]
+    assert [int(r.split(",")[0]) for r in rows] == list(range(15, 41))
+
+
+def test_record_fallback_to_legacy_start_end_row():
+    record = {"chunk_text": "a,b\n1,2", "metadata": {"source": "x", "start_row": 3, "end_row": 3}}
+    chunk = chunk_from_record(record)
+    assert (chunk.source_id, chunk.row_start, chunk.row_end) == ("x", 3, 3)
+    assert chunk_from_record({"chunk_text": "resumo", "metadata": {"chunk_type": "metadata_types"}}) is None
+
+
+def test_split_csv_block_ignores_enrichment_summary():
+    header, lines = split_csv_block(f"Resumo\nColunas: a, b\n\n{RAW_DATA_MARKER}\na,b\n1,2\n3,4\n")
+    assert header == "a,b"
+    assert lines == ["1,2", "3,4"]
+
+
+def test_gaps_between_chunks_are_reported_in_row_numbers():
+    chunks = [
+        RowRangeChunk("s", 1, 2, "a\n1\n2"),
+        RowRangeChunk("s", 5, 6, "a\n5\n6"),
+    ]
+    _, lines, numbers = merge_row_ranges(chunks)
+    assert lines == ["1", "2", "5", "6"]
+    assert numbers == [1, 2, 5, 6]
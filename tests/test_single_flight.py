@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from src.llm.manager import LLMConfig, LLMManager, LLMProvider, LLMResponse
+from src.llm.resilience import reset_provider_resilience
+from src.utils.single_flight import SingleFlight, make_flight_key
+
+
+@pytest.fixture(autouse=True)
+def fresh_resilience(monkeypatch):
+    monkeypatch.setattr("src.llm.manager.LLM_CACHE_ENABLED", False)
+    reset_provider_resilience()
+    yield
+    reset_provider_resilience()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_coroutines_share_one_execution():
+    flight = SingleFlight("teste")
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return {"value": value}
+
+    results = await asyncio.gather(*(flight.ado("k", lambda: work(1)) for _ in range(10)),
+                                   flight.ado("outra", lambda: work(2)))
+
+    assert calls == [1, 2]
+    assert all(r is results[0] for r in results[:10]) and results[10] == {"value": 2}
+    assert flight.get_metrics()["coalesced"] == 9 and flight.get_metrics()["in_flight"] == 0
+
+    # Terminada a chamada, nada fica guardado
+    await flight.ado("k", lambda: work(1))
+    assert calls == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight("teste")
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    first = asyncio.ensure_future(flight.ado("k", slow))
+    second = asyncio.ensure_future(flight.ado("k", slow))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "ok"
+    assert first.cancelled()
+
+
+def test_threads_share_result_and_exception():
+    flight = SingleFlight("teste")
+    calls = []
+    barrier = threading.Barrier(5)
+
+    def run(fn, out):
+        barrier.wait()
+        try:
+            out.append(flight.do("k", fn))
+        except Exception as e:
+            out.append(e)
+
+    def slow_ok():
+        calls.append("ok")
+        time.sleep(0.1)
+        return "resultado"
+
+    def slow_fail():
+        calls.append("falha")
+        time.sleep(0.1)
+        raise ConnectionError("rpc caiu")
+
+    for fn, expected in ((slow_ok, "resultado"), (slow_fail, ConnectionError)):
+        out = []
+        threads = [threading.Thread(target=run, args=(fn, out)) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(out) == 5
+        assert all(r == expected if isinstance(expected, str) else isinstance(r, expected) for r in out)
+    assert calls == ["ok", "falha"]
+
+    # Reentrada da mesma chave na thread líder não trava
+    assert flight.do("r", lambda: flight.do("r", lambda: 42)) == 42
+
+
+def test_flight_key_uses_full_embedding():
+    a = np.zeros(2000, dtype=np.float32)
+    b = a.copy()
+    b[1000] = 1.0
+    assert make_flight_key(a, 0.5) != make_flight_key(b, 0.5)
+    assert make_flight_key(a.tolist(), 0.5) == make_flight_key(a, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_llm_manager_coalesces_identical_prompts():
+    calls = []
+
+    async def groq(prompt, config, system_prompt=None):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return LLMResponse(content=f"resposta: {prompt}", provider=LLMProvider.GROQ, model="fake")
+
+    manager = LLMManager(preferred_providers=[LLMProvider.GROQ], provider_callers={LLMProvider.GROQ: groq})
+    prompts = ["Qual a média de Amount?", "qual a  média de amount? ", "Quantas fraudes?"]
+    responses = await asyncio.gather(*(manager.achat(p, LLMConfig()) for p in prompts * 3))
+
+    assert sorted(calls) == sorted(["Qual a média de Amount?", "Quantas fraudes?"])
+    assert all(r.success for r in responses)
+
+    # Configurações diferentes não são coalescidas
+    await asyncio.gather(manager.achat("x", LLMConfig(temperature=0.1)), manager.achat("x", LLMConfig(temperature=0.9)))
+    assert calls.count("x") == 2
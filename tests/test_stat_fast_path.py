@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.dataset_profile import compute_dataset_profile
+from src.data.stat_fast_path import StatFastPath, format_number, parse_stat_request
+from src.utils.logging_config import get_logger
+
+
+def make_df(rows=500, seed=3):
+    rng = np.random.default_rng(seed)
+    v1 = rng.normal(size=rows)
+    return pd.DataFrame({
+        "Time": np.arange(rows),
+        "V1": v1,
+        "V2": -2 * v1 + rng.normal(scale=0.1, size=rows),
+        "Amount": rng.exponential(50, size=rows).round(2),
+        "Class": (rng.random(rows) < 0.05).astype(int),
+        "tipo": rng.choice(["a", "b", "c"], size=rows),
+    })
+
+
+@pytest.fixture
+def df():
+    return make_df()
+
+
+@pytest.fixture
+def profile(df):
+    return compute_dataset_profile(df, source="creditcard", version="v1")
+
+
+def test_single_statistic_is_answered_exactly_without_llm(df, profile):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return profile
+
+    engine = StatFastPath(loader)
+    answer = engine.try_answer("Qual é a média de Amount?")
+
+    assert answer.request.to_dict() == {"statistics": ["mean"], "columns": ["Amount"]}
+    assert answer.values["Amount"]["mean"] == pytest.approx(df["Amount"].mean())
+    assert answer.response.startswith(f"📊 **Média de Amount:** {format_number(df['Amount'].mean())}")
+    assert "500 linhas" in answer.response
+
+    std = engine.try_answer("desvio padrão do V1").values["V1"]["std"]
+    assert std == pytest.approx(df["V1"].std())
+    assert engine.get_metrics()["answered"] == 2 and len(calls) == 2
+
+
+def test_multiple_statistics_and_columns_render_a_table(df, profile):
+    answer = StatFastPath(lambda: profile).try_answer("mediana e máximo de Amount e Time")
+
+    assert answer.request.statistics == ["median", "max"]
+    assert answer.request.columns == ["Time", "Amount"]
+    assert "| Coluna | Mediana | Máximo |" in answer.response
+    assert f"| Amount | {format_number(df['Amount'].median())} | {format_number(df['Amount'].max())} |" in answer.response
+
+
+def test_correlation_between_two_columns(df, profile):
+    answer = StatFastPath(lambda: profile).try_answer("Qual a correlação entre V1 e V2?")
+
+    assert answer.values["V1"]["V2"] == pytest.approx(df["V1"].corr(df["V2"]))
+    assert "correlação forte e negativa" in answer.response
+
+
+@pytest.mark.parametrize("query", [
+    "Qual é a média de Amount?",
+    "me diga o desvio padrão da coluna V1, por favor",
+    "calcule a variância de todas as colunas",
+    "qual o maior valor de Amount",
+    "coeficiente de correlação de V1 com V2",
+])
+def test_plain_phrasings_are_accepted(profile, query):
+    assert parse_stat_request(query, profile).request is not None
+
+
+@pytest.mark.parametrize("query, reason", [
+    ("Explique a média de Amount", "termos fora do pedido"),
+    ("média de Amount por tipo", "colunas não numéricas"),
+    ("média de Amount quando Class = 1", "filtro ou comparação"),
+    ("média de Amount nas 100 transações", "termos fora do pedido"),
+    ("qual a maior média entre V1 e V2", "'entre' sem correlação"),
+    ("média de tipo", "colunas não numéricas"),
+    ("correlação de Amount", "exatamente 2 colunas"),
+    ("quais colunas têm outliers em Amount?", "estatística sem atalho"),
+    ("qual a média?", "nenhuma coluna"),
+    ("quantas linhas tem o dataset?", "estatística sem atalho"),
+    # Qualificadores que restringem o recorte: a média geral seria uma resposta errada
+    ("média de amount em transações fraudulentas", "fraudulentas"),
+    ("qual a media de amount das transacoes legitimas", "legitimas"),
+    ("qual a média de Amount dos clientes ativos", "clientes, ativos"),
+    ("correlação entre V1 e V2 nas fraudes", "fraudes"),
+])
+def test_ambiguous_questions_fall_back(profile, query, reason):
+    parsed = parse_stat_request(query, profile)
+    assert parsed.request is None and reason in parsed.reason
+    assert StatFastPath(lambda: profile).try_answer(query) is None
+
+
+def test_rejects_before_loading_profile_and_survives_missing_profile():
+    def loader():
+        raise RuntimeError("sem dados")
+
+    engine = StatFastPath(loader)
+    assert engine.try_answer("Olá, tudo bem?") is None
+    assert engine.try_answer("média de Amount") is None
+    assert StatFastPath(lambda: None).try_answer("média de Amount") is None
+    assert engine.get_metrics()["fallbacks"] == {"nenhuma estatística pedida": 1, "perfil indisponível": 1}
+
+
+def test_format_number_uses_brazilian_separators():
+    assert format_number(284807) == "284.807"
+    assert format_number(1234.5678) == "1.234,57"
+    assert format_number(88.349619) == "88,3496"
+    assert format_number(-0.0123456) == "-0,012346"
+    assert format_number(None) == "indisponível"
+
+
+def test_orchestrator_skips_fast_path_for_context_files(profile):
+    orchestrator_agent = pytest.importorskip("src.agent.orchestrator_agent")
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return profile
+
+    orchestrator = orchestrator_agent.OrchestratorAgent.__new__(orchestrator_agent.OrchestratorAgent)
+    orchestrator.logger = get_logger("test_stat_fast_path")
+    orchestrator.stat_fast_path = StatFastPath(loader)
+    orchestrator.current_data_context = {}
+    csv_type = orchestrator_agent.QueryType.CSV_ANALYSIS
+
+    assert orchestrator._try_stat_fast_path("média de Amount", csv_type, {"file_path": "vendas.csv"}) is None
+    orchestrator.current_data_context = {"file_path": "vendas.csv"}
+    assert orchestrator._try_stat_fast_path("média de Amount", csv_type) is None
+    assert calls == []